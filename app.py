@@ -1,5 +1,6 @@
-from src.main import BoardApp
+import sys
+
+from src.startup import launch
 
 if __name__ == "__main__":
-    app = BoardApp()
-    app.run()
+    launch(sys.argv[1:])
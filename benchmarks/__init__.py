@@ -0,0 +1,5 @@
+"""Воспроизводимые бенчмарки: генератор синтетических досок и набор замеров."""
+
+from .generator import SIZES, BoardSpec, generate_board
+
+__all__ = ["SIZES", "BoardSpec", "generate_board"]
@@ -0,0 +1,175 @@
+"""
+Генератор синтетических досок для бенчмарков.
+
+Доска определяется ``BoardSpec`` и зерном генератора: одно и то же зерно
+всегда даёт одну и ту же доску, поэтому замеры разных коммитов сравнимы.
+"""
+
+from __future__ import annotations
+
+import base64
+import math
+import random
+from dataclasses import dataclass
+from typing import Dict, List
+
+from src.board_model import (
+    Attachment,
+    BoardData,
+    Card,
+    Connection,
+    Frame,
+    VALID_CONNECTION_STYLES,
+)
+
+CARD_COLORS = ("#fff9b1", "#ffd6a5", "#caffbf", "#9bf6ff", "#a0c4ff", "#ffc6ff", "#ffffff")
+
+_WORDS = (
+    "задача план релиз идея гипотеза метрика клиент команда спринт ревью "
+    "дизайн макет прототип тест сборка запуск отчёт бюджет риск срок "
+    "интеграция сервер клиентский API база данных кэш очередь поиск экспорт "
+    "импорт пользователь роль доступ настройка уведомление"
+).split()
+
+# Доля карточек и диапазон числа слов: короткие заметки, абзацы, длинные тексты
+TEXT_LENGTHS = ((0.6, 1, 4), (0.3, 5, 20), (0.1, 20, 80))
+
+
+@dataclass(frozen=True)
+class BoardSpec:
+    """Параметры синтетической доски."""
+
+    cards: int = 1000
+    connections_per_style: int = 300
+    frames: int = 20
+    attachments: int = 50
+    attachment_sizes: tuple[int, ...] = (2_000, 50_000, 500_000)
+    styles: tuple[str, ...] = tuple(sorted(VALID_CONNECTION_STYLES))
+    label_ratio: float = 0.3
+
+
+SIZES: Dict[str, BoardSpec] = {
+    "small": BoardSpec(cards=200, connections_per_style=60, frames=5, attachments=10),
+    "medium": BoardSpec(),
+    "large": BoardSpec(cards=5000, connections_per_style=1500, frames=80, attachments=200),
+}
+
+
+def generate_board(spec: BoardSpec, seed: int = 0) -> BoardData:
+    """Доска по ``spec``: карточки сеткой со смещениями, рамки, связи и вложения."""
+
+    rng = random.Random(seed)
+    cards = _generate_cards(spec, rng)
+    frames = _generate_frames(spec, cards, rng)
+    connections = _generate_connections(spec, cards, rng)
+    _attach_images(spec, cards, rng)
+    return BoardData(cards=cards, connections=connections, frames=frames)
+
+
+def _generate_cards(spec: BoardSpec, rng: random.Random) -> Dict[int, Card]:
+    columns = max(1, math.ceil(math.sqrt(spec.cards)))
+    cards: Dict[int, Card] = {}
+    for index in range(spec.cards):
+        row, col = divmod(index, columns)
+        card_id = index + 1
+        cards[card_id] = Card(
+            id=card_id,
+            x=col * 360.0 + rng.uniform(-30, 30),
+            y=row * 280.0 + rng.uniform(-30, 30),
+            width=float(rng.randrange(120, 321, 10)),
+            height=float(rng.randrange(80, 221, 10)),
+            text=_random_text(rng),
+            color=rng.choice(CARD_COLORS),
+        )
+    return cards
+
+
+def _random_text(rng: random.Random) -> str:
+    pick = rng.random()
+    for share, low, high in TEXT_LENGTHS:
+        if pick < share:
+            break
+        pick -= share
+    words = [rng.choice(_WORDS) for _ in range(rng.randint(low, high))]
+    # Длинные тексты разбиты на абзацы, как заметки на реальной доске
+    for position in range(12, len(words), 12):
+        words[position] = words[position] + "\n"
+    return " ".join(words).replace("\n ", "\n")
+
+
+def _generate_frames(spec: BoardSpec, cards: Dict[int, Card], rng: random.Random) -> Dict[int, Frame]:
+    if not cards:
+        return {}
+    xs = [card.x for card in cards.values()]
+    ys = [card.y for card in cards.values()]
+    frames: Dict[int, Frame] = {}
+    for index in range(spec.frames):
+        width = rng.uniform(600, 2000)
+        height = rng.uniform(500, 1500)
+        x1 = rng.uniform(min(xs), max(max(xs) - width, min(xs)))
+        y1 = rng.uniform(min(ys), max(max(ys) - height, min(ys)))
+        frame_id = index + 1
+        frames[frame_id] = Frame(
+            id=frame_id,
+            x1=x1,
+            y1=y1,
+            x2=x1 + width,
+            y2=y1 + height,
+            title=f"Группа {frame_id}",
+            collapsed=rng.random() < 0.1,
+        )
+    return frames
+
+
+def _generate_connections(spec: BoardSpec, cards: Dict[int, Card], rng: random.Random) -> List[Connection]:
+    ids = list(cards)
+    if len(ids) < 2:
+        return []
+    columns = max(1, math.ceil(math.sqrt(len(ids))))
+    connections: List[Connection] = []
+    for style in spec.styles:
+        for _ in range(spec.connections_per_style):
+            from_index = rng.randrange(len(ids))
+            # В основном соседние карточки, изредка — через всю доску
+            if rng.random() < 0.9:
+                offset = rng.choice((1, -1, columns, -columns, columns + 1))
+                to_index = min(max(from_index + offset, 0), len(ids) - 1)
+            else:
+                to_index = rng.randrange(len(ids))
+            if to_index == from_index:
+                to_index = (from_index + 1) % len(ids)
+            connection = Connection(
+                from_id=ids[from_index],
+                to_id=ids[to_index],
+                label=rng.choice(_WORDS) if rng.random() < spec.label_ratio else "",
+                direction=rng.choice(("start", "end", "end")),
+                style=style,
+            )
+            if style == "rounded":
+                connection.radius = rng.choice((0.0, 20.0, 40.0))
+                connection.curvature = rng.uniform(-60, 60)
+            connections.append(connection)
+    return connections
+
+
+def _attach_images(spec: BoardSpec, cards: Dict[int, Card], rng: random.Random) -> None:
+    if not cards or not spec.attachments:
+        return
+    ids = list(cards)
+    for index in range(spec.attachments):
+        card = cards[rng.choice(ids)]
+        size = rng.choice(spec.attachment_sizes)
+        # Содержимое не декодируется: важны только объём данных и метаданные
+        payload = rng.randbytes(size)
+        card.attachments.append(
+            Attachment(
+                id=index + 1,
+                name=f"image_{index + 1}.png",
+                source_type="file",
+                mime_type="image/png",
+                width=rng.randrange(64, 1025),
+                height=rng.randrange(64, 1025),
+                preview_scale=rng.choice((0.25, 0.5, 1.0)),
+                data_base64=base64.b64encode(payload).decode("ascii"),
+            )
+        )
@@ -0,0 +1,133 @@
+"""
+Воспроизведение записанного ввода как бенчмарк.
+
+Примеры::
+
+    python -m benchmarks.replay session.json
+    python -m benchmarks.replay session.json --speed recorded --repeat 3
+
+Сеанс записывается в приложении (``Ctrl+Shift+R``) и содержит доску на
+момент начала записи и все события мыши и горячие клавиши. Сеанс
+воспроизводится в настоящем ``BoardApp`` со скрытым окном (нужен дисплей),
+результаты пишутся в том же JSON-формате, что у ``benchmarks.run``: замер
+``replay.<обработчик>`` — суммарное время обработчика за прогон, так что
+``--compare`` сравнивает их между коммитами.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+from src.input_recorder import REPLAY_SPEEDS, InputReplayer, ReplayReport, load_recording
+
+from .run import RESULTS_VERSION, _default_output, _meta, compare_results
+
+
+def replay_session(session: Dict[str, Any], *, speed: str = "max", repeat: int = 1) -> List[ReplayReport]:
+    """
+    Воспроизводит сеанс ``repeat`` раз в новом ``BoardApp``. Приложение
+    запускается во временной папке, чтобы не подхватить и не перезаписать
+    автосохранение пользователя.
+    """
+
+    from src.main import BoardApp
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            app = BoardApp()
+            app.root.withdraw()
+            try:
+                replayer = InputReplayer(app)
+                return [replayer.replay(session, speed=speed) for _ in range(repeat)]
+            finally:
+                app.perf_monitor.shutdown()
+                app.attachment_store.shutdown()
+                app.root.destroy()
+        finally:
+            os.chdir(cwd)
+
+
+def results_payload(session: Dict[str, Any], reports: List[ReplayReport], source: str) -> Dict[str, Any]:
+    """Результаты в формате ``benchmarks.run``; время — в секундах."""
+
+    totals: Dict[str, List[float]] = {}
+    for report in reports:
+        for name, row in report.by_handler().items():
+            totals.setdefault(f"replay.{name}", []).append(row["total_ms"] / 1000)
+        totals.setdefault("replay.wall", []).append(report.wall_ms / 1000)
+    results = [
+        {
+            "name": name,
+            "times": times,
+            "min": min(times),
+            "median": statistics.median(times),
+            "mean": statistics.fmean(times),
+        }
+        for name, times in totals.items()
+    ]
+    return {
+        "version": RESULTS_VERSION,
+        "meta": _meta(),
+        "recording": source,
+        "speed": reports[0].speed if reports else "max",
+        "repeat": len(reports),
+        "events": len(session["events"]),
+        "results": results,
+        "handlers": reports[-1].by_handler() if reports else {},
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.replay",
+        description="Воспроизведение записанного ввода Mini Miro с замером обработчиков.",
+    )
+    parser.add_argument("recording", help="файл записи (Ctrl+Shift+R в приложении)")
+    parser.add_argument("--speed", choices=REPLAY_SPEEDS, default="max", help="темп воспроизведения")
+    parser.add_argument("--repeat", type=int, default=1, help="число прогонов")
+    parser.add_argument("-o", "--output", help="файл результатов JSON")
+    parser.add_argument("--compare", metavar="BASE.json", help="сравнить с результатами другого прогона")
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error("--repeat должен быть положительным")
+    try:
+        session = load_recording(args.recording)
+    except (OSError, ValueError) as exc:
+        print(f"Не удалось прочитать запись: {exc}", file=sys.stderr)
+        return 1
+
+    reports = replay_session(session, speed=args.speed, repeat=args.repeat)
+    print(reports[-1].format())
+
+    payload = results_payload(session, reports, args.recording)
+    output = Path(args.output) if args.output else _default_output(payload)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"Результаты: {output}", file=sys.stderr)
+
+    if args.compare:
+        base = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        for row in compare_results(base, payload):
+            print(
+                f"{row['name']:<28} {row['base'] * 1000:10.2f} -> {row['current'] * 1000:10.2f} мс"
+                f"  x{row['ratio']:.2f}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
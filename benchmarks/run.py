@@ -0,0 +1,624 @@
+"""
+Набор воспроизводимых бенчмарков доски.
+
+Примеры::
+
+    python -m benchmarks.run --size medium --seed 1
+    python -m benchmarks.run --size large --only render --repeat 3
+    python -m benchmarks.run --compare benchmarks/results/base.json
+
+Доска строится генератором (``benchmarks.generator``) по зерну, замеры
+пишутся в JSON (по умолчанию в ``benchmarks/results/``) вместе с коммитом
+и параметрами доски. ``--compare`` печатает отношение медиан к другому
+прогону: так сравниваются результаты разных коммитов.
+
+Код приложения выполняется без окна: отрисовка идёт в ``RecordingBackend``,
+а методы ``BoardApp`` вызываются на безоконной подмене приложения.
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, fields, replace
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterable, List, Sequence
+
+from src import bulk_ops, geometry_batch
+from src.board_index import ConnectionIndex
+from src.board_model import BoardData, BoardEvents
+from src.canvas_view import CanvasView
+from src.export import board_router
+from src.card_store import CardStore
+from src.config import THEMES
+from src.drag_controller import DragController
+from src.elbow_router import ElbowRouter
+from src.history import History
+from src.render_backend import NullBackend, RecordingBackend
+from src.spatial_index import CardIndex
+
+from .generator import SIZES, BoardSpec, generate_board
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+RESULTS_VERSION = 1
+THEME = THEMES["light"]
+GRID_SIZE = 50
+DRAG_CARDS = 20
+DRAG_STEPS = 10
+
+
+class HeadlessCanvas(RecordingBackend):
+    """``RecordingBackend`` с методами ``tk.Canvas``, которые нужны обработчикам мыши и масштаба."""
+
+    def canvasx(self, x: float) -> float:
+        return float(x)
+
+    canvasy = canvasx
+
+    def scale(self, item: Any, cx: float, cy: float, sx: float, sy: float) -> None:
+        for item_id in self.find_withtag(item):
+            record = self.items[item_id]
+            record.coords = [
+                cx + (v - cx) * sx if index % 2 == 0 else cy + (v - cy) * sy
+                for index, v in enumerate(record.coords)
+            ]
+
+    def move(self, item: Any, dx: float, dy: float) -> None:
+        for item_id in self.find_withtag(item):
+            record = self.items[item_id]
+            record.coords = [v + (dy if index % 2 else dx) for index, v in enumerate(record.coords)]
+
+    def config(self, **options: Any) -> None:
+        self.configure(**options)
+
+
+class _NoCollapse:
+    """Свёрнутых рамок в замерах нет."""
+
+    hidden_cards: frozenset = frozenset()
+
+    @staticmethod
+    def is_hidden(_card_id: int) -> bool:
+        return False
+
+
+def _board_app_method(name: str) -> Callable[..., Any]:
+    """Метод ``BoardApp`` для ``HeadlessApp``; ``src.main`` (и tkinter) импортируется при вызове."""
+
+    def method(self, *args, **kwargs):
+        from src.main import BoardApp
+
+        return getattr(BoardApp, name)(self, *args, **kwargs)
+
+    method.__name__ = name
+    return method
+
+
+class HeadlessApp:
+    """
+    Подмена ``BoardApp`` без окна: те же поля, события и индексы, холст —
+    ``HeadlessCanvas``. Перетаскивание идёт через ``DragController``, масштаб —
+    через ``BoardApp.apply_zoom``: замеряется код приложения, а не его копия.
+    """
+
+    get_board_data = _board_app_method("get_board_data")
+    _prepare_attachment_for_save = _board_app_method("_prepare_attachment_for_save")
+    apply_zoom = _board_app_method("apply_zoom")
+    update_cards_geometry = _board_app_method("update_cards_geometry")
+    update_card_layout = _board_app_method("update_card_layout")
+    update_card_handles_positions = _board_app_method("update_card_handles_positions")
+    update_frame_handles_positions = _board_app_method("update_frame_handles_positions")
+    _card_handle_positions = _board_app_method("_card_handle_positions")
+
+    def __init__(self, board: BoardData) -> None:
+        self.canvas = HeadlessCanvas()
+        self.canvas_view = CanvasView(self.canvas, RecordingBackend(200, 150), THEME)
+        self.items = self.canvas_view.items
+        self.collapse_controller = _NoCollapse()
+        self.selected_connection = None
+        self.zoom_factor = 1.0
+        self.min_zoom = 0.3
+        self.max_zoom = 2.5
+        self.drag_controller = DragController(self)
+        self.load(board)
+
+    def load(self, board: BoardData) -> None:
+        self.board_events = BoardEvents()
+        self.cards = CardStore(board.cards, events=self.board_events)
+        self.connections = board.connections
+        self.frames = board.frames
+        self.card_index = CardIndex(lambda: self.cards, self.board_events)
+        self.connection_index = ConnectionIndex(lambda: self.connections, self.board_events)
+        self.elbow_router = ElbowRouter(
+            lambda: self.cards, lambda: self.frames, self.card_index, self.board_events
+        )
+        self.canvas_view.elbow_router = self.elbow_router
+        self.canvas_view.render_board(self.cards, self.frames, self.connections, GRID_SIZE, True)
+
+    def set_board_from_data(self, data: Dict[str, Any]) -> None:
+        self.load(BoardData.from_primitive(data))
+
+    # Картинки вложений рисуются через Tk PhotoImage — без окна их нет
+    def render_card_attachments(self, card_id: int) -> None:
+        pass
+
+    def update_attachment_positions(self, card_id: int, scale=None) -> None:
+        pass
+
+    def drag_cards(self, card_ids: Iterable[int], path: Iterable[tuple[float, float]]) -> None:
+        """Перетаскивает карточки по точкам ``path`` событиями мыши, начиная с ``(0, 0)``."""
+
+        self.drag_data = {
+            "dragging": True,
+            "mode": "cards",
+            "dragged_cards": set(card_ids),
+            "last_x": 0.0,
+            "last_y": 0.0,
+            "moved": False,
+        }
+        for x, y in path:
+            self.drag_controller.on_mouse_drag(SimpleNamespace(x=x, y=y))
+        self.drag_data["dragging"] = False
+        self.elbow_router.suspended = False
+
+    def zoom(self, scale: float, x: float, y: float) -> None:
+        """Шаг колеса мыши в точке окна ``(x, y)``."""
+
+        self.apply_zoom(scale, SimpleNamespace(x=x, y=y))
+
+    def update_minimap(self) -> None:
+        self.canvas_view.render_minimap(self.cards, self.frames.values())
+
+
+@dataclass
+class Benchmark:
+    """Замер: ``setup`` готовит состояние и возвращает функцию одного прогона."""
+
+    name: str
+    setup: Callable[[BoardData, Dict[str, Any]], Callable[[], Any]]
+    requires_pillow: bool = False
+
+
+def _copy(board: BoardData) -> BoardData:
+    return BoardData.from_primitive(board.to_primitive())
+
+
+def _from_primitive(board, _options):
+    data = board.to_primitive()
+    return lambda: BoardData.from_primitive(data)
+
+
+def _to_primitive(board, _options):
+    return board.to_primitive
+
+
+def _get_board_data(board, _options):
+    return HeadlessApp(_copy(board)).get_board_data
+
+
+def _history_push(board, _options):
+    history = History()
+    state = board.to_primitive()
+    history.clear_and_init(state)
+    return lambda: history.push(state)
+
+
+def _history_undo(board, _options):
+    app = HeadlessApp(_copy(board))
+    state = board.to_primitive()
+    history = History()
+    history.clear_and_init(state)
+
+    def run():
+        history.push(state)
+        history.undo(app)
+
+    return run
+
+
+def _render(backend_factory):
+    def setup(board, _options):
+        copied = _copy(board)
+        view = CanvasView(backend_factory(), backend_factory(200, 150), THEME)
+        view.elbow_router = board_router(copied)
+        return lambda: view.render_board(copied.cards, copied.frames, copied.connections, GRID_SIZE, True)
+
+    return setup
+
+
+def _drag(board, _options):
+    app = HeadlessApp(_copy(board))
+    # Карточки с наибольшим числом связей: худший случай для перестроения линий
+    degree: Dict[int, int] = {}
+    for conn in app.connections:
+        degree[conn.from_id] = degree.get(conn.from_id, 0) + 1
+        degree[conn.to_id] = degree.get(conn.to_id, 0) + 1
+    selection = sorted(app.cards, key=lambda cid: -degree.get(cid, 0))[:DRAG_CARDS]
+
+    # Мышь качается на 5 px туда и обратно: после прогона доска та же
+    path = [(5.0, 5.0) if step % 2 == 0 else (0.0, 0.0) for step in range(DRAG_STEPS)]
+
+    def run():
+        app.drag_cards(selection, path)
+        app.update_minimap()
+
+    return run
+
+
+def _zoom(board, _options):
+    app = HeadlessApp(_copy(board))
+
+    def run():
+        app.zoom(1.1, 0.0, 0.0)
+        app.zoom(1 / 1.1, 0.0, 0.0)
+
+    return run
+
+
+def _minimap(board, _options):
+    return HeadlessApp(_copy(board)).update_minimap
+
+
+def _cards_translate(board, _options):
+    cards = CardStore(_copy(board).cards)
+    selection = list(cards)
+
+    def run():
+        cards.translate(selection, 5.0, 5.0)
+        cards.translate(selection, -5.0, -5.0)
+
+    return run
+
+
+def _cards_queries(board, _options):
+    """Общие границы и выделение рамкой четверти доски, как при экспорте и лассо."""
+
+    cards = CardStore(_copy(board).cards)
+
+    def run():
+        x1, y1, x2, y2 = cards.bounds()
+        cards.ids_with_center_in(x1, y1, (x1 + x2) / 2, (y1 + y2) / 2)
+
+    return run
+
+
+def _cards_bulk(board, _options):
+    """Выравнивание, распределение и размер всех карточек через ``bulk_ops``."""
+
+    cards = CardStore(_copy(board).cards)
+    selection = list(cards)
+    # Чередование параметров: каждый прогон действительно меняет карточки
+    steps = itertools.cycle([("left", "y", 160.0), ("right", "x", 120.0)])
+
+    def run():
+        edge, axis, width = next(steps)
+        bulk_ops.align(cards, selection, edge)
+        bulk_ops.distribute(cards, selection, axis)
+        bulk_ops.set_size(cards, selection, width=width)
+
+    return run
+
+
+def _connections_geometry(board, _options):
+    """Геометрия всех связей доски одним пакетом, как при первой отрисовке."""
+
+    copy = _copy(board)
+    jobs = [
+        (conn, copy.cards[conn.from_id], copy.cards[conn.to_id])
+        for conn in copy.connections
+        if conn.from_id in copy.cards and conn.to_id in copy.cards
+    ]
+
+    def run():
+        geometry_batch.connection_geometries(jobs)
+
+    return run
+
+
+def _export_png(scale: float):
+    def setup(board, options):
+        from src.export import write_png
+
+        path = Path(options["workdir"]) / f"board_{scale}.png"
+        return lambda: write_png(board, path, theme=THEME, scale=scale, jobs=options["jobs"])
+
+    return setup
+
+
+def _export_canvas_png(scale: float):
+    def setup(board, options):
+        from src.export import write_canvas_png
+
+        path = Path(options["workdir"]) / f"canvas_{scale}.png"
+        return lambda: write_canvas_png(board, path, theme=THEME, scale=scale)
+
+    return setup
+
+
+def _export_svg(board, options):
+    from src.export import write_svg
+
+    path = Path(options["workdir"]) / "board.svg"
+    return lambda: write_svg(board, path, theme=THEME)
+
+
+def build_benchmarks(export_scales: Iterable[float]) -> List[Benchmark]:
+    benchmarks = [
+        Benchmark("model.from_primitive", _from_primitive),
+        Benchmark("model.to_primitive", _to_primitive),
+        Benchmark("app.get_board_data", _get_board_data),
+        Benchmark("history.push", _history_push),
+        Benchmark("history.push_undo", _history_undo),
+        Benchmark("render.board.null", _render(NullBackend)),
+        Benchmark("render.board.recording", _render(RecordingBackend)),
+        Benchmark("interaction.drag", _drag),
+        Benchmark("interaction.zoom", _zoom),
+        Benchmark("interaction.minimap", _minimap),
+        Benchmark("cards.translate", _cards_translate),
+        Benchmark("cards.queries", _cards_queries),
+        Benchmark("cards.bulk", _cards_bulk),
+        Benchmark("connections.geometry", _connections_geometry),
+        Benchmark("export.svg", _export_svg),
+    ]
+    for scale in export_scales:
+        benchmarks.append(Benchmark(f"export.png@{scale:g}", _export_png(scale), requires_pillow=True))
+        benchmarks.append(
+            Benchmark(f"export.canvas_png@{scale:g}", _export_canvas_png(scale), requires_pillow=True)
+        )
+    return benchmarks
+
+
+def _has_pillow() -> bool:
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def run_benchmark(benchmark: Benchmark, board: BoardData, options: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    """Прогоняет замер ``repeat`` раз после одного прогрева; время — в секундах."""
+
+    run = benchmark.setup(board, options)
+    run()
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - started)
+    return {
+        "name": benchmark.name,
+        "times": times,
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+    }
+
+
+def _object_size(obj: Any) -> int:
+    size = sys.getsizeof(obj)
+    if hasattr(obj, "__dict__"):
+        size += sys.getsizeof(obj.__dict__)
+    for field in fields(obj):
+        value = getattr(obj, field.name, None)
+        if isinstance(value, (dict, list)):
+            size += sys.getsizeof(value)
+    return size
+
+
+def model_memory(board: BoardData) -> Dict[str, float]:
+    """
+    Средний размер объекта модели в байтах: сам объект, его ``__dict__``
+    (если есть) и собственные списки/словари, без общих строк и вложений.
+    """
+
+    groups = {
+        "card": list(board.cards.values()),
+        "connection": list(board.connections),
+        "frame": list(board.frames.values()),
+    }
+    return {
+        name: round(statistics.fmean(_object_size(obj) for obj in objects), 1) if objects else 0.0
+        for name, objects in groups.items()
+    }
+
+
+def run_suite(
+    spec: BoardSpec,
+    *,
+    seed: int = 0,
+    repeat: int = 5,
+    only: Sequence[str] = (),
+    export_scales: Iterable[float] = (0.1, 0.25, 0.5),
+    jobs: int = 1,
+    progress: Callable[[Dict[str, Any]], None] | None = None,
+) -> Dict[str, Any]:
+    """Генерирует доску и выполняет замеры; ``only`` — префиксы имён замеров."""
+
+    board = generate_board(spec, seed)
+    pillow = _has_pillow()
+    results: List[Dict[str, Any]] = []
+    skipped: List[str] = []
+    with tempfile.TemporaryDirectory() as workdir:
+        options = {"workdir": workdir, "jobs": jobs}
+        for benchmark in build_benchmarks(export_scales):
+            if only and not any(benchmark.name.startswith(prefix) for prefix in only):
+                continue
+            if benchmark.requires_pillow and not pillow:
+                skipped.append(benchmark.name)
+                continue
+            result = run_benchmark(benchmark, board, options, repeat)
+            results.append(result)
+            if progress is not None:
+                progress(result)
+    return {
+        "version": RESULTS_VERSION,
+        "meta": _meta(),
+        "seed": seed,
+        "repeat": repeat,
+        "spec": asdict(spec),
+        "board": {
+            "cards": len(board.cards),
+            "connections": len(board.connections),
+            "frames": len(board.frames),
+            "attachments": sum(len(card.attachments) for card in board.cards.values()),
+        },
+        "memory": model_memory(board),
+        "results": results,
+        "skipped": skipped,
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return completed.stdout.strip() or None
+
+
+def _meta() -> Dict[str, Any]:
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+
+
+def compare_results(base: Dict[str, Any], current: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Отношение медиан ``current / base`` для замеров, которые есть в обоих прогонах."""
+
+    base_by_name = {result["name"]: result for result in base.get("results", [])}
+    rows = []
+    for result in current.get("results", []):
+        previous = base_by_name.get(result["name"])
+        if previous is None or not previous["median"]:
+            continue
+        rows.append(
+            {
+                "name": result["name"],
+                "base": previous["median"],
+                "current": result["median"],
+                "ratio": result["median"] / previous["median"],
+            }
+        )
+    return rows
+
+
+def _default_output(payload: Dict[str, Any]) -> Path:
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    commit = payload["meta"]["commit"] or "nogit"
+    return RESULTS_DIR / f"{stamp}-{commit}.json"
+
+
+def _parse_scales(value: str) -> List[float]:
+    try:
+        scales = [float(part) for part in value.split(",") if part]
+    except ValueError:
+        raise argparse.ArgumentTypeError("ожидается список чисел через запятую") from None
+    if any(scale <= 0 for scale in scales):
+        raise argparse.ArgumentTypeError("масштаб должен быть положительным")
+    return scales
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.run",
+        description="Бенчмарки доски Mini Miro на синтетических данных.",
+    )
+    parser.add_argument("--size", choices=sorted(SIZES), default="medium", help="пресет размера доски")
+    parser.add_argument("--cards", type=int, help="число карточек (поверх пресета)")
+    parser.add_argument("--connections", type=int, help="число связей каждого стиля")
+    parser.add_argument("--frames", type=int, help="число рамок")
+    parser.add_argument("--attachments", type=int, help="число вложений")
+    parser.add_argument("--seed", type=int, default=0, help="зерно генератора доски")
+    parser.add_argument("--repeat", type=int, default=5, help="число прогонов каждого замера")
+    parser.add_argument(
+        "--only",
+        action="append",
+        default=[],
+        metavar="PREFIX",
+        help="выполнить только замеры с этим префиксом имени (можно повторять)",
+    )
+    parser.add_argument(
+        "--export-scales",
+        type=_parse_scales,
+        default=[0.1, 0.25, 0.5],
+        metavar="S1,S2,...",
+        help="масштабы экспорта PNG",
+    )
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="процессы для тайлов PNG")
+    parser.add_argument("-o", "--output", help="файл результатов JSON")
+    parser.add_argument("--compare", metavar="BASE.json", help="сравнить с результатами другого прогона")
+    parser.add_argument("-q", "--quiet", action="store_true", help="не печатать ход работы")
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error("--repeat должен быть положительным")
+    if args.jobs < 1:
+        parser.error("--jobs должен быть положительным")
+
+    overrides = {
+        "cards": args.cards,
+        "connections_per_style": args.connections,
+        "frames": args.frames,
+        "attachments": args.attachments,
+    }
+    spec = replace(SIZES[args.size], **{key: value for key, value in overrides.items() if value is not None})
+
+    def progress(result: Dict[str, Any]) -> None:
+        print(
+            f"{result['name']:<28} медиана {result['median'] * 1000:10.2f} мс"
+            f"  мин {result['min'] * 1000:10.2f} мс",
+            file=sys.stderr,
+        )
+
+    payload = run_suite(
+        spec,
+        seed=args.seed,
+        repeat=args.repeat,
+        only=args.only,
+        export_scales=args.export_scales,
+        jobs=args.jobs,
+        progress=None if args.quiet else progress,
+    )
+    if not args.quiet:
+        memory = ", ".join(f"{name} {size:.0f} Б" for name, size in payload["memory"].items())
+        print(f"Память на объект модели: {memory}", file=sys.stderr)
+    output = Path(args.output) if args.output else _default_output(payload)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"Результаты: {output}", file=sys.stderr)
+
+    if args.compare:
+        base = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        for row in compare_results(base, payload):
+            print(
+                f"{row['name']:<28} {row['base'] * 1000:10.2f} -> {row['current'] * 1000:10.2f} мс"
+                f"  x{row['ratio']:.2f}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+"""Ленивые вложения: чтение данных по требованию и фоновая запись файлов."""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from .board_model import Attachment
+from .board_io import (
+    CONTAINER_EXTENSION,
+    BoardContainer,
+    BoardFileError,
+    write_board_container,
+    write_board_file,
+)
+
+
+def extension_from_mime(mime_type: str) -> str:
+    if mime_type.endswith("/jpeg") or mime_type.endswith("/jpg"):
+        return ".jpg"
+    if mime_type.endswith("/png"):
+        return ".png"
+    if mime_type.endswith("/gif"):
+        return ".gif"
+    return ".bin"
+
+
+class AttachmentStore:
+    """
+    Источник данных вложений открытой доски.
+
+    Вложение остаётся ссылкой на свои данные — файл в ``attachments/``,
+    встроенный base64 или файл zip-контейнера — пока его не нужно показать,
+    экспортировать или сохранить. Запись файла в ``attachments/`` выполняется
+    пулом потоков; результаты применяются к модели в ``drain()``, который
+    вызывается из потока Tk.
+    """
+
+    def __init__(
+        self,
+        attachments_dir: Path,
+        *,
+        max_bytes: int,
+        max_workers: int = 2,
+    ) -> None:
+        self.attachments_dir = Path(attachments_dir)
+        self.max_bytes = max_bytes
+        self.max_workers = max_workers
+        self.container: BoardContainer | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._jobs: Dict[Tuple[int, int], Tuple[Attachment, Future]] = {}
+
+    # --- Чтение ---
+
+    def resolve_path(self, storage_path: str | None) -> Path | None:
+        if not storage_path:
+            return None
+        path = Path(storage_path)
+        if not path.is_absolute():
+            path = Path.cwd() / path
+        return path
+
+    def has_file(self, attachment: Attachment) -> bool:
+        """Записано ли вложение файлом на диске."""
+
+        path = self.resolve_path(attachment.storage_path)
+        return bool(path and path.exists())
+
+    def has_data(self, attachment: Attachment) -> bool:
+        """Есть ли у вложения откуда взять данные (без их чтения)."""
+
+        if self.has_file(attachment):
+            return True
+        if attachment.data_base64:
+            return True
+        return bool(
+            attachment.archive_member
+            and self.container is not None
+            and attachment.archive_member in self.container.members
+        )
+
+    def read_bytes(self, attachment: Attachment) -> bytes | None:
+        """Данные вложения: файл на диске, затем base64, затем контейнер."""
+
+        path = self.resolve_path(attachment.storage_path)
+        if path and path.exists():
+            try:
+                return path.read_bytes()
+            except OSError:
+                return None
+        if attachment.data_base64:
+            try:
+                return base64.b64decode(attachment.data_base64)
+            except (binascii.Error, ValueError):
+                return None
+        if attachment.archive_member and self.container is not None:
+            try:
+                return self.container.read_attachment(attachment.archive_member)
+            except (OSError, BoardFileError):
+                return None
+        return None
+
+    def read_record(self, record: Dict[str, Any]) -> bytes | None:
+        """``read_bytes`` для вложения из снимка доски (словаря)."""
+
+        return self.read_bytes(Attachment.from_primitive(record))
+
+    # --- Сохранение ---
+
+    def write_board(self, path: str | os.PathLike, board_data: Dict[str, Any]) -> None:
+        """Сохраняет снимок доски в формате по расширению файла."""
+
+        if Path(path).suffix.lower() == CONTAINER_EXTENSION:
+            self.write_container(path, board_data)
+        else:
+            write_board_file(path, board_data, attachment_reader=self.read_record)
+
+    def write_container(
+        self, path: str | os.PathLike, board_data: Dict[str, Any], *, compress: bool = True
+    ) -> None:
+        """
+        Сохраняет снимок доски в контейнер ``.mboard``, читая вложения отсюда.
+
+        Если это файл открытого контейнера, он закрывается перед заменой (иначе
+        Windows не даст заменить файл, а POSIX оставит чтение из удалённого)
+        и открывается заново уже новым файлом.
+        """
+
+        target = Path(path)
+        container = self.container
+        same_file = container is not None and _same_file(container.path, target)
+        if same_file:
+            # Фоновые записи читают тот же архив; результаты применит drain()
+            self._join()
+        closed = False
+
+        def close_container() -> None:
+            nonlocal closed
+            container.close()
+            closed = True
+
+        try:
+            write_board_container(
+                target,
+                board_data,
+                compress=compress,
+                attachment_reader=self.read_record,
+                before_replace=close_container if same_file else None,
+            )
+        finally:
+            if closed:
+                self.container = BoardContainer(target)
+
+    # --- Материализация ---
+
+    @property
+    def pending(self) -> bool:
+        return bool(self._jobs)
+
+    def materialize_async(self, card_id: int, attachment: Attachment) -> bool:
+        """
+        Ставит в очередь запись файла вложения в ``attachments/``.
+
+        Возвращает ``False``, если данных для вложения нет совсем. Если файл уже
+        существует, только нормализует ``storage_path``.
+        """
+
+        path = self.resolve_path(attachment.storage_path)
+        if path and path.exists():
+            attachment.storage_path = self._relative(path)
+            return True
+        if not self.has_data(attachment):
+            return False
+
+        key = (card_id, attachment.id)
+        if key in self._jobs:
+            return True
+        extension = Path(attachment.name).suffix or extension_from_mime(attachment.mime_type)
+        target_path = self.attachments_dir / f"{card_id}-{attachment.id}{extension}"
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="attachments"
+            )
+        future = self._executor.submit(self._write, attachment, target_path)
+        self._jobs[key] = (attachment, future)
+        return True
+
+    def drain(self) -> List[str]:
+        """
+        Применяет завершённые записи к вложениям. Вызывается из потока Tk.
+        Возвращает имена вложений, которые записать не удалось.
+        """
+
+        failures: List[str] = []
+        for key, (attachment, future) in list(self._jobs.items()):
+            if not future.done():
+                continue
+            del self._jobs[key]
+            try:
+                target_path = future.result()
+            except (OSError, ValueError):
+                target_path = None
+            if target_path is None:
+                failures.append(attachment.name)
+            else:
+                attachment.storage_path = self._relative(target_path)
+        return failures
+
+    def wait(self) -> List[str]:
+        """Дожидается всех записей и применяет их (экспорт, сохранение, тесты)."""
+
+        self._join()
+        return self.drain()
+
+    def _join(self) -> None:
+        for _attachment, future in list(self._jobs.values()):
+            try:
+                future.result()
+            except (OSError, ValueError):
+                pass
+
+    def reset(self) -> None:
+        """Забывает записи предыдущей доски; уже начатые просто доработают."""
+
+        for _attachment, future in self._jobs.values():
+            future.cancel()
+        self._jobs.clear()
+
+    def set_container(self, container: BoardContainer | None) -> BoardContainer | None:
+        """Подключает контейнер новой доски и возвращает предыдущий."""
+
+        previous = self.container
+        self.container = container
+        return previous
+
+    def shutdown(self) -> None:
+        self.reset()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self.container is not None:
+            self.container.close()
+            self.container = None
+
+    # --- Работа в пуле ---
+
+    def _write(self, attachment: Attachment, target_path: Path) -> Path | None:
+        payload = self.read_bytes(attachment)
+        if payload is None or len(payload) > self.max_bytes:
+            return None
+        self.attachments_dir.mkdir(exist_ok=True)
+        tmp_path = target_path.with_name(f"{target_path.name}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(payload)
+        os.replace(tmp_path, target_path)
+        return target_path
+
+    @staticmethod
+    def _relative(path: Path) -> str:
+        try:
+            return str(path.relative_to(Path.cwd()))
+        except ValueError:
+            return str(path)
+
+
+def _same_file(a: Path, b: Path) -> bool:
+    try:
+        return os.path.samefile(a, b)
+    except OSError:
+        return False
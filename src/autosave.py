@@ -4,12 +4,22 @@ from __future__ import annotations
 
 import json
 import os
+import time
 from typing import Any, Dict
 
+from .board_stream import StreamingBoardReader
+from .tracing import count, span
+
+# Задержка записи после последней правки: серия правок пишется одним файлом
+AUTOSAVE_DELAY_MS = 500
+
 
 class AutoSaveService:
     def __init__(self, filename: str = "_mini_miro_autosave.json") -> None:
         self.filename = filename
+        # Длительность последней записи и момент её окончания (time.monotonic)
+        self.last_save_ms: float | None = None
+        self.last_saved_at: float | None = None
 
     def exists(self) -> bool:
         return os.path.exists(self.filename)
@@ -18,9 +28,18 @@ class AutoSaveService:
         with open(self.filename, "r", encoding="utf-8") as f:
             return json.load(f)
 
+    def open_stream(self) -> StreamingBoardReader:
+        """Открывает автосохранение для потокового чтения."""
+
+        return StreamingBoardReader(self.filename)
+
     def save(self, data: Dict[str, Any]) -> None:
-        with open(self.filename, "w", encoding="utf-8") as f:
+        started = time.perf_counter()
+        with span("autosave.save"), open(self.filename, "w", encoding="utf-8") as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
+            count("autosave.bytes", f.tell())
+        self.last_save_ms = (time.perf_counter() - started) * 1000
+        self.last_saved_at = time.monotonic()
 
     def clear(self) -> None:
         if self.exists():
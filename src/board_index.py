@@ -0,0 +1,304 @@
+"""
+Производные индексы доски, поддерживаемые по событиям ``BoardEvents`` (без Tk).
+
+``FrameIndex`` знает, какие карточки и вложенные рамки лежат в каждой
+рамке, а ``ConnectionIndex`` — какие связи выходят из каждой карточки.
+Перемещение рамки, её сворачивание и пересчёт связей у сдвинутых карточек
+по ним стоят пропорционально числу затронутых объектов, а не размеру доски.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Dict, Iterable, List, Mapping, Set, Tuple
+
+from .board_model import (
+    BOARD_REPLACED,
+    CARD_ADDED,
+    CARD_MOVED,
+    CARD_REMOVED,
+    CARD_RESIZED,
+    CONNECTION_ADDED,
+    CONNECTION_REMOVED,
+    CONNECTION_RETARGETED,
+    FRAME_ADDED,
+    FRAME_MOVED,
+    FRAME_REMOVED,
+    FRAME_RESIZED,
+    BoardChange,
+    BoardEvents,
+    Card,
+    Connection,
+    Frame,
+)
+from .spatial_index import DEFAULT_CELL_SIZE, Box, CardIndex, GridIndex
+
+_CARD_PLACEMENT = (CARD_ADDED, CARD_REMOVED, CARD_MOVED, CARD_RESIZED)
+_FRAME_PLACEMENT = (FRAME_ADDED, FRAME_REMOVED, FRAME_MOVED, FRAME_RESIZED)
+
+
+def frame_box(frame: Frame) -> Box:
+    return (
+        min(frame.x1, frame.x2),
+        min(frame.y1, frame.y2),
+        max(frame.x1, frame.x2),
+        max(frame.y1, frame.y2),
+    )
+
+
+class FrameIndex:
+    """
+    Принадлежность карточек рамкам. Карточка входит в рамку, если её центр
+    лежит в прямоугольнике рамки (границы включены), поэтому карточки
+    вложенной рамки входят и во внешнюю. Рамка вложена в другую, если целиком
+    лежит внутри неё.
+
+    Сдвинутая карточка перепроверяется только против рамок под своим центром,
+    сдвинутая рамка — только против карточек под собой (через ``CardIndex``).
+    Пересчёт ленивый: изменения копятся до ближайшего запроса.
+
+    ``revision`` рамки меняется вместе с её составом, поэтому производные
+    от состава (скрытые карточки свёрнутых рамок) можно кэшировать по ней.
+    """
+
+    def __init__(
+        self,
+        cards: Callable[[], Mapping[int, Card]],
+        frames: Callable[[], Mapping[int, Frame]],
+        card_index: CardIndex,
+        events: BoardEvents | None = None,
+        cell_size: float = DEFAULT_CELL_SIZE,
+    ) -> None:
+        self._cards = cards
+        self._frames = frames
+        self.card_index = card_index
+        self.grid = GridIndex(cell_size)
+        self._members: Dict[int, Set[int]] = {}
+        self._card_frames: Dict[int, Set[int]] = {}
+        self._dirty_cards: Set[int] = set()
+        self._dirty_frames: Set[int] = set()
+        # Версии: размещения любой рамки (меняет вложенность) и карточек каждой рамки
+        self._frames_revision = 0
+        self._revisions: Dict[int, int] = {}
+        self._stale = True
+        if events is not None:
+            events.subscribe(self._on_change, (*_CARD_PLACEMENT, *_FRAME_PLACEMENT, BOARD_REPLACED))
+
+    def _on_change(self, change: BoardChange) -> None:
+        if BOARD_REPLACED in change:
+            self._stale = True
+        if self._stale:
+            self._dirty_cards.clear()
+            self._dirty_frames.clear()
+            return
+        for kind in _FRAME_PLACEMENT:
+            self._dirty_frames |= change.ids(kind)
+        if self._members or self._dirty_frames:
+            # Без рамок карточкам не во что входить: новые рамки
+            # сами соберут свои карточки при пересчёте
+            for kind in _CARD_PLACEMENT:
+                self._dirty_cards |= change.ids(kind)
+
+    def invalidate(self) -> None:
+        """Перестроить индекс целиком перед следующим запросом."""
+
+        self._stale = True
+        self._dirty_cards.clear()
+        self._dirty_frames.clear()
+
+    def sync(self) -> None:
+        frames = self._frames()
+        if not self._stale and len(self._dirty_cards) > len(self._cards()) // 2:
+            # Сдвинута большая часть доски (масштаб, отмена): быстрее заново
+            self._stale = True
+        if self._stale:
+            self.grid.clear()
+            self._members.clear()
+            self._card_frames.clear()
+            self._revisions.clear()
+            self._dirty_cards.clear()
+            self._dirty_frames = set(frames)
+            self._frames_revision += 1
+            self._stale = False
+
+        dirty_frames, self._dirty_frames = self._dirty_frames, set()
+        if dirty_frames:
+            self._frames_revision += 1
+        for frame_id in dirty_frames:
+            self._place_frame(frame_id, frames.get(frame_id))
+
+        dirty_cards, self._dirty_cards = self._dirty_cards, set()
+        if dirty_cards:
+            cards = self._cards()
+            for card_id in dirty_cards:
+                self._place_card(card_id, cards.get(card_id), frames)
+
+    def _place_frame(self, frame_id: int, frame: Frame | None) -> None:
+        card_frames = self._card_frames
+        for card_id in self._members.pop(frame_id, ()):
+            owners = card_frames.get(card_id)
+            if owners is not None:
+                owners.discard(frame_id)
+                if not owners:
+                    del card_frames[card_id]
+        if frame is None:
+            self.grid.remove(frame_id)
+            self._revisions.pop(frame_id, None)
+            return
+        box = frame_box(frame)
+        self.grid.insert(frame_id, box)
+        members = set(self.card_index.ids_with_center_in(*box))
+        self._members[frame_id] = members
+        self._touch(frame_id)
+        for card_id in members:
+            card_frames.setdefault(card_id, set()).add(frame_id)
+
+    def _place_card(self, card_id: int, card: Card | None, frames: Mapping[int, Frame]) -> None:
+        old = self._card_frames.pop(card_id, set())
+        owners = set(self.grid.query(card.x, card.y, card.x, card.y)) if card is not None else set()
+        for frame_id in old - owners:
+            self._members[frame_id].discard(card_id)
+            self._touch(frame_id)
+        for frame_id in owners - old:
+            self._members[frame_id].add(card_id)
+            self._touch(frame_id)
+        if owners:
+            self._card_frames[card_id] = owners
+
+    def _touch(self, frame_id: int) -> None:
+        self._revisions[frame_id] = self._revisions.get(frame_id, 0) + 1
+
+    def revision(self, frame_id: int) -> Tuple[int, int]:
+        """
+        Версия состава рамки: меняется, когда в рамку входит или из неё
+        выходит карточка и когда размещается любая рамка (вложенность).
+        """
+
+        self.sync()
+        return self._frames_revision, self._revisions.get(frame_id, 0)
+
+    def cards_in(self, frame_id: int) -> Set[int]:
+        """Карточки рамки, включая карточки вложенных в неё рамок."""
+
+        self.sync()
+        return set(self._members.get(frame_id, ()))
+
+    def frames_of(self, card_id: int) -> Set[int]:
+        """Рамки, в которые входит карточка (внешние и вложенные)."""
+
+        self.sync()
+        return set(self._card_frames.get(card_id, ()))
+
+    def nested_in(self, frame_id: int) -> List[int]:
+        """Рамки, целиком лежащие внутри рамки, на любой глубине вложенности."""
+
+        self.sync()
+        box = self.grid.box(frame_id)
+        if box is None:
+            return []
+        x1, y1, x2, y2 = box
+        nested = []
+        for other in self.grid.query(x1, y1, x2, y2):
+            if other == frame_id:
+                continue
+            ox1, oy1, ox2, oy2 = self.grid.box(other)
+            if x1 <= ox1 and y1 <= oy1 and ox2 <= x2 and oy2 <= y2:
+                nested.append(other)
+        return nested
+
+    def enclosing(self, frame_id: int) -> List[int]:
+        """Рамки, внутри которых целиком лежит рамка."""
+
+        self.sync()
+        box = self.grid.box(frame_id)
+        if box is None:
+            return []
+        x1, y1, x2, y2 = box
+        outer = []
+        for other in self.grid.query(x1, y1, x2, y2):
+            if other == frame_id:
+                continue
+            ox1, oy1, ox2, oy2 = self.grid.box(other)
+            if ox1 <= x1 and oy1 <= y1 and x2 <= ox2 and y2 <= oy2:
+                outer.append(other)
+        return outer
+
+
+class ConnectionIndex:
+    """
+    Связи по id карточек на их концах. ``connections`` возвращает текущий
+    список связей (приложение заменяет его при загрузке доски). Добавление,
+    удаление и перецепление связей применяются сразу, замена доски —
+    перестройкой перед следующим запросом.
+    """
+
+    def __init__(
+        self,
+        connections: Callable[[], List[Connection]],
+        events: BoardEvents | None = None,
+    ) -> None:
+        self._connections = connections
+        self._by_card: Dict[int, Dict[int, Connection]] = {}
+        self._ends: Dict[int, Tuple[int, int]] = {}
+        self._stale = True
+        if events is not None:
+            events.subscribe(
+                self._on_change,
+                (CONNECTION_ADDED, CONNECTION_REMOVED, CONNECTION_RETARGETED, BOARD_REPLACED),
+            )
+
+    def _on_change(self, change: BoardChange) -> None:
+        if BOARD_REPLACED in change:
+            self._stale = True
+        if self._stale:
+            return
+        # Порядок внутри пакета потерян; добавленная и тут же удалённая
+        # связь должна остаться удалённой
+        for conn in change.connections(CONNECTION_ADDED):
+            self._add(conn)
+        for conn in change.connections(CONNECTION_RETARGETED):
+            self._discard(conn)
+            self._add(conn)
+        for conn in change.connections(CONNECTION_REMOVED):
+            self._discard(conn)
+
+    def _add(self, conn: Connection) -> None:
+        key = id(conn)
+        self._ends[key] = (conn.from_id, conn.to_id)
+        self._by_card.setdefault(conn.from_id, {})[key] = conn
+        self._by_card.setdefault(conn.to_id, {})[key] = conn
+
+    def _discard(self, conn: Connection) -> None:
+        key = id(conn)
+        ends = self._ends.pop(key, None)
+        if ends is None:
+            return
+        for card_id in ends:
+            bucket = self._by_card.get(card_id)
+            if bucket is not None:
+                bucket.pop(key, None)
+                if not bucket:
+                    del self._by_card[card_id]
+
+    def invalidate(self) -> None:
+        self._stale = True
+
+    def sync(self) -> None:
+        if not self._stale:
+            return
+        self._by_card.clear()
+        self._ends.clear()
+        for conn in self._connections():
+            self._add(conn)
+        self._stale = False
+
+    def of_cards(self, card_ids: Iterable[int]) -> List[Connection]:
+        """Связи, у которых хотя бы один конец — одна из карточек (без повторов)."""
+
+        self.sync()
+        found: Dict[int, Connection] = {}
+        by_card = self._by_card
+        for card_id in card_ids:
+            bucket = by_card.get(card_id)
+            if bucket:
+                found.update(bucket)
+        return list(found.values())
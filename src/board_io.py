@@ -0,0 +1,336 @@
+"""Форматы файлов доски без зависимости от Tk: JSON, контейнер ``.mboard`` и валидация."""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import copy
+import json
+import os
+import zipfile
+from pathlib import Path
+from typing import IO, Any, Callable, Collection, Dict
+
+from .board_model import SUPPORTED_SCHEMA_VERSIONS
+
+
+class BoardFileError(Exception):
+    """Исключение, описывающее проблемы с содержимым файла доски."""
+
+
+REQUIRED_KEYS = ("cards", "connections", "frames")
+
+CONTAINER_EXTENSION = ".mboard"
+CONTAINER_BOARD_MEMBER = "board.json"
+CONTAINER_ATTACHMENTS_DIR = "attachments/"
+CONTAINER_VERSION = 1
+SUPPORTED_CONTAINER_VERSIONS = {CONTAINER_VERSION}
+# Путь к контейнеру, из которого автосохранение берёт вложения по ``archive_member``
+ATTACHMENTS_CONTAINER_KEY = "attachments_container"
+
+
+def is_board_container(path: str | os.PathLike) -> bool:
+    """Проверяет, является ли файл zip-контейнером доски."""
+
+    try:
+        return zipfile.is_zipfile(path)
+    except OSError:
+        return False
+
+
+def write_board_file(
+    path: str | os.PathLike,
+    board_data: Dict[str, Any],
+    *,
+    compress: bool = True,
+    attachment_reader: Callable[[Dict[str, Any]], bytes | None] | None = None,
+) -> None:
+    """
+    Сохраняет доску в формате, выбранном по расширению файла. С
+    ``attachment_reader`` обычный JSON получает данные вложений в base64.
+    """
+
+    if Path(path).suffix.lower() == CONTAINER_EXTENSION:
+        write_board_container(path, board_data, compress=compress, attachment_reader=attachment_reader)
+        return
+    if attachment_reader is not None:
+        board_data = embed_attachment_data(board_data, attachment_reader)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(board_data, f, ensure_ascii=False, indent=2)
+
+
+def read_board_file(path: str | os.PathLike) -> Dict[str, Any]:
+    """Читает и валидирует JSON или контейнер доски целиком."""
+
+    if is_board_container(path):
+        with BoardContainer(path) as container:
+            return container.board_data()
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    _validate_board_data(data)
+    return data
+
+
+def embed_attachment_data(
+    board_data: Dict[str, Any], attachment_reader: Callable[[Dict[str, Any]], bytes | None]
+) -> Dict[str, Any]:
+    """
+    Копия снимка доски для обычного JSON: данные вложений встроены в base64,
+    ссылки на контейнер убраны. Исходный снимок не меняется.
+    """
+
+    data = copy.deepcopy(board_data)
+    for card in data.get("cards", []):
+        for attachment in card.get("attachments") or []:
+            if not attachment.get("data_base64"):
+                payload = attachment_reader(attachment)
+                if payload is not None:
+                    attachment["data_base64"] = base64.b64encode(payload).decode("ascii")
+            attachment.pop("archive_member", None)
+    return data
+
+
+def _attachment_payload(attachment: Dict[str, Any]) -> bytes | None:
+    encoded = attachment.get("data_base64")
+    if encoded:
+        try:
+            return base64.b64decode(encoded)
+        except (binascii.Error, ValueError):
+            return None
+    storage_path = attachment.get("storage_path")
+    if storage_path:
+        try:
+            return Path(storage_path).read_bytes()
+        except OSError:
+            return None
+    return None
+
+
+def write_board_container(
+    path: str | os.PathLike,
+    board_data: Dict[str, Any],
+    *,
+    compress: bool = True,
+    attachment_reader: Callable[[Dict[str, Any]], bytes | None] | None = None,
+    before_replace: Callable[[], None] | None = None,
+) -> None:
+    """
+    Записывает доску в zip-контейнер: ``board.json`` и вложения отдельными
+    бинарными файлами ``attachments/<card_id>-<attachment_id><ext>``.
+    Вложение, уже лежащее в контейнере, сохраняет имя файла: ссылки живой
+    модели и истории остаются верными и после сохранения поверх.
+
+    Изображения уже сжаты, поэтому вложения по умолчанию хранятся без
+    сжатия; ``compress=True`` сжимает ``board.json``. Файл пишется рядом и
+    заменяет целевой; ``before_replace`` вызывается перед заменой, когда все
+    вложения уже прочитаны (например, чтобы закрыть открытый целевой файл).
+    """
+
+    read_payload = attachment_reader or _attachment_payload
+    data = copy.deepcopy(board_data)
+    data["container_version"] = CONTAINER_VERSION
+    target = Path(path)
+    tmp_path = target.with_name(target.name + ".tmp")
+    board_compression = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+
+    written: set[str] = set()
+
+    try:
+        with zipfile.ZipFile(tmp_path, "w") as archive:
+            for card in data.get("cards", []):
+                for attachment in card.get("attachments", []):
+                    payload = read_payload(attachment)
+                    if payload is None:
+                        attachment.pop("archive_member", None)
+                        continue
+                    member = attachment.get("archive_member")
+                    if (
+                        not isinstance(member, str)
+                        or not member.startswith(CONTAINER_ATTACHMENTS_DIR)
+                        or member in written
+                    ):
+                        extension = (
+                            Path(attachment.get("storage_path") or "").suffix
+                            or Path(attachment.get("name") or "").suffix
+                            or ".bin"
+                        )
+                        member = f"{CONTAINER_ATTACHMENTS_DIR}{card['id']}-{attachment['id']}{extension}"
+                        if member in written:
+                            member = f"{CONTAINER_ATTACHMENTS_DIR}{card['id']}-{attachment['id']}-{len(written)}{extension}"
+                    written.add(member)
+                    archive.writestr(member, payload, compress_type=zipfile.ZIP_STORED)
+                    attachment["archive_member"] = member
+                    attachment["data_base64"] = None
+            archive.writestr(
+                CONTAINER_BOARD_MEMBER,
+                json.dumps(data, ensure_ascii=False, indent=2),
+                compress_type=board_compression,
+            )
+        if before_replace is not None:
+            before_replace()
+        os.replace(tmp_path, target)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+class BoardContainer:
+    """
+    Открытый zip-контейнер доски с произвольным доступом к вложениям.
+
+    Вложения читаются по одному через центральный каталог zip, без чтения
+    остального содержимого файла.
+    """
+
+    def __init__(self, path: str | os.PathLike) -> None:
+        self.path = Path(path)
+        try:
+            self._archive = zipfile.ZipFile(self.path, "r")
+        except zipfile.BadZipFile as exc:
+            raise BoardFileError(f"Файл не является контейнером доски: {exc}") from exc
+        self.members = set(self._archive.namelist())
+        if CONTAINER_BOARD_MEMBER not in self.members:
+            self._archive.close()
+            raise BoardFileError(
+                f"В контейнере отсутствует {CONTAINER_BOARD_MEMBER}."
+            )
+
+    @property
+    def board_size(self) -> int:
+        return self._archive.getinfo(CONTAINER_BOARD_MEMBER).file_size
+
+    def open_board(self) -> IO[bytes]:
+        """Поток ``board.json`` для потокового чтения."""
+
+        return self._archive.open(CONTAINER_BOARD_MEMBER)
+
+    def board_data(self, *, embed_attachments: bool = False) -> Dict[str, Any]:
+        """
+        Читает и валидирует ``board.json``. С ``embed_attachments=True``
+        данные вложений встраиваются в base64, как в обычном JSON-файле.
+        """
+
+        with self.open_board() as f:
+            data = json.load(f)
+        _validate_board_data(data, members=self.members)
+        if embed_attachments:
+            data.pop("container_version", None)
+            for card in data["cards"]:
+                for attachment in card.get("attachments") or []:
+                    member = attachment.pop("archive_member", None)
+                    if member:
+                        payload = self.read_attachment(member)
+                        attachment["data_base64"] = base64.b64encode(payload).decode("ascii")
+        return data
+
+    def read_attachment(self, member: str) -> bytes:
+        try:
+            return self._archive.read(member)
+        except KeyError as exc:
+            raise BoardFileError(f"В контейнере нет вложения {member}.") from exc
+
+    def attachment_size(self, member: str) -> int:
+        try:
+            return self._archive.getinfo(member).file_size
+        except KeyError as exc:
+            raise BoardFileError(f"В контейнере нет вложения {member}.") from exc
+
+    def open_attachment(self, member: str) -> IO[bytes]:
+        try:
+            return self._archive.open(member)
+        except KeyError as exc:
+            raise BoardFileError(f"В контейнере нет вложения {member}.") from exc
+
+    def close(self) -> None:
+        self._archive.close()
+
+    def __enter__(self) -> "BoardContainer":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+
+def _validate_board_data(
+    data: Dict[str, Any], *, members: Collection[str] | None = None
+) -> None:
+    if not isinstance(data, dict):
+        raise BoardFileError(
+            "Файл не соответствует формату доски: ожидается JSON-объект с данными."
+        )
+
+    version = data.get("schema_version")
+    if version is None:
+        raise BoardFileError(
+            "Файл не содержит информацию о версии схемы (schema_version)."
+        )
+    if version not in SUPPORTED_SCHEMA_VERSIONS:
+        raise BoardFileError(
+            "Неподдерживаемая версия схемы: "
+            f"{version}. Ожидается один из: {sorted(SUPPORTED_SCHEMA_VERSIONS)}."
+        )
+
+    missing = [key for key in REQUIRED_KEYS if key not in data]
+    if missing:
+        missing_str = ", ".join(missing)
+        raise BoardFileError(
+            f"В файле отсутствуют обязательные разделы: {missing_str}."
+        )
+
+    list_checks = {
+        "cards": list,
+        "connections": list,
+        "frames": list,
+    }
+    bad_types = [
+        key for key, expected_type in list_checks.items() if not isinstance(data[key], expected_type)
+    ]
+    if bad_types:
+        readable = ", ".join(bad_types)
+        raise BoardFileError(
+            f"Некорректный формат разделов: ожидаются списки для {readable}."
+        )
+
+    viewport = data.get("viewport")
+    if viewport is not None:
+        _validate_viewport(viewport)
+
+    container_version = data.get("container_version")
+    if container_version is not None and container_version not in SUPPORTED_CONTAINER_VERSIONS:
+        raise BoardFileError(
+            "Неподдерживаемая версия контейнера: "
+            f"{container_version}. Ожидается один из: {sorted(SUPPORTED_CONTAINER_VERSIONS)}."
+        )
+    if container_version is not None or members is not None:
+        _validate_archive_members(data, members)
+
+
+def _validate_archive_members(data: Dict[str, Any], members: Collection[str] | None) -> None:
+    missing = []
+    for card in data["cards"]:
+        if not isinstance(card, dict):
+            continue
+        for attachment in card.get("attachments") or []:
+            member = attachment.get("archive_member") if isinstance(attachment, dict) else None
+            if member is None:
+                continue
+            if not isinstance(member, str) or not member.startswith(CONTAINER_ATTACHMENTS_DIR):
+                raise BoardFileError(
+                    f"Некорректная ссылка на вложение в контейнере: {member!r}."
+                )
+            if members is not None and member not in members:
+                missing.append(member)
+    if missing:
+        raise BoardFileError(
+            "В контейнере отсутствуют вложения: " + ", ".join(sorted(missing)) + "."
+        )
+
+
+def _validate_viewport(viewport: Any) -> None:
+    keys = ("x1", "y1", "x2", "y2")
+    if not isinstance(viewport, dict) or not all(
+        isinstance(viewport.get(key), (int, float)) for key in keys
+    ):
+        raise BoardFileError(
+            "Некорректная область просмотра (viewport): ожидаются числа x1, y1, x2, y2."
+        )
@@ -1,13 +1,14 @@
 from __future__ import annotations
 
+from contextlib import contextmanager
 from dataclasses import dataclass, field
-from typing import Any, Dict, Iterable, List, Literal
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Literal, Set
 
 SCHEMA_VERSION = 5
 SUPPORTED_SCHEMA_VERSIONS = {1, 2, 3, 4, SCHEMA_VERSION}
 
 
-@dataclass
+@dataclass(slots=True)
 class Attachment:
     """Метаданные вложения (например, изображения)."""
 
@@ -22,9 +23,10 @@ class Attachment:
     preview_scale: float = 1.0
     storage_path: str | None = None
     data_base64: str | None = None
+    archive_member: str | None = None
 
     def to_primitive(self) -> Dict[str, Any]:
-        return {
+        payload = {
             "id": self.id,
             "name": self.name,
             "source_type": self.source_type,
@@ -37,6 +39,9 @@ class Attachment:
             "storage_path": self.storage_path,
             "data_base64": self.data_base64,
         }
+        if self.archive_member is not None:
+            payload["archive_member"] = self.archive_member
+        return payload
 
     @staticmethod
     def from_primitive(data: Dict[str, Any]) -> "Attachment":
@@ -52,14 +57,17 @@ class Attachment:
             preview_scale=data.get("preview_scale", 1.0),
             storage_path=data.get("storage_path"),
             data_base64=data.get("data_base64"),
+            archive_member=data.get("archive_member"),
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class Card:
     """
     Логическая модель карточки без привязки к Tkinter.
-    Используется и в рантайме, и для сериализации.
+    Используется и в рантайме, и для сериализации; элементы холста
+    хранит представление (``item_registry``). Геометрию карточек доски
+    дублирует колоночное хранилище (``card_store``).
     """
 
     id: int
@@ -70,14 +78,16 @@ class Card:
     text: str = ""
     color: str = "#fff9b1"
     attachments: List[Attachment] = field(default_factory=list)
-
-    # UI поля (не сериализуются)
-    rect_id: int | None = None
-    text_id: int | None = None
-    text_bg_id: int | None = None
-    image_id: int | None = None
-    resize_handle_id: int | None = None
-    connect_handles: Dict[str, int | None] = field(default_factory=dict)
+    # Заполняются только у карточки в ``CardStore``
+    _store: Any = field(init=False, repr=False, compare=False)
+    _row: int = field(init=False, repr=False, compare=False)
+
+    def __reduce__(self):
+        # Копия карточки не привязана к хранилищу
+        return (
+            Card,
+            (self.id, self.x, self.y, self.width, self.height, self.text, self.color, self.attachments),
+        )
 
     def to_primitive(self) -> Dict[str, Any]:
         """Сериализация карточки в dict для JSON."""
@@ -135,7 +145,7 @@ DEFAULT_CONNECTION_RADIUS = 0.0
 DEFAULT_CONNECTION_CURVATURE = 0.0
 
 
-@dataclass
+@dataclass(slots=True)
 class Connection:
     """
     Логическая модель связи между карточками.
@@ -152,14 +162,6 @@ class Connection:
     from_anchor: str | None = None
     to_anchor: str | None = None
 
-    # UI поля (не сериализуются)
-    line_id: int | None = None
-    label_id: int | None = None
-    start_handle_id: int | None = None
-    end_handle_id: int | None = None
-    radius_handle_id: int | None = None
-    curvature_handle_id: int | None = None
-
     def to_primitive(self) -> Dict[str, Any]:
         """Сериализация связи в dict для JSON."""
 
@@ -228,7 +230,7 @@ class Connection:
         self.direction = "start" if self.direction == "end" else "end"
 
 
-@dataclass
+@dataclass(slots=True)
 class Frame:
     """
     Логическая модель рамки (группы карточек).
@@ -242,11 +244,6 @@ class Frame:
     title: str = "Группа"
     collapsed: bool = False
 
-    # UI поля (не сериализуются)
-    rect_id: int | None = None
-    title_id: int | None = None
-    resize_handles: Dict[str, int | None] = field(default_factory=dict)
-
     def to_primitive(self) -> Dict[str, Any]:
         """Сериализация рамки в dict для JSON."""
 
@@ -275,6 +272,167 @@ class Frame:
         )
 
 
+# ---------- События изменения доски ----------
+
+CARD_ADDED = "card_added"
+CARD_REMOVED = "card_removed"
+CARD_MOVED = "card_moved"
+CARD_RESIZED = "card_resized"
+CARD_TEXT_CHANGED = "card_text_changed"
+CARD_COLOR_CHANGED = "card_color_changed"
+CARD_ATTACHMENTS_CHANGED = "card_attachments_changed"
+CONNECTION_ADDED = "connection_added"
+CONNECTION_REMOVED = "connection_removed"
+CONNECTION_RETARGETED = "connection_retargeted"
+CONNECTION_CHANGED = "connection_changed"
+FRAME_ADDED = "frame_added"
+FRAME_REMOVED = "frame_removed"
+FRAME_MOVED = "frame_moved"
+FRAME_RESIZED = "frame_resized"
+FRAME_COLLAPSED = "frame_collapsed"
+FRAME_RENAMED = "frame_renamed"
+BOARD_REPLACED = "board_replaced"
+
+CARD_EVENTS = frozenset(
+    {
+        CARD_ADDED,
+        CARD_REMOVED,
+        CARD_MOVED,
+        CARD_RESIZED,
+        CARD_TEXT_CHANGED,
+        CARD_COLOR_CHANGED,
+        CARD_ATTACHMENTS_CHANGED,
+    }
+)
+CONNECTION_EVENTS = frozenset({CONNECTION_ADDED, CONNECTION_REMOVED, CONNECTION_RETARGETED, CONNECTION_CHANGED})
+FRAME_EVENTS = frozenset({FRAME_ADDED, FRAME_REMOVED, FRAME_MOVED, FRAME_RESIZED, FRAME_COLLAPSED, FRAME_RENAMED})
+# События, после которых меняется положение или состав объектов на доске
+GEOMETRY_EVENTS = frozenset(
+    {
+        CARD_ADDED,
+        CARD_REMOVED,
+        CARD_MOVED,
+        CARD_RESIZED,
+        CONNECTION_ADDED,
+        CONNECTION_REMOVED,
+        CONNECTION_RETARGETED,
+        FRAME_ADDED,
+        FRAME_REMOVED,
+        FRAME_MOVED,
+        FRAME_RESIZED,
+        FRAME_COLLAPSED,
+        BOARD_REPLACED,
+    }
+)
+
+
+class BoardChange:
+    """
+    Изменения доски за один пакет: вид события -> id карточек или рамок.
+    Связи не имеют id, поэтому для их событий хранятся сами объекты.
+    """
+
+    __slots__ = ("_ids", "_connections")
+
+    def __init__(self) -> None:
+        self._ids: Dict[str, Set[int]] = {}
+        self._connections: Dict[str, Dict[int, Connection]] = {}
+
+    def add(self, kind: str, ids: Iterable[int] = ()) -> None:
+        self._ids.setdefault(kind, set()).update(ids)
+
+    def add_connections(self, kind: str, connections: Iterable[Connection]) -> None:
+        bucket = self._connections.setdefault(kind, {})
+        for conn in connections:
+            bucket[id(conn)] = conn
+
+    @property
+    def kinds(self) -> Set[str]:
+        return set(self._ids) | set(self._connections)
+
+    def __contains__(self, kind: str) -> bool:
+        return kind in self._ids or kind in self._connections
+
+    def __bool__(self) -> bool:
+        return bool(self._ids or self._connections)
+
+    def ids(self, kind: str) -> Set[int]:
+        return self._ids.get(kind, set())
+
+    def connections(self, kind: str) -> List[Connection]:
+        return list(self._connections.get(kind, {}).values())
+
+    def card_ids(self) -> Set[int]:
+        """Все карточки, затронутые любым событием карточек."""
+
+        touched: Set[int] = set()
+        for kind in CARD_EVENTS & self._ids.keys():
+            touched |= self._ids[kind]
+        return touched
+
+
+BoardListener = Callable[[BoardChange], None]
+
+
+class BoardEvents:
+    """
+    Подписчики на изменения доски. Событие вне пакета доставляется сразу;
+    внутри ``batch()`` события копятся и по выходе из внешнего пакета
+    доставляются одним ``BoardChange``.
+    """
+
+    def __init__(self) -> None:
+        self._listeners: List[tuple[BoardListener, frozenset[str] | None]] = []
+        self._pending: BoardChange | None = None
+        self._depth = 0
+
+    def subscribe(self, listener: BoardListener, kinds: Iterable[str] | None = None) -> Callable[[], None]:
+        """Подписывает на события ``kinds`` (все, если ``None``); возвращает функцию отписки."""
+
+        entry = (listener, frozenset(kinds) if kinds is not None else None)
+        self._listeners.append(entry)
+
+        def unsubscribe() -> None:
+            if entry in self._listeners:
+                self._listeners.remove(entry)
+
+        return unsubscribe
+
+    def emit(self, kind: str, ids: Iterable[int] = ()) -> None:
+        self._change().add(kind, ids)
+        if self._depth == 0:
+            self.flush()
+
+    def emit_connections(self, kind: str, connections: Iterable[Connection]) -> None:
+        self._change().add_connections(kind, connections)
+        if self._depth == 0:
+            self.flush()
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                self.flush()
+
+    def flush(self) -> None:
+        change, self._pending = self._pending, None
+        if not change:
+            return
+        kinds = change.kinds
+        for listener, wanted in list(self._listeners):
+            if wanted is None or wanted & kinds:
+                listener(change)
+
+    def _change(self) -> BoardChange:
+        if self._pending is None:
+            self._pending = BoardChange()
+        return self._pending
+
+
 @dataclass
 class BoardData:
     """
@@ -325,7 +483,8 @@ class BoardData:
                   "offset_x": float,
                   "offset_y": float,
                   "storage_path": str | null,
-                  "data_base64": str | null
+                  "data_base64": str | null,
+                  "archive_member": str  # только в контейнере .mboard
                 }, ...
               ]
             }, ...
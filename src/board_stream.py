@@ -0,0 +1,189 @@
+"""Потоковое чтение файла доски без загрузки всего JSON в память."""
+
+from __future__ import annotations
+
+import codecs
+import json
+import os
+from json import JSONDecodeError
+from typing import Any, BinaryIO, Dict, Iterator, Tuple
+
+# Разделы, элементы которых отдаются по одному
+SECTION_KINDS = {"cards": "card", "connections": "connection", "frames": "frame"}
+
+_WHITESPACE = " \t\n\r"
+
+
+class StreamingBoardReader:
+    """
+    Инкрементальный парсер JSON-файла доски.
+
+    Читает файл порциями и отдаёт записи по мере разбора:
+    ``("card", {...})``, ``("connection", {...})``, ``("frame", {...})``
+    для элементов основных разделов и ``(key, value)`` для остальных ключей
+    верхнего уровня (``schema_version``, ``viewport`` и т.д.).
+    """
+
+    def __init__(
+        self,
+        source: str | os.PathLike | BinaryIO,
+        *,
+        chunk_size: int = 64 * 1024,
+        size: int | None = None,
+    ) -> None:
+        if hasattr(source, "read"):
+            self._file = source
+            self._owns_file = False
+        else:
+            self._file = open(source, "rb")
+            self._owns_file = True
+        if size is not None:
+            self.bytes_total = size
+        else:
+            try:
+                self.bytes_total = os.fstat(self._file.fileno()).st_size
+            except (AttributeError, OSError, ValueError):
+                self.bytes_total = 0
+        self.bytes_read = 0
+        self.chunk_size = max(16, int(chunk_size))
+        self._decoder = json.JSONDecoder()
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self._seen: Dict[str, Any] = {}
+
+    # --- Публичный интерфейс ---
+
+    @property
+    def progress(self) -> float:
+        """Доля прочитанных байт файла (0.0–1.0)."""
+
+        if self._eof:
+            return 1.0
+        if not self.bytes_total:
+            return 0.0
+        return min(self.bytes_read / self.bytes_total, 1.0)
+
+    def skeleton(self) -> Dict[str, Any]:
+        """
+        Сводка по уже разобранным ключам верхнего уровня: разделы-списки
+        заменены пустыми списками. Подходит для ``_validate_board_data``.
+        """
+
+        return dict(self._seen)
+
+    def close(self) -> None:
+        if self._owns_file:
+            self._file.close()
+
+    def __enter__(self) -> "StreamingBoardReader":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+    def records(self) -> Iterator[Tuple[str, Any]]:
+        if self._peek() != "{":
+            self._fail("Ожидается JSON-объект с данными доски")
+        self._pos += 1
+
+        first = True
+        while True:
+            char = self._peek()
+            if char == "}":
+                self._pos += 1
+                break
+            if not first:
+                self._expect(",")
+            key = self._decode_value()
+            if not isinstance(key, str):
+                self._fail("Ключ объекта должен быть строкой")
+            self._expect(":")
+
+            if key in SECTION_KINDS and self._peek() == "[":
+                self._pos += 1
+                self._seen[key] = []
+                yield from self._section_items(SECTION_KINDS[key])
+            else:
+                value = self._decode_value()
+                self._seen[key] = value
+                yield key, value
+            first = False
+
+        if self._peek() != "":
+            self._fail("Лишние данные после конца JSON-объекта")
+
+    # --- Разбор ---
+
+    def _section_items(self, kind: str) -> Iterator[Tuple[str, Any]]:
+        first = True
+        while True:
+            if self._peek() == "]":
+                self._pos += 1
+                return
+            if not first:
+                self._expect(",")
+            yield kind, self._decode_value()
+            self._compact()
+            first = False
+
+    def _peek(self) -> str:
+        """Пропускает пробелы и возвращает следующий символ ('' в конце файла)."""
+
+        while True:
+            buf = self._buf
+            pos = self._pos
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            self._pos = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, char: str) -> None:
+        if self._peek() != char:
+            self._fail(f"Ожидается '{char}'")
+        self._pos += 1
+
+    def _decode_value(self) -> Any:
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except JSONDecodeError:
+                if self._eof:
+                    raise
+                self._fill(grow=True)
+                continue
+            # Число на границе буфера могло быть прочитано не полностью
+            if end >= len(self._buf) and not self._eof:
+                self._fill(grow=True)
+                continue
+            self._pos = end
+            return value
+
+    def _fill(self, *, grow: bool = False) -> bool:
+        if self._eof:
+            return False
+        size = self.chunk_size
+        if grow:
+            size = max(size, len(self._buf) - self._pos)
+        raw = self._file.read(size)
+        if not raw:
+            self._eof = True
+            tail = self._text_decoder.decode(b"", final=True)
+            self._buf += tail
+            return bool(tail)
+        self.bytes_read += len(raw)
+        self._buf += self._text_decoder.decode(raw)
+        return True
+
+    def _compact(self) -> None:
+        if self._pos > self.chunk_size:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+
+    def _fail(self, message: str) -> None:
+        raise JSONDecodeError(message, self._buf, self._pos)
@@ -0,0 +1,130 @@
+"""
+Массовые правки карточек по наборам id (без Tk).
+
+Каждая операция меняет модель целиком и возвращает ``BulkEdit``: id
+изменённых карточек и один патч с их новыми значениями. Интерфейс по нему
+перерисовывает затронутые карточки одним проходом и кладёт в историю одну
+запись. Геометрию считает ``CardStore`` над колонками, поэтому время растёт
+линейно с числом выбранных карточек.
+"""
+
+from __future__ import annotations
+
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Mapping, Sequence, Tuple
+
+from .board_model import CONNECTION_REMOVED, Card, Connection, bulk_update_card_colors
+from .card_store import ALIGN_EDGES, GEOMETRY_FIELDS, CardStore
+
+
+@dataclass(slots=True)
+class BulkEdit:
+    """
+    Итог массовой операции.
+
+    ``patch`` — id карточки -> новые значения изменённых полей, ``None`` для
+    удалённой карточки. Удалённые карточки и связи лежат в ``removed_cards``
+    и ``removed_connections``, чтобы интерфейс мог убрать их элементы.
+    """
+
+    changed: List[int] = field(default_factory=list)
+    patch: Dict[int, Dict[str, Any] | None] = field(default_factory=dict)
+    removed_cards: List[Card] = field(default_factory=list)
+    removed_connections: List[Connection] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.changed or self.removed_connections)
+
+
+def _edit(cards: Mapping[int, Card], changed: List[int], fields: Sequence[str]) -> BulkEdit:
+    patch: Dict[int, Dict[str, Any] | None] = {
+        card_id: {name: getattr(cards[card_id], name) for name in fields} for card_id in changed
+    }
+    return BulkEdit(changed=changed, patch=patch)
+
+
+def translate(cards: CardStore, card_ids: Iterable[int], dx: float, dy: float) -> BulkEdit:
+    """Сдвигает карточки на ``(dx, dy)``."""
+
+    if not dx and not dy:
+        return BulkEdit()
+    return _edit(cards, cards.translate(card_ids, dx, dy), ("x", "y"))
+
+
+def set_size(
+    cards: CardStore,
+    card_ids: Iterable[int],
+    width: float | None = None,
+    height: float | None = None,
+    *,
+    min_width: float = 0.0,
+    min_height: float = 0.0,
+    minimums: Mapping[int, Tuple[float, float]] | None = None,
+) -> BulkEdit:
+    """Задаёт размер карточек, сохраняя центры (см. ``CardStore.resize``)."""
+
+    changed = cards.resize(
+        card_ids,
+        width,
+        height,
+        min_width=min_width,
+        min_height=min_height,
+        minimums=minimums,
+    )
+    return _edit(cards, changed, ("width", "height"))
+
+
+def align(cards: CardStore, card_ids: Iterable[int], edge: str) -> BulkEdit:
+    """Выравнивает карточки: ``left``, ``right``, ``center_x``, ``top``, ``bottom``, ``center_y``."""
+
+    axis = GEOMETRY_FIELDS[ALIGN_EDGES[edge][0]]
+    return _edit(cards, cards.align(card_ids, edge), (axis,))
+
+
+def distribute(cards: CardStore, card_ids: Iterable[int], axis: str) -> BulkEdit:
+    """Равные промежутки между карточками вдоль ``"x"`` или ``"y"``."""
+
+    return _edit(cards, cards.distribute(card_ids, axis), (axis,))
+
+
+def snap(cards: CardStore, card_ids: Iterable[int], grid: float) -> BulkEdit:
+    """Переносит центры карточек в узлы сетки."""
+
+    return _edit(cards, cards.snap(card_ids, grid), ("x", "y"))
+
+
+def recolor(cards: Mapping[int, Card], card_ids: Iterable[int], color: str) -> BulkEdit:
+    """Задаёт цвет карточкам; неизменившиеся в итог не попадают."""
+
+    changed = bulk_update_card_colors(cards, card_ids, color)
+    return BulkEdit(changed=changed, patch={card_id: {"color": color} for card_id in changed})
+
+
+def delete(cards: CardStore, connections: List[Connection], card_ids: Iterable[int]) -> BulkEdit:
+    """
+    Удаляет карточки и связи, которые в них входят или из них выходят.
+    Список ``connections`` меняется на месте одним проходом.
+    """
+
+    doomed = {card_id for card_id in card_ids if card_id in cards}
+    if not doomed:
+        return BulkEdit()
+    kept: List[Connection] = []
+    dropped: List[Connection] = []
+    for conn in connections:
+        (dropped if conn.from_id in doomed or conn.to_id in doomed else kept).append(conn)
+
+    events = cards.events
+    with events.batch() if events is not None else nullcontext():
+        removed = [cards.pop(card_id) for card_id in doomed]
+        if dropped:
+            connections[:] = kept
+            if events is not None:
+                events.emit_connections(CONNECTION_REMOVED, dropped)
+    return BulkEdit(
+        changed=list(doomed),
+        patch=dict.fromkeys(doomed),
+        removed_cards=removed,
+        removed_connections=dropped,
+    )
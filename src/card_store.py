@@ -0,0 +1,605 @@
+"""
+Колоночное хранилище геометрии карточек.
+
+``CardStore`` — словарь ``id -> Card``, который дополнительно держит центр,
+ширину и высоту всех карточек в непрерывных массивах ``array('d')``.
+Массовые операции (сдвиг, масштаб, размер, выравнивание, распределение,
+привязка к сетке, общие границы, попадание в прямоугольник) выполняются над
+колонками целиком — через NumPy, если он установлен, иначе циклом по
+массивам.
+
+Карточка в хранилище остаётся обычным объектом: чтение ``card.x`` идёт
+из её слота с прежней скоростью (отрисовка читает геометрию постоянно),
+а запись попадает и в слот, и в колонку. Массовые операции записывают
+результат обратно только в изменённые карточки. Если хранилищу задан
+``events``, оно сообщает о добавлении, удалении и изменении карточек.
+"""
+
+from __future__ import annotations
+
+from array import array
+from collections import deque
+from operator import attrgetter
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Sequence, Tuple
+
+from .board_model import (
+    CARD_ADDED,
+    CARD_ATTACHMENTS_CHANGED,
+    CARD_COLOR_CHANGED,
+    CARD_MOVED,
+    CARD_REMOVED,
+    CARD_RESIZED,
+    CARD_TEXT_CHANGED,
+    BoardEvents,
+    Card,
+)
+
+# На малом числе строк накладные расходы NumPy больше выигрыша
+VECTOR_MIN_ROWS = 64
+
+_NUMPY_UNSET = object()
+_numpy_module: Any = _NUMPY_UNSET
+
+
+def _numpy() -> Any:
+    """Модуль ``numpy`` или ``None``, если он не установлен."""
+
+    global _numpy_module
+    if _numpy_module is _NUMPY_UNSET:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _numpy_module = numpy
+    return _numpy_module
+
+
+Bounds = Tuple[float, float, float, float]
+
+GEOMETRY_FIELDS = ("x", "y", "width", "height")
+_GEOMETRY_COLUMNS = {name: column for column, name in enumerate(GEOMETRY_FIELDS)}
+# Край выравнивания -> (колонка центра, сторона: -1 начало, 1 конец, 0 середина)
+ALIGN_EDGES = {
+    "left": (0, -1),
+    "right": (0, 1),
+    "center_x": (0, 0),
+    "top": (1, -1),
+    "bottom": (1, 1),
+    "center_y": (1, 0),
+}
+_FIELD_EVENTS = {
+    "x": CARD_MOVED,
+    "y": CARD_MOVED,
+    "width": CARD_RESIZED,
+    "height": CARD_RESIZED,
+    "text": CARD_TEXT_CHANGED,
+    "color": CARD_COLOR_CHANGED,
+    "attachments": CARD_ATTACHMENTS_CHANGED,
+}
+# Запись в слот мимо ``_StoredCard.__setattr__``
+_SLOT_SETTERS = tuple(getattr(Card, name).__set__ for name in GEOMETRY_FIELDS)
+_compared_fields = attrgetter(*(name for name, f in Card.__dataclass_fields__.items() if f.compare))
+
+
+class _StoredCard(Card):
+    """Класс карточки, пока она лежит в ``CardStore``: запись геометрии дублируется в колонку."""
+
+    __slots__ = ()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        object.__setattr__(self, name, value)
+        column = _GEOMETRY_COLUMNS.get(name)
+        if column is not None:
+            self._store.columns[column][self._row] = value
+        kind = _FIELD_EVENTS.get(name)
+        if kind is not None and self._store.events is not None:
+            self._store.events.emit(kind, (self.id,))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Card):
+            return NotImplemented
+        return _compared_fields(self) == _compared_fields(other)
+
+    __hash__ = None  # type: ignore[assignment]
+
+
+class CardStore(dict):
+    """
+    Карточки доски по id с геометрией в колонках ``xs``, ``ys``, ``widths``,
+    ``heights``. Строка карточки — ``card._row``; при удалении на её место
+    переезжает последняя строка. Порядок словаря и порядок строк не связаны.
+    """
+
+    _MISSING = object()
+
+    def __init__(
+        self,
+        cards: Mapping[int, Card] | None = None,
+        *,
+        use_numpy: bool = True,
+        events: BoardEvents | None = None,
+    ) -> None:
+        super().__init__()
+        # Подключается после заполнения: начальные карточки не порождают событий
+        self.events: BoardEvents | None = None
+        self.xs = array("d")
+        self.ys = array("d")
+        self.widths = array("d")
+        self.heights = array("d")
+        self.columns = (self.xs, self.ys, self.widths, self.heights)
+        self.row_ids: List[int] = []
+        self.row_cards: List[Card] = []
+        self.use_numpy = use_numpy
+        if cards:
+            self.update(cards)
+        self.events = events
+
+    # ---------- словарь ----------
+
+    def __setitem__(self, card_id: int, card: Card) -> None:
+        previous = self.get(card_id)
+        if previous is card:
+            return
+        if previous is not None:
+            self._unbind(previous)
+        if type(card) is _StoredCard:
+            owner = card._store
+            del owner[owner.row_ids[card._row]]
+        self._bind(card_id, card)
+        super().__setitem__(card_id, card)
+        self._emit(CARD_ADDED, (card_id,))
+
+    def __delitem__(self, card_id: int) -> None:
+        card = self[card_id]
+        super().__delitem__(card_id)
+        self._unbind(card)
+        self._emit(CARD_REMOVED, (card_id,))
+
+    def pop(self, card_id: int, default: Any = _MISSING) -> Any:
+        if card_id not in self:
+            if default is CardStore._MISSING:
+                raise KeyError(card_id)
+            return default
+        card = self[card_id]
+        del self[card_id]
+        return card
+
+    def popitem(self) -> Tuple[int, Card]:
+        card_id, card = super().popitem()
+        self._unbind(card)
+        self._emit(CARD_REMOVED, (card_id,))
+        return card_id, card
+
+    def setdefault(self, card_id: int, default: Card) -> Card:
+        if card_id not in self:
+            self[card_id] = default
+        return self[card_id]
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        for card_id, card in dict(*args, **kwargs).items():
+            self[card_id] = card
+
+    def __ior__(self, other: Mapping[int, Card]) -> "CardStore":
+        self.update(other)
+        return self
+
+    def clear(self) -> None:
+        removed = list(self)
+        for card in self.row_cards:
+            self._detach(card)
+        super().clear()
+        for column in self.columns:
+            del column[:]
+        self.row_ids.clear()
+        self.row_cards.clear()
+        if removed:
+            self._emit(CARD_REMOVED, removed)
+
+    def copy(self) -> Dict[int, Card]:
+        return dict(self)
+
+    def __reduce__(self):
+        return (CardStore, (dict(self),))
+
+    def _emit(self, kind: str, card_ids: Iterable[int]) -> None:
+        if self.events is not None:
+            self.events.emit(kind, card_ids)
+
+    # ---------- строки ----------
+
+    def _bind(self, card_id: int, card: Card) -> None:
+        values = (card.x, card.y, card.width, card.height)
+        for column, value in zip(self.columns, values):
+            column.append(value)
+        card._row = len(self.row_ids)
+        card._store = self
+        object.__setattr__(card, "__class__", _StoredCard)
+        self.row_ids.append(card_id)
+        self.row_cards.append(card)
+
+    def _unbind(self, card: Card) -> None:
+        row = card._row
+        self._detach(card)
+        last = len(self.row_ids) - 1
+        if row != last:
+            for column in self.columns:
+                column[row] = column[last]
+            moved = self.row_cards[last]
+            moved._row = row
+            self.row_ids[row] = self.row_ids[last]
+            self.row_cards[row] = moved
+        for column in self.columns:
+            del column[last]
+        self.row_ids.pop()
+        self.row_cards.pop()
+
+    def _detach(self, card: Card) -> None:
+        object.__setattr__(card, "__class__", Card)
+        del card._store
+        del card._row
+
+    def rows_for(self, card_ids: Iterable[int] | None = None) -> List[int]:
+        """
+        Строки карточек без повторов; ``None`` — все строки. Если выбраны
+        все карточки, строки идут по порядку: операции над всеми строками
+        работают с колонками целиком.
+        """
+
+        if card_ids is None:
+            return list(range(len(self.row_ids)))
+        rows: Dict[int, None] = {}
+        for card_id in card_ids:
+            card = self.get(card_id)
+            if card is not None:
+                rows[card._row] = None
+        if len(rows) == len(self.row_ids):
+            return list(range(len(self.row_ids)))
+        return list(rows)
+
+    def _np(self, rows: Sequence[int]) -> Any:
+        if not self.use_numpy or len(rows) < VECTOR_MIN_ROWS:
+            return None
+        return _numpy()
+
+    def _views(self, np: Any) -> List[Any]:
+        return [np.frombuffer(column, dtype=np.float64) for column in self.columns]
+
+    def _index(self, np: Any, rows: List[int]) -> Any:
+        if len(rows) == len(self.row_ids):
+            return slice(None)
+        return np.asarray(rows, dtype=np.intp)
+
+    # ---------- массовые операции ----------
+
+    def _column_values(self, column: array, rows: List[int]) -> List[float]:
+        if len(rows) == len(self.row_ids):
+            return column.tolist()
+        return [column[row] for row in rows]
+
+    def _cards(self, rows: List[int]) -> List[Card]:
+        if len(rows) == len(self.row_ids):
+            return self.row_cards
+        cards = self.row_cards
+        return [cards[row] for row in rows]
+
+    def _ids(self, rows: List[int]) -> List[int]:
+        if len(rows) == len(self.row_ids):
+            return list(self.row_ids)
+        ids = self.row_ids
+        return [ids[row] for row in rows]
+
+    def _store_values(self, rows: List[int], *values: List[float]) -> None:
+        """Записывает новые значения первых колонок в колонки и слоты карточек."""
+
+        self._store_columns(rows, dict(enumerate(values)))
+
+    def _store_columns(self, rows: List[int], values: Dict[int, List[float]]) -> None:
+        """Записывает значения колонок (номер колонки -> значения по строкам)."""
+
+        cards = self._cards(rows)
+        for index, column_values in values.items():
+            column = self.columns[index]
+            if len(rows) == len(self.row_ids):
+                column[:] = array("d", column_values)
+            else:
+                for row, value in zip(rows, column_values):
+                    column[row] = value
+            deque(map(_SLOT_SETTERS[index], cards, column_values), maxlen=0)
+        if self.events is not None:
+            ids = self._ids(rows)
+            with self.events.batch():
+                if 0 in values or 1 in values:
+                    self.events.emit(CARD_MOVED, ids)
+                if 2 in values or 3 in values:
+                    self.events.emit(CARD_RESIZED, ids)
+
+    def _geometry(self, rows: List[int]) -> Tuple[Any, List[Any]]:
+        """NumPy (или ``None``) и копии четырёх колонок для строк ``rows``."""
+
+        np = self._np(rows)
+        if np is None:
+            return None, [self._column_values(column, rows) for column in self.columns]
+        index = self._index(np, rows)
+        views = self._views(np)
+        values = [np.array(view[index]) for view in views]
+        del views
+        return np, values
+
+    def _store_changed(self, rows: List[int], np: Any, changes: Dict[int, Tuple[Any, Any]]) -> List[int]:
+        """
+        Записывает новые значения колонок (номер -> (старые, новые)) только
+        в строки, где что-то изменилось, и возвращает id этих карточек.
+        """
+
+        if np is not None:
+            mask = np.zeros(len(rows), dtype=bool)
+            for old, new in changes.values():
+                mask |= old != new
+            picked = np.flatnonzero(mask)
+            changed = np.asarray(rows, dtype=np.intp)[picked].tolist()
+            values = {index: new[picked].tolist() for index, (_old, new) in changes.items()}
+        else:
+            flags = [False] * len(rows)
+            for old, new in changes.values():
+                flags = [flag or a != b for flag, a, b in zip(flags, old, new)]
+            picked = [i for i, flag in enumerate(flags) if flag]
+            changed = [rows[i] for i in picked]
+            values = {index: [new[i] for i in picked] for index, (_old, new) in changes.items()}
+        if changed:
+            self._store_columns(changed, values)
+        return self._ids(changed)
+
+    def translate(self, card_ids: Iterable[int] | None, dx: float, dy: float) -> List[int]:
+        """Сдвигает карточки на ``(dx, dy)`` и возвращает их id."""
+
+        rows = self.rows_for(card_ids)
+        if rows and (dx or dy):
+            np = self._np(rows)
+            if np is not None:
+                xs, ys, _ws, _hs = self._views(np)
+                index = self._index(np, rows)
+                new_x = (xs[index] + dx).tolist()
+                new_y = (ys[index] + dy).tolist()
+                del xs, ys, _ws, _hs
+            else:
+                new_x = [x + dx for x in self._column_values(self.xs, rows)]
+                new_y = [y + dy for y in self._column_values(self.ys, rows)]
+            self._store_values(rows, new_x, new_y)
+        return self._ids(rows)
+
+    def scale(self, factor: float, cx: float, cy: float) -> None:
+        """Масштабирует все карточки относительно точки ``(cx, cy)``, как ``Canvas.scale``."""
+
+        rows = self.rows_for()
+        if not rows:
+            return
+        np = self._np(rows)
+        if np is not None:
+            xs, ys, ws, hs = self._views(np)
+            values = [
+                (cx + (xs - cx) * factor).tolist(),
+                (cy + (ys - cy) * factor).tolist(),
+                (ws * factor).tolist(),
+                (hs * factor).tolist(),
+            ]
+            del xs, ys, ws, hs
+        else:
+            values = [
+                [cx + (x - cx) * factor for x in self.xs],
+                [cy + (y - cy) * factor for y in self.ys],
+                [w * factor for w in self.widths],
+                [h * factor for h in self.heights],
+            ]
+        self._store_values(rows, *values)
+
+    def snap(self, card_ids: Iterable[int] | None, grid: float) -> List[int]:
+        """Переносит центры карточек в узлы сетки; возвращает id сдвинутых."""
+
+        rows = self.rows_for(card_ids)
+        if not rows or grid <= 0:
+            return []
+        np = self._np(rows)
+        if np is not None:
+            xs, ys, _ws, _hs = self._views(np)
+            index = np.asarray(rows, dtype=np.intp)
+            old_x = xs[index]
+            old_y = ys[index]
+            new_x = np.round(old_x / grid) * grid
+            new_y = np.round(old_y / grid) * grid
+            moved_mask = (new_x != old_x) | (new_y != old_y)
+            moved = index[moved_mask].tolist()
+            new_x, new_y = new_x[moved_mask].tolist(), new_y[moved_mask].tolist()
+            del xs, ys, _ws, _hs
+        else:
+            xs, ys = self.xs, self.ys
+            moved, new_x, new_y = [], [], []
+            for row in rows:
+                gx = round(xs[row] / grid) * grid
+                gy = round(ys[row] / grid) * grid
+                if gx != xs[row] or gy != ys[row]:
+                    moved.append(row)
+                    new_x.append(gx)
+                    new_y.append(gy)
+        if moved:
+            self._store_values(moved, new_x, new_y)
+        return self._ids(moved)
+
+    def resize(
+        self,
+        card_ids: Iterable[int] | None,
+        width: float | None = None,
+        height: float | None = None,
+        *,
+        min_width: float = 0.0,
+        min_height: float = 0.0,
+        minimums: Mapping[int, Tuple[float, float]] | None = None,
+    ) -> List[int]:
+        """
+        Задаёт ширину и/или высоту карточек, сохраняя центр. Размер не
+        меньше ``min_width``/``min_height``, а для карточек из ``minimums`` —
+        не меньше их собственного минимума. Возвращает id изменённых.
+        """
+
+        rows = self.rows_for(card_ids)
+        if not rows or (width is None and height is None):
+            return []
+        lower = [[min_width] * len(rows), [min_height] * len(rows)]
+        if minimums:
+            position = {row: i for i, row in enumerate(rows)}
+            for card_id, (own_w, own_h) in minimums.items():
+                card = self.get(card_id)
+                i = position.get(card._row) if card is not None else None
+                if i is not None:
+                    lower[0][i] = max(min_width, own_w)
+                    lower[1][i] = max(min_height, own_h)
+        np, columns = self._geometry(rows)
+        changes = {}
+        for offset, target in enumerate((width, height)):
+            if target is None:
+                continue
+            if np is not None:
+                new = np.maximum(np.asarray(lower[offset], dtype=np.float64), target)
+            else:
+                new = [max(target, low) for low in lower[offset]]
+            changes[2 + offset] = (columns[2 + offset], new)
+        return self._store_changed(rows, np, changes)
+
+    def align(self, card_ids: Iterable[int] | None, edge: str) -> List[int]:
+        """
+        Выравнивает карточки по краю или середине их общей рамки (``edge`` из
+        ``ALIGN_EDGES``). Возвращает id сдвинутых.
+        """
+
+        axis, side = ALIGN_EDGES[edge]
+        rows = self.rows_for(card_ids)
+        if len(rows) < 2:
+            return []
+        np, columns = self._geometry(rows)
+        centers, sizes = columns[axis], columns[axis + 2]
+        if np is not None:
+            start = float((centers - sizes / 2).min())
+            end = float((centers + sizes / 2).max())
+        else:
+            start = min(c - s / 2 for c, s in zip(centers, sizes))
+            end = max(c + s / 2 for c, s in zip(centers, sizes))
+        if side < 0:
+            new = [start + s / 2 for s in sizes] if np is None else start + sizes / 2
+        elif side > 0:
+            new = [end - s / 2 for s in sizes] if np is None else end - sizes / 2
+        else:
+            middle = (start + end) / 2
+            new = [middle] * len(rows) if np is None else np.full(len(rows), middle)
+        return self._store_changed(rows, np, {axis: (centers, new)})
+
+    def distribute(self, card_ids: Iterable[int] | None, axis: str) -> List[int]:
+        """
+        Расставляет карточки вдоль оси ``"x"`` или ``"y"`` с равными
+        промежутками; крайние карточки остаются на месте. Возвращает id
+        сдвинутых.
+        """
+
+        column = _GEOMETRY_COLUMNS[axis]
+        rows = self.rows_for(card_ids)
+        if len(rows) < 3:
+            return []
+        np, columns = self._geometry(rows)
+        centers, sizes = columns[column], columns[column + 2]
+        if np is not None:
+            order = np.argsort(centers, kind="stable")
+            ordered = sizes[order]
+            start = float(centers[order[0]] - ordered[0] / 2)
+            end = float(centers[order[-1]] + ordered[-1] / 2)
+            gap = (end - start - sum(ordered.tolist())) / (len(rows) - 1)
+            # Левый край каждой карточки: сумма предыдущих размеров и промежутков
+            lead = np.concatenate(([0.0], np.cumsum(ordered[:-1] + gap)))
+            new = np.empty(len(rows))
+            new[order] = start + lead + ordered / 2
+        else:
+            order = sorted(range(len(rows)), key=centers.__getitem__)
+            start = centers[order[0]] - sizes[order[0]] / 2
+            end = centers[order[-1]] + sizes[order[-1]] / 2
+            gap = (end - start - sum(sizes)) / (len(rows) - 1)
+            new = list(centers)
+            lead = 0.0
+            for i in order:
+                new[i] = start + lead + sizes[i] / 2
+                lead += sizes[i] + gap
+        return self._store_changed(rows, np, {column: (centers, new)})
+
+    def bounds(self, card_ids: Iterable[int] | None = None) -> Bounds | None:
+        """Общий прямоугольник карточек или ``None``, если их нет."""
+
+        rows = self.rows_for(card_ids)
+        if not rows:
+            return None
+        np = self._np(rows)
+        if np is not None:
+            xs, ys, ws, hs = self._views(np)
+            index = self._index(np, rows)
+            half_w = ws[index] / 2
+            half_h = hs[index] / 2
+            x, y = xs[index], ys[index]
+            result = (
+                float((x - half_w).min()),
+                float((y - half_h).min()),
+                float((x + half_w).max()),
+                float((y + half_h).max()),
+            )
+            del xs, ys, ws, hs
+            return result
+        return _bounds_of(self._cards(rows))
+
+    def ids_with_center_in(self, x1: float, y1: float, x2: float, y2: float) -> List[int]:
+        """Карточки, центр которых лежит в прямоугольнике (границы включены)."""
+
+        rows = self.rows_for()
+        np = self._np(rows)
+        if np is not None:
+            xs, ys, _ws, _hs = self._views(np)
+            mask = (xs >= x1) & (xs <= x2) & (ys >= y1) & (ys <= y2)
+            hits = np.flatnonzero(mask).tolist()
+            del xs, ys, _ws, _hs
+            return self._ids(hits)
+        return [
+            card_id
+            for card_id, x, y in zip(self.row_ids, self.xs, self.ys)
+            if x1 <= x <= x2 and y1 <= y <= y2
+        ]
+
+
+def _box(card: Card) -> Bounds:
+    return (card.x - card.width / 2, card.y - card.height / 2, card.x + card.width / 2, card.y + card.height / 2)
+
+
+def _bounds_of(cards: Iterable[Card]) -> Bounds | None:
+    boxes = [_box(card) for card in cards]
+    if not boxes:
+        return None
+    return (
+        min(box[0] for box in boxes),
+        min(box[1] for box in boxes),
+        max(box[2] for box in boxes),
+        max(box[3] for box in boxes),
+    )
+
+
+def card_boxes(cards: Mapping[int, Card]) -> Iterator[Bounds]:
+    """Прямоугольники ``(x1, y1, x2, y2)`` карточек."""
+
+    return (_box(card) for card in cards.values())
+
+
+def cards_bounds(cards: Mapping[int, Card]) -> Bounds | None:
+    """Общий прямоугольник карточек или ``None``; для ``CardStore`` — по колонкам."""
+
+    if isinstance(cards, CardStore):
+        return cards.bounds()
+    return _bounds_of(cards.values())
+
+
+def card_ids_with_center_in(cards: Mapping[int, Card], x1: float, y1: float, x2: float, y2: float) -> List[int]:
+    """Id карточек с центром в прямоугольнике, для ``CardStore`` — по колонкам."""
+
+    if isinstance(cards, CardStore):
+        return cards.ids_with_center_in(x1, y1, x2, y2)
+    return [cid for cid, card in cards.items() if x1 <= card.x <= x2 and y1 <= card.y <= y2]
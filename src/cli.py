@@ -0,0 +1,408 @@
+"""
+Пакетная обработка файлов доски без интерфейса.
+
+Примеры::
+
+    python -m src.cli validate boards/*.json
+    python -m src.cli convert --to mboard -o out/ boards/*.json
+    python -m src.cli export --format svg -o out/ board.mboard
+    python -m src.cli stats --json boards/*
+
+Файлы обрабатываются параллельно в пуле процессов (``--jobs``), ход работы
+печатается в stderr. Код возврата: 0 — все файлы обработаны, 1 — часть файлов
+с ошибками, 2 — неверные аргументы.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from json import JSONDecodeError
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence
+
+from .board_io import (
+    CONTAINER_EXTENSION,
+    BoardContainer,
+    BoardFileError,
+    is_board_container,
+    read_board_file,
+    write_board_container,
+)
+from .attachment_store import AttachmentStore
+from .board_model import BoardData
+from .config import THEMES
+from .export import (
+    DEFAULT_TILE_SIZE,
+    SVG_ATTACHMENT_MODES,
+    board_bounds,
+    write_canvas_png,
+    write_png,
+    write_png_tiles,
+    write_svg,
+)
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+
+FORMAT_EXTENSIONS = {"json": ".json", "mboard": CONTAINER_EXTENSION}
+
+
+@dataclass
+class TaskResult:
+    path: str
+    ok: bool
+    message: str = ""
+    output: str | None = None
+    stats: Dict[str, Any] = field(default_factory=dict)
+
+
+# --- Операции над одним файлом (выполняются в процессах пула) ---
+
+
+def _read(path: Path, *, embed_attachments: bool = False) -> Dict[str, Any]:
+    if is_board_container(path):
+        with BoardContainer(path) as container:
+            return container.board_data(embed_attachments=embed_attachments)
+    return read_board_file(path)
+
+
+def validate_file(path: Path, options: Dict[str, Any]) -> TaskResult:
+    data = _read(path)
+    return TaskResult(str(path), True, f"схема {data['schema_version']}")
+
+
+def convert_file(path: Path, options: Dict[str, Any]) -> TaskResult:
+    target_format = options["to"]
+    output = _output_path(path, FORMAT_EXTENSIONS[target_format], options.get("output_dir"))
+    if output.resolve() == path.resolve():
+        return TaskResult(str(path), False, "файл уже в этом формате")
+    data = _read(path, embed_attachments=True)
+    if target_format == "mboard":
+        write_board_container(output, data)
+    else:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+    return TaskResult(str(path), True, f"-> {output}", output=str(output))
+
+
+def export_file(path: Path, options: Dict[str, Any]) -> TaskResult:
+    export_format = options["format"]
+    theme = THEMES[options.get("theme", "light")]
+    if export_format == "svg":
+        output = _output_path(path, ".svg", options.get("output_dir"))
+        width, height = _export_svg(path, output, theme, options.get("attachments", "embed"))
+        return TaskResult(str(path), True, f"-> {output} ({width}x{height})", output=str(output))
+
+    board = BoardData.from_primitive(_read(path))
+    raster = {
+        "scale": options.get("scale", 1.0),
+        "dpi": options.get("dpi"),
+        "region": options.get("region"),
+        "jobs": options.get("tile_jobs", 1),
+    }
+    if options.get("tiles"):
+        output = _output_path(path, "_tiles", options.get("output_dir"))
+        manifest = write_png_tiles(
+            board, output, theme=theme, tile_size=options.get("tile_size") or 512, **raster
+        )
+        level = manifest["levels"][0]
+        message = f"-> {output}/ ({level['width']}x{level['height']}, уровней {len(manifest['levels'])})"
+        return TaskResult(str(path), True, message, output=str(output))
+
+    output = _output_path(path, ".png", options.get("output_dir"))
+    if options.get("renderer") == "canvas":
+        del raster["jobs"]
+        width, height = write_canvas_png(board, output, theme=theme, **raster)
+    else:
+        width, height = write_png(
+            board, output, theme=theme, tile_size=options.get("tile_size") or DEFAULT_TILE_SIZE, **raster
+        )
+    return TaskResult(str(path), True, f"-> {output} ({width}x{height})", output=str(output))
+
+
+def _export_svg(path: Path, output: Path, theme: Dict[str, str], attachments: str) -> tuple[int, int]:
+    # Вложения контейнера читаются из архива по мере записи SVG, без base64 в памяти
+    container = BoardContainer(path) if is_board_container(path) else None
+    try:
+        data = container.board_data() if container else read_board_file(path)
+        store = AttachmentStore(path.parent / "attachments", max_bytes=0)  # только чтение
+        store.set_container(container)
+        return write_svg(
+            BoardData.from_primitive(data),
+            output,
+            theme=theme,
+            attachments=attachments,
+            attachment_reader=store.read_bytes,
+        )
+    finally:
+        if container is not None:
+            container.close()
+
+
+def stats_file(path: Path, options: Dict[str, Any]) -> TaskResult:
+    stats: Dict[str, Any] = {
+        "format": "mboard" if is_board_container(path) else "json",
+        "file_bytes": path.stat().st_size,
+    }
+    if stats["format"] == "mboard":
+        with BoardContainer(path) as container:
+
+            def size_of(attachment: Dict[str, Any]) -> int:
+                member = attachment.get("archive_member")
+                return container.attachment_size(member) if member else _base64_size(attachment)
+
+            stats.update(_collect_stats(container.board_data(), size_of))
+    else:
+        stats.update(_collect_stats(read_board_file(path), _base64_size))
+    message = (
+        f"карточек {stats['cards']}, связей {stats['connections']}, рамок {stats['frames']}, "
+        f"вложений {stats['attachments']} ({stats['attachment_bytes'] // 1024} КБ)"
+    )
+    return TaskResult(str(path), True, message, stats=stats)
+
+
+def _collect_stats(
+    data: Dict[str, Any], attachment_size: Callable[[Dict[str, Any]], int]
+) -> Dict[str, Any]:
+    board = BoardData.from_primitive(data)
+    attachments = [a for card in data["cards"] for a in card.get("attachments") or []]
+    bounds = board_bounds(board)
+    return {
+        "schema_version": data["schema_version"],
+        "cards": len(board.cards),
+        "connections": len(board.connections),
+        "frames": len(board.frames),
+        "attachments": len(attachments),
+        "attachment_bytes": sum(attachment_size(a) for a in attachments),
+        "text_chars": sum(len(card.text) for card in board.cards.values()),
+        "bounds": list(bounds) if bounds else None,
+    }
+
+
+def _base64_size(attachment: Dict[str, Any]) -> int:
+    encoded = attachment.get("data_base64") or ""
+    return len(encoded) * 3 // 4 - encoded[-2:].count("=")
+
+
+def _output_path(path: Path, suffix: str, output_dir: str | None) -> Path:
+    directory = Path(output_dir) if output_dir else path.parent
+    return directory / (path.stem + suffix)
+
+
+COMMANDS: Dict[str, Callable[[Path, Dict[str, Any]], TaskResult]] = {
+    "validate": validate_file,
+    "convert": convert_file,
+    "export": export_file,
+    "stats": stats_file,
+}
+
+
+def run_task(command: str, path: str, options: Dict[str, Any]) -> TaskResult:
+    """Выполняет команду над одним файлом и превращает ошибки в результат."""
+
+    try:
+        return COMMANDS[command](Path(path), options)
+    except JSONDecodeError as exc:
+        return TaskResult(path, False, f"некорректный JSON: {exc}")
+    except BoardFileError as exc:
+        return TaskResult(path, False, str(exc))
+    except ImportError:
+        return TaskResult(path, False, "для экспорта в PNG нужен пакет Pillow (pip install pillow)")
+    except (OSError, ValueError, KeyError, TypeError) as exc:
+        return TaskResult(path, False, str(exc) or exc.__class__.__name__)
+
+
+# --- Запуск ---
+
+
+def run_batch(
+    command: str,
+    paths: Sequence[str],
+    options: Dict[str, Any],
+    *,
+    jobs: int = 1,
+    progress: Callable[[int, int, TaskResult], None] | None = None,
+) -> List[TaskResult]:
+    """Обрабатывает файлы последовательно или в пуле процессов; результаты в порядке ``paths``."""
+
+    paths = list(dict.fromkeys(paths))
+    total = len(paths)
+    results: Dict[str, TaskResult] = {}
+
+    def report(result: TaskResult) -> None:
+        results[result.path] = result
+        if progress:
+            progress(len(results), total, result)
+
+    if jobs <= 1 or total <= 1:
+        for path in paths:
+            report(run_task(command, path, options))
+    else:
+        with ProcessPoolExecutor(max_workers=min(jobs, total)) as pool:
+            futures = [pool.submit(run_task, command, path, options) for path in paths]
+            for future in as_completed(futures):
+                report(future.result())
+    return [results[path] for path in paths]
+
+
+def _positive_int(value: str) -> int:
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError("ожидается целое число") from None
+    if number <= 0:
+        raise argparse.ArgumentTypeError("значение должно быть больше нуля")
+    return number
+
+
+def _positive_float(value: str) -> float:
+    try:
+        number = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError("ожидается число") from None
+    if not math.isfinite(number) or number <= 0:
+        raise argparse.ArgumentTypeError("значение должно быть конечным и больше нуля")
+    return number
+
+
+def _parse_region(value: str) -> tuple[float, float, float, float]:
+    try:
+        x1, y1, x2, y2 = (float(part) for part in value.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError("ожидается X1,Y1,X2,Y2") from None
+    if x2 <= x1 or y2 <= y1:
+        raise argparse.ArgumentTypeError("X2 и Y2 должны быть больше X1 и Y1")
+    return x1, y1, x2, y2
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.cli",
+        description="Пакетная обработка файлов доски Mini Miro без интерфейса.",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="число процессов (по умолчанию — число ядер)",
+    )
+    parser.add_argument("-q", "--quiet", action="store_true", help="не печатать ход работы")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    validate = sub.add_parser("validate", help="проверить файлы доски")
+    validate.add_argument("files", nargs="+")
+
+    convert = sub.add_parser("convert", help="преобразовать JSON <-> .mboard")
+    convert.add_argument("files", nargs="+")
+    convert.add_argument("--to", choices=sorted(FORMAT_EXTENSIONS), required=True)
+    convert.add_argument("-o", "--output-dir", help="папка для результатов")
+
+    export = sub.add_parser("export", help="экспортировать в PNG или SVG")
+    export.add_argument("files", nargs="+")
+    export.add_argument("--format", choices=("png", "svg"), default="png")
+    export.add_argument("--theme", choices=sorted(THEMES), default="light")
+    export.add_argument("--scale", type=_positive_float, default=1.0, help="масштаб PNG")
+    export.add_argument("--dpi", type=_positive_int, help="разрешение PNG (масштаб относительно 96 DPI)")
+    export.add_argument(
+        "--region",
+        type=_parse_region,
+        metavar="X1,Y1,X2,Y2",
+        help="экспортировать только область доски",
+    )
+    export.add_argument("--tile-size", type=_positive_int, help="размер тайла PNG в пикселях")
+    export.add_argument(
+        "--renderer",
+        choices=("model", "canvas"),
+        default="model",
+        help="PNG: model — тайлами по модели, canvas — тем же кодом, что и экран",
+    )
+    export.add_argument(
+        "--attachments",
+        choices=SVG_ATTACHMENT_MODES,
+        default="embed",
+        help="вложения в SVG: встроить, сослаться на файлы или пропустить",
+    )
+    export.add_argument(
+        "--tiles",
+        action="store_true",
+        help="писать PNG набором тайлов с уровнями уменьшения вместо одного файла",
+    )
+    export.add_argument("-o", "--output-dir", help="папка для результатов")
+
+    stats = sub.add_parser("stats", help="статистика по доскам")
+    stats.add_argument("files", nargs="+")
+    stats.add_argument("--json", action="store_true", help="вывести статистику в JSON")
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error("--jobs должен быть положительным")
+    if args.command == "export" and args.tiles and args.renderer == "canvas":
+        parser.error("--tiles работает только с --renderer model")
+    output_dir = getattr(args, "output_dir", None)
+    if args.command in {"convert", "export"}:
+        if args.command == "convert":
+            suffix = FORMAT_EXTENSIONS[args.to]
+        elif args.format == "png" and args.tiles:
+            suffix = "_tiles"
+        else:
+            suffix = f".{args.format}"
+        outputs: Dict[Path, str] = {}
+        for name in dict.fromkeys(args.files):
+            output = _output_path(Path(name), suffix, output_dir)
+            if output in outputs:
+                parser.error(f"{outputs[output]} и {name} дают один и тот же файл {output}")
+            outputs[output] = name
+    if output_dir:
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+
+    options = {
+        key: value
+        for key, value in vars(args).items()
+        if key not in {"files", "jobs", "quiet", "command", "json"}
+    }
+    # Один файл — пул процессов рисует его тайлы; много файлов — сами файлы
+    options["tile_jobs"] = args.jobs if len(set(args.files)) == 1 else 1
+
+    def progress(done: int, total: int, result: TaskResult) -> None:
+        status = "OK" if result.ok else "ОШИБКА"
+        print(f"[{done}/{total}] {status} {result.path}: {result.message}", file=sys.stderr)
+
+    results = run_batch(
+        args.command,
+        args.files,
+        options,
+        jobs=args.jobs,
+        progress=None if args.quiet else progress,
+    )
+
+    if args.command == "stats" and args.json:
+        payload = [
+            {"path": r.path, **r.stats} if r.ok else {"path": r.path, "error": r.message}
+            for r in results
+        ]
+        print(json.dumps(payload, ensure_ascii=False, indent=2))
+    elif args.command == "stats":
+        for result in results:
+            if result.ok:
+                print(f"{result.path}: {result.message}")
+
+    failed = sum(1 for r in results if not r.ok)
+    if not args.quiet:
+        print(f"Готово: {len(results) - failed} из {len(results)}, ошибок: {failed}", file=sys.stderr)
+    return EXIT_FAILED if failed else EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
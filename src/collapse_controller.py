@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, FrozenSet, Iterable, Set, Tuple
+
+from .board_index import frame_box
+
+if TYPE_CHECKING:
+    from .main import BoardApp
+
+
+def cards_count_label(count: int) -> str:
+    """«1 карточка», «3 карточки», «11 карточек»."""
+
+    if count % 10 == 1 and count % 100 != 11:
+        word = "карточка"
+    elif 2 <= count % 10 <= 4 and not 12 <= count % 100 <= 14:
+        word = "карточки"
+    else:
+        word = "карточек"
+    return f"{count} {word}"
+
+
+class CollapseController:
+    """
+    Свёрнутые рамки. Содержимое свёрнутой рамки не прячется, а убирается с
+    холста: у карточек удаляются прямоугольник, текст с подложкой, превью
+    вложений и маркеры, у их связей — линия и подпись. Такие элементы не
+    занимают память Tk и не пересчитываются при масштабе и перерисовке.
+    Вместо содержимого рамка показывает сводку — число карточек и миниатюру
+    их расположения. Элементы создаются заново при разворачивании.
+
+    Карточка скрыта, пока её покрывает хоть одна свёрнутая рамка; вложенная
+    рамка — пока свёрнута одна из внешних. Состав свёрнутых рамок кэшируется
+    по их версиям в ``FrameIndex``: ``refresh`` без перемен в свёрнутых
+    рамках ничего не пересчитывает.
+    """
+
+    def __init__(self, app: "BoardApp") -> None:
+        self.app = app
+        self.hidden_cards: Set[int] = set()
+        self.hidden_frames: Set[int] = set()
+        # Рамка -> (прямоугольник, состав), по которым нарисована её сводка
+        self._summaries: dict[int, Tuple[tuple, frozenset]] = {}
+        # Свёрнутая рамка -> (версия в FrameIndex, её карточки, вложенные рамки)
+        self._members: dict[int, Tuple[tuple, FrozenSet[int], FrozenSet[int]]] = {}
+        # Версии свёрнутых рамок и скрытое ими: последний результат collapsed_members
+        self._collapsed: Tuple[tuple, FrozenSet[int], FrozenSet[int]] | None = None
+        # Версии свёрнутых рамок, которым соответствует холст после refresh
+        self._applied: tuple | None = None
+
+    def is_hidden(self, card_id: int) -> bool:
+        return card_id in self.hidden_cards
+
+    def collapsed_members(self) -> Tuple[FrozenSet[int], FrozenSet[int]]:
+        """Карточки и рамки, скрытые хотя бы одной свёрнутой рамкой."""
+
+        state = self._collapsed_state()
+        collapsed = self._collapsed
+        if collapsed is None or collapsed[0] != state:
+            cards: Set[int] = set()
+            frames: Set[int] = set()
+            for frame_id, _revision in state:
+                _revision, frame_cards, nested = self._members[frame_id]
+                cards |= frame_cards
+                frames |= nested
+            collapsed = self._collapsed = (state, frozenset(cards), frozenset(frames))
+        return collapsed[1], collapsed[2]
+
+    def _collapsed_state(self) -> tuple:
+        """Свёрнутые рамки с версиями их состава; кэш остальных рамок сбрасывается."""
+
+        app = self.app
+        index = app.frame_index
+        state = []
+        for frame in app.frames.values():
+            if not frame.collapsed:
+                continue
+            revision = index.revision(frame.id)
+            cached = self._members.get(frame.id)
+            if cached is None or cached[0] != revision:
+                self._members[frame.id] = (
+                    revision,
+                    frozenset(index.cards_in(frame.id)),
+                    frozenset(index.nested_in(frame.id)),
+                )
+            state.append((frame.id, revision))
+        if len(self._members) > len(state):
+            collapsed = {frame_id for frame_id, _revision in state}
+            for frame_id in self._members.keys() - collapsed:
+                del self._members[frame_id]
+        return tuple(state)
+
+    def reset(self, hidden_cards: Iterable[int] = ()) -> None:
+        """Холст перерисован с нуля: скрытыми считаются карточки, которые не рисовались."""
+
+        self.hidden_cards = set(hidden_cards)
+        self.hidden_frames = set()
+        self._summaries.clear()
+        self._applied = None
+
+    def refresh(self) -> None:
+        """Приводит холст в соответствие со свёрнутыми рамками (затраты — по их составу)."""
+
+        cards, frames = self.collapsed_members()
+        state = self._collapsed[0]
+        if state == self._applied:
+            return
+        self._release_cards(cards - self.hidden_cards)
+        self._restore_cards(self.hidden_cards - cards)
+        self._set_hidden_frames(set(frames))
+        self._update_summaries()
+        self._applied = state
+
+    # ---------- Карточки и связи ----------
+
+    def _release_cards(self, card_ids: Set[int]) -> None:
+        if not card_ids:
+            return
+        app = self.app
+        self.hidden_cards |= card_ids
+        if app.selected_cards & card_ids:
+            app.selection_controller.set_card_selection(app.selected_cards - card_ids)
+        for card_id in card_ids:
+            app._clear_attachment_previews_for_card(card_id)
+            app._delete_card_items(card_id)
+        for conn in app.connection_index.of_cards(card_ids):
+            entry = app.items.connections.get(id(conn))
+            if entry is not None and entry[1].line_id:
+                app._discard_connection_items(conn)
+
+    def _restore_cards(self, card_ids: Set[int]) -> None:
+        if not card_ids:
+            return
+        app = self.app
+        self.hidden_cards -= card_ids
+        for card_id in card_ids:
+            card = app.cards.get(card_id)
+            if card is None:
+                continue
+            app.canvas_view.draw_card(card)
+            if card.attachments:
+                app.render_card_attachments(card_id)
+        hidden = self.hidden_cards
+        for conn in app.connection_index.of_cards(card_ids):
+            if conn.from_id in hidden or conn.to_id in hidden:
+                continue
+            from_card = app.cards.get(conn.from_id)
+            to_card = app.cards.get(conn.to_id)
+            if from_card is None or to_card is None:
+                continue
+            app.canvas_view.draw_connection(conn, from_card, to_card)
+        app.canvas.tag_raise("connection")
+        app.canvas.tag_raise("connection_label")
+
+    # ---------- Рамки ----------
+
+    def _set_hidden_frames(self, frame_ids: Set[int]) -> None:
+        app = self.app
+        frame_ids = {fid for fid in frame_ids if fid in app.frames}
+        if app.selected_frame_id in frame_ids:
+            app.selection_controller.select_frame(None)
+        for frame_id in frame_ids ^ self.hidden_frames:
+            if frame_id not in app.frames:
+                continue
+            state = "hidden" if frame_id in frame_ids else "normal"
+            items = app.items.frame(frame_id)
+            for item_id in (items.rect_id, items.title_id, *items.summary_ids):
+                if item_id:
+                    app.canvas.itemconfig(item_id, state=state)
+        self.hidden_frames = frame_ids
+
+    def _update_summaries(self) -> None:
+        app = self.app
+        view = app.canvas_view
+        for frame_id in list(self._summaries):
+            frame = app.frames.get(frame_id)
+            if frame is None or not frame.collapsed:
+                view.clear_frame_summary(frame_id)
+                del self._summaries[frame_id]
+        for frame in app.frames.values():
+            if not frame.collapsed:
+                continue
+            members = self._members[frame.id][1]
+            key = (frame_box(frame), members)
+            if self._summaries.get(frame.id) == key:
+                continue
+            self._summaries[frame.id] = key
+            cards = [app.cards[card_id] for card_id in members if card_id in app.cards]
+            view.draw_frame_summary(frame, cards, cards_count_label(len(cards)))
+            if frame.id in self.hidden_frames:
+                for item_id in app.items.frame(frame.id).summary_ids:
+                    app.canvas.itemconfig(item_id, state="hidden")
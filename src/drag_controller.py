@@ -2,14 +2,27 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
+from .board_model import (
+    CARD_ATTACHMENTS_CHANGED,
+    CONNECTION_CHANGED,
+    CONNECTION_RETARGETED,
+    FRAME_MOVED,
+    FRAME_RESIZED,
+)
+from .tracing import traced
+
 if TYPE_CHECKING:
     from .main import BoardApp
 
+# Перетаскивания, во время которых угловые связи не обходят карточки
+ROUTE_SUSPENDING_MODES = frozenset({"cards", "frame", "resize_card"})
+
 
 class DragController:
     def __init__(self, app: "BoardApp") -> None:
         self.app = app
 
+    @traced("drag.on_canvas_click")
     def on_canvas_click(self, event):
         app = self.app
         cx = app.canvas.canvasx(event.x)
@@ -66,7 +79,7 @@ class DragController:
                         }
                 return "break"
 
-        conn = app.get_connection_from_item(item_id)
+        conn = app.connection_at(cx, cy, item_id)
         if conn is not None:
             app.select_connection(conn)
             return "break"
@@ -147,9 +160,10 @@ class DragController:
 
         if "frame_handle" in tags:
             frame_id = app.get_frame_id_from_item(item)
-            if frame_id is not None:
+            if frame_id in app.frames:
                 app.selection_controller.select_frame(frame_id)
-                x1, y1, x2, y2 = app.canvas.coords(app.frames[frame_id].rect_id)
+                frame = app.frames[frame_id]
+                x1, y1, x2, y2 = frame.x1, frame.y1, frame.x2, frame.y2
                 handle_dir = next((t.split("_")[2] for t in tags if t.startswith("frame_handle_") and len(t.split("_")) == 3), None)
                 anchor = (x1, y1)
                 if handle_dir == "ne":
@@ -184,6 +198,7 @@ class DragController:
 
         app.drag_data["dragging"] = False
         app.drag_data["dragged_cards"] = set()
+        app.drag_data["dragged_frames"] = []
         app.drag_data["moved"] = False
         app.drag_data["mode"] = None
         app.drag_data["frame_id"] = None
@@ -203,6 +218,7 @@ class DragController:
         if app.selection_rect_id is not None:
             app.canvas.delete(app.selection_rect_id)
             app.selection_rect_id = None
+            app.selection_controller.clear_lasso_preview()
 
         if card_id is not None:
             if card_id in app.selected_cards:
@@ -223,11 +239,9 @@ class DragController:
             app.drag_data["frame_id"] = frame_id
             app.drag_data["last_x"] = cx
             app.drag_data["last_y"] = cy
-            x1, y1, x2, y2 = app.canvas.coords(app.frames[frame_id].rect_id)
-            app.drag_data["dragged_cards"] = {
-                cid for cid, card in app.cards.items()
-                if x1 <= card.x <= x2 and y1 <= card.y <= y2
-            }
+            # Вложенные рамки и все карточки внутри едут вместе с рамкой
+            app.drag_data["dragged_frames"] = [frame_id, *app.frame_index.nested_in(frame_id)]
+            app.drag_data["dragged_cards"] = app.frame_index.cards_in(frame_id)
         else:
             app.selection_controller.select_card(None)
             app.selection_start = (cx, cy)
@@ -239,6 +253,7 @@ class DragController:
                 tags=("selection_rect",),
             )
 
+    @traced("drag.on_mouse_drag")
     def on_mouse_drag(self, event):
         app = self.app
         cx = app.canvas.canvasx(event.x)
@@ -246,6 +261,9 @@ class DragController:
 
         if app.drag_data["dragging"]:
             mode = app.drag_data["mode"]
+            if mode in ROUTE_SUSPENDING_MODES:
+                # Обход карточек пересчитается после отпускания, пока — простой угол
+                app.elbow_router.suspended = True
 
             if mode == "resize_card":
                 card_id = app.drag_data["resize_card_id"]
@@ -270,7 +288,7 @@ class DragController:
                 y1 = oy1
                 x2 = new_x2
                 y2 = new_y2
-                app.canvas.coords(card.rect_id, x1, y1, x2, y2)
+                app.canvas.coords(app.items.card(card_id).rect_id, x1, y1, x2, y2)
                 width_scale = w / old_w if old_w else 1.0
                 height_scale = h / old_h if old_h else 1.0
                 app.update_card_layout(
@@ -305,9 +323,9 @@ class DragController:
                 new_scale = max(width_scale, height_scale)
                 new_scale = max(0.1, min(new_scale, 10.0))
                 attachment.preview_scale = new_scale
+                app.board_events.emit(CARD_ATTACHMENTS_CHANGED, (card_id,))
                 app.render_card_attachments(card_id)
                 app._show_attachment_selection(card_id, attachment)
-                app.update_minimap()
                 app.drag_data["moved"] = True
                 return
 
@@ -316,7 +334,8 @@ class DragController:
                 frame = app.frames.get(frame_id)
                 handle = app.drag_data["resize_frame_handle"]
                 anchor = app.drag_data["resize_frame_anchor"]
-                if not frame or not frame.rect_id or anchor is None:
+                frame_items = app.items.frame(frame_id)
+                if not frame or not frame_items.rect_id or anchor is None:
                     return
                 ax, ay = anchor
                 min_w = app.min_frame_width
@@ -339,12 +358,12 @@ class DragController:
                     new_x2 = max(cx, ax + min_w)
                     new_y2 = max(cy, ay + min_h)
 
-                app.canvas.coords(frame.rect_id, new_x1, new_y1, new_x2, new_y2)
-                if frame.title_id:
-                    app.canvas.coords(frame.title_id, new_x1 + 10, new_y1 + 15)
+                app.canvas.coords(frame_items.rect_id, new_x1, new_y1, new_x2, new_y2)
+                if frame_items.title_id:
+                    app.canvas.coords(frame_items.title_id, new_x1 + 10, new_y1 + 15)
                 frame.x1, frame.y1, frame.x2, frame.y2 = new_x1, new_y1, new_x2, new_y2
+                app.board_events.emit(FRAME_RESIZED, (frame_id,))
                 app.update_frame_handles_positions(frame_id)
-                app.update_minimap()
                 app.drag_data["moved"] = True
                 return
 
@@ -367,6 +386,7 @@ class DragController:
                 proj = (cx - start[0]) * dir_x + (cy - start[1]) * dir_y
                 new_radius = max(0.0, min(length * 0.6, proj))
                 conn.radius = new_radius
+                app.board_events.emit_connections(CONNECTION_CHANGED, (conn,))
                 app.canvas_view.update_connection_positions([conn], app.cards)
                 app.show_connection_handles(conn)
                 app.drag_data["moved"] = True
@@ -383,6 +403,7 @@ class DragController:
                 offset = (cx - baseline_mid[0]) * normal_x + (cy - baseline_mid[1]) * normal_y
                 offset = max(-length / 2, min(length / 2, offset))
                 conn.curvature = offset
+                app.board_events.emit_connections(CONNECTION_CHANGED, (conn,))
                 app.canvas_view.update_connection_positions([conn], app.cards)
                 app.show_connection_handles(conn)
                 app.drag_data["moved"] = True
@@ -418,6 +439,7 @@ class DragController:
                 else:
                     conn.to_id = target_id
                     conn.to_anchor = target_anchor
+                app.board_events.emit_connections(CONNECTION_RETARGETED, (conn,))
 
                 app.canvas_view.update_connection_positions([conn], app.cards)
                 if app.selected_connection is conn:
@@ -434,56 +456,37 @@ class DragController:
             app.drag_data["moved"] = True
 
             if mode == "cards":
-                for card_id in app.drag_data["dragged_cards"]:
-                    card = app.cards.get(card_id)
-                    if not card:
-                        continue
-                    card.x += dx
-                    card.y += dy
-                    x1 = card.x - card.width / 2
-                    y1 = card.y - card.height / 2
-                    x2 = card.x + card.width / 2
-                    y2 = card.y + card.height / 2
-                    app.canvas.coords(card.rect_id, x1, y1, x2, y2)
-                    app.update_card_layout(card_id, redraw_attachment=False)
-                    app.update_card_handles_positions(card_id)
-                    app.update_connections_for_card(card_id)
+                app.update_cards_geometry(app.cards.translate(app.drag_data["dragged_cards"], dx, dy))
 
             elif mode == "frame":
-                frame_id = app.drag_data["frame_id"]
-                frame = app.frames.get(frame_id)
-                if frame:
-                    app.canvas.move(frame.rect_id, dx, dy)
-                    app.canvas.move(frame.title_id, dx, dy)
-                    x1, y1, x2, y2 = app.canvas.coords(frame.rect_id)
-                    frame.x1, frame.y1, frame.x2, frame.y2 = x1, y1, x2, y2
-                    app.update_frame_handles_positions(frame_id)
-                    app.update_minimap()
-
-                for card_id in app.drag_data["dragged_cards"]:
-                    card = app.cards.get(card_id)
-                    if not card:
-                        continue
-                    card.x += dx
-                    card.y += dy
-                    x1 = card.x - card.width / 2
-                    y1 = card.y - card.height / 2
-                    x2 = card.x + card.width / 2
-                    y2 = card.y + card.height / 2
-                    app.canvas.coords(card.rect_id, x1, y1, x2, y2)
-                    app.update_card_layout(card_id, redraw_attachment=False)
-                    app.update_card_handles_positions(card_id)
-                    app.update_connections_for_card(card_id)
+                moved_frames = [fid for fid in app.drag_data["dragged_frames"] if fid in app.frames]
+                for fid in moved_frames:
+                    frame = app.frames[fid]
+                    frame_items = app.items.frame(fid)
+                    for item_id in (frame_items.rect_id, frame_items.title_id, *frame_items.summary_ids):
+                        app.canvas.move(item_id, dx, dy)
+                    frame.x1 += dx
+                    frame.y1 += dy
+                    frame.x2 += dx
+                    frame.y2 += dy
+                if moved_frames:
+                    app.board_events.emit(FRAME_MOVED, moved_frames)
+                    app.update_frame_handles_positions(app.drag_data["frame_id"])
+
+                app.update_cards_geometry(app.cards.translate(app.drag_data["dragged_cards"], dx, dy))
 
         elif app.selection_start is not None and app.selection_rect_id is not None:
             x0, y0 = app.selection_start
             app.canvas.coords(app.selection_rect_id, x0, y0, cx, cy)
+            app.selection_controller.preview_lasso(x0, y0, cx, cy)
 
+    @traced("drag.on_mouse_release")
     def on_mouse_release(self, event):
         app = self.app
         cx = app.canvas.canvasx(event.x)
         cy = app.canvas.canvasy(event.y)
         mode = app.drag_data["mode"]
+        app.elbow_router.suspended = False
 
         if mode == "connect_drag":
             from_id = app.drag_data["connect_from_card"]
@@ -545,7 +548,6 @@ class DragController:
         if mode == "resize_attachment":
             if app.drag_data["moved"]:
                 app.push_history()
-                app.update_minimap()
             app.drag_data["dragging"] = False
             app.drag_data["mode"] = None
             app.drag_data["resize_attachment"] = None
@@ -572,6 +574,7 @@ class DragController:
                     conn.to_id = original.get("to_id", conn.to_id)
                     conn.from_anchor = original.get("from_anchor")
                     conn.to_anchor = original.get("to_anchor")
+                    app.board_events.emit_connections(CONNECTION_RETARGETED, (conn,))
                     app.canvas_view.update_connection_positions([conn], app.cards)
                     app.show_connection_handles(conn)
             else:
@@ -589,20 +592,13 @@ class DragController:
 
         app.drag_data["dragging"] = False
         app.drag_data["dragged_cards"] = set()
+        app.drag_data["dragged_frames"] = []
         app.drag_data["moved"] = False
         app.drag_data["mode"] = None
 
         if app.selection_start is not None and app.selection_rect_id is not None:
             x1, y1, x2, y2 = app.canvas.coords(app.selection_rect_id)
-            left = min(x1, x2)
-            right = max(x1, x2)
-            top = min(y1, y2)
-            bottom = max(y1, y2)
-
-            app.selection_controller.select_card(None)
-            for card_id, card in app.cards.items():
-                if left <= card.x <= right and top <= card.y <= bottom:
-                    app.selection_controller.select_card(card_id, additive=True)
+            app.selection_controller.finish_lasso(x1, y1, x2, y2)
 
             app.canvas.delete(app.selection_rect_id)
             app.selection_rect_id = None
@@ -0,0 +1,425 @@
+"""
+Обход препятствий для угловых связей (без Tk).
+
+Связь стиля ``elbow`` прокладывается ортогональной ломаной в обход карточек.
+Граф видимости строится не по пиксельной сетке, а по редкой: вертикали и
+горизонтали проходят только по краям карточек (с отступом), по точкам выхода
+из якорей и по середине между ними. A* ищет по этой сетке путь с наименьшей
+суммой длины, штрафов за изгибы и за пересечения границ рамок.
+
+Маршрут ищется в окрестности концов связи: карточки для неё берутся из
+``CardIndex``. ``ElbowRouter`` хранит найденные маршруты и по событиям
+``BoardEvents`` сбрасывает только те, чью окрестность задела сдвинутая
+карточка или рамка. Сброшенные связи копятся в ``take_rerouted`` — их нужно
+перерисовать. Пока маршрутизация приостановлена (перетаскивание), связи
+рисуются простым углом.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+from bisect import bisect_left
+from typing import Callable, Dict, List, Mapping, Sequence, Set, Tuple
+
+from . import geometry
+from .board_index import frame_box
+from .board_model import (
+    BOARD_REPLACED,
+    CARD_ADDED,
+    CARD_MOVED,
+    CARD_REMOVED,
+    CARD_RESIZED,
+    CONNECTION_CHANGED,
+    CONNECTION_REMOVED,
+    CONNECTION_RETARGETED,
+    DEFAULT_CONNECTION_STYLE,
+    FRAME_ADDED,
+    FRAME_MOVED,
+    FRAME_REMOVED,
+    FRAME_RESIZED,
+    BoardChange,
+    BoardEvents,
+    Card,
+    Connection,
+    Frame,
+)
+from .spatial_index import Box, CardIndex, GridIndex, card_box
+
+# Зазор между линией связи и карточками; столько же длина выхода из якоря
+ROUTE_MARGIN = 16.0
+# Изгиб стоит как столько пикселей пути
+BEND_PENALTY = 60.0
+# Лишнее пересечение границы рамки
+FRAME_CROSSING_PENALTY = 200.0
+# Запас вокруг концов связи, в котором ищется обход
+SEARCH_PADDING = 120.0
+# Больше препятствий в окрестности — связь рисуется простым углом
+MAX_ROUTE_OBSTACLES = 48
+
+_CARD_PLACEMENT = (CARD_ADDED, CARD_REMOVED, CARD_MOVED, CARD_RESIZED)
+_FRAME_PLACEMENT = (FRAME_ADDED, FRAME_REMOVED, FRAME_MOVED, FRAME_RESIZED)
+
+# Направления: восток, юг, запад, север
+_STEPS = ((1, 0), (0, 1), (-1, 0), (0, -1))
+_ANCHOR_STEP = {"e": 0, "s": 1, "w": 2, "n": 3}
+
+Waypoints = Tuple[float, ...]
+
+
+def _inflate(box: Box, margin: float) -> Box:
+    return box[0] - margin, box[1] - margin, box[2] + margin, box[3] + margin
+
+
+def _strictly_inside(box: Box, x: float, y: float) -> bool:
+    return box[0] < x < box[2] and box[1] < y < box[3]
+
+
+def _simplify(points: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
+    """Убирает повторы и точки посреди прямого участка."""
+
+    result: List[Tuple[float, float]] = []
+    for point in points:
+        if result and point == result[-1]:
+            continue
+        if len(result) >= 2:
+            (ax, ay), (bx, by) = result[-2], result[-1]
+            if (ax == bx == point[0]) or (ay == by == point[1]):
+                result[-1] = point
+                continue
+        result.append(point)
+    return result
+
+
+def route_orthogonal(
+    start: Tuple[float, float],
+    start_anchor: str,
+    end: Tuple[float, float],
+    end_anchor: str,
+    obstacles: Sequence[Box],
+    frames: Sequence[Box] = (),
+    margin: float = ROUTE_MARGIN,
+    region: Box | None = None,
+) -> Waypoints | None:
+    """
+    Ортогональный путь от точки ``start`` на стороне ``start_anchor`` карточки
+    до ``end`` на стороне ``end_anchor``. Путь выходит из якорей наружу на
+    ``margin``, не заходит внутрь препятствий, раздутых на ``margin``, и не
+    покидает ``region``. Возвращает плоский список точек между концами или
+    ``None``, если пути нет.
+    """
+
+    sx, sy = start
+    tx, ty = end
+    start_dir = _ANCHOR_STEP.get(start_anchor, 0)
+    end_dir = _ANCHOR_STEP.get(end_anchor, 2)
+    ox, oy = _STEPS[start_dir]
+    px, py = sx + ox * margin, sy + oy * margin
+    ex, ey = _STEPS[end_dir]
+    qx, qy = tx + ex * margin, ty + ey * margin
+    # Направление последнего участка — внутрь карточки назначения
+    arrive_dir = (end_dir + 2) % 4
+
+    blocking = []
+    for box in obstacles:
+        inflated = _inflate(box, margin)
+        # Соседняя карточка вплотную к якорю не должна запирать выход из него
+        if _strictly_inside(inflated, px, py) or _strictly_inside(inflated, qx, qy):
+            continue
+        blocking.append(inflated)
+
+    if region is None:
+        region = (
+            min(px, qx) - SEARCH_PADDING,
+            min(py, qy) - SEARCH_PADDING,
+            max(px, qx) + SEARCH_PADDING,
+            max(py, qy) + SEARCH_PADDING,
+        )
+    xs_set = {px, qx, (px + qx) / 2, region[0], region[2]}
+    ys_set = {py, qy, (py + qy) / 2, region[1], region[3]}
+    for x1, y1, x2, y2 in blocking:
+        xs_set.update((x1, x2))
+        ys_set.update((y1, y2))
+    xs = sorted(x for x in xs_set if region[0] <= x <= region[2])
+    ys = sorted(y for y in ys_set if region[1] <= y <= region[3])
+
+    si, sj = bisect_left(xs, px), bisect_left(ys, py)
+    ti, tj = bisect_left(xs, qx), bisect_left(ys, qy)
+    if si >= len(xs) or xs[si] != px or sj >= len(ys) or ys[sj] != py:
+        return None
+    if ti >= len(xs) or xs[ti] != qx or tj >= len(ys) or ys[tj] != qy:
+        return None
+
+    blocked_memo: Dict[Tuple[float, float], bool] = {}
+
+    def blocked(x: float, y: float) -> bool:
+        # Края препятствий — линии сетки, поэтому отрезок между соседними
+        # линиями либо целиком внутри препятствия, либо снаружи: хватает середины
+        hit = blocked_memo.get((x, y))
+        if hit is None:
+            hit = any(_strictly_inside(box, x, y) for box in blocking)
+            blocked_memo[(x, y)] = hit
+        return hit
+
+    def crossings(x1: float, y1: float, x2: float, y2: float) -> int:
+        total = 0
+        lo_x, hi_x = min(x1, x2), max(x1, x2)
+        lo_y, hi_y = min(y1, y2), max(y1, y2)
+        for fx1, fy1, fx2, fy2 in frames:
+            if y1 == y2:
+                if fy1 < y1 < fy2:
+                    total += (lo_x < fx1 < hi_x) + (lo_x < fx2 < hi_x)
+            elif fx1 < x1 < fx2:
+                total += (lo_y < fy1 < hi_y) + (lo_y < fy2 < hi_y)
+        return total
+
+    def finish_cost(direction: int) -> float:
+        if direction == arrive_dir:
+            return 0.0
+        # Подход навстречу выходу — это разворот, два изгиба
+        return 2 * BEND_PENALTY if direction == end_dir else BEND_PENALTY
+
+    order = itertools.count()
+    start_state = (si, sj, start_dir)
+    best: Dict[Tuple[int, int, int], float] = {start_state: 0.0}
+    parent: Dict[Tuple[int, int, int], Tuple[int, int, int] | None] = {start_state: None}
+    queue: List[tuple] = [(abs(px - qx) + abs(py - qy), next(order), 0.0, start_state, False)]
+    goal_state = None
+    while queue:
+        _f, _n, cost, state, done = heapq.heappop(queue)
+        if done:
+            goal_state = state
+            break
+        if cost > best.get(state, float("inf")):
+            continue
+        i, j, direction = state
+        x, y = xs[i], ys[j]
+        if i == ti and j == tj:
+            heapq.heappush(queue, (cost + finish_cost(direction), next(order), cost, state, True))
+        for step, (di, dj) in enumerate(_STEPS):
+            if step == (direction + 2) % 4:
+                continue
+            ni, nj = i + di, j + dj
+            if not (0 <= ni < len(xs) and 0 <= nj < len(ys)):
+                continue
+            nx, ny = xs[ni], ys[nj]
+            if blocked((x + nx) / 2, (y + ny) / 2):
+                continue
+            new_cost = cost + abs(nx - x) + abs(ny - y)
+            if step != direction:
+                new_cost += BEND_PENALTY
+            if frames:
+                new_cost += FRAME_CROSSING_PENALTY * crossings(x, y, nx, ny)
+            new_state = (ni, nj, step)
+            if new_cost < best.get(new_state, float("inf")):
+                best[new_state] = new_cost
+                parent[new_state] = state
+                heuristic = abs(nx - qx) + abs(ny - qy)
+                heapq.heappush(queue, (new_cost + heuristic, next(order), new_cost, new_state, False))
+
+    if goal_state is None:
+        return None
+    path: List[Tuple[float, float]] = []
+    state = goal_state
+    while state is not None:
+        path.append((xs[state[0]], ys[state[1]]))
+        state = parent[state]
+    path.reverse()
+    points = _simplify([(sx, sy), *path, (tx, ty)])
+    return tuple(coord for point in points[1:-1] for coord in point)
+
+
+class ElbowRouter:
+    """
+    Маршруты угловых связей с обходом карточек. ``cards`` и ``frames``
+    возвращают текущие словари доски, ``card_index`` ищет карточки в
+    окрестности связи.
+
+    Маршрут связи запоминается вместе с её окрестностью, карточками и
+    рамками, по которым он построен. Сдвиг, добавление или удаление карточки
+    или рамки сбрасывает маршруты, которых они касались или в окрестность
+    которых попали, — остальные связи не пересчитываются.
+    """
+
+    def __init__(
+        self,
+        cards: Callable[[], Mapping[int, Card]],
+        frames: Callable[[], Mapping[int, Frame]],
+        card_index: CardIndex,
+        events: BoardEvents | None = None,
+    ) -> None:
+        self._cards = cards
+        self._frames = frames
+        self.card_index = card_index
+        # id(связи) -> (связь, ключ концов, маршрут или None)
+        self._routes: Dict[int, Tuple[Connection, tuple, Waypoints | None]] = {}
+        self._regions = GridIndex()
+        self._by_card: Dict[int, Set[int]] = {}
+        self._by_frame: Dict[int, Set[int]] = {}
+        self._route_cards: Dict[int, Tuple[int, ...]] = {}
+        self._route_frames: Dict[int, Tuple[int, ...]] = {}
+        self._rerouted: Dict[int, Connection] = {}
+        # Во время перетаскивания связи рисуются простым углом
+        self.suspended = False
+        self.hits = 0
+        self.misses = 0
+        if events is not None:
+            events.subscribe(
+                self._on_change,
+                (
+                    *_CARD_PLACEMENT,
+                    *_FRAME_PLACEMENT,
+                    CONNECTION_REMOVED,
+                    CONNECTION_RETARGETED,
+                    CONNECTION_CHANGED,
+                    BOARD_REPLACED,
+                ),
+            )
+
+    def __len__(self) -> int:
+        return len(self._routes)
+
+    def _on_change(self, change: BoardChange) -> None:
+        if BOARD_REPLACED in change:
+            self.clear()
+            return
+        for kind in (CONNECTION_REMOVED, CONNECTION_RETARGETED, CONNECTION_CHANGED):
+            for conn in change.connections(kind):
+                self._forget(id(conn))
+                if kind == CONNECTION_REMOVED:
+                    self._rerouted.pop(id(conn), None)
+        if not self._routes:
+            return
+        affected: Set[int] = set()
+        cards = self._cards()
+        for kind in _CARD_PLACEMENT:
+            for card_id in change.ids(kind):
+                affected |= self._by_card.get(card_id, set())
+                card = cards.get(card_id)
+                if card is not None:
+                    affected.update(self._regions.query(*card_box(card)))
+        frames = self._frames()
+        for kind in _FRAME_PLACEMENT:
+            for frame_id in change.ids(kind):
+                affected |= self._by_frame.get(frame_id, set())
+                frame = frames.get(frame_id)
+                if frame is not None:
+                    affected.update(self._regions.query(*frame_box(frame)))
+        for key in affected:
+            entry = self._routes.get(key)
+            if entry is not None:
+                self._rerouted[key] = entry[0]
+                self._forget(key)
+
+    def _forget(self, key: int) -> None:
+        if self._routes.pop(key, None) is None:
+            return
+        self._regions.remove(key)
+        for card_id in self._route_cards.pop(key, ()):
+            routes = self._by_card.get(card_id)
+            if routes is not None:
+                routes.discard(key)
+                if not routes:
+                    del self._by_card[card_id]
+        for frame_id in self._route_frames.pop(key, ()):
+            routes = self._by_frame.get(frame_id)
+            if routes is not None:
+                routes.discard(key)
+                if not routes:
+                    del self._by_frame[frame_id]
+
+    def clear(self) -> None:
+        self._routes.clear()
+        self._regions.clear()
+        self._by_card.clear()
+        self._by_frame.clear()
+        self._route_cards.clear()
+        self._route_frames.clear()
+        self._rerouted.clear()
+
+    def take_rerouted(self) -> List[Connection]:
+        """Связи, маршрут которых сброшен или отложен с прошлого вызова."""
+
+        rerouted = list(self._rerouted.values())
+        self._rerouted.clear()
+        return rerouted
+
+    def cache_stats(self) -> Tuple[int, int]:
+        """``(попадания, промахи)`` кэша маршрутов."""
+
+        return self.hits, self.misses
+
+    def route(self, connection: Connection, from_card: Card, to_card: Card) -> Waypoints | None:
+        """
+        Промежуточные точки угловой связи или ``None`` — тогда связь рисуется
+        простым углом (другой стиль, перетаскивание, пути нет).
+        """
+
+        if getattr(connection, "style", DEFAULT_CONNECTION_STYLE) != "elbow":
+            return None
+        key = id(connection)
+        if self.suspended:
+            # Маршрут пересчитается, когда перетаскивание закончится
+            self._rerouted[key] = connection
+            return None
+        sx, sy, tx, ty = geometry.connection_anchors(from_card, to_card, connection)
+        ends = (sx, sy, tx, ty, connection.from_anchor, connection.to_anchor)
+        entry = self._routes.get(key)
+        if entry is not None and entry[0] is connection and entry[1] == ends:
+            self.hits += 1
+            return entry[2]
+        self.misses += 1
+        self._forget(key)
+        waypoints = self._compute(key, connection, (sx, sy), (tx, ty))
+        self._routes[key] = (connection, ends, waypoints)
+        return waypoints
+
+    def _compute(
+        self, key: int, connection: Connection, start: Tuple[float, float], end: Tuple[float, float]
+    ) -> Waypoints | None:
+        margin = ROUTE_MARGIN
+        pad = SEARCH_PADDING
+        near = (
+            min(start[0], end[0]) - pad,
+            min(start[1], end[1]) - pad,
+            max(start[0], end[0]) + pad,
+            max(start[1], end[1]) + pad,
+        )
+        # Окрестность растягивается на задетые карточки, чтобы их можно было обойти
+        cards = self._cards()
+        region = near
+        for card_id in self.card_index.ids_in(*near):
+            x1, y1, x2, y2 = _inflate(card_box(cards[card_id]), 2 * margin)
+            region = (min(region[0], x1), min(region[1], y1), max(region[2], x2), max(region[3], y2))
+        card_ids = tuple(self.card_index.ids_in(*region))
+        frames = self._frames()
+        frame_ids = tuple(
+            frame_id
+            for frame_id, frame in frames.items()
+            if self._boxes_touch(frame_box(frame), region)
+        )
+
+        self._regions.insert(key, region)
+        self._route_cards[key] = card_ids
+        for card_id in card_ids:
+            self._by_card.setdefault(card_id, set()).add(key)
+        self._route_frames[key] = frame_ids
+        for frame_id in frame_ids:
+            self._by_frame.setdefault(frame_id, set()).add(key)
+
+        if len(card_ids) > MAX_ROUTE_OBSTACLES:
+            return None
+        return route_orthogonal(
+            start,
+            connection.from_anchor,
+            end,
+            connection.to_anchor,
+            [card_box(cards[card_id]) for card_id in card_ids],
+            [frame_box(frames[frame_id]) for frame_id in frame_ids],
+            margin=margin,
+            region=region,
+        )
+
+    @staticmethod
+    def _boxes_touch(a: Box, b: Box) -> bool:
+        return a[0] <= b[2] and a[2] >= b[0] and a[1] <= b[3] and a[3] >= b[1]
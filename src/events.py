@@ -1,7 +1,12 @@
 from __future__ import annotations
 
+import functools
 from dataclasses import dataclass
-from typing import Iterable, List, Sequence
+from typing import TYPE_CHECKING, Any, Callable, Iterable, List, Sequence
+
+if TYPE_CHECKING:
+    from .input_recorder import InputRecorder
+    from .perf_monitor import PerfMonitor
 
 
 @dataclass(frozen=True)
@@ -44,27 +49,74 @@ HOTKEYS: List[Hotkey] = [
         ("<Control-Shift-d>", "<Control-Shift-D>"),
         "toggle_selected_connection_direction",
     ),
+    Hotkey("toggle_tracing", ("<Control-Shift-t>", "<Control-Shift-T>"), "toggle_tracing"),
+    Hotkey("toggle_perf_hud", ("<Control-Shift-p>", "<Control-Shift-P>"), "toggle_perf_hud"),
+    Hotkey(
+        "toggle_input_recording",
+        ("<Control-Shift-r>", "<Control-Shift-R>"),
+        "toggle_input_recording",
+    ),
 ]
 
+# Handlers that leave the board untouched and stay active while a board loads
+LOAD_SAFE_HANDLERS = frozenset(
+    {"start_pan", "do_pan", "toggle_tracing", "toggle_perf_hud", "toggle_input_recording"}
+)
+
 
 class EventBinder:
-    """Registers keyboard and mouse bindings for the application."""
+    """
+    Registers keyboard and mouse bindings for the application.
+
+    With a ``monitor`` every handler is wrapped by ``PerfMonitor.wrap`` under
+    its handler name, so latency stats and slow-call reports name the binding.
+    With a ``recorder`` every dispatched event is also passed to
+    ``InputRecorder.wrap`` together with its sequence, outside the monitor.
+    With a ``busy`` callable, handlers outside ``LOAD_SAFE_HANDLERS`` ignore
+    their events while it returns true (a board is still loading).
+    """
 
     def __init__(self, mouse_bindings: Iterable[MouseBinding] | None = None,
-                 hotkeys: Iterable[Hotkey] | None = None) -> None:
+                 hotkeys: Iterable[Hotkey] | None = None,
+                 monitor: "PerfMonitor | None" = None,
+                 recorder: "InputRecorder | None" = None,
+                 busy: Callable[[], bool] | None = None) -> None:
         self.mouse_bindings = list(mouse_bindings or MOUSE_BINDINGS)
         self.hotkeys = list(hotkeys or HOTKEYS)
+        self.monitor = monitor
+        self.recorder = recorder
+        self.busy = busy
+
+    def handler_for(self, app, name: str, sequence: str = "", kind: str = "mouse") -> Callable[..., Any]:
+        handler = getattr(app, name)
+        if self.busy is not None and name not in LOAD_SAFE_HANDLERS:
+            handler = _unless_busy(self.busy, handler)
+        if self.monitor is not None:
+            handler = self.monitor.wrap(name, handler)
+        if self.recorder is not None:
+            handler = self.recorder.wrap(name, sequence, kind, handler)
+        return handler
 
     def bind(self, app) -> None:
         canvas = app.canvas
         for binding in self.mouse_bindings:
-            handler = getattr(app, binding.handler)
+            handler = self.handler_for(app, binding.handler, binding.sequence)
             canvas.bind(binding.sequence, handler)
 
         for hotkey in self.hotkeys:
-            handler = getattr(app, hotkey.handler)
             for sequence in hotkey.sequences:
+                handler = self.handler_for(app, hotkey.handler, sequence, "hotkey")
                 app.root.bind_all(sequence, handler)
 
     def hotkey_table(self) -> List[Hotkey]:
         return list(self.hotkeys)
+
+
+def _unless_busy(busy: Callable[[], bool], handler: Callable[..., Any]) -> Callable[..., Any]:
+    @functools.wraps(handler)
+    def guarded(*args: Any, **kwargs: Any) -> Any:
+        if busy():
+            return None
+        return handler(*args, **kwargs)
+
+    return guarded
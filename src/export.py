@@ -0,0 +1,809 @@
+"""Экспорт доски в PNG и SVG по данным модели, без Tk."""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Sequence, TextIO
+from xml.sax.saxutils import escape, quoteattr
+
+from .board_model import Attachment, BoardData, Card, Connection
+from .card_store import card_boxes
+from .elbow_router import ElbowRouter
+from .geometry import connection_geometry, label_position
+from .render_backend import _arrow_head, anchored_box
+from .spatial_index import CardIndex
+from .text_layout import (
+    TextBlock,
+    TextLayoutEngine,
+    card_layout,
+    font_key,
+    headless_engine,
+    pillow_font,
+    responsive_scale,
+)
+
+EXPORT_PADDING = 20
+
+
+ConnectionPath = tuple[Connection, Sequence[float], tuple[float, float]]
+
+
+def board_bounds(
+    board: BoardData, paths: Sequence[ConnectionPath] | None = None
+) -> tuple[float, float, float, float] | None:
+    """
+    Общий прямоугольник карточек, рамок и связей или ``None`` для пустой доски.
+    ``paths`` — уже построенные ``_connection_paths(board)``: экспорт считает
+    маршруты один раз и для габаритов, и для рисования.
+    """
+
+    if paths is None:
+        paths = _connection_paths(board)
+    boxes = [(f.x1, f.y1, f.x2, f.y2) for f in board.frames.values()]
+    boxes.extend(card_boxes(board.cards))
+    for _conn, coords, _label_xy in paths:
+        boxes.append(_polyline_box(coords))
+    if not boxes:
+        return None
+    return (
+        min(b[0] for b in boxes),
+        min(b[1] for b in boxes),
+        max(b[2] for b in boxes),
+        max(b[3] for b in boxes),
+    )
+
+
+def _connection_paths(board: BoardData) -> List[ConnectionPath]:
+    """Связи с той же ломаной и точкой подписи, что и на холсте."""
+
+    router = board_router(board)
+    paths = []
+    for conn in board.connections:
+        from_card = board.cards.get(conn.from_id)
+        to_card = board.cards.get(conn.to_id)
+        if from_card is None or to_card is None:
+            continue
+        waypoints = router.route(conn, from_card, to_card)
+        coords, render_info = connection_geometry(conn, from_card, to_card, waypoints)
+        paths.append((conn, coords, label_position(coords, render_info)))
+    return paths
+
+
+def board_router(board: BoardData) -> ElbowRouter:
+    """Маршруты угловых связей доски вне приложения: экспорт, бенчмарки."""
+
+    return ElbowRouter(lambda: board.cards, lambda: board.frames, CardIndex(lambda: board.cards))
+
+
+def _polyline_box(coords: Sequence[float]) -> tuple[float, float, float, float]:
+    xs = coords[0::2]
+    ys = coords[1::2]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def _card_box(card: Card) -> tuple[float, float, float, float]:
+    return (
+        card.x - card.width / 2,
+        card.y - card.height / 2,
+        card.x + card.width / 2,
+        card.y + card.height / 2,
+    )
+
+
+# --- Текст: те же шрифты, якоря и переносы, что у ``CanvasView`` ---
+
+FRAME_TITLE_FONT = ("Arial", 10, "bold")
+LABEL_FONT = ("Arial", 9, "italic")
+
+
+def _placed_text(
+    text: str, font: Any, x: float, y: float, anchor: str, engine: TextLayoutEngine
+) -> tuple[float, float, TextBlock]:
+    """Левый верхний угол и раскладка текста, привязанного к ``(x, y)`` якорем Tk."""
+
+    block = engine.layout(text, font=font)
+    left, top, _right, _bottom = anchored_box(x, y, block.width, block.height, anchor)
+    return left, top, block
+
+
+def _card_text(card: Card, engine: TextLayoutEngine) -> tuple[float, Dict[str, Any]]:
+    """
+    Раскладка карточки как на холсте шириной больше 480 px и левый край
+    её текста: блок строк центрирован по карточке, строки — по левому краю.
+    """
+
+    layout = card_layout(card, engine.layout, scale=responsive_scale(card.width))
+    return card.x - layout["block"].width / 2, layout
+
+
+# --- PNG: тайлы, которые рисуются независимо и параллельно ---
+
+DEFAULT_TILE_SIZE = 2048
+# Больше этого write_png держит в памяти слишком большое полотно (3 байта на пиксель)
+PNG_PIXEL_BUDGET = 64_000_000
+BASE_DPI = 96
+_TEXT_BLEED = 4  # запас на выносные элементы глифов при раскладке текста по тайлам
+# Поле вокруг тайла: текст и кисть линий у края тайла рисуются целиком
+_TILE_MARGIN = 16
+
+
+def select_cards(board: BoardData, card_ids: Iterable[int]) -> BoardData:
+    """Часть доски: выбранные карточки и связи между ними."""
+
+    ids = set(card_ids)
+    cards = {cid: card for cid, card in board.cards.items() if cid in ids}
+    connections = [c for c in board.connections if c.from_id in ids and c.to_id in ids]
+    return BoardData(cards=cards, connections=connections, frames={})
+
+
+def _raster_ops(
+    board: BoardData,
+    theme: Dict[str, str],
+    paths: Sequence[ConnectionPath],
+    text_engine: TextLayoutEngine,
+) -> List[tuple]:
+    """
+    Плоский список операций рисования в координатах доски в порядке слоёв:
+    рамки, связи, карточки; текст идёт сразу за своей фигурой. Каждая
+    операция начинается с габаритов, по которым она раскладывается по тайлам.
+    """
+
+    ops: List[tuple] = []
+    for frame in board.frames.values():
+        fill = theme["frame_collapsed_bg"] if frame.collapsed else theme["frame_bg"]
+        bbox = (frame.x1, frame.y1, frame.x2, frame.y2)
+        ops.append((_inflate(bbox, 1), "frame", frame.x1, frame.y1, frame.x2, frame.y2, fill))
+        if frame.title:
+            left, top, block = _placed_text(
+                frame.title, FRAME_TITLE_FONT, frame.x1 + 10, frame.y1 + 15, "w", text_engine
+            )
+            ops.append(_text_op(left, top, block, FRAME_TITLE_FONT, theme["text"]))
+    for conn, coords, (mx, my) in paths:
+        # Запас под наконечник: крылья отходят от линии на 4 единицы доски
+        ops.append((_inflate(_polyline_box(coords), 5), "line", tuple(coords), conn.direction))
+        if conn.label:
+            left, top, block = _placed_text(conn.label, LABEL_FONT, mx, my, "center", text_engine)
+            ops.append(_text_op(left, top, block, LABEL_FONT, theme["connection_label"]))
+    for card in board.cards.values():
+        box = _card_box(card)
+        ops.append((_inflate(box, 1), "card", *box, card.color or theme["card_default"]))
+        if card.text:
+            left, layout = _card_text(card, text_engine)
+            ops.append(_text_op(left, layout["text_top"], layout["block"], layout["font"], theme["text"]))
+    return ops
+
+
+def _text_op(left: float, top: float, block: TextBlock, font: Any, fill: str) -> tuple:
+    bbox = (left, top, left + block.width, top + block.height)
+    margin = _TEXT_BLEED + block.width * 0.1
+    return (_inflate(bbox, margin), "text", left, top, block.lines, font, block.line_height, fill)
+
+
+def _inflate(bbox: tuple[float, float, float, float], margin: float) -> tuple[float, float, float, float]:
+    return bbox[0] - margin, bbox[1] - margin, bbox[2] + margin, bbox[3] + margin
+
+
+class _TileRenderer:
+    """Рисует прямоугольные куски изображения по общему списку операций."""
+
+    def __init__(self, ops: List[tuple], theme: Dict[str, str], origin: tuple[float, float], scale: float):
+        self.ops = ops
+        self.theme = theme
+        self.origin = origin
+        self.scale = scale
+        self.line_width = max(1, round(2 * scale))
+        self.brush = _brush_offsets(self.line_width)
+
+    def render(self, left: int, top: int, width: int, height: int, indices: Sequence[int]):
+        from PIL import Image, ImageDraw
+
+        theme = self.theme
+        ox, oy = self.origin
+        scale = self.scale
+        margin = _TILE_MARGIN
+        img = Image.new("RGB", (width + 2 * margin, height + 2 * margin), theme["bg"])
+        draw = ImageDraw.Draw(img)
+        dx = left - margin
+        dy = top - margin
+
+        def map_xy(x, y):
+            # Точки округляются по сетке всего изображения, а не тайла: иначе
+            # Pillow округлял бы их от начала каждого тайла, и швы были бы видны
+            return (round((x - ox) * scale) - dx, round((y - oy) * scale) - dy)
+
+        for index in indices:
+            op = self.ops[index]
+            kind = op[1]
+            if kind == "frame":
+                _bbox, _kind, x1, y1, x2, y2, fill = op
+                mx1, my1 = map_xy(x1, y1)
+                mx2, my2 = map_xy(x2, y2)
+                draw.rectangle([mx1, my1, mx2, my2], outline=theme["frame_outline"], fill=fill)
+            elif kind == "line":
+                points = [map_xy(x, y) for x, y in zip(op[2][0::2], op[2][1::2])]
+                # Широкая линия Pillow считается в float и зависит от начала
+                # тайла; тонкие линии целочисленны, из них и набирается кисть
+                for bx, by in self.brush:
+                    draw.line([(x + bx, y + by) for x, y in points], fill=theme["connection"], width=1)
+                draw.polygon(self._arrow(op[2], op[3], dx, dy), fill=theme["connection"])
+            elif kind == "card":
+                _bbox, _kind, x1, y1, x2, y2, fill = op
+                mx1, my1 = map_xy(x1, y1)
+                mx2, my2 = map_xy(x2, y2)
+                draw.rectangle([mx1, my1, mx2, my2], fill=fill, outline=theme["card_outline"])
+            else:
+                _bbox, _kind, x, y, lines, font, line_height, fill = op
+                pil_font = pillow_font(font, scale)
+                for number, line in enumerate(lines):
+                    draw.text(map_xy(x, y + number * line_height), line, font=pil_font, fill=fill, anchor="la")
+        return img.crop((margin, margin, margin + width, margin + height))
+
+    def _arrow(self, coords: Sequence[float], direction: str, dx: int, dy: int) -> List[tuple[int, int]]:
+        """
+        Наконечник связи, как у холста: у начала при ``direction == "start"``,
+        иначе у конца. Вершины округляются по сетке всего изображения.
+        """
+
+        ox, oy = self.origin
+        scale = self.scale
+        if direction == "start":
+            (tx, ty), (bx, by) = (coords[0], coords[1]), (coords[2], coords[3])
+        else:
+            (tx, ty), (bx, by) = (coords[-2], coords[-1]), (coords[-4], coords[-3])
+        head = _arrow_head(
+            ((bx - ox) * scale, (by - oy) * scale), ((tx - ox) * scale, (ty - oy) * scale), 2, scale
+        )
+        return [(round(x) - dx, round(y) - dy) for x, y in head]
+
+
+def _brush_offsets(width: int) -> List[tuple[int, int]]:
+    """Смещения круглой кисти диаметром ``width`` пикселей."""
+
+    radius = width / 2
+    low = -(width // 2)
+    return [
+        (i, j)
+        for i in range(low, low + width)
+        for j in range(low, low + width)
+        if (i + 0.5 - radius - low) ** 2 + (j + 0.5 - radius - low) ** 2 <= radius ** 2
+    ]
+
+
+def _plan_tiles(
+    ops: List[tuple],
+    origin: tuple[float, float],
+    scale: float,
+    size: tuple[int, int],
+    tile_size: int,
+) -> List[tuple[int, int, int, int, List[int]]]:
+    """Раскладывает операции по тайлам: ``(left, top, width, height, indices)``."""
+
+    width, height = size
+    columns = max(1, -(-width // tile_size))
+    rows = max(1, -(-height // tile_size))
+    buckets: List[List[int]] = [[] for _ in range(columns * rows)]
+    ox, oy = origin
+    for index, op in enumerate(ops):
+        x1, y1, x2, y2 = op[0]
+        c1 = max(0, int((x1 - ox) * scale // tile_size))
+        c2 = min(columns - 1, int((x2 - ox) * scale // tile_size))
+        r1 = max(0, int((y1 - oy) * scale // tile_size))
+        r2 = min(rows - 1, int((y2 - oy) * scale // tile_size))
+        for row in range(r1, r2 + 1):
+            for col in range(c1, c2 + 1):
+                buckets[row * columns + col].append(index)
+
+    tiles = []
+    for row in range(rows):
+        for col in range(columns):
+            left = col * tile_size
+            top = row * tile_size
+            tiles.append(
+                (
+                    left,
+                    top,
+                    min(tile_size, width - left),
+                    min(tile_size, height - top),
+                    buckets[row * columns + col],
+                )
+            )
+    return tiles
+
+
+_worker_renderer: _TileRenderer | None = None
+
+
+def _init_tile_worker(ops, theme, origin, scale) -> None:
+    global _worker_renderer
+    _worker_renderer = _TileRenderer(ops, theme, origin, scale)
+
+
+def _render_tile_in_worker(tile) -> tuple[int, int, tuple[int, int], bytes]:
+    left, top, width, height, indices = tile
+    img = _worker_renderer.render(left, top, width, height, indices)
+    return left, top, img.size, img.tobytes()
+
+
+def _render_tiles(
+    ops: List[tuple],
+    theme: Dict[str, str],
+    origin: tuple[float, float],
+    scale: float,
+    tiles: List[tuple],
+    jobs: int,
+) -> Iterator[tuple[int, int, Any]]:
+    """Отдаёт ``(left, top, image)`` по мере готовности тайлов."""
+
+    from PIL import Image
+
+    if jobs <= 1 or len(tiles) <= 1:
+        renderer = _TileRenderer(ops, theme, origin, scale)
+        for left, top, width, height, indices in tiles:
+            yield left, top, renderer.render(left, top, width, height, indices)
+        return
+
+    # spawn: рабочие процессы не наследуют состояние Tk и потоки приложения
+    with ProcessPoolExecutor(
+        max_workers=min(jobs, len(tiles)),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_tile_worker,
+        initargs=(ops, theme, origin, scale),
+    ) as pool:
+        for left, top, size, raw in pool.map(_render_tile_in_worker, tiles):
+            yield left, top, Image.frombytes("RGB", size, raw)
+
+
+def _export_area(
+    board: BoardData,
+    paths: Sequence[ConnectionPath],
+    *,
+    padding: int,
+    region: tuple[float, float, float, float] | None,
+) -> tuple[float, float, float, float]:
+    """Область экспорта в координатах доски: ``region`` или доска с отступом."""
+
+    if region is not None:
+        x1, y1, x2, y2 = region
+        if x2 <= x1 or y2 <= y1:
+            raise ValueError("Некорректная область экспорта.")
+        return region
+    bounds = board_bounds(board, paths)
+    if bounds is None:
+        raise ValueError("Нечего экспортировать: доска пуста.")
+    return _inflate(bounds, padding)
+
+
+def _export_size(area: tuple[float, float, float, float], scale: float) -> tuple[int, int]:
+    x1, y1, x2, y2 = area
+    return max(1, int((x2 - x1) * scale)), max(1, int((y2 - y1) * scale))
+
+
+def png_size(
+    board: BoardData,
+    *,
+    padding: int = EXPORT_PADDING,
+    scale: float = 1.0,
+    dpi: int | None = None,
+    region: tuple[float, float, float, float] | None = None,
+    card_ids: Iterable[int] | None = None,
+) -> tuple[int, int]:
+    """
+    Оценка размера PNG в пикселях по карточкам и рамкам, без построения
+    маршрутов связей: по ней решают, склеивать ли изображение целиком.
+    """
+
+    if card_ids is not None:
+        board = select_cards(board, card_ids)
+    area = _export_area(board, [], padding=padding, region=region)
+    return _export_size(area, _effective_scale(scale, dpi))
+
+
+def _effective_scale(scale: float, dpi: int | None) -> float:
+    if scale <= 0:
+        raise ValueError("Масштаб экспорта должен быть положительным.")
+    if dpi is not None:
+        if dpi <= 0:
+            raise ValueError("DPI должен быть положительным.")
+        scale *= dpi / BASE_DPI
+    return scale
+
+
+def write_png(
+    board: BoardData,
+    path: str | os.PathLike,
+    *,
+    theme: Dict[str, str],
+    padding: int = EXPORT_PADDING,
+    scale: float = 1.0,
+    dpi: int | None = None,
+    region: tuple[float, float, float, float] | None = None,
+    card_ids: Iterable[int] | None = None,
+    tile_size: int = DEFAULT_TILE_SIZE,
+    jobs: int = 1,
+    text_engine: TextLayoutEngine | None = None,
+) -> tuple[int, int]:
+    """
+    Рисует доску в один PNG-файл и возвращает размер изображения.
+
+    ``region`` — область в координатах доски, ``card_ids`` — экспорт только
+    выбранных карточек. ``dpi`` масштабирует изображение относительно 96 DPI
+    и записывается в метаданные. Изображение рисуется тайлами ``tile_size``,
+    при ``jobs > 1`` — в пуле процессов, и склеивается в одно полотно полного
+    размера; для изображений больше ``PNG_PIXEL_BUDGET`` есть ``write_png_tiles``.
+    Текст раскладывает ``text_engine`` (по умолчанию — без Tk, по метрикам
+    Pillow); приложение передаёт движок холста, чтобы переносы совпадали.
+
+    Требует Pillow; при его отсутствии поднимается ``ImportError``.
+    Пустая доска или некорректные параметры — ``ValueError``.
+    """
+
+    from PIL import Image
+
+    if card_ids is not None:
+        board = select_cards(board, card_ids)
+    scale = _effective_scale(scale, dpi)
+    paths = _connection_paths(board)
+    area = _export_area(board, paths, padding=padding, region=region)
+    origin, size = area[:2], _export_size(area, scale)
+    ops = _raster_ops(board, theme, paths, text_engine or headless_engine())
+    tiles = _plan_tiles(ops, origin, scale, size, tile_size)
+
+    img = Image.new("RGB", size, theme["bg"])
+    for left, top, tile in _render_tiles(ops, theme, origin, scale, tiles, jobs):
+        img.paste(tile, (left, top))
+    save_kwargs = {"dpi": (dpi, dpi)} if dpi else {}
+    img.save(path, "PNG", **save_kwargs)
+    return size
+
+
+def write_canvas_png(
+    board: BoardData,
+    path: str | os.PathLike,
+    *,
+    theme: Dict[str, str],
+    padding: int = EXPORT_PADDING,
+    scale: float = 1.0,
+    dpi: int | None = None,
+    region: tuple[float, float, float, float] | None = None,
+    card_ids: Iterable[int] | None = None,
+) -> tuple[int, int]:
+    """
+    Рисует доску тем же кодом, что и экран: ``CanvasView`` поверх
+    ``PillowBackend``. Раскладка текста, подложки и стрелки совпадают
+    с холстом; изображение строится одним проходом, без тайлов.
+    """
+
+    from .canvas_view import CanvasView
+    from .render_backend import PillowBackend
+
+    if card_ids is not None:
+        board = select_cards(board, card_ids)
+    scale = _effective_scale(scale, dpi)
+    # CanvasView записывает id элементов в модель — рисуем копию
+    board = BoardData.from_primitive(board.to_primitive())
+    backend = PillowBackend(scale=scale)
+    view = CanvasView(backend, None, theme)
+    # Угловые связи обходят карточки, как на экране
+    view.elbow_router = board_router(board)
+    view.render_board(board.cards, board.frames, board.connections, grid_size=50, show_grid=False)
+
+    if region is None:
+        bounds = backend.bbox("all")
+        if bounds is None:
+            raise ValueError("Нечего экспортировать: доска пуста.")
+        region = _inflate(bounds, padding)
+    elif region[2] <= region[0] or region[3] <= region[1]:
+        raise ValueError("Некорректная область экспорта.")
+    img = backend.render(region, background=theme["bg"])
+    save_kwargs = {"dpi": (dpi, dpi)} if dpi else {}
+    img.save(path, "PNG", **save_kwargs)
+    return img.size
+
+
+def write_png_tiles(
+    board: BoardData,
+    directory: str | os.PathLike,
+    *,
+    theme: Dict[str, str],
+    padding: int = EXPORT_PADDING,
+    scale: float = 1.0,
+    dpi: int | None = None,
+    region: tuple[float, float, float, float] | None = None,
+    card_ids: Iterable[int] | None = None,
+    tile_size: int = 512,
+    jobs: int = 1,
+    pyramid: bool = True,
+    text_engine: TextLayoutEngine | None = None,
+) -> Dict[str, Any]:
+    """
+    Пишет доску набором PNG-тайлов без склейки в одно изображение.
+
+    Уровень 0 — полный масштаб, каждый следующий уровень (при ``pyramid``)
+    вдвое меньше, пока изображение не поместится в один тайл. Маршруты связей
+    и операции рисования строятся один раз, уровни только растеризуют их
+    в своём масштабе. Тайлы лежат в ``<directory>/<level>/<col>_<row>.png``,
+    описание сетки — в ``manifest.json``; манифест и возвращается.
+    ``text_engine`` — как у ``write_png``.
+    """
+
+    if card_ids is not None:
+        board = select_cards(board, card_ids)
+    scale = _effective_scale(scale, dpi)
+    paths = _connection_paths(board)
+    area = _export_area(board, paths, padding=padding, region=region)
+    origin = area[:2]
+    ops = _raster_ops(board, theme, paths, text_engine or headless_engine())
+    root = Path(directory)
+    root.mkdir(parents=True, exist_ok=True)
+    save_kwargs = {"dpi": (dpi, dpi)} if dpi else {}
+
+    levels = []
+    level_scale = scale
+    while True:
+        size = _export_size(area, level_scale)
+        tiles = _plan_tiles(ops, origin, level_scale, size, tile_size)
+        level_dir = root / str(len(levels))
+        level_dir.mkdir(exist_ok=True)
+        for left, top, tile in _render_tiles(ops, theme, origin, level_scale, tiles, jobs):
+            tile.save(level_dir / f"{left // tile_size}_{top // tile_size}.png", "PNG", **save_kwargs)
+        levels.append(
+            {
+                "scale": level_scale,
+                "width": size[0],
+                "height": size[1],
+                "columns": -(-size[0] // tile_size),
+                "rows": -(-size[1] // tile_size),
+            }
+        )
+        if not pyramid or (size[0] <= tile_size and size[1] <= tile_size):
+            break
+        level_scale /= 2
+
+    manifest = {
+        "tile_size": tile_size,
+        "origin": list(origin),
+        "levels": levels,
+    }
+    with open(root / "manifest.json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+# --- SVG: элементы пишутся в файл по мере обхода модели ---
+
+SVG_ATTACHMENT_MODES = ("embed", "link", "none")
+_BASE64_CHUNK = 3 * 16 * 1024  # кратно 3: куски кодируются без заполнителей посередине
+
+AttachmentReader = Callable[[Attachment], "bytes | None"]
+
+
+def write_svg(
+    board: BoardData,
+    path: str | os.PathLike,
+    *,
+    theme: Dict[str, str],
+    padding: int = EXPORT_PADDING,
+    attachments: str = "embed",
+    attachment_reader: AttachmentReader | None = None,
+    text_engine: TextLayoutEngine | None = None,
+) -> tuple[int, int]:
+    """
+    Пишет доску в SVG-файл по мере обхода модели и возвращает размер холста.
+
+    Связи рисуются той же ломаной, что и на холсте, со стрелкой из общего
+    маркера; оформление задано классами CSS, так что на каждый элемент
+    приходится строка ограниченной длины и файл растёт линейно с доской.
+
+    ``attachments``: ``"embed"`` — изображения встраиваются как data URI,
+    ``"link"`` — ссылка на файл вложения (если файла нет, данные
+    встраиваются), ``"none"`` — без вложений. Данные читает
+    ``attachment_reader``, например ``AttachmentStore.read_bytes``;
+    по умолчанию — только встроенный base64. Текст раскладывает
+    ``text_engine``, как у ``write_png``.
+    """
+
+    if attachments not in SVG_ATTACHMENT_MODES:
+        raise ValueError(f"Неизвестный режим вложений: {attachments}")
+    reader = attachment_reader or _embedded_bytes
+    text_engine = text_engine or headless_engine()
+    # Цвета темы попадают и в атрибуты, и в CSS: берутся только проверенные
+    theme = {key: _svg_color(value, "none") for key, value in theme.items()}
+    paths = _connection_paths(board)
+    bounds = board_bounds(board, paths)
+    if bounds is None:
+        raise ValueError("Нечего экспортировать: доска пуста.")
+    x1, y1, x2, y2 = bounds
+    width = int(x2 - x1 + 2 * padding)
+    height = int(y2 - y1 + 2 * padding)
+    left = _fmt(x1 - padding)
+    top = _fmt(y1 - padding)
+    svg_dir = Path(path).resolve().parent
+
+    with open(path, "w", encoding="utf-8") as out:
+        out.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+            f'width="{width}" height="{height}" viewBox="{left} {top} {width} {height}">\n'
+        )
+        _write_svg_defs(out, theme)
+        out.write(f'<rect x="{left}" y="{top}" width="{width}" height="{height}" fill={quoteattr(theme["bg"])}/>\n')
+
+        for frame in board.frames.values():
+            css_class = "fc" if frame.collapsed else "fr"
+            out.write(
+                f'<rect class="{css_class}" x="{_fmt(frame.x1)}" y="{_fmt(frame.y1)}" '
+                f'width="{_fmt(frame.x2 - frame.x1)}" height="{_fmt(frame.y2 - frame.y1)}"/>\n'
+            )
+            if frame.title:
+                left, top, block = _placed_text(
+                    frame.title, FRAME_TITLE_FONT, frame.x1 + 10, frame.y1 + 15, "w", text_engine
+                )
+                _write_text(out, left, top, block, FRAME_TITLE_FONT, "ft")
+
+        for conn, coords, (mx, my) in paths:
+            points = " ".join(
+                f"{_fmt(x)},{_fmt(y)}" for x, y in zip(coords[0::2], coords[1::2])
+            )
+            marker = "marker-start" if conn.direction == "start" else "marker-end"
+            out.write(f'<polyline class="ln" points="{points}" {marker}="url(#arrow)"/>\n')
+            if conn.label:
+                left, top, block = _placed_text(conn.label, LABEL_FONT, mx, my, "center", text_engine)
+                _write_text(out, left, top, block, LABEL_FONT, "lb")
+
+        for card in board.cards.values():
+            cx1, cy1, _cx2, _cy2 = _card_box(card)
+            out.write(
+                f'<rect class="cd" x="{_fmt(cx1)}" y="{_fmt(cy1)}" width="{_fmt(card.width)}" '
+                f'height="{_fmt(card.height)}" fill={quoteattr(_svg_color(card.color, theme["card_default"]))}/>\n'
+            )
+            # Как на холсте: текст сверху, изображения под ним
+            text_left, layout = _card_text(card, text_engine)
+            if card.attachments and attachments != "none":
+                for attachment, box in _attachment_boxes(card, layout):
+                    _write_attachment(out, attachment, box, attachments, reader, svg_dir)
+            if card.text:
+                _write_text(out, text_left, layout["text_top"], layout["block"], layout["font"], "tx")
+
+        out.write("</svg>\n")
+    return width, height
+
+
+def _write_svg_defs(out: TextIO, theme: Dict[str, str]) -> None:
+    out.write(
+        "<style>\n"
+        "text{font-family:Arial,sans-serif}\n"
+        f'.fr{{fill:{theme["frame_bg"]};stroke:{theme["frame_outline"]}}}\n'
+        f'.fc{{fill:{theme["frame_collapsed_bg"]};stroke:{theme["frame_outline"]}}}\n'
+        f'.ft{{fill:{theme["text"]}}}\n'
+        f'.ln{{fill:none;stroke:{theme["connection"]};stroke-width:2;stroke-linejoin:round}}\n'
+        f'.lb{{fill:{theme["connection_label"]}}}\n'
+        f'.cd{{stroke:{theme["card_outline"]};stroke-width:1.5}}\n'
+        f'.tx{{fill:{theme["text"]}}}\n'
+        "</style>\n"
+        # Стрелка того же размера, что у Tk (8x10 px), остриём в конце линии
+        '<defs><marker id="arrow" viewBox="0 0 10 8" refX="10" refY="4" markerWidth="10" '
+        'markerHeight="8" markerUnits="userSpaceOnUse" orient="auto-start-reverse">'
+        f'<path d="M0,0L10,4L0,8z" fill={quoteattr(theme["connection"])}/></marker></defs>\n'
+    )
+
+
+def _attachment_boxes(
+    card: Card, layout: Dict[str, Any]
+) -> List[tuple[Attachment, tuple[float, float, float, float]]]:
+    """Прямоугольники ``(x, y, w, h)`` вложений карточки в области изображений ``layout``."""
+
+    max_w = layout["image_width"]
+    max_h = layout["image_height"]
+    if max_w <= 0 or max_h <= 0:
+        return []
+
+    center_y = layout["image_top"] + max_h / 2
+    boxes = []
+    for attachment in card.attachments:
+        w = max(1.0, attachment.width * attachment.preview_scale)
+        h = max(1.0, attachment.height * attachment.preview_scale)
+        fit = min(max_w / w, max_h / h, 1.0)
+        w, h = w * fit, h * fit
+        max_dx = (max_w - w) / 2
+        max_dy = (max_h - h) / 2
+        dx = min(max(attachment.offset_x, -max_dx), max_dx)
+        dy = min(max(attachment.offset_y, -max_dy), max_dy)
+        boxes.append((attachment, (card.x + dx - w / 2, center_y + dy - h / 2, w, h)))
+    return boxes
+
+
+def _write_attachment(
+    out: TextIO,
+    attachment: Attachment,
+    box: tuple[float, float, float, float],
+    mode: str,
+    reader: AttachmentReader,
+    svg_dir: Path,
+) -> None:
+    x, y, w, h = box
+    head = (
+        f'<image x="{_fmt(x)}" y="{_fmt(y)}" width="{_fmt(w)}" height="{_fmt(h)}" '
+        'preserveAspectRatio="xMidYMid meet" xlink:href='
+    )
+    if mode == "link":
+        href = _attachment_href(attachment, svg_dir)
+        if href is not None:
+            out.write(f"{head}{quoteattr(href)}/>\n")
+            return
+
+    payload = reader(attachment)
+    if not payload:
+        return
+    mime_type = attachment.mime_type if _MIME_RE.fullmatch(attachment.mime_type or "") else "application/octet-stream"
+    out.write(f'{head}"data:{mime_type};base64,')
+    for start in range(0, len(payload), _BASE64_CHUNK):
+        out.write(base64.b64encode(payload[start:start + _BASE64_CHUNK]).decode("ascii"))
+    out.write('"/>\n')
+
+
+def _attachment_href(attachment: Attachment, svg_dir: Path) -> str | None:
+    """Путь к файлу вложения относительно SVG или ``None``, если файла нет."""
+
+    if not attachment.storage_path:
+        return None
+    file_path = Path(attachment.storage_path).resolve()
+    if not file_path.is_file():
+        return None
+    try:
+        return Path(os.path.relpath(file_path, svg_dir)).as_posix()
+    except ValueError:
+        # Другой диск в Windows: относительного пути нет
+        return file_path.as_uri()
+
+
+def _embedded_bytes(attachment: Attachment) -> bytes | None:
+    if not attachment.data_base64:
+        return None
+    try:
+        return base64.b64decode(attachment.data_base64)
+    except (binascii.Error, ValueError):
+        return None
+
+
+# Цвет Tk/SVG: #rgb, #rrggbb (и длиннее) или имя из букв
+_COLOR_RE = re.compile(r"#[0-9A-Fa-f]{3}(?:[0-9A-Fa-f]{3}){0,3}|[A-Za-z]+")
+_MIME_RE = re.compile(r"[\w.+-]+/[\w.+-]+")
+
+
+def _svg_color(value: Any, fallback: str) -> str:
+    """Цвет, безопасный для атрибута и CSS, или ``fallback``."""
+
+    if isinstance(value, str) and _COLOR_RE.fullmatch(value):
+        return value
+    return fallback
+
+
+def _fmt(value: float) -> str:
+    """Координата без экспоненты и лишних нулей (две цифры после точки)."""
+
+    text = f"{value:.2f}".rstrip("0").rstrip(".")
+    return "0" if text == "-0" else text
+
+
+def _write_text(out: TextIO, left: float, top: float, block: TextBlock, font: Any, css_class: str) -> None:
+    """Строки уже разложенного блока: базовая линия каждой — на ``ascent`` ниже её верха."""
+
+    key = font_key(font)
+    style = f"font-size:{key.pixel_size}px"
+    if key.bold:
+        style += ";font-weight:bold"
+    if key.italic:
+        style += ";font-style:italic"
+    x = _fmt(left)
+    out.write(f'<text class={quoteattr(css_class)} style={quoteattr(style)} x="{x}" y="{_fmt(top + block.ascent)}">')
+    for index, line in enumerate(block.lines):
+        dy = 0 if index == 0 else _fmt(block.line_height)
+        out.write(f'<tspan x="{x}" dy="{dy}">{escape(line)}</tspan>')
+    out.write("</text>\n")
@@ -2,24 +2,45 @@
 
 from __future__ import annotations
 
-import json
+import os
 from json import JSONDecodeError
 from typing import Any, Callable, Dict, Iterable
 
-from tkinter import filedialog, messagebox
-
-from .board_model import SCHEMA_VERSION, SUPPORTED_SCHEMA_VERSIONS
-
-
-class BoardFileError(Exception):
-    """Исключение, описывающее проблемы с содержимым файла доски."""
-
-
-REQUIRED_KEYS = ("cards", "connections", "frames")
-
+from tkinter import filedialog, messagebox, simpledialog
+
+from .board_io import (
+    CONTAINER_EXTENSION,
+    BoardFileError,
+    write_board_file,
+)
+from .board_model import Attachment, BoardData
+from .export import (
+    BASE_DPI,
+    PNG_PIXEL_BUDGET,
+    png_size,
+    select_cards,
+    write_png,
+    write_png_tiles,
+    write_svg,
+)
+from .text_layout import TextLayoutEngine
+
+
+BOARD_FILETYPES = [
+    ("Доска Mini Miro", f"*{CONTAINER_EXTENSION}"),
+    ("JSON файлы", "*.json"),
+    ("Все файлы", "*.*"),
+]
+
+
+def save_board(
+    board_data: Dict[str, Any],
+    write: Callable[[str, Dict[str, Any]], None] = write_board_file,
+) -> bool:
+    """Открывает диалог и сохраняет данные борда в JSON или контейнер ``.mboard``.
 
-def save_board(board_data: Dict[str, Any]) -> bool:
-    """Открывает диалог и сохраняет данные борда в JSON.
+    ``write`` записывает файл; приложение передаёт запись через хранилище
+    вложений, чтобы данные контейнера читались из открытого файла.
 
     Возвращает ``True`` при успешном сохранении и ``False`` если пользователь
     отменил диалог или произошла ошибка.
@@ -27,70 +48,63 @@ def save_board(board_data: Dict[str, Any]) -> bool:
 
     filename = filedialog.asksaveasfilename(
         defaultextension=".json",
-        filetypes=[("JSON файлы", "*.json"), ("Все файлы", "*.*")],
+        filetypes=[BOARD_FILETYPES[1], BOARD_FILETYPES[0], BOARD_FILETYPES[2]],
     )
     if not filename:
         return False
 
     try:
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(board_data, f, ensure_ascii=False, indent=2)
+        write(filename, board_data)
         return True
-    except OSError as e:
+    except (OSError, BoardFileError) as e:
         messagebox.showerror("Ошибка сохранения", f"Не удалось сохранить файл:\n{e}")
         return False
 
 
-def load_board() -> Dict[str, Any] | None:
-    """Читает и валидирует JSON с диска.
-
-    Возвращает словарь с данными или ``None`` если пользователь отменил диалог
-    либо данные не прошли валидацию.
-    """
+def ask_open_board_filename() -> str | None:
+    """Показывает диалог выбора файла доски и возвращает путь или ``None``."""
 
     filename = filedialog.askopenfilename(
         defaultextension=".json",
-        filetypes=[("JSON файлы", "*.json"), ("Все файлы", "*.*")],
+        filetypes=BOARD_FILETYPES,
     )
-    if not filename:
-        return None
+    return filename or None
 
-    try:
-        with open(filename, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    except JSONDecodeError as e:
+
+def show_load_error(error: Exception, title: str = "Ошибка загрузки") -> None:
+    """Сообщает пользователю об ошибке чтения или валидации файла доски."""
+
+    if isinstance(error, JSONDecodeError):
         messagebox.showerror(
-            "Ошибка загрузки",
+            title,
             "Файл не является корректным JSON.\n"
-            f"Проверьте содержимое файла. Детали:\n{e}",
+            f"Проверьте содержимое файла. Детали:\n{error}",
         )
-        return None
-    except OSError as e:
-        messagebox.showerror("Ошибка загрузки", f"Не удалось открыть файл:\n{e}")
-        return None
-
-    try:
-        _validate_board_data(data)
-    except BoardFileError as e:
-        messagebox.showerror("Ошибка загрузки", str(e))
-        return None
-
-    return data
+    elif isinstance(error, OSError):
+        messagebox.showerror(title, f"Не удалось открыть файл:\n{error}")
+    else:
+        messagebox.showerror(title, str(error))
 
 
 def export_png(
     *,
-    canvas,
-    cards: Dict[int, Any],
-    frames: Dict[int, Any],
-    connections: Iterable[Any],
+    board: BoardData,
     theme: Dict[str, Any],
-    connection_anchor_fn: Callable[[Any, Any, Any | None], tuple[float, float, float, float]],
+    selected_card_ids: Iterable[int] = (),
+    text_engine: TextLayoutEngine | None = None,
 ) -> bool:
-    """Экспортирует содержимое доски в PNG через диалог выбора файла."""
+    """
+    Экспортирует доску (или выделенные карточки) в PNG через диалог выбора файла.
+
+    Изображение строится по модели тайлами в пуле процессов, поэтому экспорт
+    не зависит от состояния холста, а затем склеивается в одно полотно полного
+    размера. Если оно больше ``PNG_PIXEL_BUDGET`` пикселей, предлагается
+    записать тайлы в папку без склейки (``write_png_tiles``). ``text_engine`` —
+    движок раскладки текста холста, чтобы переносы строк совпадали с экраном.
+    """
 
     try:
-        from PIL import Image, ImageDraw, ImageFont
+        import PIL  # noqa: F401
     except ImportError:
         messagebox.showerror(
             "Экспорт в PNG",
@@ -99,11 +113,40 @@ def export_png(
         )
         return False
 
-    connections_list = list(connections)
-    if not cards and not frames and not connections_list:
+    if not board.cards and not board.frames and not board.connections:
         messagebox.showinfo("Экспорт в PNG", "Нечего экспортировать: борд пуст.")
         return False
 
+    proceed, card_ids = _ask_card_ids("Экспорт в PNG", selected_card_ids)
+    if not proceed:
+        return False
+
+    dpi = simpledialog.askinteger(
+        "Экспорт в PNG",
+        f"Разрешение изображения, DPI ({BASE_DPI} — как на экране):",
+        initialvalue=BASE_DPI,
+        minvalue=24,
+        maxvalue=1200,
+    )
+    if dpi is None:
+        return False
+
+    width, height = png_size(board, dpi=dpi, card_ids=card_ids)
+    if width * height > PNG_PIXEL_BUDGET:
+        answer = messagebox.askyesnocancel(
+            "Экспорт в PNG",
+            f"Изображение {width}×{height} пикселей займёт в памяти около"
+            f" {width * height * 3 // 2**20} МБ.\n"
+            "Сохранить его тайлами в папку, без склейки?\n"
+            "«Нет» — всё равно одним файлом.",
+        )
+        if answer is None:
+            return False
+        if answer:
+            return _export_png_tiles(
+                board, theme=theme, dpi=dpi, card_ids=card_ids, text_engine=text_engine
+            )
+
     filename = filedialog.asksaveasfilename(
         defaultextension=".png",
         filetypes=[("PNG изображения", "*.png"), ("Все файлы", "*.*")],
@@ -111,159 +154,150 @@ def export_png(
     if not filename:
         return False
 
-    items_bbox = None
-
-    def update_bbox(bbox, x1, y1, x2, y2):
-        if bbox is None:
-            return (x1, y1, x2, y2)
-        bx1, by1, bx2, by2 = bbox
-        return (min(bx1, x1), min(by1, y1), max(bx2, x2), max(by2, y2))
-
-    for frame in frames.values():
-        coords = canvas.coords(frame.rect_id)
-        if coords:
-            fx1, fy1, fx2, fy2 = coords
-            items_bbox = update_bbox(items_bbox, fx1, fy1, fx2, fy2)
-    for card in cards.values():
-        cx1 = card.x - card.width / 2
-        cy1 = card.y - card.height / 2
-        cx2 = card.x + card.width / 2
-        cy2 = card.y + card.height / 2
-        items_bbox = update_bbox(items_bbox, cx1, cy1, cx2, cy2)
-    for conn in connections_list:
-        coords = canvas.coords(conn.line_id)
-        if coords and len(coords) >= 4:
-            x1, y1, x2, y2 = coords[:4]
-            items_bbox = update_bbox(items_bbox, x1, y1, x2, y2)
-
-    if items_bbox is None:
-        messagebox.showinfo("Экспорт в PNG", "Не найдено объектов для экспорта.")
+    try:
+        write_png(
+            board,
+            filename,
+            theme=theme,
+            dpi=dpi,
+            card_ids=card_ids,
+            jobs=os.cpu_count() or 1,
+            text_engine=text_engine,
+        )
+    except ValueError as e:
+        messagebox.showinfo("Экспорт в PNG", str(e))
         return False
-
-    x1, y1, x2, y2 = items_bbox
-    padding = 20
-    width = int(x2 - x1 + 2 * padding)
-    height = int(y2 - y1 + 2 * padding)
-    if width <= 0 or height <= 0:
-        messagebox.showerror("Экспорт в PNG", "Некорректный размер изображения.")
+    except OSError as e:
+        messagebox.showerror("Ошибка экспорта", f"Не удалось сохранить PNG:\n{e}")
+        return False
+    except MemoryError:
+        messagebox.showerror(
+            "Ошибка экспорта",
+            "Не хватило памяти на изображение целиком.\n"
+            "Уменьшите DPI или сохраните доску тайлами.",
+        )
         return False
 
-    img = Image.new("RGB", (width, height), theme["bg"])
-    draw = ImageDraw.Draw(img)
-    font = ImageFont.load_default()
-
-    def map_xy(x, y):
-        return (x - x1 + padding, y - y1 + padding)
-
-    for frame in frames.values():
-        coords = canvas.coords(frame.rect_id)
-        if not coords:
-            continue
-        fx1, fy1, fx2, fy2 = coords
-        mx1, my1 = map_xy(fx1, fy1)
-        mx2, my2 = map_xy(fx2, fy2)
-        collapsed = frame.collapsed
-        fill = theme["frame_collapsed_bg"] if collapsed else theme["frame_bg"]
-        outline = theme["frame_outline"]
-        draw.rectangle([mx1, my1, mx2, my2], outline=outline, fill=fill)
-        title = frame.title
-        if title:
-            draw.text((mx1 + 8, my1 + 8), title, font=font, fill=theme["text"])
-
-    for conn in connections_list:
-        from_card = cards.get(conn.from_id)
-        to_card = cards.get(conn.to_id)
-        if not from_card or not to_card:
-            continue
-        sx, sy, tx, ty = connection_anchor_fn(from_card, to_card, conn)
-        msx, msy = map_xy(sx, sy)
-        mtx, mty = map_xy(tx, ty)
-        draw.line([msx, msy, mtx, mty], fill=theme["connection"], width=2)
-        if conn.label:
-            mx = (msx + mtx) / 2
-            my = (msy + mty) / 2
-            try:
-                draw.text(
-                    (mx, my),
-                    conn.label,
-                    font=font,
-                    fill=theme["connection_label"],
-                    anchor="mm",
-                )
-            except TypeError:
-                draw.text((mx, my), conn.label, font=font, fill=theme["connection_label"])
-
-    for card in cards.values():
-        cx1 = card.x - card.width / 2
-        cy1 = card.y - card.height / 2
-        cx2 = card.x + card.width / 2
-        cy2 = card.y + card.height / 2
-        mx1, my1 = map_xy(cx1, cy1)
-        mx2, my2 = map_xy(cx2, cy2)
-        fill = card.color or theme["card_default"]
-        outline = theme["card_outline"]
-        draw.rectangle([mx1, my1, mx2, my2], fill=fill, outline=outline)
-        text = card.text
-        if text:
-            tx, ty = map_xy(card.x, card.y)
-            try:
-                draw.multiline_text(
-                    (tx, ty),
-                    text,
-                    font=font,
-                    fill=theme["text"],
-                    align="center",
-                    anchor="mm",
-                )
-            except TypeError:
-                draw.multiline_text(
-                    (mx1 + 5, my1 + 5), text, font=font, fill=theme["text"]
-                )
+    messagebox.showinfo("Экспорт в PNG", "Изображение сохранено:\n" + filename)
+    return True
 
+
+def _export_png_tiles(
+    board: BoardData,
+    *,
+    theme: Dict[str, Any],
+    dpi: int,
+    card_ids: list[int] | None,
+    text_engine: TextLayoutEngine | None,
+) -> bool:
+    """Пишет PNG-тайлы с ``manifest.json`` в выбранную папку."""
+
+    directory = filedialog.askdirectory(title="Папка для тайлов PNG", mustexist=False)
+    if not directory:
+        return False
     try:
-        img.save(filename, "PNG")
+        write_png_tiles(
+            board,
+            directory,
+            theme=theme,
+            dpi=dpi,
+            card_ids=card_ids,
+            jobs=os.cpu_count() or 1,
+            text_engine=text_engine,
+        )
+    except ValueError as e:
+        messagebox.showinfo("Экспорт в PNG", str(e))
+        return False
     except OSError as e:
-        messagebox.showerror("Ошибка экспорта", f"Не удалось сохранить PNG:\n{e}")
+        messagebox.showerror("Ошибка экспорта", f"Не удалось сохранить тайлы PNG:\n{e}")
         return False
 
-    messagebox.showinfo("Экспорт в PNG", "Изображение сохранено:\n" + filename)
+    messagebox.showinfo("Экспорт в PNG", "Тайлы сохранены в папку:\n" + directory)
     return True
 
 
-def _validate_board_data(data: Dict[str, Any]) -> None:
-    if not isinstance(data, dict):
-        raise BoardFileError(
-            "Файл не соответствует формату доски: ожидается JSON-объект с данными."
-        )
+def export_svg(
+    *,
+    board: BoardData,
+    theme: Dict[str, Any],
+    selected_card_ids: Iterable[int] = (),
+    attachment_reader: Callable[[Attachment], bytes | None] | None = None,
+    materialize: Callable[[Iterable[int]], None] | None = None,
+    text_engine: TextLayoutEngine | None = None,
+) -> bool:
+    """
+    Экспортирует доску (или выделенные карточки) в векторный SVG.
 
-    version = data.get("schema_version")
-    if version is None:
-        raise BoardFileError(
-            "Файл не содержит информацию о версии схемы (schema_version)."
-        )
-    if version not in SUPPORTED_SCHEMA_VERSIONS:
-        raise BoardFileError(
-            "Неподдерживаемая версия схемы: "
-            f"{version}. Ожидается один из: {sorted(SUPPORTED_SCHEMA_VERSIONS)}."
-        )
+    Файл пишется по мере обхода модели; изображения вложений встраиваются
+    в файл или подключаются ссылками на файлы в ``attachments/``. Перед
+    экспортом ссылками ``materialize`` записывает недостающие файлы вложений
+    экспортируемых карточек. ``text_engine`` — как у ``export_png``.
+    """
+
+    if not board.cards and not board.frames and not board.connections:
+        messagebox.showinfo("Экспорт в SVG", "Нечего экспортировать: борд пуст.")
+        return False
 
-    missing = [key for key in REQUIRED_KEYS if key not in data]
-    if missing:
-        missing_str = ", ".join(missing)
-        raise BoardFileError(
-            f"В файле отсутствуют обязательные разделы: {missing_str}."
+    proceed, card_ids = _ask_card_ids("Экспорт в SVG", selected_card_ids)
+    if not proceed:
+        return False
+    if card_ids is not None:
+        board = select_cards(board, card_ids)
+
+    attachments = "embed"
+    if any(card.attachments for card in board.cards.values()):
+        answer = messagebox.askyesnocancel(
+            "Экспорт в SVG",
+            "Встроить изображения в SVG-файл?\n"
+            "«Нет» — сослаться на файлы вложений (файл SVG будет меньше).",
         )
+        if answer is None:
+            return False
+        attachments = "embed" if answer else "link"
+
+    filename = filedialog.asksaveasfilename(
+        defaultextension=".svg",
+        filetypes=[("SVG изображения", "*.svg"), ("Все файлы", "*.*")],
+    )
+    if not filename:
+        return False
+    if attachments == "link" and materialize is not None:
+        materialize(board.cards.keys())
 
-    list_checks = {
-        "cards": list,
-        "connections": list,
-        "frames": list,
-    }
-    bad_types = [
-        key for key, expected_type in list_checks.items() if not isinstance(data[key], expected_type)
-    ]
-    if bad_types:
-        readable = ", ".join(bad_types)
-        raise BoardFileError(
-            f"Некорректный формат разделов: ожидаются списки для {readable}."
+    try:
+        write_svg(
+            board,
+            filename,
+            theme=theme,
+            attachments=attachments,
+            attachment_reader=attachment_reader,
+            text_engine=text_engine,
         )
+    except ValueError as e:
+        messagebox.showinfo("Экспорт в SVG", str(e))
+        return False
+    except OSError as e:
+        messagebox.showerror("Ошибка экспорта", f"Не удалось сохранить SVG:\n{e}")
+        return False
+
+    messagebox.showinfo("Экспорт в SVG", "Изображение сохранено:\n" + filename)
+    return True
+
+
+def _ask_card_ids(title: str, selected_card_ids: Iterable[int]) -> tuple[bool, list[int] | None]:
+    """
+    Спрашивает, экспортировать ли только выделенные карточки.
+    Возвращает ``(продолжать, id карточек или None для всей доски)``.
+    """
+
+    selected = sorted(selected_card_ids)
+    if not selected:
+        return True, None
+    answer = messagebox.askyesnocancel(
+        title,
+        f"Экспортировать только выделенные карточки ({len(selected)})?\n"
+        "«Нет» — экспортировать всю доску.",
+    )
+    if answer is None:
+        return False, None
+    return True, selected if answer else None
@@ -0,0 +1,495 @@
+"""Геометрия карточек и связей без зависимости от Tk."""
+
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, Sequence, Tuple
+
+from .board_model import (
+    Card,
+    Connection,
+    DEFAULT_CONNECTION_CURVATURE,
+    DEFAULT_CONNECTION_RADIUS,
+    DEFAULT_CONNECTION_STYLE,
+)
+
+
+def card_handle_positions(card: Card) -> Dict[str, tuple[float, float]]:
+    half_w = card.width / 2
+    half_h = card.height / 2
+    return {
+        "n": (card.x, card.y - half_h),
+        "e": (card.x + half_w, card.y),
+        "s": (card.x, card.y + half_h),
+        "w": (card.x - half_w, card.y),
+    }
+
+
+def auto_anchors(from_card: Card, to_card: Card) -> tuple[str, str]:
+    dx = to_card.x - from_card.x
+    dy = to_card.y - from_card.y
+    if abs(dx) > abs(dy):
+        return ("e" if dx > 0 else "w", "w" if dx > 0 else "e")
+    return ("s" if dy > 0 else "n", "n" if dy > 0 else "s")
+
+
+def resolve_anchor(
+    card: Card, preferred: str | None, fallback: str
+) -> tuple[str, tuple[float, float]]:
+    positions = card_handle_positions(card)
+    anchor = preferred if preferred in positions else fallback
+    return anchor, positions[anchor]
+
+
+def connection_anchors(
+    from_card: Card, to_card: Card, connection: Connection | Any | None = None
+) -> Sequence[float]:
+    """
+    Точки крепления связи ``(sx, sy, tx, ty)``. Выбранные якоря записываются
+    обратно в ``connection``, как и при отрисовке на холсте.
+    """
+
+    default_from, default_to = auto_anchors(from_card, to_card)
+    from_anchor, (sx, sy) = resolve_anchor(
+        from_card, getattr(connection, "from_anchor", None), default_from
+    )
+    to_anchor, (tx, ty) = resolve_anchor(
+        to_card, getattr(connection, "to_anchor", None), default_to
+    )
+
+    if connection is not None:
+        connection.from_anchor = from_anchor
+        connection.to_anchor = to_anchor
+
+    return sx, sy, tx, ty
+
+
+_ANCHOR_DIRECTIONS = {
+    "n": (0.0, -1.0),
+    "e": (1.0, 0.0),
+    "s": (0.0, 1.0),
+    "w": (-1.0, 0.0),
+}
+
+
+def anchor_direction(anchor: str | None, fallback: tuple[float, float]) -> tuple[float, float]:
+    return _ANCHOR_DIRECTIONS.get(anchor, fallback)
+
+
+def bezier_point(
+    start: tuple[float, float],
+    ctrl1: tuple[float, float],
+    ctrl2: tuple[float, float],
+    end: tuple[float, float],
+    t: float,
+) -> tuple[float, float]:
+    inv_t = 1 - t
+    x = (
+        inv_t**3 * start[0]
+        + 3 * inv_t**2 * t * ctrl1[0]
+        + 3 * inv_t * t**2 * ctrl2[0]
+        + t**3 * end[0]
+    )
+    y = (
+        inv_t**3 * start[1]
+        + 3 * inv_t**2 * t * ctrl1[1]
+        + 3 * inv_t * t**2 * ctrl2[1]
+        + t**3 * end[1]
+    )
+    return x, y
+
+
+def sample_cubic_bezier(
+    start: tuple[float, float],
+    ctrl1: tuple[float, float],
+    ctrl2: tuple[float, float],
+    end: tuple[float, float],
+    *,
+    steps: int,
+) -> list[float]:
+    samples: list[float] = []
+    for i in range(steps + 1):
+        t = i / steps
+        x, y = bezier_point(start, ctrl1, ctrl2, end, t)
+        samples.extend([x, y])
+    return samples
+
+
+def segments_intersect(
+    a1: tuple[float, float],
+    a2: tuple[float, float],
+    b1: tuple[float, float],
+    b2: tuple[float, float],
+) -> bool:
+    def _orientation(p, q, r):
+        return (q[0] - p[0]) * (r[1] - p[1]) - (q[1] - p[1]) * (r[0] - p[0])
+
+    def _on_segment(p, q, r):
+        return (
+            min(p[0], r[0]) <= q[0] <= max(p[0], r[0])
+            and min(p[1], r[1]) <= q[1] <= max(p[1], r[1])
+        )
+
+    o1 = _orientation(a1, a2, b1)
+    o2 = _orientation(a1, a2, b2)
+    o3 = _orientation(b1, b2, a1)
+    o4 = _orientation(b1, b2, a2)
+
+    if (o1 == 0 and _on_segment(a1, b1, a2)) or (o2 == 0 and _on_segment(a1, b2, a2)):
+        return True
+    if (o3 == 0 and _on_segment(b1, a1, b2)) or (o4 == 0 and _on_segment(b1, a2, b2)):
+        return True
+
+    return (o1 > 0) != (o2 > 0) and (o3 > 0) != (o4 > 0)
+
+
+def polyline_self_intersects(coords: Sequence[float]) -> bool:
+    points = list(zip(coords[0::2], coords[1::2]))
+    for i in range(len(points) - 1):
+        a1, a2 = points[i], points[i + 1]
+        # Соседние отрезки имеют общую точку, поэтому начинаем с i + 2
+        for j in range(i + 2, len(points) - 1):
+            b1, b2 = points[j], points[j + 1]
+            if segments_intersect(a1, a2, b1, b2):
+                return True
+    return False
+
+
+def straight_connection(
+    connection: Connection | Any, sx: float, sy: float, tx: float, ty: float
+) -> tuple[Sequence[float], Dict[str, float | bool]]:
+    midpoint = ((sx + tx) / 2, (sy + ty) / 2)
+    length = math.hypot(tx - sx, ty - sy) or 1.0
+    dir_x = (tx - sx) / length
+    dir_y = (ty - sy) / length
+    return (
+        (sx, sy, tx, ty),
+        {
+            "smooth": False,
+            "midpoint_x": midpoint[0],
+            "midpoint_y": midpoint[1],
+            "normal_x": 0.0,
+            "normal_y": 0.0,
+            "length": length,
+            "start_dir": anchor_direction(
+                getattr(connection, "from_anchor", None), (dir_x, dir_y)
+            ),
+            "handle_length": 0.0,
+            "baseline_mid_x": midpoint[0],
+            "baseline_mid_y": midpoint[1],
+        },
+    )
+
+
+def routed_elbow(
+    connection: Connection | Any,
+    sx: float,
+    sy: float,
+    tx: float,
+    ty: float,
+    waypoints: Sequence[float],
+) -> tuple[Sequence[float], Dict[str, float | bool]]:
+    """Угловая связь через промежуточные точки обхода (см. ``elbow_router``)."""
+
+    coords = (sx, sy, *waypoints, tx, ty)
+    points = list(zip(coords[0::2], coords[1::2]))
+    lengths = [abs(bx - ax) + abs(by - ay) for (ax, ay), (bx, by) in zip(points, points[1:])]
+    total_len = max(sum(lengths), 1.0)
+
+    half = total_len / 2
+    mid_x, mid_y = points[-1]
+    passed = 0.0
+    for (ax, ay), (bx, by), segment_len in zip(points, points[1:], lengths):
+        if segment_len and passed + segment_len >= half:
+            ratio = (half - passed) / segment_len
+            mid_x = ax + (bx - ax) * ratio
+            mid_y = ay + (by - ay) * ratio
+            break
+        passed += segment_len
+
+    (ax, ay), (bx, by) = points[0], points[1]
+    fallback = (
+        (1.0 if bx >= ax else -1.0, 0.0) if abs(bx - ax) >= abs(by - ay) else (0.0, 1.0 if by >= ay else -1.0)
+    )
+    return (
+        coords,
+        {
+            "smooth": False,
+            "midpoint_x": mid_x,
+            "midpoint_y": mid_y,
+            "normal_x": 0.0,
+            "normal_y": 0.0,
+            "length": total_len,
+            "start_dir": anchor_direction(getattr(connection, "from_anchor", None), fallback),
+            "handle_length": 0.0,
+            "baseline_mid_x": mid_x,
+            "baseline_mid_y": mid_y,
+        },
+    )
+
+
+def connection_points(
+    connection: Connection | Any,
+    sx: float,
+    sy: float,
+    tx: float,
+    ty: float,
+    waypoints: Sequence[float] | None = None,
+) -> tuple[Sequence[float], Dict[str, float | bool]]:
+    """
+    Ломаная связи между точками крепления и сведения для подписи и ручек.
+    ``waypoints`` — обход препятствий для угловой связи; без него угол простой.
+    """
+
+    style = getattr(connection, "style", DEFAULT_CONNECTION_STYLE)
+
+    if style == "elbow" and waypoints:
+        return routed_elbow(connection, sx, sy, tx, ty, waypoints)
+
+    if style == "elbow":
+        dx = tx - sx
+        dy = ty - sy
+        via_horizontal_first = abs(dx) >= abs(dy)
+        if via_horizontal_first:
+            corner = (tx, sy)
+            start_dir = anchor_direction(
+                getattr(connection, "from_anchor", None),
+                (1.0 if dx >= 0 else -1.0, 0.0),
+            )
+        else:
+            corner = (sx, ty)
+            start_dir = anchor_direction(
+                getattr(connection, "from_anchor", None),
+                (0.0, 1.0 if dy >= 0 else -1.0),
+            )
+
+        first_len = abs(corner[0] - sx) + abs(corner[1] - sy)
+        second_len = abs(tx - corner[0]) + abs(ty - corner[1])
+        total_len = max(first_len + second_len, 1.0)
+
+        half = total_len / 2
+        if half <= first_len and first_len:
+            ratio = half / first_len
+            mid_x = sx + (corner[0] - sx) * ratio
+            mid_y = sy + (corner[1] - sy) * ratio
+        else:
+            remain = half - first_len
+            segment_len = max(second_len, 1.0)
+            ratio = remain / segment_len
+            mid_x = corner[0] + (tx - corner[0]) * ratio
+            mid_y = corner[1] + (ty - corner[1]) * ratio
+
+        return (
+            (sx, sy, corner[0], corner[1], tx, ty),
+            {
+                "smooth": False,
+                "midpoint_x": mid_x,
+                "midpoint_y": mid_y,
+                "normal_x": 0.0,
+                "normal_y": 0.0,
+                "length": total_len,
+                "start_dir": start_dir,
+                "handle_length": 0.0,
+                "baseline_mid_x": mid_x,
+                "baseline_mid_y": mid_y,
+            },
+        )
+
+    if style != "rounded":
+        return straight_connection(connection, sx, sy, tx, ty)
+
+    radius = max(getattr(connection, "radius", DEFAULT_CONNECTION_RADIUS), 0.0)
+    curvature = getattr(connection, "curvature", DEFAULT_CONNECTION_CURVATURE)
+
+    if radius <= 0 and curvature == 0:
+        return straight_connection(connection, sx, sy, tx, ty)
+
+    dx = tx - sx
+    dy = ty - sy
+    length = math.hypot(dx, dy) or 1.0
+    dir_x = dx / length
+    dir_y = dy / length
+    normal_x = -dy / length
+    normal_y = dx / length
+
+    handle_base = radius if radius > 0 else length * 0.25
+    max_handle_length = length * 0.45
+    if radius > 0 and handle_base > max_handle_length:
+        return straight_connection(connection, sx, sy, tx, ty)
+
+    handle_length = max(length * 0.1, min(handle_base, max_handle_length))
+    if handle_length <= 0:
+        return straight_connection(connection, sx, sy, tx, ty)
+
+    start_dir = anchor_direction(getattr(connection, "from_anchor", None), (dir_x, dir_y))
+    end_dir_outward = anchor_direction(getattr(connection, "to_anchor", None), (-dir_x, -dir_y))
+    end_dir = (-end_dir_outward[0], -end_dir_outward[1])
+
+    start_ctrl = (sx + start_dir[0] * handle_length, sy + start_dir[1] * handle_length)
+    end_ctrl = (tx - end_dir[0] * handle_length, ty - end_dir[1] * handle_length)
+
+    curve_shift = max(-length / 2, min(curvature, length / 2))
+    if curve_shift:
+        shift_x = normal_x * curve_shift
+        shift_y = normal_y * curve_shift
+        start_ctrl = (start_ctrl[0] + shift_x, start_ctrl[1] + shift_y)
+        end_ctrl = (end_ctrl[0] + shift_x, end_ctrl[1] + shift_y)
+
+    steps = max(12, int(length / 18))
+    coords = sample_cubic_bezier((sx, sy), start_ctrl, end_ctrl, (tx, ty), steps=steps)
+    if polyline_self_intersects(coords):
+        return straight_connection(connection, sx, sy, tx, ty)
+
+    mid_x, mid_y = bezier_point((sx, sy), start_ctrl, end_ctrl, (tx, ty), 0.5)
+
+    return coords, {
+        "smooth": False,
+        "midpoint_x": mid_x,
+        "midpoint_y": mid_y,
+        "normal_x": normal_x,
+        "normal_y": normal_y,
+        "length": length,
+        "start_dir": start_dir,
+        "handle_length": handle_length,
+        "baseline_mid_x": (sx + tx) / 2,
+        "baseline_mid_y": (sy + ty) / 2,
+    }
+
+
+def label_position(
+    coords: Sequence[float], render_info: Dict[str, float | bool]
+) -> tuple[float, float]:
+    if "midpoint_x" in render_info and "midpoint_y" in render_info:
+        return render_info["midpoint_x"], render_info["midpoint_y"]
+    if render_info.get("smooth") and len(coords) >= 4:
+        return coords[2], coords[3]
+    return (coords[0] + coords[-2]) / 2, (coords[1] + coords[-1]) / 2
+
+
+def connection_geometry(
+    connection: Connection | Any,
+    from_card: Card,
+    to_card: Card,
+    waypoints: Sequence[float] | None = None,
+) -> tuple[Sequence[float], Dict[str, float | bool]]:
+    """Та же ломаная, что рисует холст: общая для холста и экспорта."""
+
+    sx, sy, tx, ty = connection_anchors(from_card, to_card, connection)
+    coords, render_info = connection_points(connection, sx, sy, tx, ty, waypoints)
+    render_info["start_x"] = sx
+    render_info["start_y"] = sy
+    render_info["end_x"] = tx
+    render_info["end_y"] = ty
+    return coords, render_info
+
+
+class ConnectionGeometryCache:
+    """
+    Геометрия связей по ключу из прямоугольников карточек на концах, якорей,
+    стиля, радиуса, кривизны и точек обхода. Пока ключ связи не изменился, ломаная и
+    сведения для подписи и ручек отдаются без пересчёта. Результат общий
+    для всех вызовов, поэтому его не меняют на месте.
+    """
+
+    CACHE_LIMIT = 100_000
+
+    def __init__(self) -> None:
+        # id(связи) -> (связь, ключ, ломаная, сведения); ссылка на связь не
+        # даёт id достаться другому объекту, пока запись жива
+        self._entries: Dict[int, Tuple[Any, tuple, Sequence[float], Dict[str, float | bool]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _key(
+        connection: Connection | Any,
+        from_card: Card,
+        to_card: Card,
+        waypoints: Sequence[float] | None = None,
+    ) -> tuple:
+        return (
+            from_card.x,
+            from_card.y,
+            from_card.width,
+            from_card.height,
+            to_card.x,
+            to_card.y,
+            to_card.width,
+            to_card.height,
+            getattr(connection, "from_anchor", None),
+            getattr(connection, "to_anchor", None),
+            getattr(connection, "style", DEFAULT_CONNECTION_STYLE),
+            getattr(connection, "radius", DEFAULT_CONNECTION_RADIUS),
+            getattr(connection, "curvature", DEFAULT_CONNECTION_CURVATURE),
+            waypoints,
+        )
+
+    def lookup(
+        self,
+        connection: Connection | Any,
+        from_card: Card,
+        to_card: Card,
+        waypoints: Sequence[float] | None = None,
+    ) -> tuple[Sequence[float], Dict[str, float | bool]] | None:
+        """Геометрия из кэша или ``None``; учитывается в попаданиях и промахах."""
+
+        entry = self._entries.get(id(connection))
+        if entry is not None and entry[0] is connection and entry[1] == self._key(
+            connection, from_card, to_card, waypoints
+        ):
+            self.hits += 1
+            return entry[2], entry[3]
+        self.misses += 1
+        return None
+
+    def store(
+        self,
+        connection: Connection | Any,
+        from_card: Card,
+        to_card: Card,
+        coords: Sequence[float],
+        render_info: Dict[str, float | bool],
+        waypoints: Sequence[float] | None = None,
+    ) -> tuple[Sequence[float], Dict[str, float | bool]]:
+        """Запоминает посчитанную геометрию связи."""
+
+        coords = tuple(coords)
+        if len(self._entries) >= self.CACHE_LIMIT:
+            self._entries.clear()
+        # Ключ берётся после расчёта: выбранные якоря уже записаны в связь
+        self._entries[id(connection)] = (
+            connection,
+            self._key(connection, from_card, to_card, waypoints),
+            coords,
+            render_info,
+        )
+        return coords, render_info
+
+    def connection_geometry(
+        self,
+        connection: Connection | Any,
+        from_card: Card,
+        to_card: Card,
+        waypoints: Sequence[float] | None = None,
+    ) -> tuple[Sequence[float], Dict[str, float | bool]]:
+        cached = self.lookup(connection, from_card, to_card, waypoints)
+        if cached is not None:
+            return cached
+        coords, render_info = connection_geometry(connection, from_card, to_card, waypoints)
+        return self.store(connection, from_card, to_card, coords, render_info, waypoints)
+
+    def discard(self, connection: Connection | Any) -> None:
+        entry = self._entries.get(id(connection))
+        if entry is not None and entry[0] is connection:
+            del self._entries[id(connection)]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def cache_stats(self) -> tuple[int, int]:
+        """``(попадания, промахи)`` кэша геометрии."""
+
+        return self.hits, self.misses
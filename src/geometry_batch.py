@@ -0,0 +1,330 @@
+"""
+Пакетная геометрия связей на NumPy (без Tk).
+
+``connection_geometries`` считает то же, что ``geometry.connection_geometry``,
+но для многих связей сразу: якоря, контрольные точки, ломаные и середины
+для подписей считаются над массивами. Кривые Безье сэмплируются по заранее
+посчитанным таблицам базиса Бернштейна — отдельной на каждое число шагов,
+— а проверка самопересечения идёт по всем парам отрезков всех кривых группы.
+
+Результат совпадает со скалярным путём до бита: таблицы считаются теми же
+выражениями Python, а суммы и произведения над массивами идут в том же
+порядке, что и в ``geometry``. Длины берутся через ``math.hypot``, как там.
+Без NumPy и на малых пакетах работает скалярный путь.
+"""
+
+from __future__ import annotations
+
+import math
+from functools import lru_cache
+from typing import Any, Dict, List, Sequence, Tuple
+
+from . import geometry
+from .board_model import (
+    Card,
+    Connection,
+    DEFAULT_CONNECTION_CURVATURE,
+    DEFAULT_CONNECTION_RADIUS,
+    DEFAULT_CONNECTION_STYLE,
+)
+from .card_store import _numpy
+
+# На меньшем числе связей накладные расходы NumPy больше выигрыша
+VECTOR_MIN_CONNECTIONS = 32
+# Сколько пар отрезков проверять на пересечение за один проход массивами
+INTERSECTION_CHUNK_PAIRS = 1_000_000
+
+Job = Tuple[Connection, Card, Card]
+Route = Tuple[Sequence[float], Dict[str, float | bool]]
+
+_ANCHORS = ("n", "e", "s", "w")
+_ANCHOR_CODES = {anchor: code for code, anchor in enumerate(_ANCHORS)}
+_N, _E, _S, _W = range(4)
+
+
+@lru_cache(maxsize=None)
+def bernstein_table(steps: int) -> Tuple[Tuple[float, ...], ...]:
+    """
+    Коэффициенты кубической кривой Безье в ``t = i / steps`` — теми же
+    выражениями, что в ``geometry.bezier_point``.
+    """
+
+    b0, b1, b2, b3 = [], [], [], []
+    for i in range(steps + 1):
+        t = i / steps
+        inv_t = 1 - t
+        b0.append(inv_t**3)
+        b1.append(3 * inv_t**2 * t)
+        b2.append(3 * inv_t * t**2)
+        b3.append(t**3)
+    return tuple(b0), tuple(b1), tuple(b2), tuple(b3)
+
+
+def _bezier(np: Any, basis: Sequence[Any], p0: Any, p1: Any, p2: Any, p3: Any) -> Any:
+    b0, b1, b2, b3 = basis
+    return b0 * p0 + b1 * p1 + b2 * p2 + b3 * p3
+
+
+def _orientation(px: Any, py: Any, qx: Any, qy: Any, rx: Any, ry: Any) -> Any:
+    return (qx - px) * (ry - py) - (qy - py) * (rx - px)
+
+
+def _on_segment(np: Any, px: Any, py: Any, qx: Any, qy: Any, rx: Any, ry: Any) -> Any:
+    return (
+        (np.minimum(px, rx) <= qx)
+        & (qx <= np.maximum(px, rx))
+        & (np.minimum(py, ry) <= qy)
+        & (qy <= np.maximum(py, ry))
+    )
+
+
+def polylines_self_intersect(np: Any, xs: Any, ys: Any) -> Any:
+    """
+    ``geometry.polyline_self_intersects`` для строк массивов ``xs``/``ys``
+    (одна ломаная на строку, все одной длины).
+    """
+
+    rows, points = xs.shape
+    result = np.zeros(rows, dtype=bool)
+    # Пары несоседних отрезков в порядке ``geometry.polyline_self_intersects``;
+    # строятся на каждый вызов, чтобы не держать O(точек²) индексов в памяти
+    i, j = np.triu_indices(max(points - 1, 0), 2)
+    if not len(i):
+        return result
+    chunk = max(1, INTERSECTION_CHUNK_PAIRS // len(i))
+    for start in range(0, rows, chunk):
+        x = xs[start:start + chunk]
+        y = ys[start:start + chunk]
+        a1x, a1y, a2x, a2y = x[:, i], y[:, i], x[:, i + 1], y[:, i + 1]
+        b1x, b1y, b2x, b2y = x[:, j], y[:, j], x[:, j + 1], y[:, j + 1]
+        o1 = _orientation(a1x, a1y, a2x, a2y, b1x, b1y)
+        o2 = _orientation(a1x, a1y, a2x, a2y, b2x, b2y)
+        o3 = _orientation(b1x, b1y, b2x, b2y, a1x, a1y)
+        o4 = _orientation(b1x, b1y, b2x, b2y, a2x, a2y)
+        hit = ((o1 > 0) != (o2 > 0)) & ((o3 > 0) != (o4 > 0))
+        hit |= (o1 == 0) & _on_segment(np, a1x, a1y, b1x, b1y, a2x, a2y)
+        hit |= (o2 == 0) & _on_segment(np, a1x, a1y, b2x, b2y, a2x, a2y)
+        hit |= (o3 == 0) & _on_segment(np, b1x, b1y, a1x, a1y, b2x, b2y)
+        hit |= (o4 == 0) & _on_segment(np, b1x, b1y, a2x, a2y, b2x, b2y)
+        result[start:start + chunk] = hit.any(axis=1)
+    return result
+
+
+def _anchor_points(np: Any, code: Any, x: Any, y: Any, w: Any, h: Any) -> Tuple[Any, Any]:
+    """Точки ``geometry.card_handle_positions`` для кодов якорей."""
+
+    half_w = w / 2
+    half_h = h / 2
+    px = np.where(code == _E, x + half_w, np.where(code == _W, x - half_w, x))
+    py = np.where(code == _N, y - half_h, np.where(code == _S, y + half_h, y))
+    return px, py
+
+
+def _resolve_anchors(np: Any, jobs: Sequence[Job]) -> Tuple[Any, Any, Any, Any, List[int], List[int]]:
+    """
+    ``geometry.connection_anchors`` для всех связей: точки крепления и коды
+    якорей. Выбранные якоря записываются в связи, как и в скалярном пути.
+    """
+
+    fx = np.array([job[1].x for job in jobs])
+    fy = np.array([job[1].y for job in jobs])
+    fw = np.array([job[1].width for job in jobs])
+    fh = np.array([job[1].height for job in jobs])
+    tx = np.array([job[2].x for job in jobs])
+    ty = np.array([job[2].y for job in jobs])
+    tw = np.array([job[2].width for job in jobs])
+    th = np.array([job[2].height for job in jobs])
+
+    dx = tx - fx
+    dy = ty - fy
+    horizontal = np.abs(dx) > np.abs(dy)
+    auto_from = np.where(horizontal, np.where(dx > 0, _E, _W), np.where(dy > 0, _S, _N))
+    auto_to = np.where(horizontal, np.where(dx > 0, _W, _E), np.where(dy > 0, _N, _S))
+    preferred_from = np.array([_ANCHOR_CODES.get(getattr(job[0], "from_anchor", None), -1) for job in jobs])
+    preferred_to = np.array([_ANCHOR_CODES.get(getattr(job[0], "to_anchor", None), -1) for job in jobs])
+    from_code = np.where(preferred_from >= 0, preferred_from, auto_from)
+    to_code = np.where(preferred_to >= 0, preferred_to, auto_to)
+
+    sx, sy = _anchor_points(np, from_code, fx, fy, fw, fh)
+    ex, ey = _anchor_points(np, to_code, tx, ty, tw, th)
+    from_codes = from_code.tolist()
+    to_codes = to_code.tolist()
+    for (connection, _from_card, _to_card), fc, tc in zip(jobs, from_codes, to_codes):
+        connection.from_anchor = _ANCHORS[fc]
+        connection.to_anchor = _ANCHORS[tc]
+    return sx, sy, ex, ey, from_codes, to_codes
+
+
+def _elbow_routes(np: Any, sx: Any, sy: Any, tx: Any, ty: Any) -> Tuple[Any, ...]:
+    """Ветка ``elbow`` из ``geometry.connection_points`` над массивами."""
+
+    dx = tx - sx
+    dy = ty - sy
+    horizontal = np.abs(dx) >= np.abs(dy)
+    cx = np.where(horizontal, tx, sx)
+    cy = np.where(horizontal, sy, ty)
+    first_len = np.abs(cx - sx) + np.abs(cy - sy)
+    second_len = np.abs(tx - cx) + np.abs(ty - cy)
+    total_len = np.maximum(first_len + second_len, 1.0)
+    half = total_len / 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio_first = half / first_len
+        remain = half - first_len
+        ratio_second = remain / np.maximum(second_len, 1.0)
+        on_first = (half <= first_len) & (first_len != 0)
+        mid_x = np.where(on_first, sx + (cx - sx) * ratio_first, cx + (tx - cx) * ratio_second)
+        mid_y = np.where(on_first, sy + (cy - sy) * ratio_first, cy + (ty - cy) * ratio_second)
+    return horizontal, dx, dy, cx, cy, total_len, mid_x, mid_y
+
+
+def connection_geometries(jobs: Sequence[Job]) -> List[Route]:
+    """
+    ``geometry.connection_geometry`` для каждой тройки ``(связь, откуда, куда)``
+    одним пакетом. Ломаные возвращаются кортежами.
+    """
+
+    np = _numpy()
+    if np is None or len(jobs) < VECTOR_MIN_CONNECTIONS:
+        routes = []
+        for connection, from_card, to_card in jobs:
+            coords, render_info = geometry.connection_geometry(connection, from_card, to_card)
+            routes.append((tuple(coords), render_info))
+        return routes
+
+    count = len(jobs)
+    sx, sy, tx, ty, from_codes, to_codes = _resolve_anchors(np, jobs)
+    sxl, syl, txl, tyl = sx.tolist(), sy.tolist(), tx.tolist(), ty.tolist()
+    styles = [getattr(job[0], "style", DEFAULT_CONNECTION_STYLE) for job in jobs]
+    routes: List[Route | None] = [None] * count
+
+    # --- elbow ---
+    elbow = [k for k in range(count) if styles[k] == "elbow"]
+    if elbow:
+        idx = np.asarray(elbow)
+        horizontal, dx, dy, cx, cy, total_len, mid_x, mid_y = (
+            part.tolist() for part in _elbow_routes(np, sx[idx], sy[idx], tx[idx], ty[idx])
+        )
+        for n, k in enumerate(elbow):
+            if horizontal[n]:
+                fallback = (1.0 if dx[n] >= 0 else -1.0, 0.0)
+            else:
+                fallback = (0.0, 1.0 if dy[n] >= 0 else -1.0)
+            routes[k] = (
+                (sxl[k], syl[k], cx[n], cy[n], txl[k], tyl[k]),
+                {
+                    "smooth": False,
+                    "midpoint_x": mid_x[n],
+                    "midpoint_y": mid_y[n],
+                    "normal_x": 0.0,
+                    "normal_y": 0.0,
+                    "length": total_len[n],
+                    "start_dir": geometry.anchor_direction(_ANCHORS[from_codes[k]], fallback),
+                    "handle_length": 0.0,
+                    "baseline_mid_x": mid_x[n],
+                    "baseline_mid_y": mid_y[n],
+                },
+            )
+
+    # --- rounded ---
+    rounded = []
+    for k in range(count):
+        if styles[k] != "rounded":
+            continue
+        connection = jobs[k][0]
+        radius = max(getattr(connection, "radius", DEFAULT_CONNECTION_RADIUS), 0.0)
+        curvature = getattr(connection, "curvature", DEFAULT_CONNECTION_CURVATURE)
+        if radius <= 0 and curvature == 0:
+            continue
+        rounded.append((k, radius, curvature))
+    groups: Dict[int, List[int]] = {}
+    if rounded:
+        idx = np.asarray([k for k, _radius, _curvature in rounded])
+        radius = np.array([r for _k, r, _c in rounded])
+        curvature = np.array([c for _k, _r, c in rounded])
+        rsx, rsy, rtx, rty = sx[idx], sy[idx], tx[idx], ty[idx]
+        dx = rtx - rsx
+        dy = rty - rsy
+        length = np.array([math.hypot(a, b) or 1.0 for a, b in zip(dx.tolist(), dy.tolist())])
+        dir_x = dx / length
+        dir_y = dy / length
+        normal_x = -dy / length
+        normal_y = dx / length
+        handle_base = np.where(radius > 0, radius, length * 0.25)
+        max_handle_length = length * 0.45
+        handle_length = np.maximum(length * 0.1, np.minimum(handle_base, max_handle_length))
+        curvy = ~((radius > 0) & (handle_base > max_handle_length)) & (handle_length > 0)
+
+        directions = np.array([geometry.anchor_direction(anchor, (0.0, 0.0)) for anchor in _ANCHORS])
+        start_dir = directions[np.asarray([from_codes[k] for k, _r, _c in rounded])]
+        end_out = directions[np.asarray([to_codes[k] for k, _r, _c in rounded])]
+        c1x = rsx + start_dir[:, 0] * handle_length
+        c1y = rsy + start_dir[:, 1] * handle_length
+        c2x = rtx - -end_out[:, 0] * handle_length
+        c2y = rty - -end_out[:, 1] * handle_length
+        curve_shift = np.maximum(-length / 2, np.minimum(curvature, length / 2))
+        shifted = curve_shift != 0
+        c1x = np.where(shifted, c1x + normal_x * curve_shift, c1x)
+        c1y = np.where(shifted, c1y + normal_y * curve_shift, c1y)
+        c2x = np.where(shifted, c2x + normal_x * curve_shift, c2x)
+        c2y = np.where(shifted, c2y + normal_y * curve_shift, c2y)
+
+        for n, length_value in enumerate(length.tolist()):
+            if curvy[n]:
+                groups.setdefault(max(12, int(length_value / 18)), []).append(n)
+
+        half = [np.asarray(column) for column in bernstein_table(2)]
+        mid_x = _bezier(np, [b[1] for b in half], rsx, c1x, c2x, rtx)
+        mid_y = _bezier(np, [b[1] for b in half], rsy, c1y, c2y, rty)
+        columns = {
+            "length": length.tolist(),
+            "normal_x": normal_x.tolist(),
+            "normal_y": normal_y.tolist(),
+            "handle_length": handle_length.tolist(),
+            "mid_x": mid_x.tolist(),
+            "mid_y": mid_y.tolist(),
+            "dir_x": dir_x.tolist(),
+            "dir_y": dir_y.tolist(),
+        }
+
+        for steps, members in groups.items():
+            sel = np.asarray(members)
+            basis = [np.asarray(column)[None, :] for column in bernstein_table(steps)]
+            xs = _bezier(np, basis, rsx[sel][:, None], c1x[sel][:, None], c2x[sel][:, None], rtx[sel][:, None])
+            ys = _bezier(np, basis, rsy[sel][:, None], c1y[sel][:, None], c2y[sel][:, None], rty[sel][:, None])
+            crossing = polylines_self_intersect(np, xs, ys).tolist()
+            coords = np.empty((len(members), 2 * (steps + 1)))
+            coords[:, 0::2] = xs
+            coords[:, 1::2] = ys
+            for n, row, crosses in zip(members, coords.tolist(), crossing):
+                if crosses:
+                    continue
+                k = rounded[n][0]
+                routes[k] = (
+                    tuple(row),
+                    {
+                        "smooth": False,
+                        "midpoint_x": columns["mid_x"][n],
+                        "midpoint_y": columns["mid_y"][n],
+                        "normal_x": columns["normal_x"][n],
+                        "normal_y": columns["normal_y"][n],
+                        "length": columns["length"][n],
+                        "start_dir": geometry.anchor_direction(
+                            _ANCHORS[from_codes[k]], (columns["dir_x"][n], columns["dir_y"][n])
+                        ),
+                        "handle_length": columns["handle_length"][n],
+                        "baseline_mid_x": (sxl[k] + txl[k]) / 2,
+                        "baseline_mid_y": (syl[k] + tyl[k]) / 2,
+                    },
+                )
+
+    # --- прямые и всё, что откатилось к прямой ---
+    for k in range(count):
+        if routes[k] is None:
+            coords, render_info = geometry.straight_connection(jobs[k][0], sxl[k], syl[k], txl[k], tyl[k])
+            routes[k] = (tuple(coords), render_info)
+        render_info = routes[k][1]
+        render_info["start_x"] = sxl[k]
+        render_info["start_y"] = syl[k]
+        render_info["end_x"] = txl[k]
+        render_info["end_y"] = tyl[k]
+    return routes
@@ -0,0 +1,91 @@
+"""
+Переиспользуемые элементы холста для хэндлов карточек, рамок и связей.
+
+Хэндлы появляются и исчезают постоянно: при наведении на карточку, при смене
+выделения, при каждом движении мыши во время правки связи. Вместо пары
+``create_*``/``delete`` спрятанный хэндл остаётся на холсте с
+``state="hidden"`` и при следующем показе получает новые координаты и теги.
+Так во время перетаскивания элементы не создаются вовсе (без Tk).
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+# Тег спрятанного элемента пула: чужие теги (``card_7``, ``connection_handle``)
+# снимаются, чтобы поиск по ним не находил свободные хэндлы
+POOLED_TAG = "pooled_handle"
+
+
+class HandlePool:
+    """
+    Свободные элементы по видам хэндлов. Вид (``"connect"``, ``"frame_nw"``…)
+    задаёт форму элемента и привязки, сделанные при создании; цвет, теги и
+    координаты выставляются при каждой выдаче.
+
+    Элементы живут до очистки холста: после ``delete("all")`` нужно вызвать
+    ``clear``. Элемент, удалённый с холста мимо пула, просто не возвращается в него.
+    """
+
+    def __init__(self, canvas: Any) -> None:
+        self.canvas = canvas
+        self._free: Dict[str, List[int]] = {}
+        self._kinds: Dict[int, str] = {}
+        self.created = 0
+        self.reused = 0
+
+    def acquire(
+        self,
+        kind: str,
+        create: Callable[..., int],
+        coords: Sequence[float],
+        **options: Any,
+    ) -> int:
+        """
+        Выдаёт видимый элемент вида ``kind`` с координатами ``coords`` и опциями
+        ``options`` (``tags``, ``fill``…). Новый элемент создаётся через
+        ``create(*coords, **options)``, только если свободных нет.
+        """
+
+        free = self._free.get(kind)
+        if free:
+            item_id = free.pop()
+            self.canvas.coords(item_id, *coords)
+            self.canvas.itemconfig(item_id, state="normal", **options)
+            self.reused += 1
+            return item_id
+        item_id = create(*coords, **options)
+        self._kinds[item_id] = kind
+        self.created += 1
+        return item_id
+
+    def release(self, item_id: int | None) -> None:
+        """Прячет элемент и возвращает его в пул; чужие элементы удаляет."""
+
+        if not item_id:
+            return
+        kind = self._kinds.get(item_id)
+        if kind is None:
+            self.canvas.delete(item_id)
+            return
+        free = self._free.setdefault(kind, [])
+        if item_id in free:
+            return
+        self.canvas.itemconfig(item_id, state="hidden", tags=(POOLED_TAG,))
+        free.append(item_id)
+
+    def clear(self) -> None:
+        """Забывает все элементы (холст уже очищен)."""
+
+        self._free.clear()
+        self._kinds.clear()
+
+    def size(self) -> Tuple[int, int]:
+        """``(всего элементов, из них свободных)``."""
+
+        return len(self._kinds), sum(len(free) for free in self._free.values())
+
+    def cache_stats(self) -> Tuple[int, int]:
+        """``(переиспользования, созданные элементы)`` — для ``PerfMonitor``."""
+
+        return self.reused, self.created
@@ -0,0 +1,245 @@
+"""
+Запись ввода и детерминированное воспроизведение.
+
+``InputRecorder`` оборачивает обработчики ``EventBinder`` и записывает каждое
+событие мыши и горячую клавишу: имя обработчика, последовательность Tk, время
+от начала записи и координаты в окне и на холсте. Вместе с событиями
+сохраняются доска, область просмотра и зум на момент начала записи.
+
+``InputReplayer`` восстанавливает это состояние в ``BoardApp`` и подаёт
+события обратно в обработчики — в записанном темпе или без пауз — с замером
+каждого обработчика и последующей перерисовки. Так записанный сеанс
+становится повторяемым бенчмарком (``python -m benchmarks.replay``).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List
+
+from .perf_monitor import percentile
+
+RECORDING_VERSION = 1
+REPLAY_SPEEDS = ("max", "recorded")
+
+# Обработчики, которым важны координаты окна, а не холста (панорамирование)
+WIDGET_COORDINATE_HANDLERS = {"start_pan", "do_pan"}
+# Служебные клавиши самой записи в неё не попадают
+IGNORED_HANDLERS = {"toggle_input_recording"}
+_EVENT_FIELDS = ("x", "y", "delta", "num", "state", "keysym", "char")
+
+
+class InputRecorder:
+    """Запись событий, прошедших через ``EventBinder``."""
+
+    def __init__(self) -> None:
+        self.recording = False
+        self.events: List[Dict[str, Any]] = []
+        self._app: Any = None
+        self._started = 0.0
+        self._initial: Dict[str, Any] = {}
+
+    def start(self, app: Any) -> None:
+        """Начинает запись; состояние доски ``app`` становится началом сеанса."""
+
+        self._app = app
+        self.events = []
+        self._initial = {
+            "board": app.get_board_data(),
+            "viewport": app.current_viewport(),
+            "zoom": app.zoom_factor,
+        }
+        self._started = time.perf_counter()
+        self.recording = True
+
+    def stop(self) -> Dict[str, Any]:
+        """Заканчивает запись и возвращает сеанс (см. ``save``)."""
+
+        self.recording = False
+        return self.session()
+
+    def session(self) -> Dict[str, Any]:
+        return {"version": RECORDING_VERSION, **self._initial, "events": list(self.events)}
+
+    def save(self, path: str | os.PathLike) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.session(), f, ensure_ascii=False)
+
+    def wrap(self, name: str, sequence: str, kind: str, handler: Callable[..., Any]) -> Callable[..., Any]:
+        """Обёртка обработчика: при включённой записи событие записывается до вызова."""
+
+        if name in IGNORED_HANDLERS:
+            return handler
+
+        def record(event: Any = None, *args: Any, **kwargs: Any) -> Any:
+            if self.recording and event is not None:
+                self.events.append(self._describe(name, sequence, kind, event))
+            return handler(event, *args, **kwargs)
+
+        return record
+
+    def _describe(self, name: str, sequence: str, kind: str, event: Any) -> Dict[str, Any]:
+        entry: Dict[str, Any] = {
+            "t": round(time.perf_counter() - self._started, 6),
+            "handler": name,
+            "sequence": sequence,
+            "kind": kind,
+        }
+        for key in _EVENT_FIELDS:
+            value = getattr(event, key, None)
+            # Tk подставляет "??" в поля, которых у события нет
+            if isinstance(value, (int, float)) or (isinstance(value, str) and value != "??"):
+                entry[key] = value
+        canvas = getattr(self._app, "canvas", None)
+        if kind == "mouse" and canvas is not None and "x" in entry and "y" in entry:
+            entry["cx"] = canvas.canvasx(entry["x"])
+            entry["cy"] = canvas.canvasy(entry["y"])
+        return entry
+
+
+def load_recording(path: str | os.PathLike) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            session = json.load(f)
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"Файл записи повреждён: {exc}") from exc
+    if not isinstance(session, dict) or session.get("version") != RECORDING_VERSION:
+        raise ValueError("Неподдерживаемый формат записи ввода.")
+    if not isinstance(session.get("events"), list) or not isinstance(session.get("board"), dict):
+        raise ValueError("В записи нет событий или состояния доски.")
+    return session
+
+
+class ReplayEvent:
+    """Событие для обработчика: те же поля, что у ``tk.Event``."""
+
+    def __init__(self, widget: Any, **fields: Any) -> None:
+        self.widget = widget
+        self.x = 0
+        self.y = 0
+        self.x_root = 0
+        self.y_root = 0
+        self.delta = 0
+        self.num = 0
+        self.state = 0
+        self.keysym = ""
+        self.char = ""
+        for key, value in fields.items():
+            setattr(self, key, value)
+
+
+@dataclass
+class EventTiming:
+    index: int
+    handler: str
+    handler_ms: float
+    idle_ms: float
+
+
+@dataclass
+class ReplayReport:
+    """Время каждого события: обработчик и последующая перерисовка (``update_idletasks``)."""
+
+    speed: str
+    timings: List[EventTiming] = field(default_factory=list)
+    wall_ms: float = 0.0
+
+    def by_handler(self) -> Dict[str, Dict[str, float]]:
+        grouped: Dict[str, List[EventTiming]] = {}
+        for timing in self.timings:
+            grouped.setdefault(timing.handler, []).append(timing)
+        summary = {}
+        for name, items in grouped.items():
+            handler_ms = [item.handler_ms for item in items]
+            summary[name] = {
+                "events": len(items),
+                "total_ms": sum(handler_ms),
+                "idle_ms": sum(item.idle_ms for item in items),
+                "p50_ms": percentile(handler_ms, 0.5),
+                "p95_ms": percentile(handler_ms, 0.95),
+                "max_ms": max(handler_ms),
+            }
+        return dict(sorted(summary.items(), key=lambda item: item[1]["total_ms"], reverse=True))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "speed": self.speed,
+            "wall_ms": self.wall_ms,
+            "handlers": self.by_handler(),
+            "events": [timing.__dict__ for timing in self.timings],
+        }
+
+    def format(self) -> str:
+        lines = [f"{'обработчик':<34} {'событий':>8} {'всего, мс':>10} {'p50':>8} {'p95':>8} {'макс':>8}"]
+        for name, row in self.by_handler().items():
+            lines.append(
+                f"{name:<34} {row['events']:>8} {row['total_ms']:>10.2f} {row['p50_ms']:>8.2f}"
+                f" {row['p95_ms']:>8.2f} {row['max_ms']:>8.2f}"
+            )
+        lines.append(f"всего: {len(self.timings)} событий за {self.wall_ms:.0f} мс")
+        return "\n".join(lines)
+
+
+class InputReplayer:
+    """Воспроизведение записанного сеанса в ``BoardApp``."""
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    def prepare(self, session: Dict[str, Any]) -> None:
+        """Возвращает приложение к состоянию начала записи."""
+
+        app = self.app
+        app.set_board_from_data(session["board"])
+        app.history.clear_and_init(app.get_board_data())
+        app.zoom_factor = session.get("zoom", 1.0)
+        viewport = session.get("viewport")
+        if viewport:
+            app.root.update_idletasks()
+            app.scroll_to_viewport(viewport)
+        app.root.update_idletasks()
+
+    def replay(self, session: Dict[str, Any], *, speed: str = "max") -> ReplayReport:
+        if speed not in REPLAY_SPEEDS:
+            raise ValueError(f"Неизвестная скорость воспроизведения: {speed}")
+        app = self.app
+        self.prepare(session)
+        report = ReplayReport(speed)
+        started = time.perf_counter()
+        for index, entry in enumerate(session["events"]):
+            if speed == "recorded":
+                self._wait_until(started + entry.get("t", 0.0))
+            handler = getattr(app, entry["handler"])
+            event = self._event(entry)
+            begin = time.perf_counter()
+            handler(event)
+            handled = time.perf_counter()
+            app.root.update_idletasks()
+            report.timings.append(
+                EventTiming(
+                    index,
+                    entry["handler"],
+                    (handled - begin) * 1000,
+                    (time.perf_counter() - handled) * 1000,
+                )
+            )
+        report.wall_ms = (time.perf_counter() - started) * 1000
+        return report
+
+    def _event(self, entry: Dict[str, Any]) -> ReplayEvent:
+        canvas = self.app.canvas
+        fields = {key: entry[key] for key in _EVENT_FIELDS if key in entry}
+        if "cx" in entry and entry["handler"] not in WIDGET_COORDINATE_HANDLERS:
+            # Та же точка доски при любой текущей прокрутке
+            fields["x"] = entry["cx"] - canvas.canvasx(0)
+            fields["y"] = entry["cy"] - canvas.canvasy(0)
+        return ReplayEvent(canvas, **fields)
+
+    def _wait_until(self, deadline: float) -> None:
+        root = self.app.root
+        while time.perf_counter() < deadline:
+            root.update()
+            time.sleep(min(0.001, max(0.0, deadline - time.perf_counter())))
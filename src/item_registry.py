@@ -0,0 +1,106 @@
+"""
+Идентификаторы элементов холста для объектов доски.
+
+Модель (``Card``, ``Connection``, ``Frame``) хранит только сохраняемые данные;
+какими элементами холста нарисован объект, знает представление. Реестр
+принадлежит ``CanvasView`` и очищается вместе с холстом.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Tuple
+
+from .board_model import Connection
+
+
+class CardItems:
+    __slots__ = ("rect_id", "text_id", "text_bg_id", "image_id", "resize_handle_id", "connect_handles")
+
+    def __init__(self) -> None:
+        self.rect_id: int | None = None
+        self.text_id: int | None = None
+        self.text_bg_id: int | None = None
+        self.image_id: int | None = None
+        self.resize_handle_id: int | None = None
+        self.connect_handles: Dict[str, int | None] = {}
+
+    def all_ids(self) -> list[int]:
+        ids = [self.rect_id, self.text_id, self.text_bg_id, self.image_id, self.resize_handle_id]
+        ids.extend(self.connect_handles.values())
+        return [item_id for item_id in ids if item_id]
+
+
+class ConnectionItems:
+    __slots__ = (
+        "line_id",
+        "label_id",
+        "start_handle_id",
+        "end_handle_id",
+        "radius_handle_id",
+        "curvature_handle_id",
+    )
+
+    def __init__(self) -> None:
+        self.line_id: int | None = None
+        self.label_id: int | None = None
+        self.start_handle_id: int | None = None
+        self.end_handle_id: int | None = None
+        self.radius_handle_id: int | None = None
+        self.curvature_handle_id: int | None = None
+
+
+class FrameItems:
+    __slots__ = ("rect_id", "title_id", "resize_handles", "summary_ids")
+
+    def __init__(self) -> None:
+        self.rect_id: int | None = None
+        self.title_id: int | None = None
+        self.resize_handles: Dict[str, int | None] = {}
+        # Сводка свёрнутой рамки: подпись и миниатюра
+        self.summary_ids: list[int] = []
+
+
+class ItemRegistry:
+    """
+    Элементы холста по объектам доски. ``card``/``frame``/``connection``
+    возвращают запись, создавая пустую при первом обращении. Связи не имеют
+    идентификатора и хранятся по объекту: запись держит ссылку на связь,
+    поэтому ключ не может достаться другому объекту, пока запись не удалена.
+    """
+
+    def __init__(self) -> None:
+        self.cards: Dict[int, CardItems] = {}
+        self.frames: Dict[int, FrameItems] = {}
+        self.connections: Dict[int, Tuple[Connection, ConnectionItems]] = {}
+
+    def card(self, card_id: int) -> CardItems:
+        items = self.cards.get(card_id)
+        if items is None:
+            items = self.cards[card_id] = CardItems()
+        return items
+
+    def frame(self, frame_id: int) -> FrameItems:
+        items = self.frames.get(frame_id)
+        if items is None:
+            items = self.frames[frame_id] = FrameItems()
+        return items
+
+    def connection(self, connection: Connection) -> ConnectionItems:
+        entry = self.connections.get(id(connection))
+        if entry is None:
+            entry = self.connections[id(connection)] = (connection, ConnectionItems())
+        return entry[1]
+
+    def forget_card(self, card_id: int) -> None:
+        self.cards.pop(card_id, None)
+
+    def forget_frame(self, frame_id: int) -> None:
+        self.frames.pop(frame_id, None)
+
+    def forget_connection(self, connection: Connection) -> None:
+        self.connections.pop(id(connection), None)
+
+    def clear(self) -> None:
+        self.cards.clear()
+        self.frames.clear()
+        self.connections.clear()
@@ -0,0 +1,343 @@
+from __future__ import annotations
+
+import functools
+import time
+from json import JSONDecodeError
+from typing import TYPE_CHECKING, Any, Callable, Collection, Dict, List
+
+from .board_model import BOARD_REPLACED, CONNECTION_ADDED, FRAME_ADDED, Card, Connection, Frame, SUPPORTED_SCHEMA_VERSIONS
+from .board_stream import StreamingBoardReader
+from .board_io import (
+    ATTACHMENTS_CONTAINER_KEY,
+    BoardContainer,
+    BoardFileError,
+    is_board_container,
+    _validate_archive_members,
+    _validate_board_data,
+    _validate_viewport,
+)
+
+if TYPE_CHECKING:
+    from .main import BoardApp
+
+
+def unless_loading(method: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Действие ``BoardApp`` игнорируется, пока доска загружается порциями:
+    полузагруженную доску нельзя ни сохранить, ни править, ни занести в историю.
+    """
+
+    @functools.wraps(method)
+    def guarded(app: "BoardApp", *args: Any, **kwargs: Any) -> Any:
+        if app.load_controller.is_loading:
+            return None
+        return method(app, *args, **kwargs)
+
+    return guarded
+
+
+class LoadController:
+    """
+    Прогрессивная загрузка доски.
+
+    Записи файла разбираются порциями в ``after``-колбэках, карточки вокруг
+    сохранённой области просмотра рисуются сразу, остальные — следующими
+    порциями. Вложения остаются ссылками: превью читаются из файла доски.
+    Пока загрузка идёт, правки, сохранение и история недоступны
+    (``unless_loading``, ``EventBinder(busy=...)``).
+    """
+
+    PARSE_SHARE = 0.7
+
+    def __init__(
+        self,
+        app: "BoardApp",
+        *,
+        chunk_size: int = 250,
+        frame_budget_ms: float = 12.0,
+        priority_margin: float = 0.5,
+    ) -> None:
+        self.app = app
+        self.chunk_size = chunk_size
+        self.frame_budget_ms = frame_budget_ms
+        self.priority_margin = priority_margin
+        self.reader: StreamingBoardReader | None = None
+        self._records = None
+        self._after_id: str | None = None
+        self._on_finished: Callable[[], None] | None = None
+        self._on_failed: Callable[[Exception], None] | None = None
+        self._priority_rect: tuple[float, float, float, float] | None = None
+        self._drawn_cards: set[int] = set()
+        self._pending_cards: List[Card] = []
+        self._pending_connections: List[Connection] = []
+        self._render_queue: List[tuple[str, Any]] = []
+        self._render_total = 0
+        self._progress_id: int | None = None
+        self._members: Collection[str] | None = None
+        self.viewport: Dict[str, float] | None = None
+
+    @property
+    def is_loading(self) -> bool:
+        return self.reader is not None
+
+    def start(
+        self,
+        reader: StreamingBoardReader,
+        *,
+        on_finished: Callable[[], None] | None = None,
+        on_failed: Callable[[Exception], None] | None = None,
+        members: Collection[str] | None = None,
+    ) -> None:
+        """
+        Запускает загрузку. ``members`` — список файлов контейнера ``.mboard``,
+        если доска читается из него: ссылки вложений проверяются по ходу чтения.
+        """
+        self.cancel()
+        app = self.app
+        app.reset_board_canvas()
+        app.next_card_id = 1
+        app.next_frame_id = 1
+        self.reader = reader
+        self._records = reader.records()
+        self._on_finished = on_finished
+        self._on_failed = on_failed
+        self._members = members
+        self._drawn_cards = set()
+        self._pending_cards = []
+        self._pending_connections = []
+        self._render_queue = []
+        self._render_total = 0
+        self.viewport = None
+        self._priority_rect = self._expand_rect(app.visible_canvas_rect())
+        self._show_progress(0.0)
+        self._schedule(self._parse_step)
+
+    def cancel(self) -> None:
+        if self._after_id is not None:
+            self.app.root.after_cancel(self._after_id)
+            self._after_id = None
+        self._close_reader()
+        self._hide_progress()
+
+    # --- Этапы загрузки ---
+
+    def _schedule(self, step: Callable[[], None]) -> None:
+        self._after_id = self.app.root.after(1, step)
+
+    def _parse_step(self) -> None:
+        self._after_id = None
+        deadline = time.perf_counter() + self.frame_budget_ms / 1000
+        try:
+            # Карточки и рамки порции доходят до подписчиков одним изменением
+            with self.app.board_events.batch():
+                for _ in range(self.chunk_size):
+                    record = next(self._records, None)
+                    if record is None:
+                        self._finish_parsing()
+                        return
+                    self._handle_record(*record)
+                    if time.perf_counter() >= deadline:
+                        break
+        except (JSONDecodeError, OSError, BoardFileError, KeyError, TypeError, ValueError) as exc:
+            self._fail(exc)
+            return
+
+        self._show_progress(self.reader.progress * self.PARSE_SHARE)
+        self._schedule(self._parse_step)
+
+    def _handle_record(self, kind: str, payload: Any) -> None:
+        app = self.app
+        if kind == "schema_version":
+            if payload not in SUPPORTED_SCHEMA_VERSIONS:
+                raise BoardFileError(
+                    "Неподдерживаемая версия схемы: "
+                    f"{payload}. Ожидается один из: {sorted(SUPPORTED_SCHEMA_VERSIONS)}."
+                )
+        elif kind == "viewport":
+            _validate_viewport(payload)
+            self.viewport = payload
+            app.scroll_to_viewport(payload)
+            self._priority_rect = self._expand_rect(
+                (payload["x1"], payload["y1"], payload["x2"], payload["y2"])
+            )
+        elif kind == ATTACHMENTS_CONTAINER_KEY:
+            self._open_attachments_container(payload)
+        elif kind == "card":
+            if self._members is not None:
+                _validate_archive_members({"cards": [payload]}, self._members)
+            card = Card.from_primitive(payload)
+            app.cards[card.id] = card
+            app.next_card_id = max(app.next_card_id, card.id + 1)
+            app.pending_attachment_restore.update((card.id, a.id) for a in card.attachments)
+            if self._is_priority(card):
+                self._draw_card(card)
+            else:
+                self._pending_cards.append(card)
+        elif kind == "connection":
+            try:
+                self._pending_connections.append(Connection.from_primitive(payload))
+            except ValueError:
+                # Битые записи пропускаем, как и BoardData.from_primitive
+                pass
+        elif kind == "frame":
+            frame = Frame.from_primitive(payload)
+            app.frames[frame.id] = frame
+            app.next_frame_id = max(app.next_frame_id, frame.id + 1)
+            app.board_events.emit(FRAME_ADDED, (frame.id,))
+            app.canvas_view.draw_frame(frame)
+
+    def _open_attachments_container(self, path: Any) -> None:
+        """
+        Подключает контейнер, из которого автосохранение берёт вложения. Если
+        файла больше нет, такие вложения просто не восстановятся.
+        """
+        if not isinstance(path, str) or not is_board_container(path):
+            return
+        try:
+            container = BoardContainer(path)
+        except (OSError, BoardFileError):
+            return
+        previous = self.app.attachment_store.set_container(container)
+        if previous is not None:
+            previous.close()
+
+    def _finish_parsing(self) -> None:
+        _validate_board_data(self.reader.skeleton(), members=self._members)
+        self._close_reader(keep_state=True)
+
+        app = self.app
+        app.connections.extend(self._pending_connections)
+        app.board_events.emit_connections(CONNECTION_ADDED, self._pending_connections)
+        ready = [c for c in self._pending_connections if self._endpoints_drawn(c)]
+        deferred = [c for c in self._pending_connections if not self._endpoints_drawn(c)]
+        self._render_queue = (
+            [("connection", c) for c in ready]
+            + [("card", c) for c in self._pending_cards]
+            + [("connection", c) for c in deferred]
+        )
+        self._render_queue.reverse()
+        self._render_total = len(self._render_queue)
+        self._pending_cards = []
+        self._pending_connections = []
+        self._schedule(self._render_step)
+
+    def _render_step(self) -> None:
+        self._after_id = None
+        deadline = time.perf_counter() + self.frame_budget_ms / 1000
+        for _ in range(self.chunk_size):
+            if not self._render_queue:
+                self._finish()
+                return
+            kind, obj = self._render_queue.pop()
+            if kind == "card":
+                self._draw_card(obj)
+            else:
+                self._draw_connection(obj)
+            if time.perf_counter() >= deadline:
+                break
+
+        done = 1 - len(self._render_queue) / max(self._render_total, 1)
+        self._show_progress(self.PARSE_SHARE + (1 - self.PARSE_SHARE) * done)
+        self._schedule(self._render_step)
+
+    def _finish(self) -> None:
+        app = self.app
+        self.reader = None
+        self._records = None
+        self._hide_progress()
+        app.canvas.tag_raise("connection")
+        app.canvas.tag_raise("connection_label")
+        bbox = app.canvas.bbox("all")
+        if bbox:
+            app.canvas.config(scrollregion=bbox)
+        if self.viewport:
+            app.scroll_to_viewport(self.viewport)
+        app.report_attachment_restore_failures()
+        app.board_events.emit(BOARD_REPLACED)
+        # Содержимое свёрнутых рамок убирается с холста, рамки получают сводки
+        app.collapse_controller.refresh()
+        app.update_controls_state()
+        callback = self._on_finished
+        self._on_finished = self._on_failed = None
+        if callback:
+            callback()
+
+    def _fail(self, exc: Exception) -> None:
+        callback = self._on_failed
+        self._on_finished = self._on_failed = None
+        self.cancel()
+        if callback:
+            callback(exc)
+
+    # --- Вспомогательные методы ---
+
+    def _draw_card(self, card: Card) -> None:
+        app = self.app
+        app.canvas_view.draw_card(card)
+        if card.attachments:
+            app.render_card_attachments(card.id)
+        self._drawn_cards.add(card.id)
+
+    def _draw_connection(self, connection: Connection) -> None:
+        app = self.app
+        from_card = app.cards.get(connection.from_id)
+        to_card = app.cards.get(connection.to_id)
+        if from_card is None or to_card is None:
+            return
+        app.canvas_view.draw_connection(connection, from_card, to_card)
+
+    def _endpoints_drawn(self, connection: Connection) -> bool:
+        return connection.from_id in self._drawn_cards and connection.to_id in self._drawn_cards
+
+    def _expand_rect(
+        self, rect: tuple[float, float, float, float]
+    ) -> tuple[float, float, float, float]:
+        x1, y1, x2, y2 = rect
+        dx = (x2 - x1) * self.priority_margin
+        dy = (y2 - y1) * self.priority_margin
+        return x1 - dx, y1 - dy, x2 + dx, y2 + dy
+
+    def _is_priority(self, card: Card) -> bool:
+        if self._priority_rect is None:
+            return True
+        x1, y1, x2, y2 = self._priority_rect
+        half_w = card.width / 2
+        half_h = card.height / 2
+        return (
+            card.x + half_w >= x1
+            and card.x - half_w <= x2
+            and card.y + half_h >= y1
+            and card.y - half_h <= y2
+        )
+
+    def _close_reader(self, keep_state: bool = False) -> None:
+        if self.reader is not None:
+            self.reader.close()
+            if not keep_state:
+                self.reader = None
+                self._records = None
+
+    def _show_progress(self, fraction: float) -> None:
+        canvas = self.app.canvas
+        text = f"Загрузка доски… {int(fraction * 100)}%"
+        x = canvas.canvasx(12)
+        y = canvas.canvasy(12)
+        if self._progress_id is None:
+            self._progress_id = canvas.create_text(
+                x,
+                y,
+                text=text,
+                anchor="nw",
+                font=("Arial", 11, "bold"),
+                fill=self.app.theme["text"],
+                tags=("load_progress",),
+            )
+        else:
+            canvas.coords(self._progress_id, x, y)
+            canvas.itemconfig(self._progress_id, text=text)
+        canvas.tag_raise(self._progress_id)
+
+    def _hide_progress(self) -> None:
+        if self._progress_id is not None:
+            self.app.canvas.delete(self._progress_id)
+            self._progress_id = None
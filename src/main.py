@@ -1,16 +1,32 @@
 import tkinter as tk
 import base64
-import binascii
 import math
 from tkinter import colorchooser, filedialog, messagebox, simpledialog
 import copy
 import io
+import sys
 from pathlib import Path
 from typing import Dict, List
-from .autosave import AutoSaveService
+from .attachment_store import AttachmentStore, extension_from_mime
+from .autosave import AUTOSAVE_DELAY_MS, AutoSaveService
+from .board_io import ATTACHMENTS_CONTAINER_KEY, BoardContainer, BoardFileError, is_board_container
+from .board_stream import StreamingBoardReader
 from .board_model import (
+    BOARD_REPLACED,
+    CARD_ATTACHMENTS_CHANGED,
+    CONNECTION_ADDED,
+    CONNECTION_CHANGED,
+    CONNECTION_REMOVED,
+    FRAME_ADDED,
+    FRAME_COLLAPSED,
+    FRAME_MOVED,
+    FRAME_REMOVED,
+    FRAME_RENAMED,
+    FRAME_RESIZED,
+    GEOMETRY_EVENTS,
     Attachment,
     BoardData,
+    BoardEvents,
     Card as ModelCard,
     Connection as ModelConnection,
     DEFAULT_CONNECTION_RADIUS,
@@ -18,21 +34,46 @@ from .board_model import (
     DEFAULT_CONNECTION_STYLE,
     DEFAULT_CONNECTION_DIRECTION,
     Frame as ModelFrame,
-    bulk_update_card_colors,
 )
+from . import bulk_ops
 from .canvas_view import CanvasView
+from .collapse_controller import CollapseController
+from .board_index import ConnectionIndex, FrameIndex
+from .card_store import CardStore
 from .config import THEMES, load_theme_settings, save_theme_settings
 from .connect_controller import ConnectController
 from .drag_controller import DragController
-from . import files as file_io
+from .elbow_router import ElbowRouter
+from .events import EventBinder
+from .handle_pool import HandlePool
 from .history import History
+from .input_recorder import InputRecorder
+from .item_registry import ItemRegistry
 from .layout import LayoutBuilder
+from .load_controller import LoadController, unless_loading
+from .perf_monitor import PerfMonitor, budget_from_env
 from .selection_controller import SelectionController
+from .spatial_index import CardIndex
+from .startup import StartupProfiler
+from . import tracing
+from .tracing import traced
 
 class BoardApp:
-    def __init__(self):
+    def __init__(self, *, profiler: StartupProfiler | None = None, deferred_startup: bool = False):
+        """
+        ``deferred_startup`` — сначала показать окно, а сетку и восстановление
+        из автосохранения выполнить после первой отрисовки (см. ``src.startup``).
+        """
+        self.startup_profiler = profiler or StartupProfiler()
+        self.deferred_startup = deferred_startup
         self.max_attachment_bytes = 5 * 1024 * 1024
-        self.root = tk.Tk()
+        # Трассировка: с запуска через MINI_MIRO_TRACE или по Ctrl+Shift+T
+        env_trace_path = tracing.trace_path_from_env()
+        self.trace_path = env_trace_path or tracing.DEFAULT_TRACE_FILE
+        if env_trace_path:
+            tracing.tracer.enable()
+        with self.startup_profiler.phase("окно Tk"):
+            self.root = tk.Tk()
         self.root.title("Mini Miro Board (Python)")
         self.root.geometry("1200x800")
 
@@ -40,9 +81,16 @@ class BoardApp:
         self.theme_name, self.text_colors, self.show_grid = load_theme_settings(THEMES)
         self.theme = self._build_theme()
 
-        # Данные борда
-        self.cards: Dict[int, ModelCard] = {}
+        # Данные борда. Об изменениях модели подписчики узнают через
+        # board_events: карточки сообщают о себе сами (CardStore), о связях
+        # и рамках сообщают места, где они меняются
+        self.board_events = BoardEvents()
+        self.cards: CardStore = CardStore(events=self.board_events)
+        # Пространственный индекс карточек: выбор рамкой и попадания в точку
+        self.card_index = CardIndex(lambda: self.cards, self.board_events)
         self.connections: List[ModelConnection] = []
+        # Связи по карточкам-концам
+        self.connection_index = ConnectionIndex(lambda: self.connections, self.board_events)
         self.next_card_id = 1
 
         # Группы / рамки
@@ -51,6 +99,14 @@ class BoardApp:
         self.selected_frame_id = None
         self.min_frame_width = 150
         self.min_frame_height = 120
+        # Какие карточки и вложенные рамки лежат в каждой рамке
+        self.frame_index = FrameIndex(
+            lambda: self.cards, lambda: self.frames, self.card_index, self.board_events
+        )
+        # Маршруты угловых связей в обход карточек
+        self.elbow_router = ElbowRouter(
+            lambda: self.cards, lambda: self.frames, self.card_index, self.board_events
+        )
 
         # Выделение карточек
         self.selected_card_id = None
@@ -65,6 +121,7 @@ class BoardApp:
         self.drag_data = {
             "dragging": False,
             "dragged_cards": set(),
+            "dragged_frames": [],
             "last_x": 0,
             "last_y": 0,
             "moved": False,
@@ -96,6 +153,7 @@ class BoardApp:
         self.selection_controller = SelectionController(self)
         self.connect_controller = ConnectController(self)
         self.drag_controller = DragController(self)
+        self.collapse_controller = CollapseController(self)
 
         # Зум
         self.zoom_factor = 1.0
@@ -119,6 +177,13 @@ class BoardApp:
         self.saved_history_index = -1
         self.unsaved_changes = False
         self.autosave_service = AutoSaveService()
+        # Автосохранение пишется с задержкой и только если доска менялась
+        self._autosave_dirty = False
+        self._autosave_state = None
+        self._autosave_after_id = None
+        self._minimap_after_id = None
+        self.board_events.subscribe(self._on_board_changed)
+        self.board_events.subscribe(self._on_board_geometry_changed, GEOMETRY_EVENTS)
 
         # Буфер обмена (копирование карточек)
         self.clipboard = None  # {"cards":[...], "connections":[...], "center":(x,y)}
@@ -133,6 +198,12 @@ class BoardApp:
         self.attachment_fit_mode: str = "contain"
         self.attachment_min_aspect_ratio = 0.5
         self.attachment_max_aspect_ratio = 2.0
+        self.pending_attachment_restore: set[tuple[int, int]] = set()
+        self.attachment_restore_failures: list[str] = []
+        self.attachment_store = AttachmentStore(
+            self.attachments_dir, max_bytes=self.max_attachment_bytes
+        )
+        self._attachment_drain_after_id: str | None = None
 
         # Inline-редактор текста карточек
         self.inline_editor = None
@@ -149,18 +220,46 @@ class BoardApp:
         # Мини-карта
         self.minimap = None
 
+        # Задержки обработчиков и сторож медленных вызовов (бюджет — MINI_MIRO_SLOW_MS)
+        self.perf_monitor = PerfMonitor(budget_from_env())
+        # Запись ввода для воспроизведения (python -m benchmarks.replay)
+        self.input_recorder = InputRecorder()
+
         # UI helpers
-        self.ui_builder = LayoutBuilder()
+        self.ui_builder = LayoutBuilder(
+            events_binder=EventBinder(
+                monitor=self.perf_monitor,
+                recorder=self.input_recorder,
+                busy=lambda: self.load_controller.is_loading,
+            )
+        )
 
-        self._build_ui()
-        self.canvas_view = CanvasView(self.canvas, self.minimap, self.theme)
+        with self.startup_profiler.phase("интерфейс"):
+            self._build_ui()
+            self.canvas_view = CanvasView(self.canvas, self.minimap, self.theme)
+            self.canvas_view.elbow_router = self.elbow_router
+            self.handle_pool = HandlePool(self.canvas)
+        self.perf_monitor.register_cache("раскладок текста", self.canvas_view.backend.text_engine.cache_stats)
+        self.perf_monitor.register_cache("геометрии связей", self.canvas_view.geometry_cache.cache_stats)
+        self.perf_monitor.register_cache("маршрутов связей", self.elbow_router.cache_stats)
+        self.perf_monitor.register_cache("хэндлов", self.handle_pool.cache_stats)
+        # HUD и контекстные меню создаются при первом использовании
+        self.perf_hud = None
+        self._context_menus_built = False
+        self.load_controller = LoadController(self)
         self._setup_dnd()
-        self.init_board_state()
+        with self.startup_profiler.phase("пустая доска"):
+            self.init_board_state()
         self.update_controls_state()
 
         # Обработчик закрытия окна
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
+    @property
+    def items(self) -> ItemRegistry:
+        """Элементы холста карточек, связей и рамок (хранит ``CanvasView``)."""
+        return self.canvas_view.items
+
     def _build_theme(self):
         base_theme = THEMES.get(self.theme_name, THEMES["light"])
         text_color = self.text_colors.get(self.theme_name, base_theme.get("text", "#000000"))
@@ -183,12 +282,15 @@ class BoardApp:
         self.set_board_from_data(state)
         if hasattr(self, "btn_theme"):
             self.btn_theme.config(text=self.get_theme_button_text())
-        self.update_minimap()
         self.update_connect_mode_indicator()
 
     def _build_ui(self):
         self.ui_builder.build(self)
-        self._build_context_menus()
+
+    def _ensure_context_menus(self):
+        if not self._context_menus_built:
+            self._build_context_menus()
+            self._context_menus_built = True
 
     def _build_context_menus(self):
         # Меню карточки
@@ -218,6 +320,14 @@ class BoardApp:
             label="Одинаковая высота",
             command=self.equalize_selected_cards_height,
         )
+        self.card_menu.add_command(
+            label="Распределить по горизонтали",
+            command=lambda: self.distribute_selected_cards("x"),
+        )
+        self.card_menu.add_command(
+            label="Распределить по вертикали",
+            command=lambda: self.distribute_selected_cards("y"),
+        )
         self.card_menu.add_separator()
         self.card_menu.add_command(
             label="Удалить",
@@ -324,6 +434,7 @@ class BoardApp:
         cy = self.canvas.canvasy(event.y)
         self.context_click_x = cx
         self.context_click_y = cy
+        self._ensure_context_menus()
     
         item = self.canvas.find_withtag("current")
         item_id = item[0] if item else None
@@ -333,14 +444,14 @@ class BoardApp:
         self.context_frame_id = None
         self.context_connection = None
     
+        conn = self.connection_at(cx, cy, item_id)
+        if conn is not None:
+            self.context_connection = conn
+            self.select_connection(conn)
+            self.connection_menu.tk_popup(event.x_root, event.y_root)
+            return
+
         if item_id:
-            conn = self.get_connection_from_item(item_id)
-            if conn is not None:
-                self.context_connection = conn
-                self.select_connection(conn)
-                self.connection_menu.tk_popup(event.x_root, event.y_root)
-                return
-    
             card_id = self.get_card_id_from_item((item_id,))
             if card_id is not None:
                 self.context_card_id = card_id
@@ -421,7 +532,8 @@ class BoardApp:
         if new_title is None:
             return
         frame.title = new_title
-        self.canvas.itemconfig(frame.title_id, text=new_title)
+        self.canvas.itemconfig(self.items.frame(frame.id).title_id, text=new_title)
+        self.board_events.emit(FRAME_RENAMED, (frame.id,))
         self.push_history()
     
     def _context_toggle_frame(self):
@@ -435,11 +547,16 @@ class BoardApp:
         if frame_id is None or frame_id not in self.frames:
             return
         self.hide_frame_handles(frame_id)
-        frame = self.frames.pop(frame_id)
-        self.canvas.delete(frame.rect_id)
-        self.canvas.delete(frame.title_id)
+        self.frames.pop(frame_id)
+        frame_items = self.items.frame(frame_id)
+        self.canvas.delete(frame_items.rect_id)
+        self.canvas.delete(frame_items.title_id)
+        for item_id in frame_items.summary_ids:
+            self.canvas.delete(item_id)
+        self.items.forget_frame(frame_id)
         if self.selected_frame_id == frame_id:
             self.selected_frame_id = None
+        self.board_events.emit(FRAME_REMOVED, (frame_id,))
         self.push_history()
     
     def _context_edit_connection_label(self):
@@ -456,19 +573,21 @@ class BoardApp:
         if new_label is None:
             return
         conn.label = new_label.strip()
-        if conn.label_id:
+        self.board_events.emit_connections(CONNECTION_CHANGED, (conn,))
+        items = self.items.connection(conn)
+        if items.label_id:
             if conn.label:
                 self.canvas.itemconfig(
-                    conn.label_id,
+                    items.label_id,
                     text=conn.label,
                     state="normal",
                     fill=self.theme["connection_label"],
                 )
             else:
-                self.canvas.delete(conn.label_id)
-                conn.label_id = None
+                self.canvas.delete(items.label_id)
+                items.label_id = None
         elif conn.label:
-            coords = self.canvas.coords(conn.line_id)
+            coords = self.canvas.coords(items.line_id)
             if len(coords) >= 4:
                 x1, y1, x2, y2 = coords[:4]
                 mx = (x1 + x2) / 2
@@ -483,7 +602,7 @@ class BoardApp:
                 fill=self.theme["connection_label"],
                 tags=("connection_label",),
             )
-            conn.label_id = label_id
+            items.label_id = label_id
 
         self.push_history()
 
@@ -492,6 +611,7 @@ class BoardApp:
         if not conn:
             return
         conn.style = style
+        self.board_events.emit_connections(CONNECTION_CHANGED, (conn,))
         self.var_connection_style.set(style)
         self.canvas_view.update_connection_positions([conn], self.cards)
         self.show_connection_handles(conn)
@@ -522,6 +642,7 @@ class BoardApp:
         max_radius = max(0.0, (length or 1.0) * 0.6)
         conn.style = "rounded"
         conn.radius = max(0.0, min(float(new_radius), max_radius))
+        self.board_events.emit_connections(CONNECTION_CHANGED, (conn,))
         self.var_connection_style.set(conn.style)
         self.var_connection_radius.set(conn.radius)
         self.canvas_view.update_connection_positions([conn], self.cards)
@@ -552,6 +673,7 @@ class BoardApp:
         limit = max(1.0, length) / 2
         conn.style = "rounded"
         conn.curvature = max(-limit, min(float(new_curvature), limit))
+        self.board_events.emit_connections(CONNECTION_CHANGED, (conn,))
         self.var_connection_style.set(conn.style)
         self.canvas_view.update_connection_positions([conn], self.cards)
         self.show_connection_handles(conn)
@@ -564,6 +686,7 @@ class BoardApp:
         conn.style = "rounded"
         conn.radius = DEFAULT_CONNECTION_RADIUS
         conn.curvature = DEFAULT_CONNECTION_CURVATURE
+        self.board_events.emit_connections(CONNECTION_CHANGED, (conn,))
         self.var_connection_style.set(conn.style)
         self.var_connection_radius.set(conn.radius)
         self.canvas_view.update_connection_positions([conn], self.cards)
@@ -578,22 +701,29 @@ class BoardApp:
         self.push_history()
 
     def _delete_connection(self, connection: ModelConnection) -> None:
-        self.hide_connection_handles(connection)
-        self.canvas.delete(connection.line_id)
-        if connection.label_id:
-            self.canvas.delete(connection.label_id)
-        try:
-            self.connections.remove(connection)
+        self._discard_connection_items(connection)
+        try:
+            self.connections.remove(connection)
         except ValueError:
             pass
+        else:
+            self.board_events.emit_connections(CONNECTION_REMOVED, (connection,))
+        self.update_controls_state()
+
+    def _discard_connection_items(self, connection: ModelConnection) -> None:
+        """Убирает связь с холста и из ссылок выделения; список связей не меняет."""
+        self.hide_connection_handles(connection)
+        items = self.items.connection(connection)
+        self.canvas.delete(items.line_id)
+        if items.label_id:
+            self.canvas.delete(items.label_id)
+        self.canvas_view.forget_connection(connection)
         if connection is self.selected_connection:
             self.selected_connection = None
         if connection is self.context_connection:
             self.context_connection = None
         if connection is self.hover_connection:
             self.hover_connection = None
-        self.render_selection()
-        self.update_controls_state()
     
     def _context_add_card_here(self):
         text_value = simpledialog.askstring(
@@ -609,9 +739,33 @@ class BoardApp:
     # ---------- Инициализация борда, история, автосейв ----------
 
     def init_board_state(self):
-        """Запускается один раз при старте приложения."""
-        restored = False
+        """
+        Запускается один раз при старте приложения. При отложенном старте
+        сетка и автовосстановление ждут первой отрисовки окна.
+        """
+        if self.deferred_startup:
+            self._init_empty_board(draw_grid=False)
+            self.root.after_idle(self._on_first_paint)
+            return
+        self._init_empty_board()
+        self._offer_autosave_restore()
+
+    def _on_first_paint(self):
+        self.root.update_idletasks()
+        self.startup_profiler.mark("первая отрисовка")
+        # Таймер, а не idle: сначала Tk обработает накопившиеся события окна
+        self.root.after(1, self._finish_deferred_startup)
 
+    def _finish_deferred_startup(self):
+        with self.startup_profiler.phase("сетка"):
+            self.draw_grid()
+            self.root.update_idletasks()
+        with self.startup_profiler.phase("автовосстановление"):
+            self._offer_autosave_restore()
+        self.startup_profiler.mark("готово")
+        self.startup_profiler.report()
+
+    def _offer_autosave_restore(self):
         # Попытка восстановиться из автосейва
         if self.autosave_service.exists():
             res = messagebox.askyesnocancel(
@@ -621,44 +775,40 @@ class BoardApp:
             )
             if res:  # Да
                 try:
-                    data = self.autosave_service.load()
-                    self.set_board_from_data(data)
-                    self.history.clear_and_init(self.get_board_data())
-                    self.saved_history_index = -1
-                    self.push_history()
-                    restored = True
-                except Exception as e:
+                    reader = self.autosave_service.open_stream()
+                except OSError as e:
                     messagebox.showerror("Ошибка автозагрузки", str(e))
-                    restored = False
-            elif res is None:
-                restored = False
-            else:
-                restored = False
-
-        if not restored:
-            self.canvas.delete("all")
-            self.cards.clear()
-            self.connections.clear()
-            self.frames.clear()
-            self.selected_card_id = None
-            self.selected_cards.clear()
-            self.selected_frame_id = None
-            self.selected_connection = None
-            self.set_connect_mode(False)
-            self.zoom_factor = 1.0
-            self.canvas.config(scrollregion=(0, 0, 4000, 4000),
-                               bg=self.theme["bg"])
-            self.next_card_id = 1
-            self.next_frame_id = 1
-
-            self.history.clear_and_init(self.get_board_data())
-            self.draw_grid()
-            self.push_history()
-            self.saved_history_index = self.history.index
+                else:
+                    self.load_controller.start(
+                        reader,
+                        on_finished=self._on_autosave_restored,
+                        on_failed=self._on_autosave_restore_failed,
+                    )
 
         self.update_unsaved_flag()
         self.update_minimap()
 
+    def _init_empty_board(self, *, draw_grid: bool = True):
+        self.reset_board_canvas(draw_grid=draw_grid)
+        self.next_card_id = 1
+        self.next_frame_id = 1
+
+        self.history.clear_and_init(self.get_board_data())
+        self.push_history()
+        self.saved_history_index = self.history.index
+
+    def _on_autosave_restored(self):
+        self.history.clear_and_init(self.get_board_data())
+        self.saved_history_index = -1
+        self.push_history()
+        self.update_unsaved_flag()
+
+    def _on_autosave_restore_failed(self, error: Exception):
+        messagebox.showerror("Ошибка автозагрузки", str(error))
+        self._init_empty_board()
+        self.update_unsaved_flag()
+
+    @traced("app.get_board_data")
     def get_board_data(self):
         """
         Собирает текущее состояние доски в BoardData
@@ -692,13 +842,12 @@ class BoardApp:
 
         frames: Dict[int, ModelFrame] = {}
         for frame_id, frame in self.frames.items():
-            x1, y1, x2, y2 = self.canvas.coords(frame.rect_id)
             frames[frame_id] = ModelFrame(
                 id=frame_id,
-                x1=x1,
-                y1=y1,
-                x2=x2,
-                y2=y2,
+                x1=frame.x1,
+                y1=frame.y1,
+                x2=frame.x2,
+                y2=frame.y2,
                 title=frame.title,
                 collapsed=frame.collapsed,
             )
@@ -706,16 +855,51 @@ class BoardApp:
         board = BoardData(cards=cards, connections=connections, frames=frames)
         return board.to_primitive()
 
+    @traced("app.set_board_from_data")
     def set_board_from_data(self, data):
         """
         Принимает dict (как из JSON), конвертирует в BoardData
         и пересоздаёт объекты на холсте.
         """
+        self.load_controller.cancel()
+        with self.board_events.batch():
+            self.reset_board_canvas(draw_grid=False)
+
+            # --- новая часть: используем модель BoardData ---
+            board = BoardData.from_primitive(data)
+            for card in board.cards.values():
+                self.pending_attachment_restore.update((card.id, a.id) for a in card.attachments)
+            self.cards = CardStore(board.cards, events=self.board_events)
+            self.connections = board.connections
+            self.frames = board.frames
+
+            self.next_card_id = max(self.cards.keys(), default=0) + 1
+            self.next_frame_id = max(self.frames.keys(), default=0) + 1
+            self.board_events.emit(BOARD_REPLACED)
+        # Рисуется после пакета: индексы рамок уже знают о новой доске
+        self.render_board()
+        self.report_attachment_restore_failures()
+        self.update_controls_state()
+
+    def reset_board_canvas(self, *, draw_grid: bool = True):
+        """Очищает холст и данные борда перед построением новой доски."""
+        had_content = bool(self.cards or self.connections or self.frames)
         self.canvas.delete("all")
-        self.cards.clear()
-        self.connections.clear()
-        self.frames.clear()
+        self.items.clear()
+        self.canvas_view.geometry_cache.clear()
+        self.canvas_view.connection_hits.clear()
+        self.handle_pool.clear()
+        self.connection_handle_map.clear()
+        with self.board_events.batch():
+            self.cards.clear()
+            self.connections.clear()
+            self.frames.clear()
+            if had_content:
+                self.board_events.emit(BOARD_REPLACED)
         self._clear_all_attachment_previews()
+        self.collapse_controller.reset()
+        self.pending_attachment_restore.clear()
+        self.attachment_store.reset()
         self.selected_card_id = None
         self.selected_cards.clear()
         self.selected_frame_id = None
@@ -723,45 +907,88 @@ class BoardApp:
         self.set_connect_mode(False)
         self.zoom_factor = 1.0
         self.canvas.config(scrollregion=(0, 0, 4000, 4000), bg=self.theme["bg"])
+        if draw_grid:
+            self.draw_grid()
 
-        # --- новая часть: используем модель BoardData ---
-        board = BoardData.from_primitive(data)
-        self._restore_attachment_files(board)
-        self.cards = board.cards
-        self.connections = board.connections
-        self.frames = board.frames
-
-        self.next_card_id = max(self.cards.keys(), default=0) + 1
-        self.next_frame_id = max(self.frames.keys(), default=0) + 1
-
-        self.render_board()
-        self.update_controls_state()
-
+    def visible_canvas_rect(self) -> tuple[float, float, float, float]:
+        """Видимая часть холста в координатах доски."""
+        width = self.canvas.winfo_width() or self.canvas.winfo_reqwidth()
+        height = self.canvas.winfo_height() or self.canvas.winfo_reqheight()
+        return (
+            self.canvas.canvasx(0),
+            self.canvas.canvasy(0),
+            self.canvas.canvasx(width),
+            self.canvas.canvasy(height),
+        )
 
+    def current_viewport(self) -> Dict[str, float]:
+        x1, y1, x2, y2 = self.visible_canvas_rect()
+        return {"x1": x1, "y1": y1, "x2": x2, "y2": y2}
+
+    def scroll_to_viewport(self, viewport: Dict[str, float]) -> None:
+        """Прокручивает холст так, чтобы показать сохранённую область просмотра."""
+        region = self.canvas.cget("scrollregion").split()
+        if len(region) != 4:
+            return
+        rx1, ry1, rx2, ry2 = (float(v) for v in region)
+        rx1 = min(rx1, viewport["x1"])
+        ry1 = min(ry1, viewport["y1"])
+        rx2 = max(rx2, viewport["x2"])
+        ry2 = max(ry2, viewport["y2"])
+        self.canvas.config(scrollregion=(rx1, ry1, rx2, ry2))
+        self.canvas.xview_moveto((viewport["x1"] - rx1) / ((rx2 - rx1) or 1))
+        self.canvas.yview_moveto((viewport["y1"] - ry1) / ((ry2 - ry1) or 1))
+
+    def _with_viewport(self, state):
+        return {"schema_version": state["schema_version"], "viewport": self.current_viewport(), **state}
+
+    @traced("app.push_history")
+    @unless_loading
     def push_history(self):
+        # Карточки, попавшие под свёрнутые рамки или вышедшие из-под них
+        self.collapse_controller.refresh()
+        self.refresh_connection_routes()
         state = self.get_board_data()
         self.history.push(state)
         self.update_unsaved_flag()
-        self.write_autosave(state)
-        self.update_minimap()
+        self._schedule_autosave(state)
         self.update_controls_state()
 
+    def refresh_connection_routes(self):
+        """
+        Перерисовывает угловые связи, чьи маршруты задела правка (или которые
+        во время перетаскивания рисовались простым углом).
+        """
+        hidden = self.collapse_controller.hidden_cards
+        rerouted = [
+            conn
+            for conn in self.elbow_router.take_rerouted()
+            if conn.from_id not in hidden and conn.to_id not in hidden
+        ]
+        if not rerouted:
+            return
+        self.canvas_view.update_connection_positions(rerouted, self.cards)
+        if self.selected_connection is not None and any(
+            conn is self.selected_connection for conn in rerouted
+        ):
+            self.show_connection_handles(self.selected_connection)
+
+    @unless_loading
     def on_undo(self, event=None):
         state = self.history.undo(self)
         if state is None:
             return
         self.update_unsaved_flag()
-        self.write_autosave(state)
-        self.update_minimap()
+        self._schedule_autosave(state)
         self.update_controls_state()
 
+    @unless_loading
     def on_redo(self, event=None):
         state = self.history.redo(self)
         if state is None:
             return
         self.update_unsaved_flag()
-        self.write_autosave(state)
-        self.update_minimap()
+        self._schedule_autosave(state)
         self.update_controls_state()
 
     def update_unsaved_flag(self):
@@ -773,22 +1000,66 @@ class BoardApp:
 
     def write_autosave(self, state=None):
         try:
-            data = state if state is not None else self.get_board_data()
+            data = self._with_viewport(state if state is not None else self.get_board_data())
+            container = self.attachment_store.container
+            if container is not None:
+                # Вложения контейнера остаются ссылками: автосохранение помнит его файл
+                data = {ATTACHMENTS_CONTAINER_KEY: str(container.path.resolve()), **data}
             self.autosave_service.save(data)
         except Exception:
             pass
 
+    def _on_board_changed(self, change):
+        self._autosave_dirty = True
+
+    def _schedule_autosave(self, state):
+        """
+        Откладывает запись автосохранения: серия правок подряд пишется одним
+        файлом через AUTOSAVE_DELAY_MS после последней. Если с прошлой записи
+        доска не менялась (например, история после пустого действия), файл
+        не трогается.
+        """
+        if not self._autosave_dirty:
+            return
+        self._autosave_dirty = False
+        self._autosave_state = state
+        if self._autosave_after_id is not None:
+            self.root.after_cancel(self._autosave_after_id)
+        self._autosave_after_id = self.root.after(AUTOSAVE_DELAY_MS, self._flush_autosave)
+
+    def _flush_autosave(self):
+        if self._autosave_after_id is not None:
+            self.root.after_cancel(self._autosave_after_id)
+            self._autosave_after_id = None
+        state, self._autosave_state = self._autosave_state, None
+        if state is not None:
+            self.write_autosave(state)
+
     # ---------- Сетка ----------
 
     def draw_grid(self):
         self.canvas_view.draw_grid(self.grid_size, visible=self.show_grid)
 
     def render_board(self):
+        # Содержимое свёрнутых рамок не рисуется вовсе
+        hidden_cards, _hidden_frames = self.collapse_controller.collapsed_members()
         self.canvas_view.render_board(
-            self.cards, self.frames, self.connections, self.grid_size, self.show_grid
+            self.cards,
+            self.frames,
+            self.connections,
+            self.grid_size,
+            self.show_grid,
+            hidden_cards=hidden_cards,
         )
+        # Холст очищен вместе со всеми хэндлами
+        self.handle_pool.clear()
+        self.connection_handle_map.clear()
+        self.collapse_controller.reset(hidden_cards)
+        # Все связи только что нарисованы по текущим маршрутам
+        self.elbow_router.take_rerouted()
         self._clear_all_attachment_previews()
         self.render_all_attachments()
+        self.collapse_controller.refresh()
 
     def render_selection(self):
         self.canvas_view.render_selection(
@@ -808,9 +1079,9 @@ class BoardApp:
         if self.selected_connection is None:
             return
         self.hide_connection_handles(self.selected_connection)
+        self.canvas_view.set_connection_selected(self.selected_connection, False)
         self.selected_connection = None
         self.context_connection = None
-        self.render_selection()
         self.update_controls_state()
 
     def select_connection(self, connection: ModelConnection | None) -> None:
@@ -822,7 +1093,8 @@ class BoardApp:
         self.selection_controller.select_card(None, additive=False)
         self.selected_connection = connection
         self.context_connection = connection
-        self.render_selection()
+        self.canvas_view.set_connection_selected(connection, True)
+        self.show_connection_handles(connection)
         self._sync_connection_controls_with_selection()
         self.update_controls_state()
 
@@ -830,80 +1102,78 @@ class BoardApp:
         self.connection_handle_map[handle_id] = connection
 
     def hide_connection_handles(self, connection: ModelConnection | None = None) -> None:
-        targets = [connection] if connection else list(self.connections)
-        for conn in targets:
+        # Хэндлы есть только у связей из карты хэндлов: обходить все связи незачем
+        for hid, conn in list(self.connection_handle_map.items()):
+            if connection is not None and conn is not connection:
+                continue
+            del self.connection_handle_map[hid]
+            self.handle_pool.release(hid)
+            entry = self.items.connections.get(id(conn))
+            if entry is None:
+                continue
             for hid_attr in ("start_handle_id", "end_handle_id", "radius_handle_id", "curvature_handle_id"):
-                hid = getattr(conn, hid_attr, None)
-                if hid:
-                    self.canvas.delete(hid)
-                    self.connection_handle_map.pop(hid, None)
-                setattr(conn, hid_attr, None)
+                if getattr(entry[1], hid_attr) == hid:
+                    setattr(entry[1], hid_attr, None)
 
     def show_connection_handles(self, connection: ModelConnection) -> None:
+        """
+        Показывает четыре хэндла связи. Вызывается на каждое движение мыши при
+        правке связи, поэтому уже показанные хэндлы только сдвигаются, а новые
+        берутся из пула.
+        """
+
         from_card = self.cards.get(connection.from_id)
         to_card = self.cards.get(connection.to_id)
         if from_card is None or to_card is None:
             return
 
-        self.hide_connection_handles()
+        others = {id(conn): conn for conn in self.connection_handle_map.values() if conn is not connection}
+        for other in others.values():
+            self.hide_connection_handles(other)
 
         positions = self.canvas_view.connection_handle_positions(connection, from_card, to_card)
+        point_style = {
+            "fill": self.theme["connection"],
+            "outline": self.theme.get("bg", "white"),
+            "width": 2,
+        }
+        radius_style = {
+            "fill": self.theme["connection"],
+            "outline": self.theme.get("connection_label", "#333"),
+            "width": 1,
+        }
+        curvature_style = {
+            "fill": self.theme.get("frame_outline", self.theme["connection"]),
+            "outline": self.theme.get("connection_label", "#333"),
+            "width": 1,
+        }
         r = 6
-        start_id = self.canvas.create_oval(
-            positions["start"][0] - r,
-            positions["start"][1] - r,
-            positions["start"][0] + r,
-            positions["start"][1] + r,
-            fill=self.theme["connection"],
-            outline=self.theme.get("bg", "white"),
-            width=2,
-            tags=("connection_handle", "connection_handle_start"),
-        )
-        end_id = self.canvas.create_oval(
-            positions["end"][0] - r,
-            positions["end"][1] - r,
-            positions["end"][0] + r,
-            positions["end"][1] + r,
-            fill=self.theme["connection"],
-            outline=self.theme.get("bg", "white"),
-            width=2,
-            tags=("connection_handle", "connection_handle_end"),
-        )
-
         ctrl_size = 6
-        radius_id = self.canvas.create_rectangle(
-            positions["radius"][0] - ctrl_size,
-            positions["radius"][1] - ctrl_size,
-            positions["radius"][0] + ctrl_size,
-            positions["radius"][1] + ctrl_size,
-            fill=self.theme["connection"],
-            outline=self.theme.get("connection_label", "#333"),
-            width=1,
-            tags=("connection_handle", "connection_handle_radius"),
+        handles = (
+            ("start_handle_id", "start", self.canvas.create_oval, r, point_style),
+            ("end_handle_id", "end", self.canvas.create_oval, r, point_style),
+            ("radius_handle_id", "radius", self.canvas.create_rectangle, ctrl_size, radius_style),
+            ("curvature_handle_id", "curvature", self.canvas.create_rectangle, ctrl_size, curvature_style),
         )
-        curvature_id = self.canvas.create_rectangle(
-            positions["curvature"][0] - ctrl_size,
-            positions["curvature"][1] - ctrl_size,
-            positions["curvature"][0] + ctrl_size,
-            positions["curvature"][1] + ctrl_size,
-            fill=self.theme.get("frame_outline", self.theme["connection"]),
-            outline=self.theme.get("connection_label", "#333"),
-            width=1,
-            tags=("connection_handle", "connection_handle_curvature"),
-        )
-
-        connection.start_handle_id = start_id
-        connection.end_handle_id = end_id
-        connection.radius_handle_id = radius_id
-        connection.curvature_handle_id = curvature_id
 
-        for hid in (start_id, end_id, radius_id, curvature_id):
-            self._register_connection_handle(connection, hid)
-
-        self.canvas.tag_raise(start_id)
-        self.canvas.tag_raise(end_id)
-        self.canvas.tag_raise(radius_id)
-        self.canvas.tag_raise(curvature_id)
+        items = self.items.connection(connection)
+        for hid_attr, key, create, size, style in handles:
+            x, y = positions[key]
+            coords = (x - size, y - size, x + size, y + size)
+            hid = getattr(items, hid_attr)
+            if hid:
+                self.canvas.coords(hid, *coords)
+            else:
+                hid = self.handle_pool.acquire(
+                    f"connection_{key}",
+                    create,
+                    coords,
+                    tags=("connection_handle", f"connection_handle_{key}"),
+                    **style,
+                )
+                setattr(items, hid_attr, hid)
+                self._register_connection_handle(connection, hid)
+            self.canvas.tag_raise(hid)
 
     def clear_attachment_selection(self) -> None:
         if self.attachment_selection_box_id:
@@ -989,6 +1259,7 @@ class BoardApp:
 
         new_style = self.var_connection_style.get()
         self.selected_connection.style = new_style
+        self.board_events.emit_connections(CONNECTION_CHANGED, (self.selected_connection,))
         self.canvas_view.update_connection_positions([self.selected_connection], self.cards)
         self.show_connection_handles(self.selected_connection)
         self.push_history()
@@ -1003,6 +1274,7 @@ class BoardApp:
             return
 
         self.selected_connection.radius = max(0.0, new_radius)
+        self.board_events.emit_connections(CONNECTION_CHANGED, (self.selected_connection,))
         self.canvas_view.update_connection_positions([self.selected_connection], self.cards)
         self.show_connection_handles(self.selected_connection)
         self.push_history()
@@ -1023,19 +1295,11 @@ class BoardApp:
         self.attachment_tk_images.clear()
         self.clear_attachment_selection()
 
-    def _resolve_attachment_path(self, storage_path: str | None) -> Path | None:
-        if not storage_path:
-            return None
-        path = Path(storage_path)
-        if not path.is_absolute():
-            path = Path.cwd() / path
-        return path
-
     def _clear_attachment_previews_for_card(self, card_id: int) -> None:
-        card = self.cards.get(card_id)
-        if card and card.image_id:
-            self.canvas.delete(card.image_id)
-            card.image_id = None
+        items = self.items.card(card_id)
+        if card_id in self.cards and items.image_id:
+            self.canvas.delete(items.image_id)
+            items.image_id = None
         to_delete = [key for key in self.attachment_items if key[0] == card_id]
         for key in to_delete:
             item_id = self.attachment_items.pop(key, None)
@@ -1056,34 +1320,13 @@ class BoardApp:
             )
             return None
 
-        path = self._resolve_attachment_path(attachment.storage_path)
-        if path and path.exists():
-            try:
-                return Image.open(path)
-            except OSError:
-                return None
-
-        if attachment.data_base64:
-            try:
-                raw = base64.b64decode(attachment.data_base64)
-            except (binascii.Error, ValueError):
-                return None
-            try:
-                return Image.open(io.BytesIO(raw))
-            except OSError:
-                return None
-
-        return None
-
-    def _read_attachment_base64(self, attachment: Attachment) -> str | None:
-        path = self._resolve_attachment_path(attachment.storage_path)
-        if not path or not path.exists():
+        raw = self.attachment_store.read_bytes(attachment)
+        if raw is None:
             return None
         try:
-            payload = path.read_bytes()
+            return Image.open(io.BytesIO(raw))
         except OSError:
             return None
-        return base64.b64encode(payload).decode("ascii")
 
     def _attach_image_to_card(
         self,
@@ -1115,6 +1358,7 @@ class BoardApp:
         layout = self.canvas_view.compute_card_layout(card)
         self._auto_position_attachment(card, attachment, layout)
         card.attachments.append(attachment)
+        self.board_events.emit(CARD_ATTACHMENTS_CHANGED, (card.id,))
         self.render_card_attachments(card.id)
         self.push_history()
         return True
@@ -1233,15 +1477,14 @@ class BoardApp:
         )
 
     def _prepare_attachment_for_save(self, attachment: Attachment) -> Attachment:
+        """
+        Копия вложения для снимка доски. Данные не читаются: снимок хранит
+        ссылки (файл, ``archive_member``), base64 встраивается только при
+        сохранении в обычный JSON (``AttachmentStore.write_board``).
+        """
         if not hasattr(attachment, "preview_scale"):
             attachment.preview_scale = 1.0
-        prepared = copy.copy(attachment)
-        if not prepared.data_base64:
-            data_base64 = self._read_attachment_base64(attachment)
-            if data_base64:
-                prepared.data_base64 = data_base64
-                attachment.data_base64 = data_base64
-        return prepared
+        return copy.copy(attachment)
 
     def _create_card_with_image(
         self,
@@ -1283,78 +1526,76 @@ class BoardApp:
             return True
 
         card.attachments.append(attachment)
+        self.board_events.emit(CARD_ATTACHMENTS_CHANGED, (card_id,))
         self.render_card_attachments(card_id)
         self.select_card(card_id, additive=False)
         self.push_history()
-        self.update_minimap()
         return True
 
     @staticmethod
     def _extension_from_mime(mime_type: str) -> str:
-        if mime_type.endswith("/jpeg") or mime_type.endswith("/jpg"):
-            return ".jpg"
-        if mime_type.endswith("/png"):
-            return ".png"
-        if mime_type.endswith("/gif"):
-            return ".gif"
-        return ".bin"
-
-    def _materialize_attachment(self, card_id: int, attachment: Attachment) -> bool:
-        if not hasattr(attachment, "preview_scale"):
-            attachment.preview_scale = 1.0
-        path = self._resolve_attachment_path(attachment.storage_path)
-        if path and path.exists():
-            try:
-                attachment.storage_path = str(path.relative_to(Path.cwd()))
-            except ValueError:
-                attachment.storage_path = str(path)
-            return True
+        return extension_from_mime(mime_type)
 
-        if not attachment.data_base64:
-            return False
-
-        try:
-            self._ensure_attachments_dir()
-        except OSError:
-            return False
-
-        extension = Path(attachment.name).suffix or self._extension_from_mime(
-            attachment.mime_type
-        )
-        target_path = self.attachments_dir / f"{card_id}-{attachment.id}{extension}"
-
-        try:
-            payload = base64.b64decode(attachment.data_base64)
-        except (binascii.Error, ValueError):
-            return False
-
-        if len(payload) > self.max_attachment_bytes:
-            return False
-
-        try:
-            target_path.write_bytes(payload)
-        except OSError:
-            return False
-
-        attachment.storage_path = str(target_path.relative_to(Path.cwd()))
-        return True
+    def _check_pending_attachments(self, card: ModelCard) -> None:
+        """
+        Проверяет при отрисовке карточки, есть ли у её вложений данные. Превью
+        читается прямо из base64 или контейнера; файл в ``attachments/`` не
+        пишется, пока вложение не правят или не экспортируют ссылкой
+        (``materialize_attachments``).
+        """
+        for attachment in card.attachments:
+            key = (card.id, attachment.id)
+            if key not in self.pending_attachment_restore:
+                continue
+            if self.attachment_store.has_file(attachment):
+                self.pending_attachment_restore.discard(key)
+            elif not self.attachment_store.has_data(attachment):
+                self.pending_attachment_restore.discard(key)
+                self.attachment_restore_failures.append(attachment.name)
 
-    def _restore_attachment_files(self, board: BoardData) -> None:
-        failed: list[str] = []
-        for card in board.cards.values():
+    def materialize_attachments(self, card_ids=None, *, wait: bool = False) -> None:
+        """
+        Ставит в очередь запись файлов вложений, которые ещё остаются ссылками
+        на base64 или контейнер: перед правкой вложения и экспортом ссылками.
+        С ``wait`` дожидается записи (экспорт читает файлы сразу).
+        """
+        ids = self.cards.keys() if card_ids is None else card_ids
+        for card_id in list(ids):
+            card = self.cards.get(card_id)
+            if card is None:
+                continue
             for attachment in card.attachments:
-                restored = self._materialize_attachment(card.id, attachment)
-                if not restored:
-                    failed.append(attachment.name)
-
-        if failed:
-            unique = sorted(set(failed))
-            names = "\n".join(unique)
-            messagebox.showwarning(
-                "Вложения",
-                "Не удалось восстановить некоторые вложения (файлы отсутствуют и нет"
-                f" встроенных данных):\n{names}",
-            )
+                key = (card_id, attachment.id)
+                if key not in self.pending_attachment_restore:
+                    continue
+                self.pending_attachment_restore.discard(key)
+                if not self.attachment_store.materialize_async(card_id, attachment):
+                    self.attachment_restore_failures.append(attachment.name)
+        if wait:
+            self.attachment_restore_failures.extend(self.attachment_store.wait())
+            self.report_attachment_restore_failures()
+        elif self.attachment_store.pending and self._attachment_drain_after_id is None:
+            self._attachment_drain_after_id = self.root.after(50, self._drain_attachment_writes)
+
+    def _drain_attachment_writes(self) -> None:
+        self._attachment_drain_after_id = None
+        self.attachment_restore_failures.extend(self.attachment_store.drain())
+        if self.attachment_store.pending:
+            self._attachment_drain_after_id = self.root.after(50, self._drain_attachment_writes)
+        elif not self.load_controller.is_loading:
+            self.report_attachment_restore_failures()
+
+    def report_attachment_restore_failures(self) -> None:
+        if not self.attachment_restore_failures:
+            return
+        unique = sorted(set(self.attachment_restore_failures))
+        self.attachment_restore_failures = []
+        names = "\n".join(unique)
+        messagebox.showwarning(
+            "Вложения",
+            "Не удалось восстановить некоторые вложения (файлы отсутствуют и нет"
+            f" встроенных данных):\n{names}",
+        )
 
     def _prepare_preview_image(self, image, *, max_size=(200, 200), crop_to_square: bool = False):
         copy_image = image.copy()
@@ -1503,6 +1744,8 @@ class BoardApp:
 
         self.selection_controller.select_card(card_id, additive=False)
         self.selected_attachment = (card_id, attachment_id)
+        # Выделенное вложение двигают и масштабируют: дальше оно живёт файлом
+        self.materialize_attachments((card_id,))
         self._show_attachment_selection(card_id, attachment)
         self.update_controls_state()
 
@@ -1644,6 +1887,7 @@ class BoardApp:
         label.image = photo
         label.pack(fill="both", expand=True)
 
+    @unless_loading
     def on_attachment_click(self, event):
         item = event.widget.find_withtag("current")
         item_id = item[0] if item else None
@@ -1662,6 +1906,7 @@ class BoardApp:
                 return "break"
         return "break"
 
+    @unless_loading
     def on_attachment_double_click(self, event):
         item = event.widget.find_withtag("current")
         item_id = item[0] if item else None
@@ -1680,7 +1925,10 @@ class BoardApp:
                 return "break"
         return "break"
 
+    @traced("app.render_card_attachments")
     def render_card_attachments(self, card_id: int) -> None:
+        if self.collapse_controller.is_hidden(card_id):
+            return
         card = self.cards.get(card_id)
         if not card or not card.attachments:
             self._clear_attachment_previews_for_card(card_id)
@@ -1697,9 +1945,11 @@ class BoardApp:
             return
 
         self._clear_attachment_previews_for_card(card_id)
+        self._check_pending_attachments(card)
 
         layout = self.canvas_view.compute_card_layout(card)
         center_y = layout["image_top"] + layout["image_height"] / 2
+        items = self.items.card(card_id)
 
         for attachment in card.attachments:
             image = self._load_attachment_image(attachment)
@@ -1724,8 +1974,8 @@ class BoardApp:
                 anchor="center",
                 tags=("attachment_preview", f"attachment_{card_id}_{attachment.id}"),
             )
-            if card.text_bg_id:
-                self.canvas.tag_lower(item_id, card.text_bg_id)
+            if items.text_bg_id:
+                self.canvas.tag_lower(item_id, items.text_bg_id)
             self.canvas.tag_bind(
                 f"attachment_{card_id}_{attachment.id}",
                 "<Button-1>",
@@ -1738,14 +1988,14 @@ class BoardApp:
             )
             self.attachment_items[(card_id, attachment.id)] = item_id
             self.attachment_tk_images[(card_id, attachment.id)] = photo
-            card.image_id = item_id
+            items.image_id = item_id
             if self.selected_attachment == (card_id, attachment.id):
                 self._show_attachment_selection(card_id, attachment)
 
-        if card.text_bg_id:
-            self.canvas.tag_raise(card.text_bg_id)
-        if card.text_id:
-            self.canvas.tag_raise(card.text_id)
+        if items.text_bg_id:
+            self.canvas.tag_raise(items.text_bg_id)
+        if items.text_id:
+            self.canvas.tag_raise(items.text_id)
 
     def render_all_attachments(self) -> None:
         for card_id in list(self.cards.keys()):
@@ -1762,6 +2012,7 @@ class BoardApp:
             width_scale = height_scale = scale if scale is not None else 1.0
 
         center_y = layout["image_top"] + layout["image_height"] / 2
+        text_bg_id = self.items.card(card_id).text_bg_id
         for attachment in card.attachments:
             preview_size = self._calculate_attachment_preview_size(card, attachment, layout)
             if scale is not None:
@@ -1775,8 +2026,8 @@ class BoardApp:
                     card.x + attachment.offset_x,
                     center_y + attachment.offset_y,
                 )
-                if card.text_bg_id:
-                    self.canvas.tag_lower(item_id, card.text_bg_id)
+                if text_bg_id:
+                    self.canvas.tag_lower(item_id, text_bg_id)
         self.render_card_attachments(card_id)
 
     def _read_clipboard_image(self):
@@ -1883,6 +2134,7 @@ class BoardApp:
             position=position,
         )
 
+    @unless_loading
     def on_drop_files(self, event):
         data = getattr(event, "data", None)
         if not data:
@@ -1920,20 +2172,15 @@ class BoardApp:
 
         base_position = self._get_canvas_point_from_event(event)
         spacing = 60
-        created_any = False
         for idx, path in enumerate(paths):
             if not path.is_file():
                 continue
             offset = (spacing * (idx % 3), spacing * (idx // 3))
-            created = self._create_card_from_path(
+            self._create_card_from_path(
                 path,
                 base_position=base_position,
                 offset=offset,
             )
-            created_any = created_any or created
-
-        if created_any:
-            self.update_minimap()
 
     def _attach_image_from_file(self) -> bool:
         opened_exts = None
@@ -2033,35 +2280,19 @@ class BoardApp:
         )
         return True
 
+    @unless_loading
     def attach_image_from_file(self):
         self._attach_image_from_file()
 
     def snap_cards_to_grid(self, card_ids):
         if not self.snap_to_grid or not card_ids:
             return
-        for card_id in card_ids:
-            card = self.cards.get(card_id)
-            if not card:
-                continue
-            gx = round(card.x / self.grid_size) * self.grid_size
-            gy = round(card.y / self.grid_size) * self.grid_size
-            dx = gx - card.x
-            dy = gy - card.y
-            if dx == 0 and dy == 0:
-                continue
-            card.x = gx
-            card.y = gy
-            x1 = gx - card.width / 2
-            y1 = gy - card.height / 2
-            x2 = gx + card.width / 2
-            y2 = gy + card.height / 2
-            self.canvas.coords(card.rect_id, x1, y1, x2, y2)
-            self.update_card_layout(card_id, redraw_attachment=False)
-            self.update_card_handles_positions(card_id)
-            self.update_connections_for_card(card_id)
+        edit = bulk_ops.snap(self.cards, card_ids, self.grid_size)
+        self.update_cards_geometry(edit.changed)
 
     # ---------- Карточки ----------
 
+    @unless_loading
     def add_card_dialog(self):
         text = simpledialog.askstring("Новая карточка",
                                       "Введите текст карточки:",
@@ -2080,7 +2311,7 @@ class BoardApp:
         item_id = item[0] if item else None
     
         # Двойной клик по связи — редактируем подпись
-        conn = self.get_connection_from_item(item_id)
+        conn = self.connection_at(cx, cy, item_id)
         if conn is not None:
             self.select_connection(conn)
             current_label = conn.label
@@ -2093,19 +2324,21 @@ class BoardApp:
             if new_label is None:
                 return
             conn.label = new_label.strip()
-            if conn.label_id:
+            self.board_events.emit_connections(CONNECTION_CHANGED, (conn,))
+            items = self.items.connection(conn)
+            if items.label_id:
                 if conn.label:
                     self.canvas.itemconfig(
-                        conn.label_id,
+                        items.label_id,
                         text=conn.label,
                         state="normal",
                         fill=self.theme["connection_label"],
                     )
                 else:
-                    self.canvas.delete(conn.label_id)
-                    conn.label_id = None
+                    self.canvas.delete(items.label_id)
+                    items.label_id = None
             elif conn.label:
-                coords = self.canvas.coords(conn.line_id)
+                coords = self.canvas.coords(items.line_id)
                 if len(coords) >= 4:
                     x1, y1, x2, y2 = coords[:4]
                     mx = (x1 + x2) / 2
@@ -2120,7 +2353,7 @@ class BoardApp:
                     fill=self.theme["connection_label"],
                     tags=("connection_label",),
                 )
-                conn.label_id = label_id
+                items.label_id = label_id
             self.push_history()
             return
     
@@ -2171,20 +2404,19 @@ class BoardApp:
         card = self.cards.pop(card_id, None)
         if not card:
             return
-        for item_id in (
-            card.rect_id,
-            card.text_id,
-            card.text_bg_id,
-            card.image_id,
-            card.resize_handle_id,
-            *card.connect_handles.values(),
-        ):
-            if item_id:
-                self.canvas.delete(item_id)
+        self._delete_card_items(card_id)
         self._clear_attachment_previews_for_card(card_id)
-        self.connections = [
-            conn for conn in self.connections if conn.from_id != card_id and conn.to_id != card_id
-        ]
+        remaining = []
+        removed = []
+        for conn in self.connections:
+            if conn.from_id == card_id or conn.to_id == card_id:
+                self.canvas_view.forget_connection(conn)
+                removed.append(conn)
+            else:
+                remaining.append(conn)
+        self.connections = remaining
+        if removed:
+            self.board_events.emit_connections(CONNECTION_REMOVED, removed)
 
     def get_card_id_from_item(self, item_ids):
         if not item_ids:
@@ -2201,6 +2433,7 @@ class BoardApp:
 
     # ---------- Рамки / группы ----------
 
+    @unless_loading
     def add_frame_dialog(self):
         title = simpledialog.askstring(
             "Новая рамка",
@@ -2241,9 +2474,10 @@ class BoardApp:
         )
         self.canvas_view.draw_frame(frame)
         self.frames[frame_id] = frame
+        self.board_events.emit(FRAME_ADDED, (frame_id,))
 
         if collapsed:
-            self.apply_frame_collapse_state(frame_id)
+            self.collapse_controller.refresh()
 
     def get_frame_id_from_item(self, item_ids):
         if not item_ids:
@@ -2281,8 +2515,9 @@ class BoardApp:
             return
         frame = self.frames[frame_id]
         frame.collapsed = not frame.collapsed
+        self.board_events.emit(FRAME_COLLAPSED, (frame_id,))
 
-        rect_id = frame.rect_id
+        rect_id = self.items.frame(frame_id).rect_id
         if frame.collapsed:
             self.canvas.itemconfig(
                 rect_id,
@@ -2298,95 +2533,68 @@ class BoardApp:
                 outline=self.theme["frame_outline"]
             )
 
-        self.apply_frame_collapse_state(frame_id)
         self.push_history()
 
-    def apply_frame_collapse_state(self, frame_id):
-        frame = self.frames.get(frame_id)
-        if not frame:
-            return
-        collapsed = frame.collapsed
-        state = "hidden" if collapsed else "normal"
-
-        x1, y1, x2, y2 = self.canvas.coords(frame.rect_id)
-        cards_in_frame = [
-            cid for cid, card in self.cards.items()
-            if x1 <= card.x <= x2 and y1 <= card.y <= y2
-        ]
-
-        for cid in cards_in_frame:
-            card = self.cards[cid]
-            self.canvas.itemconfig(card.rect_id, state=state)
-            self.canvas.itemconfig(card.text_id, state=state)
-            if card.resize_handle_id:
-                self.canvas.itemconfig(card.resize_handle_id, state=state)
-            for hid in card.connect_handles.values():
-                if hid:
-                    self.canvas.itemconfig(hid, state=state)
-
-        for conn in self.connections:
-            if conn.from_id in cards_in_frame or conn.to_id in cards_in_frame:
-                self.canvas.itemconfig(conn.line_id, state=state)
-                if conn.label_id:
-                    self.canvas.itemconfig(conn.label_id, state=state)
-
     # ---------- Хэндлы рамок ----------
 
-    def show_frame_handles(self, frame_id: int):
-        frame = self.frames.get(frame_id)
-        if not frame or not frame.rect_id:
-            return
-
-        self.hide_frame_handles(frame_id)
-        x1, y1, x2, y2 = self.canvas.coords(frame.rect_id)
+    @staticmethod
+    def _frame_handle_coords(frame: ModelFrame) -> Dict[str, tuple[float, float, float, float]]:
+        x1, y1, x2, y2 = frame.x1, frame.y1, frame.x2, frame.y2
         size = 10
-        handles: dict[str, int | None] = {}
-        positions = {
-            "nw": (x1, y1),
-            "ne": (x2, y1),
-            "sw": (x1, y2),
-            "se": (x2, y2),
+        return {
+            "nw": (x1 - size, y1 - size, x1, y1),
+            "ne": (x2 - size, y1 - size, x2, y1),
+            "sw": (x1 - size, y2 - size, x1, y2),
+            "se": (x2 - size, y2 - size, x2, y2),
         }
+
+    def _create_frame_handle(self, key: str, *coords: float, **options) -> int:
         cursors = {
             "nw": "top_left_corner",
             "ne": "top_right_corner",
             "sw": "bottom_left_corner",
             "se": "bottom_right_corner",
         }
+        hid = self.canvas.create_rectangle(*coords, **options)
+        # Привязки остаются у элемента и после возврата в пул: вид пула — угол рамки
+        cursor = cursors.get(key, "sizing")
+        self.canvas.tag_bind(hid, "<Enter>", lambda _event, cur=cursor: self.canvas.config(cursor=cur))
+        self.canvas.tag_bind(hid, "<Leave>", lambda _event: self.canvas.config(cursor=""))
+        return hid
 
-        for key, (cx, cy) in positions.items():
-            hx1 = cx - size
-            hy1 = cy - size
-            hx2 = cx
-            hy2 = cy
-            hid = self.canvas.create_rectangle(
-                hx1,
-                hy1,
-                hx2,
-                hy2,
+    def show_frame_handles(self, frame_id: int):
+        frame = self.frames.get(frame_id)
+        items = self.items.frame(frame_id)
+        if not frame or not items.rect_id:
+            return
+
+        self.hide_frame_handles(frame_id)
+        handles: dict[str, int | None] = {}
+        for key, coords in self._frame_handle_coords(frame).items():
+            hid = self.handle_pool.acquire(
+                f"frame_{key}",
+                lambda *xy, key=key, **options: self._create_frame_handle(key, *xy, **options),
+                coords,
                 fill=self.theme["frame_outline"],
                 outline="",
                 tags=("frame_handle", f"frame_handle_{key}", f"frame_handle_{frame_id}"),
             )
-            cursor = cursors.get(key, "sizing")
-            self.canvas.tag_bind(hid, "<Enter>", lambda _event, cur=cursor: self.canvas.config(cursor=cur))
-            self.canvas.tag_bind(hid, "<Leave>", lambda _event: self.canvas.config(cursor=""))
             handles[key] = hid
             self.canvas.tag_raise(hid)
 
-        frame.resize_handles = handles
+        items.resize_handles = handles
 
     def hide_frame_handles(self, frame_id: int | None):
         if frame_id is None:
             return
         frame = self.frames.get(frame_id)
+        items = self.items.frame(frame_id)
         if not frame:
             return
-        for hid in frame.resize_handles.values():
-            if hid:
-                self.canvas.delete(hid)
+        for hid in items.resize_handles.values():
+            self.handle_pool.release(hid)
         self.canvas.config(cursor="")
-        frame.resize_handles.clear()
+        items.resize_handles.clear()
 
     def hide_all_frame_handles(self):
         for fid in list(self.frames.keys()):
@@ -2394,17 +2602,11 @@ class BoardApp:
 
     def update_frame_handles_positions(self, frame_id: int):
         frame = self.frames.get(frame_id)
-        if not frame or not frame.rect_id or not frame.resize_handles:
+        items = self.items.frame(frame_id)
+        if not frame or not items.rect_id or not items.resize_handles:
             return
-        x1, y1, x2, y2 = self.canvas.coords(frame.rect_id)
-        size = 10
-        coords = {
-            "nw": (x1 - size, y1 - size, x1, y1),
-            "ne": (x2 - size, y1 - size, x2, y1),
-            "sw": (x1 - size, y2 - size, x1, y2),
-            "se": (x2 - size, y2 - size, x2, y2),
-        }
-        for key, hid in frame.resize_handles.items():
+        coords = self._frame_handle_coords(frame)
+        for key, hid in items.resize_handles.items():
             if hid and key in coords:
                 self.canvas.coords(hid, *coords[key])
                 self.canvas.tag_raise(hid)
@@ -2424,8 +2626,9 @@ class BoardApp:
 
     def show_card_handles(self, card_id: int, *, include_resize: bool = True):
         card = self.cards.get(card_id)
-        if not card:
+        if not card or self.collapse_controller.is_hidden(card_id):
             return
+        items = self.items.card(card_id)
         x = card.x
         y = card.y
         w = card.width
@@ -2435,56 +2638,69 @@ class BoardApp:
         x2 = x + w / 2
         y2 = y + h / 2
 
-        if include_resize and not card.resize_handle_id:
+        if include_resize and not items.resize_handle_id:
             size = 10
             rx1 = x2 - size
             ry1 = y2 - size
             rx2 = x2
             ry2 = y2
-            rid = self.canvas.create_rectangle(
-                rx1,
-                ry1,
-                rx2,
-                ry2,
+            rid = self.handle_pool.acquire(
+                "resize",
+                self.canvas.create_rectangle,
+                (rx1, ry1, rx2, ry2),
                 fill=self.theme["connection"],
                 outline="",
                 tags=("resize_handle", f"card_{card_id}"),
             )
-            card.resize_handle_id = rid
+            items.resize_handle_id = rid
 
         positions = self._card_handle_positions(card)
         r = 5
         for anchor, (cx, cy) in positions.items():
-            existing_id = card.connect_handles.get(anchor)
+            existing_id = items.connect_handles.get(anchor)
             if existing_id is None:
-                hid = self.canvas.create_oval(
-                    cx - r,
-                    cy - r,
-                    cx + r,
-                    cy + r,
+                hid = self.handle_pool.acquire(
+                    "connect",
+                    self.canvas.create_oval,
+                    (cx - r, cy - r, cx + r, cy + r),
                     fill=self.theme["connection"],
                     outline="",
                     tags=("connect_handle", f"connect_handle_{anchor}", f"card_{card_id}"),
                 )
-                card.connect_handles[anchor] = hid
+                items.connect_handles[anchor] = hid
             else:
                 hid = existing_id
             self.canvas.tag_raise(hid)
 
-        if card.resize_handle_id:
-            self.canvas.tag_raise(card.resize_handle_id)
+        if items.resize_handle_id:
+            self.canvas.tag_raise(items.resize_handle_id)
 
     def hide_card_handles(self, card_id: int, *, include_resize: bool = True):
         card = self.cards.get(card_id)
         if not card:
             return
-        if include_resize and card.resize_handle_id:
-            self.canvas.delete(card.resize_handle_id)
-            card.resize_handle_id = None
-        for anchor, hid in list(card.connect_handles.items()):
-            if hid:
-                self.canvas.delete(hid)
-            card.connect_handles.pop(anchor, None)
+        items = self.items.card(card_id)
+        if include_resize and items.resize_handle_id:
+            self.handle_pool.release(items.resize_handle_id)
+            items.resize_handle_id = None
+        for hid in items.connect_handles.values():
+            self.handle_pool.release(hid)
+        items.connect_handles.clear()
+
+    def _delete_card_items(self, card_id: int) -> None:
+        """
+        Удаляет элементы карточки с холста и забывает их. Хэндлы — элементы
+        пула: они возвращаются в ``handle_pool``, а не удаляются.
+        """
+        items = self.items.card(card_id)
+        self.handle_pool.release(items.resize_handle_id)
+        for hid in items.connect_handles.values():
+            self.handle_pool.release(hid)
+        items.resize_handle_id = None
+        items.connect_handles.clear()
+        for item_id in items.all_ids():
+            self.canvas.delete(item_id)
+        self.items.forget_card(card_id)
 
     def update_card_layout(
         self,
@@ -2494,12 +2710,13 @@ class BoardApp:
         attachment_scale: float | tuple[float, float] | None = None,
     ) -> None:
         card = self.cards.get(card_id)
-        if not card:
+        if not card or self.collapse_controller.is_hidden(card_id):
             return
+        items = self.items.card(card_id)
         layout = self.canvas_view.compute_card_layout(card)
         self.canvas_view.apply_card_layout(card, layout)
         if card.attachments:
-            if redraw_attachment or not card.image_id:
+            if redraw_attachment or not items.image_id:
                 self.render_card_attachments(card_id)
             else:
                 self.update_attachment_positions(card_id, scale=attachment_scale)
@@ -2508,23 +2725,24 @@ class BoardApp:
         card = self.cards.get(card_id)
         if not card:
             return
+        items = self.items.card(card_id)
         w = card.width
         h = card.height
         x2 = card.x + w / 2
         y2 = card.y + h / 2
 
-        if card.resize_handle_id:
+        if items.resize_handle_id:
             size = 10
             rx1 = x2 - size
             ry1 = y2 - size
             rx2 = x2
             ry2 = y2
-            self.canvas.coords(card.resize_handle_id, rx1, ry1, rx2, ry2)
+            self.canvas.coords(items.resize_handle_id, rx1, ry1, rx2, ry2)
 
         positions = self._card_handle_positions(card)
         r = 5
         for anchor, (cx, cy) in positions.items():
-            hid = card.connect_handles.get(anchor)
+            hid = items.connect_handles.get(anchor)
             if hid:
                 self.canvas.coords(hid, cx - r, cy - r, cx + r, cy + r)
                 self.canvas.tag_raise(hid)
@@ -2553,20 +2771,16 @@ class BoardApp:
             return
         cx = self.canvas.canvasx(event.x)
         cy = self.canvas.canvasy(event.y)
-        items = self.canvas.find_overlapping(cx, cy, cx, cy)
+        # Верхний элемент под курсором Tk уже знает; линии связей ищутся
+        # по индексу отрезков с допуском, а не попаданием в пиксель
+        current = self.canvas.find_withtag("current")
+        item_id = current[0] if current else None
         card_id = None
-        connection_hover = None
-        for it in items:
-            cid = self.get_card_id_from_item((it,))
-            if cid is not None:
-                card_id = cid
-                break
-            connection_hover = self.connection_handle_map.get(it)
-            if connection_hover:
-                break
-            connection_hover = self.get_connection_from_item(it)
-            if connection_hover:
-                break
+        connection_hover = self.connection_handle_map.get(item_id) if item_id else None
+        if connection_hover is None:
+            card_id = self.get_card_id_from_item(current)
+            if card_id is None:
+                connection_hover = self.connection_at(cx, cy, item_id)
 
         if card_id == self.hover_card_id and connection_hover == self.hover_connection:
             return
@@ -2613,37 +2827,58 @@ class BoardApp:
         self.canvas.scale("all", cx, cy, scale, scale)
         self.zoom_factor = new_zoom
 
-        for card in self.cards.values():
-            x1, y1, x2, y2 = self.canvas.coords(card.rect_id)
-            card.x = (x1 + x2) / 2
-            card.y = (y1 + y2) / 2
-            card.width = x2 - x1
-            card.height = y2 - y1
-            self.update_card_handles_positions(card.id)
-            self.update_card_layout(card.id)
-
-        for frame in self.frames.values():
-            if frame.rect_id:
-                x1, y1, x2, y2 = self.canvas.coords(frame.rect_id)
-                frame.x1, frame.y1, frame.x2, frame.y2 = x1, y1, x2, y2
-                self.update_frame_handles_positions(frame.id)
+        with self.board_events.batch():
+            # Геометрия карточек пересчитывается по колонкам, а не читается
+            # обратно с холста по одной
+            self.cards.scale(scale, cx, cy)
+            hidden = self.collapse_controller.hidden_cards
+            for card in self.cards.values():
+                if card.id in hidden:
+                    continue
+                self.update_card_handles_positions(card.id)
+                self.update_card_layout(card.id)
+
+            for frame in self.frames.values():
+                rect_id = self.items.frame(frame.id).rect_id
+                if rect_id:
+                    x1, y1, x2, y2 = self.canvas.coords(rect_id)
+                    frame.x1, frame.y1, frame.x2, frame.y2 = x1, y1, x2, y2
+                    self.update_frame_handles_positions(frame.id)
+            self.board_events.emit(FRAME_MOVED, self.frames)
+            self.board_events.emit(FRAME_RESIZED, self.frames)
+        # Линии связей масштабировал холст: поиск связи под курсором — по новым отрезкам
+        self.canvas_view.reindex_connection_hits()
 
         bbox = self.canvas.bbox("all")
         if bbox:
             self.canvas.config(scrollregion=bbox)
 
-        self.update_minimap()
-
     # ---------- Связи ----------
 
     def get_connection_from_item(self, item_id):
         if not item_id:
             return None
-        for conn in self.connections:
-            if conn.line_id == item_id or conn.label_id == item_id:
+        for conn, items in self.items.connections.values():
+            if items.line_id == item_id or items.label_id == item_id:
                 return conn
         return None
 
+    def connection_at(self, cx, cy, item_id=None):
+        """
+        Связь под курсором: её подпись — верхний элемент ``item_id``, либо
+        линия проходит не дальше CONNECTION_HIT_TOLERANCE от точки. Карточки
+        и ручки, оказавшиеся сверху, связь не отдают.
+        """
+        if item_id:
+            tags = self.canvas.gettags(item_id)
+            if "connection_label" in tags:
+                return self.get_connection_from_item(item_id)
+            if any(
+                tag.startswith(("card_", "attachment_")) or tag.endswith("_handle") for tag in tags
+            ):
+                return None
+        return self.canvas_view.connection_at(cx, cy)
+
     def _connection_anchors(self, from_card, to_card, connection=None):
         return self.canvas_view._connection_anchors(from_card, to_card, connection)
 
@@ -2676,6 +2911,7 @@ class BoardApp:
         )
         self.canvas_view.draw_connection(connection, card_from, card_to)
         self.connections.append(connection)
+        self.board_events.emit_connections(CONNECTION_ADDED, (connection,))
 
     def update_connections_for_card(self, card_id):
         self.canvas_view.update_connection_positions(self.connections, self.cards, card_id)
@@ -2702,17 +2938,17 @@ class BoardApp:
         if not color:
             return
 
-        changed = bulk_update_card_colors(self.cards, card_ids, color)
-        if not changed:
+        edit = bulk_ops.recolor(self.cards, card_ids, color)
+        if not edit:
             return
 
-        for cid in changed:
+        for cid in edit.changed:
             card = self.cards[cid]
             self.canvas_view.update_card_color(card)
             self.update_card_layout(cid, redraw_attachment=False)
-        self.render_selection()
         self.push_history()
 
+    @unless_loading
     def change_text_color(self):
         initial = self.theme.get("text")
         color = colorchooser.askcolor(initialcolor=initial, parent=self.root)[1]
@@ -2739,7 +2975,7 @@ class BoardApp:
         if new_text is None:
             return
         card.text = new_text
-        self.canvas.itemconfig(card.text_id, text=new_text)
+        self.canvas.itemconfig(self.items.card(card_id).text_id, text=new_text)
         self.update_card_layout(card_id)
 
     # ---------- Inline-редактирование карточек и выравнивание ----------
@@ -2761,7 +2997,7 @@ class BoardApp:
     
         # Берём bbox текста карточки
         try:
-            x1, y1, x2, y2 = self.canvas.bbox(card.text_id)
+            x1, y1, x2, y2 = self.canvas.bbox(self.items.card(card_id).text_id)
         except Exception:
             x = card.x
             y = card.y
@@ -2845,7 +3081,7 @@ class BoardApp:
     
         new_text = editor_text.strip()
         card.text = new_text
-        self.canvas.itemconfig(card.text_id, text=new_text)
+        self.canvas.itemconfig(self.items.card(card_id).text_id, text=new_text)
         self.update_card_layout(card_id)
 
         self.push_history()
@@ -2855,6 +3091,7 @@ class BoardApp:
         if not conn:
             return
         conn.toggle_direction()
+        self.board_events.emit_connections(CONNECTION_CHANGED, (conn,))
         self.canvas_view.apply_connection_direction(conn)
         self.push_history()
 
@@ -2862,6 +3099,7 @@ class BoardApp:
         if not self.selected_connection:
             return
         self.selected_connection.toggle_direction()
+        self.board_events.emit_connections(CONNECTION_CHANGED, (self.selected_connection,))
         self.canvas_view.apply_connection_direction(self.selected_connection)
         self.push_history()
     
@@ -2876,96 +3114,40 @@ class BoardApp:
         return cards
     
     def align_selected_cards_left(self):
-        cards = self._require_multiple_selected_cards()
-        if not cards:
-            return
-    
-        left_min = min(
-            self.cards[cid].x - self.cards[cid].width / 2 for cid in cards
-        )
-    
-        for cid in cards:
-            card = self.cards[cid]
-            new_x = left_min + card.width / 2
-            card.x = new_x
-            x1 = card.x - card.width / 2
-            y1 = card.y - card.height / 2
-            x2 = card.x + card.width / 2
-            y2 = card.y + card.height / 2
-            self.canvas.coords(card.rect_id, x1, y1, x2, y2)
-            self.update_card_layout(cid, redraw_attachment=False)
-            self.update_card_handles_positions(cid)
-            self.update_connections_for_card(cid)
+        self._align_selected_cards("left")
 
-        self.push_history()
-    
     def align_selected_cards_top(self):
+        self._align_selected_cards("top")
+
+    def _align_selected_cards(self, edge):
         cards = self._require_multiple_selected_cards()
         if not cards:
             return
-    
-        top_min = min(
-            self.cards[cid].y - self.cards[cid].height / 2 for cid in cards
-        )
-    
-        for cid in cards:
-            card = self.cards[cid]
-            new_y = top_min + card.height / 2
-            card.y = new_y
-            x1 = card.x - card.width / 2
-            y1 = card.y - card.height / 2
-            x2 = card.x + card.width / 2
-            y2 = card.y + card.height / 2
-            self.canvas.coords(card.rect_id, x1, y1, x2, y2)
-            self.update_card_layout(cid, redraw_attachment=False)
-            self.update_card_handles_positions(cid)
-            self.update_connections_for_card(cid)
-    
-        self.push_history()
-    
+        self._apply_bulk_edit(bulk_ops.align(self.cards, cards, edge))
+
+    def distribute_selected_cards(self, axis):
+        cards = [cid for cid in self.selected_cards if cid in self.cards]
+        if len(cards) < 3:
+            messagebox.showwarning(
+                "Недостаточно карточек",
+                "Для распределения нужно выбрать минимум три карточки.",
+            )
+            return
+        self._apply_bulk_edit(bulk_ops.distribute(self.cards, cards, axis))
+
     def equalize_selected_cards_width(self):
         cards = self._require_multiple_selected_cards()
         if not cards:
             return
-    
-        ref = self.cards[cards[0]]
-        ref_w = ref.width
-    
-        for cid in cards:
-            card = self.cards[cid]
-            card.width = ref_w
-            x1 = card.x - ref_w / 2
-            y1 = card.y - card.height / 2
-            x2 = card.x + ref_w / 2
-            y2 = card.y + card.height / 2
-            self.canvas.coords(card.rect_id, x1, y1, x2, y2)
-            self.update_card_layout(cid)
-            self.update_card_handles_positions(cid)
-            self.update_connections_for_card(cid)
+        edit = bulk_ops.set_size(self.cards, cards, width=self.cards[cards[0]].width)
+        self._apply_bulk_edit(edit, redraw_attachment=True)
 
-        self.push_history()
-    
     def equalize_selected_cards_height(self):
         cards = self._require_multiple_selected_cards()
         if not cards:
             return
-    
-        ref = self.cards[cards[0]]
-        ref_h = ref.height
-    
-        for cid in cards:
-            card = self.cards[cid]
-            card.height = ref_h
-            x1 = card.x - card.width / 2
-            y1 = card.y - ref_h / 2
-            x2 = card.x + card.width / 2
-            y2 = card.y + ref_h / 2
-            self.canvas.coords(card.rect_id, x1, y1, x2, y2)
-            self.update_card_layout(cid)
-            self.update_card_handles_positions(cid)
-            self.update_connections_for_card(cid)
-
-        self.push_history()
+        edit = bulk_ops.set_size(self.cards, cards, height=self.cards[cards[0]].height)
+        self._apply_bulk_edit(edit, redraw_attachment=True)
 
     def apply_card_size_from_controls(self):
         try:
@@ -2990,41 +3172,79 @@ class BoardApp:
             messagebox.showinfo("Нет выбора", "Сначала выберите карточку для изменения размера.")
             return
 
-        changed = False
+        # Вложения не должны вылезать за карточку: минимум считается по
+        # раскладке карточки с новым размером, только для карточек с вложениями
+        minimums = {}
         for cid in card_ids:
-            card = self.cards.get(cid)
-            if not card:
+            card = self.cards[cid]
+            if not card.attachments:
                 continue
-
-            original_w, original_h = card.width, card.height
-            card.width = target_width
-            card.height = target_height
-            layout = self.canvas_view.compute_card_layout(card)
-            attach_min_w, attach_min_h = self._compute_attachments_min_size(card, layout)
-            min_w = max(60, attach_min_w)
-            min_h = max(40, attach_min_h)
-            new_w = max(target_width, min_w)
-            new_h = max(target_height, min_h)
-            card.width = new_w
-            card.height = new_h
-
-            x1 = card.x - new_w / 2
-            y1 = card.y - new_h / 2
-            x2 = card.x + new_w / 2
-            y2 = card.y + new_h / 2
-            self.canvas.coords(card.rect_id, x1, y1, x2, y2)
-            width_scale = new_w / original_w if original_w else 1.0
-            height_scale = new_h / original_h if original_h else 1.0
-            self.update_card_layout(cid, attachment_scale=(width_scale, height_scale))
-            self.update_card_handles_positions(cid)
-            self.update_connections_for_card(cid)
-            changed = True
-
-        if changed:
-            self.update_minimap()
-            self.push_history()
+            probe = ModelCard(
+                id=cid,
+                x=card.x,
+                y=card.y,
+                width=target_width,
+                height=target_height,
+                text=card.text,
+                color=card.color,
+                attachments=card.attachments,
+            )
+            layout = self.canvas_view.compute_card_layout(probe)
+            minimums[cid] = self._compute_attachments_min_size(probe, layout)
+
+        edit = bulk_ops.set_size(
+            self.cards,
+            card_ids,
+            target_width,
+            target_height,
+            min_width=60,
+            min_height=40,
+            minimums=minimums,
+        )
+        self._apply_bulk_edit(edit, redraw_attachment=True)
         self.update_controls_state()
-    
+
+    def _apply_bulk_edit(self, edit, *, redraw_attachment=False):
+        """Перерисовывает итог массовой правки и кладёт его в историю одной записью."""
+        if not edit:
+            return
+        self.update_cards_geometry(edit.changed, redraw_attachment=redraw_attachment)
+        self.push_history()
+
+    def update_cards_geometry(self, card_ids, *, redraw_attachment=False):
+        """
+        Переносит на холст новую геометрию карточек. Связи пересчитываются
+        только у сдвинутых карточек, по индексу связей. Карточки свёрнутых
+        рамок на холсте не нарисованы и пропускаются.
+        """
+        hidden = self.collapse_controller.hidden_cards
+        ids = set(card_ids) - hidden
+        if not ids:
+            return
+        for card_id in ids:
+            card = self.cards.get(card_id)
+            if card is None:
+                continue
+            self.canvas.coords(
+                self.items.card(card_id).rect_id,
+                card.x - card.width / 2,
+                card.y - card.height / 2,
+                card.x + card.width / 2,
+                card.y + card.height / 2,
+            )
+            self.update_card_layout(card_id, redraw_attachment=redraw_attachment)
+            self.update_card_handles_positions(card_id)
+        touched = [
+            conn
+            for conn in self.connection_index.of_cards(ids)
+            if conn.from_id not in hidden and conn.to_id not in hidden
+        ]
+        self.canvas_view.update_connection_positions(touched, self.cards)
+        if self.selected_connection is not None and (
+            self.selected_connection.from_id in ids or self.selected_connection.to_id in ids
+        ):
+            self.show_connection_handles(self.selected_connection)
+
     # ---------- Настройки сетки (UI-обработчики) ----------
     
     def on_toggle_show_grid(self):
@@ -3071,35 +3291,18 @@ class BoardApp:
             if deleted_anything:
                 self.push_history()
             return
-        to_delete = list(self.selected_cards)
-
-        for conn in list(self.connections):
-            if conn.from_id in to_delete or conn.to_id in to_delete:
-                self._delete_connection(conn)
-                deleted_anything = True
+        to_delete = [cid for cid in self.selected_cards if cid in self.cards]
 
+        # Файлы вложений остаются в attachments/: снимки истории хранят только
+        # ссылки на них, и отмена удаления должна найти данные на месте
         for card_id in to_delete:
-            card = self.cards.get(card_id)
-            if not card:
-                continue
-            for attachment in card.attachments:
-                try:
-                    path = Path(attachment.storage_path)
-                    if not path.is_absolute():
-                        path = Path.cwd() / path
-                    if path.exists():
-                        path.unlink()
-                except Exception:
-                    pass
             self._clear_attachment_previews_for_card(card_id)
-            if card.resize_handle_id:
-                self.canvas.delete(card.resize_handle_id)
-            for hid in card.connect_handles.values():
-                if hid:
-                    self.canvas.delete(hid)
-            self.canvas.delete(card.rect_id)
-            self.canvas.delete(card.text_id)
-            del self.cards[card_id]
+            self._delete_card_items(card_id)
+
+        # Карточки и их связи удаляются одним проходом по списку связей
+        edit = bulk_ops.delete(self.cards, self.connections, to_delete)
+        for conn in edit.removed_connections:
+            self._discard_connection_items(conn)
 
         self.selected_cards.clear()
         self.selected_card_id = None
@@ -3187,10 +3390,8 @@ class BoardApp:
                 )
 
         self.select_card(None)
-        for nid in id_map.values():
-            self.select_card(nid, additive=True)
+        self.selection_controller.set_card_selection(id_map.values())
 
-        self.update_minimap()
         self.push_history()
 
     def on_duplicate(self, event=None):
@@ -3199,42 +3400,105 @@ class BoardApp:
 
     # ---------- Сохранение/загрузка ----------
 
+    @unless_loading
     def save_board(self):
-        data = self.get_board_data()
-        if file_io.save_board(data):
+        from . import files as file_io
+
+        data = self._with_viewport(self.get_board_data())
+        if file_io.save_board(data, self.attachment_store.write_board):
             self.saved_history_index = self.history.index
             self.update_unsaved_flag()
 
+    @unless_loading
     def load_board(self):
-        data = file_io.load_board()
-        if data is None:
+        from . import files as file_io
+
+        filename = file_io.ask_open_board_filename()
+        if not filename:
             return
 
-        self.set_board_from_data(data)
+        previous_state = self.get_board_data()
+        container = None
+        try:
+            if is_board_container(filename):
+                container = BoardContainer(filename)
+                reader = StreamingBoardReader(container.open_board(), size=container.board_size)
+            else:
+                reader = StreamingBoardReader(filename)
+        except (OSError, BoardFileError) as e:
+            if container is not None:
+                container.close()
+            file_io.show_load_error(e)
+            return
+
+        previous_container = self.attachment_store.set_container(container)
+
+        def on_finished():
+            if previous_container is not None and previous_container is not container:
+                previous_container.close()
+            self._on_board_loaded()
+
+        def on_failed(error: Exception):
+            self.attachment_store.reset()
+            if container is not None:
+                container.close()
+            self.attachment_store.set_container(previous_container)
+            file_io.show_load_error(error)
+            self.set_board_from_data(previous_state)
+
+        self.load_controller.start(
+            reader,
+            on_finished=on_finished,
+            on_failed=on_failed,
+            members=container.members if container is not None else None,
+        )
+
+    def _on_board_loaded(self):
         state = self.get_board_data()
         self.history.clear_and_init(state)
         self.push_history()
         self.saved_history_index = self.history.index
         self.update_unsaved_flag()
-        self.write_autosave(state)
-        self.update_minimap()
 
-    # ---------- Экспорт в PNG (как было раньше) ----------
+    # ---------- Экспорт в PNG и SVG ----------
 
     def export_png(self):
+        from . import files as file_io
+
+        board = BoardData(cards=self.cards, connections=self.connections, frames=self.frames)
         file_io.export_png(
-            canvas=self.canvas,
-            cards=self.cards,
-            frames=self.frames,
-            connections=self.connections,
+            board=board,
             theme=self.theme,
-            connection_anchor_fn=self._connection_anchors,
+            selected_card_ids=self.selected_cards,
+            text_engine=self.canvas_view.backend.text_engine,
+        )
+
+    def export_svg(self):
+        from . import files as file_io
+
+        board = BoardData(cards=self.cards, connections=self.connections, frames=self.frames)
+        file_io.export_svg(
+            board=board,
+            theme=self.theme,
+            selected_card_ids=self.selected_cards,
+            attachment_reader=self.attachment_store.read_bytes,
+            materialize=lambda card_ids: self.materialize_attachments(card_ids, wait=True),
+            text_engine=self.canvas_view.backend.text_engine,
         )
 
     # ---------- Мини-карта ----------
 
     def update_minimap(self):
-        self.canvas_view.render_minimap(self.cards.values(), self.frames.values())
+        self.canvas_view.render_minimap(self.cards, self.frames.values())
+
+    def _on_board_geometry_changed(self, change):
+        # Пачка правок подряд перерисовывает мини-карту один раз
+        if self._minimap_after_id is None:
+            self._minimap_after_id = self.root.after_idle(self._refresh_minimap)
+
+    def _refresh_minimap(self):
+        self._minimap_after_id = None
+        self.update_minimap()
 
     def on_minimap_click(self, event):
         bbox = self.canvas.bbox("all")
@@ -3276,12 +3540,79 @@ class BoardApp:
 
     # ---------- Переключение темы ----------
 
+    @unless_loading
     def toggle_theme(self):
         self.theme_name = "dark" if self.theme_name == "light" else "light"
         self._apply_theme()
         self._redraw_with_current_theme()
         save_theme_settings(self.theme_name, self.text_colors, self.show_grid)
 
+    # ---------- Трассировка и HUD производительности ----------
+
+    def toggle_perf_hud(self, event=None):
+        if self.perf_hud is None:
+            from .perf_hud import PerfHud
+
+            self.perf_hud = PerfHud(self)
+        self.perf_hud.toggle()
+
+    def toggle_tracing(self, event=None):
+        """Включает запись трассы или выключает её и сохраняет ``trace.json`` со сводкой."""
+
+        tracer = tracing.tracer
+        if not tracer.enabled:
+            tracer.clear()
+            tracer.enable()
+            messagebox.showinfo(
+                "Трассировка",
+                "Запись трассы включена.\nПовторное Ctrl+Shift+T сохранит её в файл.",
+            )
+            return
+        tracer.disable()
+        self._dump_trace()
+        messagebox.showinfo(
+            "Трассировка",
+            f"Трасса сохранена в {self.trace_path}.\n\n{tracer.format_summary(limit=10)}",
+        )
+
+    def _dump_trace(self):
+        tracer = tracing.tracer
+        try:
+            tracer.write_trace(self.trace_path)
+        except OSError as exc:
+            print(f"Не удалось сохранить трассу: {exc}", file=sys.stderr)
+            return
+        print(tracer.format_summary(), file=sys.stderr)
+
+    def toggle_input_recording(self, event=None):
+        """Начинает запись ввода или останавливает её и предлагает сохранить сеанс."""
+
+        recorder = self.input_recorder
+        if not recorder.recording:
+            recorder.start(self)
+            messagebox.showinfo(
+                "Запись ввода",
+                "Запись ввода включена.\nПовторное Ctrl+Shift+R остановит её и сохранит сеанс.",
+            )
+            return
+        session = recorder.stop()
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            filetypes=[("Запись ввода", "*.json"), ("Все файлы", "*.*")],
+        )
+        if not filename:
+            return
+        try:
+            recorder.save(filename)
+        except OSError as exc:
+            messagebox.showerror("Запись ввода", f"Не удалось сохранить запись:\n{exc}")
+            return
+        messagebox.showinfo(
+            "Запись ввода",
+            f"Записано событий: {len(session['events'])}.\n"
+            f"Воспроизведение: python -m benchmarks.replay {filename}",
+        )
+
     # ---------- Закрытие ----------
 
     def on_close(self):
@@ -3295,6 +3626,17 @@ class BoardApp:
                 return
             if res:
                 self.save_board()
+        self._flush_autosave()
+        if self._minimap_after_id is not None:
+            self.root.after_cancel(self._minimap_after_id)
+            self._minimap_after_id = None
+        self.attachment_store.shutdown()
+        if self.perf_hud is not None:
+            self.perf_hud.hide()
+        self.perf_monitor.shutdown()
+        if tracing.tracer.enabled:
+            tracing.tracer.disable()
+            self._dump_trace()
         self.root.destroy()
 
     def run(self):
@@ -3302,5 +3644,5 @@ class BoardApp:
 
 
 if __name__ == "__main__":
-    app = BoardApp()
+    app = BoardApp(deferred_startup=True)
     app.run()
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import time
+import tkinter as tk
+from typing import TYPE_CHECKING, Any, Dict, List
+
+from .perf_monitor import deep_sizeof
+
+if TYPE_CHECKING:
+    from .main import BoardApp
+
+
+class PerfHud:
+    """
+    Оверлей производительности поверх холста.
+
+    Несколько раз в секунду показывает время кадра и задержку цикла событий,
+    перцентили задержек обработчиков, число элементов холста, память истории,
+    попадания кэшей и время автосохранения. Оверлей — виджет ``Label``
+    над холстом, а не элемент холста: он не попадает в выделение,
+    ``bbox("all")`` и миникарту.
+    """
+
+    def __init__(
+        self, app: "BoardApp", *, interval_ms: int = 250, history_interval_s: float = 2.0
+    ) -> None:
+        self.app = app
+        self.interval_ms = interval_ms
+        self.history_interval_s = history_interval_s
+        self.label: tk.Label | None = None
+        self._after_id: str | None = None
+        self._expected_at = 0.0
+        self._history_sizes: Dict[int, int] = {}
+        self._history_total = 0
+        self._history_key: tuple | None = None
+        self._history_sampled_at: float | None = None
+
+    @property
+    def visible(self) -> bool:
+        return self.label is not None
+
+    def toggle(self) -> None:
+        if self.visible:
+            self.hide()
+        else:
+            self.show()
+
+    def show(self) -> None:
+        if self.visible:
+            return
+        self.label = tk.Label(
+            self.app.canvas,
+            justify="left",
+            anchor="nw",
+            font=("Consolas", 9),
+            bg="#202020",
+            fg="#e0e0e0",
+            padx=6,
+            pady=4,
+        )
+        self.label.place(x=8, y=8)
+        self._schedule()
+
+    def hide(self) -> None:
+        if self._after_id is not None:
+            self.app.root.after_cancel(self._after_id)
+            self._after_id = None
+        if self.label is not None:
+            self.label.destroy()
+            self.label = None
+
+    def _schedule(self) -> None:
+        self._expected_at = time.perf_counter() + self.interval_ms / 1000
+        self._after_id = self.app.root.after(self.interval_ms, self._tick)
+
+    def _tick(self) -> None:
+        self._after_id = None
+        if self.label is None:
+            return
+        lag_ms = max(0.0, (time.perf_counter() - self._expected_at) * 1000)
+        # Время кадра: сколько Tk тратит на отложенную перерисовку
+        started = time.perf_counter()
+        self.app.canvas.update_idletasks()
+        self.app.perf_monitor.record_frame((time.perf_counter() - started) * 1000, lag_ms)
+        self.label.configure(text="\n".join(self.lines()))
+        self._schedule()
+
+    def lines(self) -> List[str]:
+        app = self.app
+        stats = app.perf_monitor.snapshot()
+        lines = [
+            f"кадр {stats['frame_ms']:.1f} мс (макс {stats['frame_max_ms']:.1f}),"
+            f" цикл +{stats['loop_lag_ms']:.0f} мс",
+            f"обработчики p50 {stats['handler_p50_ms']:.1f} / p95 {stats['handler_p95_ms']:.1f}"
+            f" / p99 {stats['handler_p99_ms']:.1f} мс",
+            f"элементов холста: {len(app.canvas.find_all())}",
+            f"история: {len(app.history.commands)} шагов, ~{self._history_bytes() / 1e6:.1f} МБ",
+        ]
+        for name, rate in stats["cache_hit_rates"].items():
+            lines.append(f"кэш {name}: {'—' if rate is None else f'{rate:.0%}'}")
+        lines.append(self._autosave_line())
+        slow = stats["last_slow"]
+        if slow is not None:
+            lines.append(
+                f"медленных вызовов: {stats['slow_calls']},"
+                f" последний {slow.handler} {slow.duration_ms:.0f} мс"
+            )
+        return lines
+
+    def _autosave_line(self) -> str:
+        service = self.app.autosave_service
+        if service.last_saved_at is None:
+            return "автосохранение: ещё не было"
+        ago = time.monotonic() - service.last_saved_at
+        return f"автосохранение: {service.last_save_ms:.0f} мс, {ago:.0f} с назад"
+
+    def _history_bytes(self) -> int:
+        """
+        Память снимков истории. Обход снимков идёт в потоке Tk, поэтому
+        пересчёт делается, только когда история изменилась, и не чаще раза
+        в ``history_interval_s``; между замерами показывается прошлое значение.
+        Размер каждого снимка считается один раз.
+        """
+
+        history = self.app.history
+        commands = history.commands
+        key = (id(history.initial_state), len(commands), id(commands[-1]) if commands else None)
+        now = time.monotonic()
+        if key == self._history_key or (
+            self._history_sampled_at is not None
+            and now - self._history_sampled_at < self.history_interval_s
+        ):
+            return self._history_total
+        self._history_key = key
+        self._history_sampled_at = now
+        snapshots: List[Any] = [history.initial_state]
+        for command in history.commands:
+            snapshots.extend((command.before, command.after))
+        sizes = {}
+        for snapshot in snapshots:
+            if snapshot is None:
+                continue
+            key = id(snapshot)
+            size = self._history_sizes.get(key)
+            if size is None:
+                size = deep_sizeof(snapshot)
+            sizes[key] = size
+        self._history_sizes = sizes
+        self._history_total = sum(sizes.values())
+        return self._history_total
@@ -0,0 +1,233 @@
+"""
+Замеры отзывчивости интерфейса без зависимости от Tk.
+
+``PerfMonitor`` оборачивает обработчики событий (``EventBinder``), копит
+задержки обработчиков и время кадров для HUD и работает сторожем: вызов,
+превысивший бюджет, пишется в журнал с именем обработчика и образцом стека,
+снятым фоновым потоком, пока обработчик ещё выполнялся.
+"""
+
+from __future__ import annotations
+
+import functools
+import logging
+import math
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Mapping, Sequence
+
+logger = logging.getLogger(__name__)
+
+BUDGET_ENV = "MINI_MIRO_SLOW_MS"
+DEFAULT_BUDGET_MS = 16.0
+STACK_LIMIT = 25
+
+
+@dataclass
+class SlowCall:
+    """Вызов обработчика дольше бюджета; ``stack`` — образец стека или пустая строка."""
+
+    handler: str
+    duration_ms: float
+    stack: str
+
+
+@dataclass
+class _ActiveCall:
+    handler: str
+    start: float
+    thread_id: int
+    previous: "_ActiveCall | None"
+    stack: str = ""
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    """Перцентиль по ближайшему рангу; 0 для пустой выборки."""
+
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def budget_from_env(environ: Mapping[str, str] | None = None) -> float:
+    """Бюджет обработчика в миллисекундах из ``MINI_MIRO_SLOW_MS``."""
+
+    value = (os.environ if environ is None else environ).get(BUDGET_ENV, "")
+    try:
+        budget = float(value)
+    except ValueError:
+        return DEFAULT_BUDGET_MS
+    return budget if budget > 0 else DEFAULT_BUDGET_MS
+
+
+def deep_sizeof(obj: Any) -> int:
+    """Оценка памяти вложенных dict/list/str/чисел в байтах (без общих объектов дважды)."""
+
+    seen: set[int] = set()
+    total = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+    return total
+
+
+class PerfMonitor:
+    """
+    Задержки обработчиков и время кадров за последние ``window`` событий,
+    сторож медленных вызовов и статистика кэшей для HUD.
+    """
+
+    def __init__(
+        self,
+        budget_ms: float = DEFAULT_BUDGET_MS,
+        *,
+        window: int = 512,
+        sample_stacks: bool = True,
+    ) -> None:
+        self.budget_ms = budget_ms
+        self.sample_stacks = sample_stacks
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.handler_latencies: Dict[str, Deque[float]] = {}
+        self.frame_times: Deque[float] = deque(maxlen=window)
+        self.loop_lags: Deque[float] = deque(maxlen=window)
+        self.slow_calls: Deque[SlowCall] = deque(maxlen=50)
+        self._window = window
+        self._caches: Dict[str, Callable[[], tuple[int, int]]] = {}
+        self._active: _ActiveCall | None = None
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._sampler: threading.Thread | None = None
+
+    # --- Обработчики ---
+
+    def wrap(self, name: str, handler: Callable[..., Any]) -> Callable[..., Any]:
+        """Обёртка обработчика ``name``: замер времени и проверка бюджета."""
+
+        @functools.wraps(handler)
+        def dispatch(*args: Any, **kwargs: Any) -> Any:
+            call = self._begin(name)
+            try:
+                return handler(*args, **kwargs)
+            finally:
+                self._end(call)
+
+        return dispatch
+
+    def _begin(self, name: str) -> _ActiveCall:
+        call = _ActiveCall(name, time.perf_counter(), threading.get_ident(), self._active)
+        self._active = call
+        if self.sample_stacks:
+            self._ensure_sampler()
+            self._wake.set()
+        return call
+
+    def _end(self, call: _ActiveCall) -> None:
+        duration_ms = (time.perf_counter() - call.start) * 1000
+        self._active = call.previous
+        self.record_handler(call.handler, duration_ms, stack=call.stack)
+
+    def record_handler(self, name: str, duration_ms: float, *, stack: str = "") -> None:
+        self.latencies.append(duration_ms)
+        per_handler = self.handler_latencies.get(name)
+        if per_handler is None:
+            per_handler = self.handler_latencies[name] = deque(maxlen=self._window)
+        per_handler.append(duration_ms)
+        if duration_ms > self.budget_ms:
+            self.slow_calls.append(SlowCall(name, duration_ms, stack))
+            logger.warning(
+                "Медленный обработчик %s: %.1f мс (бюджет %.0f мс)%s",
+                name,
+                duration_ms,
+                self.budget_ms,
+                f"\n{stack}" if stack else "",
+            )
+
+    # --- Образцы стека ---
+
+    def _ensure_sampler(self) -> None:
+        if self._sampler is not None:
+            return
+        self._sampler = threading.Thread(target=self._sample_loop, name="perf-watchdog", daemon=True)
+        self._sampler.start()
+
+    def _sample_loop(self) -> None:
+        while not self._stopped.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            call = self._active
+            if call is None:
+                continue
+            delay = call.start + self.budget_ms / 1000 - time.perf_counter()
+            if delay > 0 and self._stopped.wait(delay):
+                return
+            if self._active is not call:
+                continue
+            # Обработчик всё ещё выполняется: снимаем стек его потока
+            frame = sys._current_frames().get(call.thread_id)
+            if frame is not None:
+                call.stack = "".join(traceback.format_stack(frame, limit=STACK_LIMIT))
+
+    def shutdown(self) -> None:
+        self._stopped.set()
+        self._wake.set()
+
+    # --- Кадры и кэши ---
+
+    def record_frame(self, duration_ms: float, lag_ms: float = 0.0) -> None:
+        self.frame_times.append(duration_ms)
+        self.loop_lags.append(lag_ms)
+
+    def register_cache(self, name: str, stats: Callable[[], tuple[int, int]]) -> None:
+        """``stats`` возвращает ``(попадания, промахи)`` кэша ``name``."""
+
+        self._caches[name] = stats
+
+    def cache_hit_rates(self) -> Dict[str, float | None]:
+        rates: Dict[str, float | None] = {}
+        for name, stats in self._caches.items():
+            hits, misses = stats()
+            total = hits + misses
+            rates[name] = hits / total if total else None
+        return rates
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Сводка для HUD: перцентили в миллисекундах и доли попаданий кэшей."""
+
+        latencies = list(self.latencies)
+        frames = list(self.frame_times)
+        return {
+            "frame_ms": frames[-1] if frames else 0.0,
+            "frame_max_ms": max(frames, default=0.0),
+            "loop_lag_ms": self.loop_lags[-1] if self.loop_lags else 0.0,
+            "handler_p50_ms": percentile(latencies, 0.5),
+            "handler_p95_ms": percentile(latencies, 0.95),
+            "handler_p99_ms": percentile(latencies, 0.99),
+            "slow_calls": len(self.slow_calls),
+            "last_slow": self.slow_calls[-1] if self.slow_calls else None,
+            "cache_hit_rates": self.cache_hit_rates(),
+        }
+
+    def handler_table(self) -> List[tuple[str, int, float, float]]:
+        """``(обработчик, вызовы в окне, p50, p95)``, сначала самые медленные по p95."""
+
+        rows = [
+            (name, len(values), percentile(list(values), 0.5), percentile(list(values), 0.95))
+            for name, values in self.handler_latencies.items()
+        ]
+        return sorted(rows, key=lambda row: row[3], reverse=True)
@@ -0,0 +1,517 @@
+"""
+Бэкенды отрисовки для ``CanvasView``.
+
+``CanvasView`` рисует через небольшой набор примитивов — создать, изменить
+и удалить элемент, измерить текст, узнать габариты — в терминах API
+``tk.Canvas``. Реализации:
+
+* ``TkBackend`` — обёртка над ``tk.Canvas`` (или совместимым объектом);
+* ``NullBackend`` — только выдаёт id и считает вызовы (бенчмарки);
+* ``RecordingBackend`` — хранит элементы в памяти (тесты, экспорт);
+* ``PillowBackend`` — записанные элементы растеризуются в изображение Pillow.
+
+Текст во всех бэкендах раскладывается движком ``text_layout`` — переносы
+строк совпадают на экране и без него. Модуль не импортирует tkinter
+и Pillow на уровне модуля.
+"""
+
+from __future__ import annotations
+
+import math
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Protocol, Sequence, runtime_checkable
+
+from .text_layout import (
+    DEFAULT_FONT,
+    TextBlock,
+    TextLayoutEngine,
+    headless_engine,
+    pillow_font,
+    tk_metrics_factory,
+)
+
+ItemRef = int | str
+Bounds = tuple[float, float, float, float]
+
+
+@runtime_checkable
+class RenderBackend(Protocol):
+    """Примитивы, через которые рисует ``CanvasView``; имена — как у ``tk.Canvas``."""
+
+    def create_rectangle(self, x1: float, y1: float, x2: float, y2: float, **options: Any) -> int: ...
+
+    def create_line(self, *coords: float, **options: Any) -> int: ...
+
+    def create_text(self, x: float, y: float, **options: Any) -> int: ...
+
+    def coords(self, item: ItemRef, *coords: float) -> Sequence[float]: ...
+
+    def itemconfig(self, item: ItemRef, **options: Any) -> None: ...
+
+    def delete(self, item: ItemRef) -> None: ...
+
+    def tag_raise(self, item: ItemRef, above: ItemRef | None = None) -> None: ...
+
+    def tag_lower(self, item: ItemRef, below: ItemRef | None = None) -> None: ...
+
+    def bbox(self, item: ItemRef) -> Bounds | None: ...
+
+    def measure_text(
+        self, text: str, *, font: Any = DEFAULT_FONT, width: float | None = None
+    ) -> tuple[float, float]: ...
+
+    def layout_text(
+        self, text: str, *, font: Any = DEFAULT_FONT, width: float | None = None
+    ) -> TextBlock: ...
+
+    def size(self) -> tuple[int, int]: ...
+
+    def view_fractions(self) -> tuple[tuple[float, float], tuple[float, float]]: ...
+
+    def configure(self, **options: Any) -> None: ...
+
+
+def as_backend(target: Any) -> RenderBackend:
+    """Бэкенд как есть, а ``tk.Canvas`` или похожий объект — в обёртке ``TkBackend``."""
+
+    if isinstance(target, RenderBackend):
+        return target
+    return TkBackend(target)
+
+
+def anchored_box(x: float, y: float, w: float, h: float, anchor: str) -> Bounds:
+    """Прямоугольник блока ``w x h``, привязанного к точке ``(x, y)`` якорем Tk."""
+
+    anchor = anchor or "center"
+    if anchor == "center":
+        anchor = ""
+    left = x - w / 2
+    top = y - h / 2
+    if "w" in anchor:
+        left = x
+    elif "e" in anchor:
+        left = x - w
+    if "n" in anchor:
+        top = y
+    elif "s" in anchor:
+        top = y - h
+    return left, top, left + w, top + h
+
+
+# --- Tk ---
+
+
+class TkBackend:
+    """Обёртка над ``tk.Canvas``: вызовы передаются холсту как есть."""
+
+    def __init__(self, canvas: Any, text_engine: TextLayoutEngine | None = None) -> None:
+        self.canvas = canvas
+        if text_engine is None:
+            # Метрики шрифтов Tk, если это настоящий холст, а не заглушка
+            text_engine = (
+                TextLayoutEngine(tk_metrics_factory(canvas)) if hasattr(canvas, "tk") else headless_engine()
+            )
+        self.text_engine = text_engine
+
+    def create_rectangle(self, x1: float, y1: float, x2: float, y2: float, **options: Any) -> int:
+        return self.canvas.create_rectangle(x1, y1, x2, y2, **options)
+
+    def create_line(self, *coords: float, **options: Any) -> int:
+        return self.canvas.create_line(*coords, **options)
+
+    def create_text(self, x: float, y: float, **options: Any) -> int:
+        return self.canvas.create_text(x, y, **options)
+
+    def coords(self, item: ItemRef, *coords: float) -> Sequence[float]:
+        return self.canvas.coords(item, *coords)
+
+    def itemconfig(self, item: ItemRef, **options: Any) -> None:
+        self.canvas.itemconfig(item, **options)
+
+    def delete(self, item: ItemRef) -> None:
+        self.canvas.delete(item)
+
+    def tag_raise(self, item: ItemRef, above: ItemRef | None = None) -> None:
+        if above is None:
+            self.canvas.tag_raise(item)
+        else:
+            self.canvas.tag_raise(item, above)
+
+    def tag_lower(self, item: ItemRef, below: ItemRef | None = None) -> None:
+        if below is None:
+            self.canvas.tag_lower(item)
+        else:
+            self.canvas.tag_lower(item, below)
+
+    def bbox(self, item: ItemRef) -> Bounds | None:
+        return self.canvas.bbox(item)
+
+    def measure_text(
+        self, text: str, *, font: Any = DEFAULT_FONT, width: float | None = None
+    ) -> tuple[float, float]:
+        return self.text_engine.measure(text or " ", font=font, width=width)
+
+    def layout_text(
+        self, text: str, *, font: Any = DEFAULT_FONT, width: float | None = None
+    ) -> TextBlock:
+        return self.text_engine.layout(text, font=font, width=width)
+
+    def size(self) -> tuple[int, int]:
+        canvas = self.canvas
+        width = canvas.winfo_width()
+        height = canvas.winfo_height()
+        if width <= 1 or height <= 1:
+            # Холст ещё не отображён: берём заданный размер
+            return int(float(canvas.cget("width"))), int(float(canvas.cget("height")))
+        inset = 2 * int(float(canvas.cget("highlightthickness")) + float(canvas.cget("borderwidth")))
+        return width - inset, height - inset
+
+    def view_fractions(self) -> tuple[tuple[float, float], tuple[float, float]]:
+        return tuple(self.canvas.xview()), tuple(self.canvas.yview())
+
+    def configure(self, **options: Any) -> None:
+        self.canvas.config(**options)
+
+
+# --- Без экрана ---
+
+
+@dataclass
+class RecordedItem:
+    kind: str
+    coords: List[float]
+    options: Dict[str, Any]
+    tags: tuple[str, ...] = field(default_factory=tuple)
+
+
+class NullBackend:
+    """
+    Бэкенд без состояния: выдаёт id элементов и считает вызовы в ``calls``.
+    Подходит для бенчмарков, где важна стоимость вычислений, а не рисования.
+    """
+
+    def __init__(
+        self, width: int = 1280, height: int = 800, *, text_engine: TextLayoutEngine | None = None
+    ) -> None:
+        self.width = width
+        self.height = height
+        self.text_engine = text_engine or headless_engine()
+        self.calls: Counter[str] = Counter()
+        self.surface: Dict[str, Any] = {}
+        self._next_id = 1
+
+    def _new_id(self) -> int:
+        item_id = self._next_id
+        self._next_id += 1
+        return item_id
+
+    def _add(self, kind: str, coords: Sequence[float], options: Dict[str, Any]) -> int:
+        return self._new_id()
+
+    def create_rectangle(self, x1: float, y1: float, x2: float, y2: float, **options: Any) -> int:
+        self.calls["create_rectangle"] += 1
+        return self._add("rectangle", (x1, y1, x2, y2), options)
+
+    def create_line(self, *coords: float, **options: Any) -> int:
+        self.calls["create_line"] += 1
+        return self._add("line", coords, options)
+
+    def create_text(self, x: float, y: float, **options: Any) -> int:
+        self.calls["create_text"] += 1
+        return self._add("text", (x, y), options)
+
+    def coords(self, item: ItemRef, *coords: float) -> Sequence[float]:
+        self.calls["coords"] += 1
+        return ()
+
+    def itemconfig(self, item: ItemRef, **options: Any) -> None:
+        self.calls["itemconfig"] += 1
+
+    def delete(self, item: ItemRef) -> None:
+        self.calls["delete"] += 1
+
+    def tag_raise(self, item: ItemRef, above: ItemRef | None = None) -> None:
+        self.calls["tag_raise"] += 1
+
+    def tag_lower(self, item: ItemRef, below: ItemRef | None = None) -> None:
+        self.calls["tag_lower"] += 1
+
+    def bbox(self, item: ItemRef) -> Bounds | None:
+        self.calls["bbox"] += 1
+        return None
+
+    def measure_text(
+        self, text: str, *, font: Any = DEFAULT_FONT, width: float | None = None
+    ) -> tuple[float, float]:
+        self.calls["measure_text"] += 1
+        return self.text_engine.measure(text or " ", font=font, width=width)
+
+    def layout_text(
+        self, text: str, *, font: Any = DEFAULT_FONT, width: float | None = None
+    ) -> TextBlock:
+        self.calls["layout_text"] += 1
+        return self.text_engine.layout(text, font=font, width=width)
+
+    def size(self) -> tuple[int, int]:
+        return self.width, self.height
+
+    def view_fractions(self) -> tuple[tuple[float, float], tuple[float, float]]:
+        return (0.0, 1.0), (0.0, 1.0)
+
+    def configure(self, **options: Any) -> None:
+        self.surface.update(options)
+
+
+class RecordingBackend(NullBackend):
+    """
+    Хранит элементы в памяти с порядком наложения и тегами, как ``tk.Canvas``:
+    ``coords``, ``bbox``, ``find_withtag`` и ``itemcget`` работают по записанным данным.
+    """
+
+    def __init__(
+        self, width: int = 1280, height: int = 800, *, text_engine: TextLayoutEngine | None = None
+    ) -> None:
+        super().__init__(width, height, text_engine=text_engine)
+        self.items: Dict[int, RecordedItem] = {}
+        self.order: List[int] = []
+
+    # --- Выбор элементов ---
+
+    def find_withtag(self, item: ItemRef) -> tuple[int, ...]:
+        if isinstance(item, int):
+            return (item,) if item in self.items else ()
+        if item == "all":
+            return tuple(self.order)
+        return tuple(i for i in self.order if item in self.items[i].tags)
+
+    def itemcget(self, item: ItemRef, option: str) -> Any:
+        found = self.find_withtag(item)
+        if not found:
+            return ""
+        record = self.items[found[0]]
+        if option == "tags":
+            return " ".join(record.tags)
+        return record.options.get(option, "")
+
+    # --- Примитивы ---
+
+    def _add(self, kind: str, coords: Sequence[float], options: Dict[str, Any]) -> int:
+        item_id = self._new_id()
+        options = dict(options)
+        tags = options.pop("tags", ())
+        if isinstance(tags, str):
+            tags = (tags,)
+        self.items[item_id] = RecordedItem(kind, [float(c) for c in coords], options, tuple(tags))
+        self.order.append(item_id)
+        return item_id
+
+    def coords(self, item: ItemRef, *coords: float) -> Sequence[float]:
+        self.calls["coords"] += 1
+        found = self.find_withtag(item)
+        if not found:
+            return ()
+        record = self.items[found[0]]
+        if coords:
+            if len(coords) == 1 and isinstance(coords[0], (list, tuple)):
+                coords = tuple(coords[0])
+            record.coords = [float(c) for c in coords]
+        return tuple(record.coords)
+
+    def itemconfig(self, item: ItemRef, **options: Any) -> None:
+        self.calls["itemconfig"] += 1
+        tags = options.pop("tags", None)
+        for item_id in self.find_withtag(item):
+            record = self.items[item_id]
+            record.options.update(options)
+            if tags is not None:
+                record.tags = (tags,) if isinstance(tags, str) else tuple(tags)
+
+    itemconfigure = itemconfig
+
+    def delete(self, item: ItemRef) -> None:
+        self.calls["delete"] += 1
+        doomed = set(self.find_withtag(item))
+        if not doomed:
+            return
+        for item_id in doomed:
+            del self.items[item_id]
+        self.order = [i for i in self.order if i not in doomed]
+
+    def tag_raise(self, item: ItemRef, above: ItemRef | None = None) -> None:
+        self.calls["tag_raise"] += 1
+        self._restack(item, above, raise_=True)
+
+    def tag_lower(self, item: ItemRef, below: ItemRef | None = None) -> None:
+        self.calls["tag_lower"] += 1
+        self._restack(item, below, raise_=False)
+
+    def _restack(self, item: ItemRef, reference: ItemRef | None, *, raise_: bool) -> None:
+        moving = set(self.find_withtag(item))
+        if not moving:
+            return
+        picked = [i for i in self.order if i in moving]
+        rest = [i for i in self.order if i not in moving]
+        if reference is None:
+            self.order = rest + picked if raise_ else picked + rest
+            return
+        anchors = [n for n, i in enumerate(rest) if i in set(self.find_withtag(reference))]
+        if not anchors:
+            return
+        # Как в Tk: выше самого верхнего или ниже самого нижнего из опорных
+        index = anchors[-1] + 1 if raise_ else anchors[0]
+        self.order = rest[:index] + picked + rest[index:]
+
+    # --- Габариты ---
+
+    def bbox(self, item: ItemRef) -> Bounds | None:
+        self.calls["bbox"] += 1
+        boxes = [
+            self.item_bounds(item_id)
+            for item_id in self.find_withtag(item)
+            if self.items[item_id].options.get("state") != "hidden"
+        ]
+        if not boxes:
+            return None
+        # Tk округляет габариты до целых пикселей наружу
+        return (
+            math.floor(min(b[0] for b in boxes)),
+            math.floor(min(b[1] for b in boxes)),
+            math.ceil(max(b[2] for b in boxes)),
+            math.ceil(max(b[3] for b in boxes)),
+        )
+
+    def item_bounds(self, item_id: int) -> Bounds:
+        record = self.items[item_id]
+        if record.kind == "text":
+            x, y = record.coords[:2]
+            options = record.options
+            w, h = self.measure_text(
+                str(options.get("text", "")),
+                font=options.get("font", DEFAULT_FONT),
+                width=options.get("width") or None,
+            )
+            return anchored_box(x, y, w, h, options.get("anchor", "center"))
+        xs = record.coords[0::2]
+        ys = record.coords[1::2]
+        half = float(record.options.get("width", 1.0)) / 2
+        return min(xs) - half, min(ys) - half, max(xs) + half, max(ys) + half
+
+
+class PillowBackend(RecordingBackend):
+    """
+    Записывает элементы как ``RecordingBackend`` и растеризует их в
+    изображение Pillow (``render``). Переносы строк берутся из того же
+    движка раскладки, что и при записи, в любом масштабе.
+    """
+
+    def __init__(
+        self,
+        width: int = 1280,
+        height: int = 800,
+        *,
+        scale: float = 1.0,
+        text_engine: TextLayoutEngine | None = None,
+    ) -> None:
+        super().__init__(width, height, text_engine=text_engine)
+        self.scale = scale
+
+    def render(
+        self,
+        region: Bounds | None = None,
+        *,
+        scale: float | None = None,
+        background: str | None = None,
+    ):
+        """Рисует видимые элементы области ``region`` (по умолчанию — всех) в ``PIL.Image``."""
+
+        from PIL import Image, ImageDraw
+
+        scale = self.scale if scale is None else scale
+        if region is None:
+            region = self.bbox("all") or (0, 0, 1, 1)
+        ox, oy, x2, y2 = region
+        size = (max(1, int((x2 - ox) * scale)), max(1, int((y2 - oy) * scale)))
+        img = Image.new("RGB", size, background or self.surface.get("bg") or "#ffffff")
+        draw = ImageDraw.Draw(img)
+
+        def map_xy(x: float, y: float) -> tuple[float, float]:
+            return (x - ox) * scale, (y - oy) * scale
+
+        for item_id in self.order:
+            record = self.items[item_id]
+            options = record.options
+            if options.get("state") == "hidden":
+                continue
+            if record.kind == "rectangle":
+                x1, y1, rx2, ry2 = record.coords
+                outline = options.get("outline", "#000000") or None
+                draw.rectangle(
+                    [map_xy(x1, y1), map_xy(rx2, ry2)],
+                    fill=options.get("fill") or None,
+                    outline=outline,
+                    width=max(1, round(float(options.get("width", 1)) * scale)) if outline else 0,
+                )
+            elif record.kind == "line":
+                self._draw_line(draw, record, map_xy, scale)
+            elif record.kind == "text":
+                self._draw_text(draw, record, map_xy, scale)
+        return img
+
+    def _draw_line(self, draw, record: RecordedItem, map_xy, scale: float) -> None:
+        options = record.options
+        fill = options.get("fill", "#000000")
+        points = [map_xy(x, y) for x, y in zip(record.coords[0::2], record.coords[1::2])]
+        if len(points) < 2 or not fill:
+            return
+        width = float(options.get("width", 1))
+        draw.line(points, fill=fill, width=max(1, round(width * scale)), joint="curve")
+        arrow = options.get("arrow", "none")
+        if arrow in ("first", "both"):
+            draw.polygon(_arrow_head(points[1], points[0], width, scale), fill=fill)
+        if arrow in ("last", "both"):
+            draw.polygon(_arrow_head(points[-2], points[-1], width, scale), fill=fill)
+
+    def _draw_text(self, draw, record: RecordedItem, map_xy, scale: float) -> None:
+        options = record.options
+        text = str(options.get("text", ""))
+        if not text:
+            return
+        font = options.get("font", DEFAULT_FONT)
+        block = self.text_engine.layout(text, font=font, width=options.get("width") or None)
+        pil_font = pillow_font(font, scale)
+        line_height = block.line_height * scale
+        x, y = map_xy(*record.coords[:2])
+        left, top, right, _bottom = anchored_box(
+            x, y, block.width * scale, block.height * scale, options.get("anchor", "center")
+        )
+        fill = options.get("fill", "#000000")
+        centered = options.get("justify", "left") == "center"
+        for index, line in enumerate(block.lines):
+            line_y = top + index * line_height
+            if centered:
+                draw.text(((left + right) / 2, line_y), line, font=pil_font, fill=fill, anchor="ma")
+            else:
+                draw.text((left, line_y), line, font=pil_font, fill=fill, anchor="la")
+
+
+def _arrow_head(
+    base: tuple[float, float], tip: tuple[float, float], line_width: float, scale: float
+) -> List[tuple[float, float]]:
+    """Наконечник с формой стрелки Tk по умолчанию (8, 10, 3)."""
+
+    dx = tip[0] - base[0]
+    dy = tip[1] - base[1]
+    length = math.hypot(dx, dy) or 1.0
+    ux, uy = dx / length, dy / length
+    nx, ny = -uy, ux
+    neck = 8 * scale
+    back = 10 * scale
+    wing = (3 + line_width / 2) * scale
+    return [
+        tip,
+        (tip[0] - ux * back + nx * wing, tip[1] - uy * back + ny * wing),
+        (tip[0] - ux * neck, tip[1] - uy * neck),
+        (tip[0] - ux * back - nx * wing, tip[1] - uy * back - ny * wing),
+    ]
+
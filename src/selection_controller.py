@@ -1,56 +1,123 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterable
 
 if TYPE_CHECKING:
     from .main import BoardApp
 
 
 class SelectionController:
+    """
+    Выделение карточек и рамок. Новое выделение сравнивается с прежним,
+    и обводки и маркеры перерисовываются только у вошедших в него и
+    вышедших из него объектов, а не у всей доски.
+    """
+
     def __init__(self, app: "BoardApp") -> None:
         self.app = app
+        # Карточки, подсвеченные предпросмотром выделения рамкой
+        self.lasso_preview: set[int] = set()
+
+    def set_card_selection(self, card_ids: Iterable[int], primary: int | None = None) -> None:
+        """Заменяет выделение карточек набором целиком."""
 
-    def clear_card_selection(self) -> None:
         app = self.app
-        app.clear_attachment_selection()
-        for cid in list(app.selected_cards):
+        hidden = app.collapse_controller.hidden_cards
+        selected = {cid for cid in card_ids if cid in app.cards and cid not in hidden}
+        previous = app.selected_cards
+        removed = previous - selected
+        added = selected - previous
+        for cid in removed:
             if cid in app.cards:
                 app.hide_card_handles(cid)
-        app.selected_cards.clear()
-        app.selected_card_id = None
-        app.render_selection()
+                app.canvas_view.set_card_selected(cid, False)
+        for cid in added:
+            app.show_card_handles(cid)
+            app.canvas_view.set_card_selected(cid, True)
+        previous.clear()
+        previous.update(selected)
+
+        if primary in selected:
+            app.selected_card_id = primary
+        elif app.selected_card_id not in selected:
+            app.selected_card_id = None
+        if app.selected_attachment and app.selected_attachment[0] not in selected:
+            app.clear_attachment_selection()
         app.update_controls_state()
 
+    def clear_card_selection(self) -> None:
+        self.app.clear_attachment_selection()
+        self.set_card_selection(())
+
     def select_card(self, card_id: int | None, additive: bool = False) -> None:
         app = self.app
         if app.selected_frame_id is not None:
-            app.selected_frame_id = None
-            app.hide_all_frame_handles()
+            self._set_selected_frame(None)
 
         if not additive:
-            self.clear_card_selection()
             app.clear_connection_selection()
+            app.clear_attachment_selection()
 
         if card_id is not None and card_id in app.cards:
             if app.selected_attachment and app.selected_attachment[0] != card_id:
                 app.clear_attachment_selection()
-            app.selected_cards.add(card_id)
-            app.selected_card_id = card_id
-            app.show_card_handles(card_id)
+            base = app.selected_cards if additive else ()
+            self.set_card_selection([*base, card_id], primary=card_id)
         elif not additive:
-            app.selected_card_id = None
-
-        app.render_selection()
-        app.update_controls_state()
+            self.clear_card_selection()
+        else:
+            app.update_controls_state()
 
     def select_frame(self, frame_id: int | None) -> None:
         app = self.app
         self.clear_card_selection()
-        app.hide_all_frame_handles()
         app.clear_connection_selection()
         app.clear_attachment_selection()
+        self._set_selected_frame(frame_id if frame_id in app.frames else None)
+        app.update_controls_state()
+
+    def _set_selected_frame(self, frame_id: int | None) -> None:
+        app = self.app
+        previous = app.selected_frame_id
+        if previous is not None and previous in app.frames:
+            app.hide_frame_handles(previous)
+            app.canvas_view.set_frame_selected(previous, False)
         app.selected_frame_id = frame_id
-        if frame_id is not None and frame_id in app.frames:
+        if frame_id is not None:
             app.show_frame_handles(frame_id)
-        app.render_selection()
-        app.update_controls_state()
+            app.canvas_view.set_frame_selected(frame_id, True)
+
+    # ---------- Предпросмотр выделения рамкой ----------
+
+    def preview_lasso(self, x1: float, y1: float, x2: float, y2: float) -> None:
+        """Подсвечивает карточки, которые выделит рамка с такими углами."""
+
+        app = self.app
+        left, right = min(x1, x2), max(x1, x2)
+        top, bottom = min(y1, y2), max(y1, y2)
+        hits = set(app.card_index.ids_with_center_in(left, top, right, bottom))
+        hits -= app.collapse_controller.hidden_cards
+        app.canvas_view.set_cards_previewed(self.lasso_preview - hits, False)
+        app.canvas_view.set_cards_previewed(hits - self.lasso_preview, True)
+        self.lasso_preview = hits
+
+    def clear_lasso_preview(self) -> None:
+        app = self.app
+        if self.lasso_preview:
+            app.canvas_view.set_cards_previewed(
+                [cid for cid in self.lasso_preview if cid in app.cards], False
+            )
+            self.lasso_preview = set()
+
+    def finish_lasso(self, x1: float, y1: float, x2: float, y2: float) -> None:
+        """Снимает предпросмотр и выделяет карточки рамки одним набором."""
+
+        app = self.app
+        self.clear_lasso_preview()
+        left, right = min(x1, x2), max(x1, x2)
+        top, bottom = min(y1, y2), max(y1, y2)
+        if app.selected_frame_id is not None:
+            self._set_selected_frame(None)
+        app.clear_connection_selection()
+        app.clear_attachment_selection()
+        self.set_card_selection(app.card_index.ids_with_center_in(left, top, right, bottom))
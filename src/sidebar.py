@@ -156,6 +156,11 @@ class SidebarFactory:
         btn_export.pack(fill="x", padx=10, pady=5)
         add_tooltip(btn_export, "Сохранить доску как изображение PNG")
 
+        btn_export_svg = tk.Button(file_content, text="Экспорт в SVG",
+                                   command=app.export_svg)
+        btn_export_svg.pack(fill="x", padx=10, pady=5)
+        add_tooltip(btn_export_svg, "Сохранить доску как векторное изображение SVG")
+
         btn_attach_image = tk.Button(file_content, text="Прикрепить изображение",
                                      command=app.attach_image_from_file)
         btn_attach_image.pack(fill="x", padx=10, pady=5)
@@ -0,0 +1,360 @@
+"""
+Пространственный индекс на равномерной сетке (без Tk).
+
+Плоскость делится на квадратные ячейки; объект записывается во все ячейки,
+которые задевает его прямоугольник. Запрос по области смотрит только её
+ячейки, поэтому выбор рамкой и попадание в точку не перебирают всю доску.
+
+``CardIndex`` держит такой индекс для карточек доски и следит за ней по
+событиям ``BoardEvents``: изменённые карточки переиндексируются лениво,
+перед ближайшим запросом.
+
+``SegmentIndex`` раскладывает по той же сетке отрезки ломаных (линии
+связей) и находит ближайшую ломаную к точке в пределах допуска.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Callable, Dict, Hashable, Iterator, List, Mapping, Sequence, Set, Tuple
+
+from .board_model import (
+    BOARD_REPLACED,
+    CARD_ADDED,
+    CARD_MOVED,
+    CARD_REMOVED,
+    CARD_RESIZED,
+    BoardChange,
+    BoardEvents,
+    Card,
+)
+from .card_store import CardStore, card_ids_with_center_in
+
+Box = Tuple[float, float, float, float]
+
+# Порядок типичной карточки: ячейка вмещает несколько карточек целиком
+DEFAULT_CELL_SIZE = 256.0
+# Доля занятых ячеек, начиная с которой запрос идёт полным проходом по колонкам
+WIDE_QUERY_COVERAGE = 0.25
+
+_CARD_GEOMETRY = (CARD_ADDED, CARD_REMOVED, CARD_MOVED, CARD_RESIZED)
+
+
+class GridIndex:
+    """Прямоугольники по ключам и поиск ключей, чьи прямоугольники задевают область."""
+
+    def __init__(self, cell_size: float = DEFAULT_CELL_SIZE) -> None:
+        self.cell_size = cell_size
+        self._cells: Dict[Tuple[int, int], Set[Hashable]] = {}
+        self._boxes: Dict[Hashable, Box] = {}
+
+    def __len__(self) -> int:
+        return len(self._boxes)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._boxes
+
+    def box(self, key: Hashable) -> Box | None:
+        return self._boxes.get(key)
+
+    def _span(self, box: Box) -> Tuple[int, int, int, int]:
+        size = self.cell_size
+        return (
+            math.floor(box[0] / size),
+            math.floor(box[1] / size),
+            math.floor(box[2] / size),
+            math.floor(box[3] / size),
+        )
+
+    def _cells_of(self, box: Box) -> Iterator[Tuple[int, int]]:
+        i1, j1, i2, j2 = self._span(box)
+        for i in range(i1, i2 + 1):
+            for j in range(j1, j2 + 1):
+                yield i, j
+
+    def insert(self, key: Hashable, box: Box) -> None:
+        """Добавляет ключ или переносит его на новый прямоугольник."""
+
+        old = self._boxes.get(key)
+        span = self._span(box)
+        if old is not None:
+            if self._span(old) == span:
+                self._boxes[key] = box
+                return
+            self.remove(key)
+        self._boxes[key] = box
+        cells = self._cells
+        i1, j1, i2, j2 = span
+        if i1 == i2 and j1 == j2:
+            bucket = cells.get((i1, j1))
+            if bucket is None:
+                cells[(i1, j1)] = {key}
+            else:
+                bucket.add(key)
+            return
+        for i in range(i1, i2 + 1):
+            for j in range(j1, j2 + 1):
+                bucket = cells.get((i, j))
+                if bucket is None:
+                    cells[(i, j)] = {key}
+                else:
+                    bucket.add(key)
+
+    def remove(self, key: Hashable) -> None:
+        box = self._boxes.pop(key, None)
+        if box is None:
+            return
+        cells = self._cells
+        for cell in self._cells_of(box):
+            bucket = cells.get(cell)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del cells[cell]
+
+    def clear(self) -> None:
+        self._cells.clear()
+        self._boxes.clear()
+
+    def coverage(self, x1: float, y1: float, x2: float, y2: float) -> float:
+        """Во сколько раз ячеек области больше, чем занятых ячеек индекса."""
+
+        i1, j1, i2, j2 = self._span((x1, y1, x2, y2))
+        return (i2 - i1 + 1) * (j2 - j1 + 1) / max(len(self._cells), 1)
+
+    def query(self, x1: float, y1: float, x2: float, y2: float) -> List[Hashable]:
+        """Ключи, прямоугольники которых пересекают область (границы включены)."""
+
+        i1, j1, i2, j2 = self._span((x1, y1, x2, y2))
+        boxes = self._boxes
+        if (i2 - i1 + 1) * (j2 - j1 + 1) > len(self._cells):
+            # Область шире занятых ячеек: дешевле проверить все прямоугольники
+            candidates: Set[Hashable] | Dict[Hashable, Box] = boxes
+        else:
+            candidates = set()
+            cells = self._cells
+            for i in range(i1, i2 + 1):
+                for j in range(j1, j2 + 1):
+                    bucket = cells.get((i, j))
+                    if bucket:
+                        candidates |= bucket
+        hits = []
+        for key in candidates:
+            bx1, by1, bx2, by2 = boxes[key]
+            if bx1 <= x2 and bx2 >= x1 and by1 <= y2 and by2 >= y1:
+                hits.append(key)
+        return hits
+
+
+def point_segment_distance(
+    px: float, py: float, ax: float, ay: float, bx: float, by: float
+) -> float:
+    """Расстояние от точки до отрезка."""
+
+    dx = bx - ax
+    dy = by - ay
+    length_sq = dx * dx + dy * dy
+    if length_sq == 0:
+        return math.hypot(px - ax, py - ay)
+    t = ((px - ax) * dx + (py - ay) * dy) / length_sq
+    t = max(0.0, min(1.0, t))
+    return math.hypot(px - (ax + t * dx), py - (ay + t * dy))
+
+
+class SegmentIndex:
+    """
+    Отрезки ломаных по ключам. Отрезок записывается только в ячейки, через
+    которые проходит (а не во все ячейки своего прямоугольника), поэтому
+    длинная диагональ не засоряет сетку. Запрос смотрит ячейки квадрата
+    допуска вокруг точки и меряет расстояние только до их отрезков.
+    """
+
+    def __init__(self, cell_size: float = 64.0) -> None:
+        self.cell_size = cell_size
+        # Ячейка -> ключ -> номера отрезков ломаной ключа в этой ячейке
+        self._cells: Dict[Tuple[int, int], Dict[Hashable, List[int]]] = {}
+        self._polylines: Dict[Hashable, Sequence[float]] = {}
+        self._key_cells: Dict[Hashable, List[Tuple[int, int]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._polylines)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._polylines
+
+    def polyline(self, key: Hashable) -> Sequence[float] | None:
+        return self._polylines.get(key)
+
+    def _segment_cells(self, ax: float, ay: float, bx: float, by: float) -> Iterator[Tuple[int, int]]:
+        size = self.cell_size
+        if ax > bx:
+            ax, ay, bx, by = bx, by, ax, ay
+        i1 = math.floor(ax / size)
+        i2 = math.floor(bx / size)
+        slope = (by - ay) / (bx - ax) if bx != ax else 0.0
+        for i in range(i1, i2 + 1):
+            if i1 == i2:
+                y_lo, y_hi = ay, by
+            else:
+                # Часть отрезка внутри столбца ячеек
+                x_lo = max(ax, i * size)
+                x_hi = min(bx, (i + 1) * size)
+                y_lo = ay + (x_lo - ax) * slope
+                y_hi = ay + (x_hi - ax) * slope
+            if y_lo > y_hi:
+                y_lo, y_hi = y_hi, y_lo
+            for j in range(math.floor(y_lo / size), math.floor(y_hi / size) + 1):
+                yield i, j
+
+    def insert(self, key: Hashable, coords: Sequence[float]) -> None:
+        """Добавляет ломаную или заменяет прежнюю; та же ломаная не переиндексируется."""
+
+        old = self._polylines.get(key)
+        if old is not None:
+            if old is coords or old == coords:
+                return
+            self.remove(key)
+        self._polylines[key] = coords
+        cells = self._cells
+        touched: Dict[Tuple[int, int], List[int]] = {}
+        for n in range(len(coords) // 2 - 1):
+            ax, ay, bx, by = coords[2 * n:2 * n + 4]
+            for cell in self._segment_cells(ax, ay, bx, by):
+                segments = touched.get(cell)
+                if segments is None:
+                    touched[cell] = [n]
+                elif segments[-1] != n:
+                    segments.append(n)
+        for cell, segments in touched.items():
+            bucket = cells.get(cell)
+            if bucket is None:
+                cells[cell] = {key: segments}
+            else:
+                bucket[key] = segments
+        self._key_cells[key] = list(touched)
+
+    def remove(self, key: Hashable) -> None:
+        if self._polylines.pop(key, None) is None:
+            return
+        cells = self._cells
+        for cell in self._key_cells.pop(key, ()):
+            bucket = cells.get(cell)
+            if bucket is not None:
+                bucket.pop(key, None)
+                if not bucket:
+                    del cells[cell]
+
+    def clear(self) -> None:
+        self._cells.clear()
+        self._polylines.clear()
+        self._key_cells.clear()
+
+    def nearest(self, x: float, y: float, tolerance: float) -> Tuple[Hashable, float] | None:
+        """Ключ ломаной, ближайшей к точке, и расстояние до неё — если не дальше ``tolerance``."""
+
+        size = self.cell_size
+        cells = self._cells
+        polylines = self._polylines
+        best_key = None
+        best = tolerance
+        seen: Set[Tuple[Hashable, int]] = set()
+        for i in range(math.floor((x - tolerance) / size), math.floor((x + tolerance) / size) + 1):
+            for j in range(math.floor((y - tolerance) / size), math.floor((y + tolerance) / size) + 1):
+                bucket = cells.get((i, j))
+                if not bucket:
+                    continue
+                for key, segments in bucket.items():
+                    coords = polylines[key]
+                    for n in segments:
+                        if (key, n) in seen:
+                            continue
+                        seen.add((key, n))
+                        ax, ay, bx, by = coords[2 * n:2 * n + 4]
+                        distance = point_segment_distance(x, y, ax, ay, bx, by)
+                        if distance <= best:
+                            best_key, best = key, distance
+        if best_key is None:
+            return None
+        return best_key, best
+
+
+def card_box(card: Card) -> Box:
+    return (card.x - card.width / 2, card.y - card.height / 2, card.x + card.width / 2, card.y + card.height / 2)
+
+
+class CardIndex:
+    """
+    Индекс прямоугольников карточек доски. ``cards`` возвращает текущий
+    словарь карточек (приложение заменяет его при загрузке доски).
+    """
+
+    def __init__(
+        self,
+        cards: Callable[[], Mapping[int, Card]],
+        events: BoardEvents | None = None,
+        cell_size: float = DEFAULT_CELL_SIZE,
+    ) -> None:
+        self._cards = cards
+        self.grid = GridIndex(cell_size)
+        self._dirty: Set[int] = set()
+        self._stale = True
+        if events is not None:
+            events.subscribe(self._on_change, (*_CARD_GEOMETRY, BOARD_REPLACED))
+
+    def _on_change(self, change: BoardChange) -> None:
+        if BOARD_REPLACED in change:
+            self._stale = True
+        if self._stale:
+            self._dirty.clear()
+            return
+        for kind in _CARD_GEOMETRY:
+            self._dirty |= change.ids(kind)
+
+    def invalidate(self) -> None:
+        """Перестроить индекс целиком перед следующим запросом."""
+
+        self._stale = True
+        self._dirty.clear()
+
+    def sync(self) -> None:
+        cards = self._cards()
+        grid = self.grid
+        if self._stale:
+            grid.clear()
+            for card_id, card in cards.items():
+                grid.insert(card_id, card_box(card))
+            self._stale = False
+        elif self._dirty:
+            for card_id in self._dirty:
+                card = cards.get(card_id)
+                if card is None:
+                    grid.remove(card_id)
+                else:
+                    grid.insert(card_id, card_box(card))
+        self._dirty.clear()
+
+    def ids_in(self, x1: float, y1: float, x2: float, y2: float) -> List[int]:
+        """Карточки, задевающие прямоугольник."""
+
+        self.sync()
+        return self.grid.query(x1, y1, x2, y2)
+
+    def ids_at(self, x: float, y: float) -> List[int]:
+        """Карточки под точкой."""
+
+        return self.ids_in(x, y, x, y)
+
+    def ids_with_center_in(self, x1: float, y1: float, x2: float, y2: float) -> List[int]:
+        """Карточки, центр которых лежит в прямоугольнике (как ``card_ids_with_center_in``)."""
+
+        cards = self._cards()
+        self.sync()
+        if isinstance(cards, CardStore) and self.grid.coverage(x1, y1, x2, y2) > WIDE_QUERY_COVERAGE:
+            # Рамка на большую часть доски: колонки хранилища проверяются быстрее
+            return card_ids_with_center_in(cards, x1, y1, x2, y2)
+        hits = []
+        for card_id in self.grid.query(x1, y1, x2, y2):
+            card = cards[card_id]
+            if x1 <= card.x <= x2 and y1 <= card.y <= y2:
+                hits.append(card_id)
+        return hits
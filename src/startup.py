@@ -0,0 +1,74 @@
+"""
+Запуск приложения и замер холодного старта.
+
+Окно показывается как можно раньше: ``BoardApp`` в режиме отложенного старта
+строит только то, что видно в первом кадре, а сетку и восстановление из
+автосохранения выполняет после первой отрисовки. ``--profile-startup``
+печатает в stderr разбивку времени запуска по этапам — от импорта модулей
+до готовности доски.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Sequence, TextIO
+
+
+class StartupProfiler:
+    """Этапы запуска: длительность каждого и время от начала до отметки."""
+
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self.phases: List[tuple[str, float, float]] = []
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.phases.append((name, (end - begin) * 1000, (end - self.started) * 1000))
+
+    def mark(self, name: str) -> None:
+        """Отметка без длительности (например, «первая отрисовка»)."""
+
+        self.phases.append((name, 0.0, (time.perf_counter() - self.started) * 1000))
+
+    def format(self) -> str:
+        width = max([len(name) for name, _, _ in self.phases] + [len("этап")])
+        lines = [f"{'этап':<{width}}  {'мс':>8}  {'с начала, мс':>12}"]
+        for name, duration_ms, at_ms in self.phases:
+            duration = f"{duration_ms:8.1f}" if duration_ms else f"{'—':>8}"
+            lines.append(f"{name:<{width}}  {duration}  {at_ms:12.1f}")
+        return "\n".join(lines)
+
+    def report(self, stream: TextIO | None = None) -> None:
+        if self.enabled:
+            print(self.format(), file=stream or sys.stderr)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="app.py", description="Mini Miro Board.")
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="напечатать время запуска по этапам",
+    )
+    return parser
+
+
+def launch(argv: Sequence[str] | None = None) -> None:
+    """Запускает приложение с отложенным стартом."""
+
+    args = build_parser().parse_args(argv)
+    profiler = StartupProfiler(enabled=args.profile_startup)
+    with profiler.phase("импорт модулей"):
+        from .main import BoardApp
+
+    app = BoardApp(profiler=profiler, deferred_startup=True)
+    app.run()
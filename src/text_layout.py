@@ -0,0 +1,356 @@
+"""
+Раскладка текста по метрикам шрифта, без холста.
+
+Перенос по словам и высота строк считаются в чистом Python по кэшированным
+ширинам символов. Ширины берутся из ``tkinter.font.Font``, когда есть окно
+Tk, иначе из шрифта Pillow, а без обоих — из грубой оценки. Одну и ту же
+раскладку используют холст, экспорт и бэкенды без дисплея, поэтому строки
+переносятся везде одинаково.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Tuple
+
+DEFAULT_FONT = ("Arial", 10)
+SCREEN_DPI = 96
+
+# Раскладка текста карточки (см. ``card_layout``)
+CARD_FONT_FAMILY = "Arial"
+CARD_BASE_FONT_SIZE = 10
+CARD_TEXT_PADDING = (8.0, 16.0)
+CARD_TEXT_MARGIN = (2.0, 6.0)
+
+
+@dataclass(frozen=True)
+class FontKey:
+    """Нормализованное описание шрифта Tk: размер > 0 — пункты, < 0 — пиксели."""
+
+    family: str
+    size: int
+    bold: bool = False
+    italic: bool = False
+
+    @property
+    def pixel_size(self) -> int:
+        if self.size < 0:
+            return -self.size
+        return max(1, round(self.size * SCREEN_DPI / 72))
+
+
+def font_key(font: Any) -> FontKey:
+    """``("Arial", 10, "bold")``, ``"Arial 10 bold"`` или ``FontKey`` -> ``FontKey``."""
+
+    if isinstance(font, FontKey):
+        return font
+    if isinstance(font, str):
+        font = font.split()
+    if not font:
+        font = DEFAULT_FONT
+    family = str(font[0])
+    size = int(font[1]) if len(font) > 1 else DEFAULT_FONT[1]
+    styles = {str(style) for style in font[2:]}
+    return FontKey(family, size, "bold" in styles, "italic" in styles)
+
+
+@dataclass(frozen=True)
+class TextBlock:
+    """Разложенный текст: строки после переноса и размеры блока в пикселях."""
+
+    lines: Tuple[str, ...]
+    width: float
+    line_height: float
+    ascent: float
+
+    @property
+    def height(self) -> float:
+        return len(self.lines) * self.line_height
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.lines)
+
+
+class FontMetrics:
+    """Ширины символов одного шрифта; ширины слов кэшируются по мере раскладки."""
+
+    WORD_CACHE_LIMIT = 100_000
+
+    def __init__(
+        self,
+        measure: Callable[[str], float],
+        ascent: float,
+        descent: float,
+        linespace: float | None = None,
+    ) -> None:
+        self._measure = measure
+        self.ascent = ascent
+        self.descent = descent
+        self.line_height = linespace or ascent + descent
+        self._chars: Dict[str, float] = {}
+        self._words: Dict[str, float] = {}
+        self.space = self.char_width(" ")
+
+    def char_width(self, char: str) -> float:
+        width = self._chars.get(char)
+        if width is None:
+            width = self._chars[char] = float(self._measure(char))
+        return width
+
+    def width(self, text: str) -> float:
+        width = self._words.get(text)
+        if width is None:
+            chars = self._chars
+            width = 0.0
+            for char in text:
+                char_w = chars.get(char)
+                if char_w is None:
+                    char_w = self.char_width(char)
+                width += char_w
+            if len(self._words) < self.WORD_CACHE_LIMIT:
+                self._words[text] = width
+        return width
+
+
+class TextLayoutEngine:
+    """
+    Перенос текста по словам в стиле текстового элемента Tk с опцией ``width``:
+    строка рвётся на последнем пробеле, слово длиннее строки — по символам.
+    Результаты кэшируются по ``(текст, шрифт, ширина)``.
+    """
+
+    CACHE_LIMIT = 50_000
+
+    def __init__(self, metrics_factory: Callable[[FontKey], FontMetrics]) -> None:
+        self._factory = metrics_factory
+        self._metrics: Dict[FontKey, FontMetrics] = {}
+        self._cache: Dict[tuple, TextBlock] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def metrics(self, font: Any) -> FontMetrics:
+        key = font_key(font)
+        metrics = self._metrics.get(key)
+        if metrics is None:
+            metrics = self._metrics[key] = self._factory(key)
+        return metrics
+
+    def layout(self, text: str, *, font: Any = DEFAULT_FONT, width: float | None = None) -> TextBlock:
+        key = font_key(font)
+        cache_key = (text, key, width or 0)
+        block = self._cache.get(cache_key)
+        if block is not None:
+            self.hits += 1
+            return block
+        self.misses += 1
+        metrics = self.metrics(key)
+        lines = self._wrap(text, metrics, width) if width and width > 0 else text.split("\n")
+        block = TextBlock(
+            tuple(lines),
+            max((metrics.width(line) for line in lines), default=0.0),
+            metrics.line_height,
+            metrics.ascent,
+        )
+        if len(self._cache) >= self.CACHE_LIMIT:
+            self._cache.clear()
+        self._cache[cache_key] = block
+        return block
+
+    def cache_stats(self) -> tuple[int, int]:
+        """``(попадания, промахи)`` кэша раскладок."""
+
+        return self.hits, self.misses
+
+    def measure(self, text: str, *, font: Any = DEFAULT_FONT, width: float | None = None) -> tuple[float, float]:
+        block = self.layout(text, font=font, width=width)
+        return block.width, block.height
+
+    @staticmethod
+    def _wrap(text: str, metrics: FontMetrics, width: float) -> List[str]:
+        lines: List[str] = []
+        space = metrics.space
+        for paragraph in text.split("\n"):
+            line = ""
+            line_w = 0.0
+            started = False
+            for word in paragraph.split(" "):
+                word_w = metrics.width(word)
+                if started and line_w + space + word_w <= width:
+                    line = f"{line} {word}"
+                    line_w += space + word_w
+                    continue
+                if started:
+                    lines.append(line)
+                if word_w > width and len(word) > 1:
+                    pieces = _break_word(word, metrics, width)
+                    lines.extend(pieces[:-1])
+                    word = pieces[-1]
+                    word_w = metrics.width(word)
+                line = word
+                line_w = word_w
+                started = True
+            lines.append(line)
+        return lines
+
+
+def _break_word(word: str, metrics: FontMetrics, width: float) -> List[str]:
+    pieces: List[str] = []
+    start = 0
+    piece_w = 0.0
+    for index, char in enumerate(word):
+        char_w = metrics.char_width(char)
+        if index > start and piece_w + char_w > width:
+            pieces.append(word[start:index])
+            start = index
+            piece_w = 0.0
+        piece_w += char_w
+    pieces.append(word[start:])
+    return pieces
+
+
+# --- Источники метрик ---
+
+
+def tk_metrics_factory(widget: Any) -> Callable[[FontKey], FontMetrics]:
+    """Метрики шрифтов Tk того же интерпретатора, что и ``widget``."""
+
+    def factory(key: FontKey) -> FontMetrics:
+        from tkinter import font as tkfont
+
+        tk_font = tkfont.Font(
+            root=widget,
+            family=key.family,
+            size=key.size,
+            weight="bold" if key.bold else "normal",
+            slant="italic" if key.italic else "roman",
+        )
+        info = tk_font.metrics()
+        return FontMetrics(tk_font.measure, info["ascent"], info["descent"], info["linespace"])
+
+    return factory
+
+
+def _font_files(key: FontKey) -> List[str]:
+    style = (key.bold, key.italic)
+    arial = {(False, False): "arial.ttf", (True, False): "arialbd.ttf", (False, True): "ariali.ttf", (True, True): "arialbi.ttf"}
+    dejavu = {
+        (False, False): "DejaVuSans.ttf",
+        (True, False): "DejaVuSans-Bold.ttf",
+        (False, True): "DejaVuSans-Oblique.ttf",
+        (True, True): "DejaVuSans-BoldOblique.ttf",
+    }
+    files = [arial[style]] if key.family.lower() == "arial" else []
+    files.append(f"{key.family}.ttf")
+    files.append(dejavu[style])
+    # Начертания может не быть: лучше прямой шрифт, чем шрифт без кириллицы
+    for fallback in (dejavu[(key.bold, False)], dejavu[(False, False)]):
+        if fallback not in files:
+            files.append(fallback)
+    return files
+
+
+@lru_cache(maxsize=None)
+def _pillow_font(key: FontKey, pixels: int):
+    from PIL import ImageFont
+
+    for name in _font_files(key):
+        try:
+            return ImageFont.truetype(name, pixels)
+        except OSError:
+            continue
+    try:
+        return ImageFont.load_default(size=pixels)
+    except (TypeError, OSError):
+        # Старый Pillow или сборка без FreeType: только растровый шрифт
+        return ImageFont.load_default()
+
+
+def pillow_font(font: Any, scale: float = 1.0):
+    """Шрифт Pillow, ближайший к шрифту Tk, для отрисовки в масштабе ``scale``."""
+
+    key = font_key(font)
+    return _pillow_font(key, max(1, round(key.pixel_size * scale)))
+
+
+def pillow_metrics(key: FontKey) -> FontMetrics:
+    font = pillow_font(key)
+    ascent, descent = font.getmetrics()
+    return FontMetrics(font.getlength, ascent, descent)
+
+
+def estimated_metrics(key: FontKey) -> FontMetrics:
+    """Оценка без шрифтов: средняя ширина символа ~0.55 кегля."""
+
+    pixels = key.pixel_size
+    char_width = pixels * (0.6 if key.bold else 0.55)
+    return FontMetrics(lambda text: len(text) * char_width, round(pixels * 0.9), round(pixels * 0.25))
+
+
+@lru_cache(maxsize=None)
+def headless_engine() -> TextLayoutEngine:
+    """Общий движок для работы без Tk: метрики Pillow или оценка."""
+
+    try:
+        import PIL.ImageFont  # noqa: F401
+    except ImportError:
+        return TextLayoutEngine(estimated_metrics)
+    return TextLayoutEngine(pillow_metrics)
+
+
+# --- Раскладка карточки ---
+
+
+def responsive_scale(card_width: float, viewport_width: float | None = None) -> float:
+    """Коэффициент для компактной раскладки (аналог мобильной точки перелома)."""
+
+    if viewport_width and viewport_width <= 480:
+        return 0.85
+    if card_width <= 240:
+        return 0.9
+    return 1.0
+
+
+def card_layout(
+    card: Any,
+    layout_text: Callable[..., TextBlock],
+    *,
+    scale: float = 1.0,
+    padding: tuple[float, float] = CARD_TEXT_PADDING,
+    margin: tuple[float, float] = CARD_TEXT_MARGIN,
+    base_font_size: int = CARD_BASE_FONT_SIZE,
+) -> Dict[str, Any]:
+    """
+    Положение текста и области изображений внутри карточки.
+
+    ``layout_text`` — ``TextLayoutEngine.layout`` или ``layout_text`` бэкенда.
+    В ``text`` — текст с уже расставленными переносами: его и нужно рисовать.
+    """
+
+    pad = max(padding[0] * scale, min(card.width * 0.05, padding[1] * scale))
+    text_margin = max(margin[0] * scale, min(pad * 0.4, margin[1] * scale))
+    y1 = card.y - card.height / 2
+    font = (CARD_FONT_FAMILY, max(8, int(base_font_size * scale)), "bold")
+    text_width = max(card.width - 2 * pad, 20)
+    block = layout_text(card.text or " ", font=font, width=text_width)
+
+    text_top = y1 + pad
+    image_top = text_top + block.height + pad
+    image_height = max(card.height - (image_top - y1) - pad, 0)
+    if scale < 1.0:
+        image_height = min(image_height, card.height * 0.6)
+    image_width = max(card.width - 2 * pad, 0)
+
+    return {
+        "text_top": text_top,
+        "text_width": text_width,
+        "image_top": image_top,
+        "image_height": image_height,
+        "image_width": image_width,
+        "padding": pad,
+        "margin": text_margin,
+        "font": font,
+        "text": block.text if card.text else "",
+        "block": block,
+    }
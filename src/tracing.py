@@ -0,0 +1,226 @@
+"""
+Трассировка горячих путей: именованные интервалы (spans) и счётчики.
+
+Выключенная трассировка почти ничего не стоит: ``span`` возвращает общий
+пустой контекст, ``traced`` проверяет один флаг и вызывает функцию как есть.
+Включается переменной окружения ``MINI_MIRO_TRACE`` (``1`` — файл
+``trace.json`` в текущей папке, иначе — путь к файлу) или горячей клавишей
+в приложении. Записанное выгружается в формате Chrome Trace Event
+(открывается в ``chrome://tracing`` и Perfetto) и сводной таблицей.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Mapping, TypeVar
+
+TRACE_ENV = "MINI_MIRO_TRACE"
+DEFAULT_TRACE_FILE = "trace.json"
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+@dataclass
+class SpanStats:
+    """Сводка по одному имени интервала; время — в наносекундах."""
+
+    name: str
+    calls: int = 0
+    total_ns: int = 0
+    max_ns: int = 0
+
+    @property
+    def mean_ns(self) -> float:
+        return self.total_ns / self.calls if self.calls else 0.0
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "args", "start")
+
+    def __init__(self, tracer: "Tracer", name: str, args: Dict[str, Any] | None) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.start = 0
+
+    def __enter__(self) -> "_Span":
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.tracer._record(self.name, self.start, time.perf_counter_ns() - self.start, self.args)
+
+
+class Tracer:
+    """
+    Накопитель интервалов и счётчиков. Событий хранится не больше
+    ``max_events``; сводка считается по всем интервалам, даже после предела.
+    """
+
+    def __init__(self, max_events: int = 1_000_000) -> None:
+        self.enabled = False
+        self.max_events = max_events
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._origin = time.perf_counter_ns()
+            self._events: List[tuple] = []
+            self._counter_events: List[tuple] = []
+            self._stats: Dict[str, SpanStats] = {}
+            self.counters: Dict[str, float] = {}
+            self.dropped = 0
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def span(self, name: str, **args: Any) -> _Span | _NullSpan:
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, args or None)
+
+    def count(self, name: str, value: float = 1) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            total = self.counters.get(name, 0) + value
+            self.counters[name] = total
+            if len(self._counter_events) < self.max_events:
+                self._counter_events.append((name, time.perf_counter_ns(), total))
+
+    def _record(self, name: str, start: int, duration: int, args: Dict[str, Any] | None) -> None:
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = SpanStats(name)
+            stats.calls += 1
+            stats.total_ns += duration
+            if duration > stats.max_ns:
+                stats.max_ns = duration
+            if len(self._events) < self.max_events:
+                self._events.append((name, start, duration, threading.get_native_id(), args))
+            else:
+                self.dropped += 1
+
+    # --- Выгрузка ---
+
+    def trace_events(self) -> List[Dict[str, Any]]:
+        """События в формате Chrome Trace Event (время — в микросекундах)."""
+
+        pid = os.getpid()
+        with self._lock:
+            events = list(self._events)
+            counter_events = list(self._counter_events)
+            origin = self._origin
+        payload: List[Dict[str, Any]] = []
+        for name, start, duration, tid, args in events:
+            event = {
+                "name": name,
+                "cat": name.split(".", 1)[0],
+                "ph": "X",
+                "ts": (start - origin) / 1000,
+                "dur": duration / 1000,
+                "pid": pid,
+                "tid": tid,
+            }
+            if args:
+                event["args"] = args
+            payload.append(event)
+        for name, ts, total in counter_events:
+            payload.append(
+                {"name": name, "ph": "C", "ts": (ts - origin) / 1000, "pid": pid, "args": {"value": total}}
+            )
+        return payload
+
+    def write_trace(self, path: str | os.PathLike) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"traceEvents": self.trace_events(), "displayTimeUnit": "ms"},
+                f,
+                ensure_ascii=False,
+                default=str,
+            )
+
+    def summary(self) -> List[SpanStats]:
+        """Сводка по интервалам, сначала самые затратные по общему времени."""
+
+        with self._lock:
+            rows = [SpanStats(s.name, s.calls, s.total_ns, s.max_ns) for s in self._stats.values()]
+        return sorted(rows, key=lambda row: row.total_ns, reverse=True)
+
+    def format_summary(self, limit: int | None = None) -> str:
+        rows = self.summary()[:limit] if limit else self.summary()
+        width = max([len(row.name) for row in rows] + [len("интервал")])
+        lines = [f"{'интервал':<{width}}  {'вызовы':>8}  {'всего, мс':>10}  {'среднее, мс':>11}  {'макс, мс':>9}"]
+        for row in rows:
+            lines.append(
+                f"{row.name:<{width}}  {row.calls:>8}  {row.total_ns / 1e6:>10.2f}"
+                f"  {row.mean_ns / 1e6:>11.3f}  {row.max_ns / 1e6:>9.2f}"
+            )
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"{name:<{width}}  счётчик = {value:g}")
+        if self.dropped:
+            lines.append(f"(событий сверх предела не записано: {self.dropped})")
+        return "\n".join(lines)
+
+
+tracer = Tracer()
+
+
+def span(name: str, **args: Any) -> _Span | _NullSpan:
+    """Контекст интервала ``name`` в общем трассировщике."""
+
+    return tracer.span(name, **args)
+
+
+def count(name: str, value: float = 1) -> None:
+    tracer.count(name, value)
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """Декоратор: каждый вызов функции — интервал ``name``."""
+
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with _Span(tracer, name, None):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def trace_path_from_env(environ: Mapping[str, str] | None = None) -> str | None:
+    """Путь к файлу трассы из ``MINI_MIRO_TRACE`` или ``None``, если она не задана."""
+
+    value = (os.environ if environ is None else environ).get(TRACE_ENV, "").strip()
+    if not value or value.lower() in {"0", "false", "no", "off"}:
+        return None
+    if value.lower() in {"1", "true", "yes", "on"}:
+        return DEFAULT_TRACE_FILE
+    return value
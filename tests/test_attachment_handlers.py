@@ -7,7 +7,10 @@ import pytest
 from PIL import Image
 
 import src.main as main
-from src.board_model import Card as ModelCard
+from src.attachment_store import AttachmentStore
+from src.board_model import Attachment, BoardEvents, Card as ModelCard
+from src.card_store import CardStore
+from src.history import History
 from src.main import BoardApp
 
 
@@ -18,6 +21,7 @@ def _make_app(tmp_root: Path):
     app.cards = {1: ModelCard(id=1, x=0, y=0, width=10, height=10, text="")}
     app.selected_cards = {1}
     app.selected_card_id = None
+    app.board_events = BoardEvents()
     app.canvas_view = mock.Mock()
     app.canvas_view.compute_card_layout.return_value = {
         "text_top": 0,
@@ -120,3 +124,108 @@ def test_attach_image_from_file_rejects_oversized(monkeypatch, attachments_root,
     assert result is True
     showerror.assert_called_once()
     assert app.cards[1].attachments == []
+
+
+def test_board_snapshot_keeps_container_attachments_as_references(attachments_root):
+    app = _make_app(attachments_root)
+    app.attachment_store = mock.Mock()
+    attachment = Attachment(
+        id=1,
+        name="image.png",
+        source_type="file",
+        mime_type="image/png",
+        width=8,
+        height=8,
+        archive_member="attachments/1-1.png",
+    )
+
+    prepared = app._prepare_attachment_for_save(attachment)
+
+    app.attachment_store.read_bytes.assert_not_called()
+    assert prepared is not attachment
+    assert prepared.archive_member == "attachments/1-1.png"
+    assert prepared.data_base64 is None
+    assert attachment.data_base64 is None
+
+
+def test_undo_card_deletion_keeps_attachment_file(attachments_root):
+    app = _make_app(attachments_root)
+    payload = b"\x89PNG\r\n\x1a\n" + b"pixels" * 16
+    stored = attachments_root / "1-1.png"
+    stored.write_bytes(payload)
+    app.cards[1].attachments.append(
+        Attachment(
+            id=1,
+            name="image.png",
+            source_type="file",
+            mime_type="image/png",
+            width=8,
+            height=8,
+            storage_path=str(stored.relative_to(Path.cwd())),
+        )
+    )
+    app.cards = CardStore(app.cards, events=app.board_events)
+    app.attachment_store = AttachmentStore(attachments_root, max_bytes=app.max_attachment_bytes)
+    app.pending_attachment_restore = set()
+    app.attachment_restore_failures = []
+    app.connections = []
+    app.frames = {}
+    app.selected_connection = None
+    app.history = History()
+    app.history.clear_and_init(app.get_board_data())
+    app.push_history = lambda: app.history.push(app.get_board_data())
+    app.load_controller = mock.Mock(is_loading=False)
+    for name in (
+        "_clear_attachment_previews_for_card",
+        "_delete_card_items",
+        "reset_board_canvas",
+        "render_board",
+        "update_controls_state",
+        "update_unsaved_flag",
+        "_schedule_autosave",
+    ):
+        setattr(app, name, mock.Mock())
+
+    app.delete_selected_cards()
+    assert 1 not in app.cards
+
+    app.on_undo()
+
+    (restored,) = app.cards[1].attachments
+    assert app.attachment_store.read_bytes(restored) == payload
+    assert app.attachment_store.materialize_async(1, restored)
+    app.attachment_store.shutdown()
+
+
+def test_rendered_attachments_stay_references_until_edited(attachments_root):
+    app = _make_app(attachments_root)
+    payload = b"\x89PNG\r\n\x1a\n" + b"pixels" * 16
+    kept = Attachment(
+        id=1,
+        name="kept.png",
+        source_type="file",
+        mime_type="image/png",
+        width=8,
+        height=8,
+        data_base64=base64.b64encode(payload).decode("ascii"),
+    )
+    lost = Attachment(id=2, name="lost.png", source_type="file", mime_type="image/png", width=8, height=8)
+    app.cards[1].attachments.extend([kept, lost])
+    app.attachment_store = AttachmentStore(attachments_root / "files", max_bytes=app.max_attachment_bytes)
+    app.pending_attachment_restore = {(1, 1), (1, 2)}
+    app.attachment_restore_failures = []
+    app.report_attachment_restore_failures = mock.Mock()
+
+    app._check_pending_attachments(app.cards[1])
+
+    assert app.attachment_restore_failures == ["lost.png"]
+    assert app.pending_attachment_restore == {(1, 1)}
+    assert app.attachment_store.read_bytes(kept) == payload
+    assert not app.attachment_store.pending
+    assert not (attachments_root / "files").exists()
+
+    app.materialize_attachments((1,), wait=True)
+    app.attachment_store.shutdown()
+
+    assert app.pending_attachment_restore == set()
+    assert Path(kept.storage_path).read_bytes() == payload
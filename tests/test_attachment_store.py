@@ -0,0 +1,150 @@
+import base64
+import json
+from pathlib import Path
+
+from src.attachment_store import AttachmentStore
+from src.board_model import Attachment, BoardData, Card
+from src.board_io import BoardContainer, write_board_file
+
+PAYLOAD = b"\x89PNG\r\n\x1a\n" + b"pixels" * 64
+
+
+def _attachment(**overrides) -> Attachment:
+    values = dict(
+        id=1,
+        name="image.png",
+        source_type="file",
+        mime_type="image/png",
+        width=8,
+        height=8,
+        offset_x=0,
+        offset_y=0,
+    )
+    values.update(overrides)
+    return Attachment(**values)
+
+
+def test_materialize_writes_base64_attachment_on_worker(tmp_path):
+    store = AttachmentStore(tmp_path / "attachments", max_bytes=1024 * 1024)
+    attachment = _attachment(data_base64=base64.b64encode(PAYLOAD).decode("ascii"))
+
+    assert store.materialize_async(7, attachment)
+    assert store.pending
+    assert store.wait() == []
+    store.shutdown()
+
+    assert not store.pending
+    assert Path(attachment.storage_path) == tmp_path / "attachments" / "7-1.png"
+    assert Path(attachment.storage_path).read_bytes() == PAYLOAD
+
+
+def test_container_attachment_stays_lazy_until_read(tmp_path):
+    board = BoardData(
+        cards={
+            1: Card(
+                id=1, x=0, y=0, width=180, height=100, text="",
+                attachments=[_attachment(data_base64=base64.b64encode(PAYLOAD).decode("ascii"))],
+            )
+        },
+        connections=[],
+        frames={},
+    )
+    path = tmp_path / "board.mboard"
+    write_board_file(path, board.to_primitive())
+
+    store = AttachmentStore(tmp_path / "attachments", max_bytes=1024 * 1024)
+    container = BoardContainer(path)
+    store.set_container(container)
+    attachment = BoardData.from_primitive(container.board_data()).cards[1].attachments[0]
+
+    assert attachment.data_base64 is None
+    assert store.has_data(attachment)
+    assert store.read_bytes(attachment) == PAYLOAD
+    assert not (tmp_path / "attachments").exists()
+
+    store.materialize_async(1, attachment)
+    store.wait()
+    store.shutdown()
+    assert Path(attachment.storage_path).read_bytes() == PAYLOAD
+
+
+def test_materialize_reports_missing_and_oversized_data(tmp_path):
+    store = AttachmentStore(tmp_path, max_bytes=16)
+    missing = _attachment(id=1, name="missing.png")
+    oversized = _attachment(id=2, name="big.png", data_base64=base64.b64encode(PAYLOAD).decode("ascii"))
+
+    assert not store.materialize_async(1, missing)
+    assert store.materialize_async(1, oversized)
+    assert store.wait() == ["big.png"]
+    store.shutdown()
+    assert oversized.storage_path is None
+
+
+def test_existing_file_is_not_rewritten(tmp_path):
+    existing = tmp_path / "1-1.png"
+    existing.write_bytes(PAYLOAD)
+    store = AttachmentStore(tmp_path, max_bytes=1024)
+    attachment = _attachment(storage_path=str(existing))
+
+    assert store.materialize_async(1, attachment)
+    assert not store.pending
+
+
+def test_saving_over_the_open_container_reopens_it(tmp_path):
+    first = _attachment(data_base64=base64.b64encode(PAYLOAD).decode("ascii"))
+    board = BoardData(
+        cards={1: Card(id=1, x=0, y=0, width=180, height=100, text="", attachments=[first])},
+        connections=[],
+        frames={},
+    )
+    path = tmp_path / "board.mboard"
+    write_board_file(path, board.to_primitive())
+
+    store = AttachmentStore(tmp_path / "attachments", max_bytes=1024 * 1024)
+    opened = BoardContainer(path)
+    store.set_container(opened)
+    live = BoardData.from_primitive(opened.board_data())
+    added = _attachment(id=2, name="second.png", data_base64=base64.b64encode(b"second").decode("ascii"))
+    live.cards[2] = Card(id=2, x=300, y=0, width=180, height=100, text="", attachments=[added])
+
+    store.write_board(path, live.to_primitive())
+
+    assert store.container is not opened
+    assert opened._archive.fp is None
+    # Ссылки живой модели остаются верными, новые вложения читаются из нового файла
+    assert store.read_bytes(live.cards[1].attachments[0]) == PAYLOAD
+    saved = BoardData.from_primitive(store.container.board_data())
+    assert saved.cards[1].attachments[0].archive_member == live.cards[1].attachments[0].archive_member
+    assert store.read_bytes(saved.cards[2].attachments[0]) == b"second"
+    store.shutdown()
+
+
+def test_plain_json_save_inlines_container_data_without_touching_the_model(tmp_path):
+    board = BoardData(
+        cards={
+            1: Card(
+                id=1, x=0, y=0, width=180, height=100, text="",
+                attachments=[_attachment(data_base64=base64.b64encode(PAYLOAD).decode("ascii"))],
+            )
+        },
+        connections=[],
+        frames={},
+    )
+    path = tmp_path / "board.mboard"
+    write_board_file(path, board.to_primitive())
+    store = AttachmentStore(tmp_path / "attachments", max_bytes=1024 * 1024)
+    store.set_container(BoardContainer(path))
+    live = BoardData.from_primitive(store.container.board_data())
+    snapshot = live.to_primitive()
+
+    store.write_board(tmp_path / "board.json", snapshot)
+
+    saved = json.loads((tmp_path / "board.json").read_text(encoding="utf-8"))
+    attachment = saved["cards"][0]["attachments"][0]
+    assert base64.b64decode(attachment["data_base64"]) == PAYLOAD
+    assert "archive_member" not in attachment
+    # Снимок и живая модель остаются ссылками на контейнер
+    assert snapshot["cards"][0]["attachments"][0]["data_base64"] is None
+    assert live.cards[1].attachments[0].data_base64 is None
+    assert live.cards[1].attachments[0].archive_member
+    store.shutdown()
@@ -0,0 +1,75 @@
+import json
+
+from benchmarks.generator import BoardSpec, generate_board
+from benchmarks.run import HeadlessApp, compare_results, main, run_suite
+
+TINY = BoardSpec(cards=30, connections_per_style=10, frames=3, attachments=4, attachment_sizes=(100, 1000))
+
+
+def test_generator_is_reproducible_and_follows_spec():
+    first = generate_board(TINY, seed=7)
+    second = generate_board(TINY, seed=7)
+    other = generate_board(TINY, seed=8)
+
+    assert first.to_primitive() == second.to_primitive()
+    assert first.to_primitive() != other.to_primitive()
+    assert len(first.cards) == 30
+    assert len(first.frames) == 3
+    styles = [conn.style for conn in first.connections]
+    assert {style: styles.count(style) for style in set(styles)} == {"elbow": 10, "rounded": 10, "straight": 10}
+    assert sum(len(card.attachments) for card in first.cards.values()) == 4
+    assert all(conn.from_id != conn.to_id for conn in first.connections)
+
+
+def test_suite_reports_timings_for_selected_benchmarks():
+    payload = run_suite(TINY, seed=1, repeat=2, only=["model.", "render.board.null", "interaction.drag"])
+
+    names = [result["name"] for result in payload["results"]]
+    assert names == ["model.from_primitive", "model.to_primitive", "render.board.null", "interaction.drag"]
+    assert all(len(result["times"]) == 2 and result["min"] <= result["median"] for result in payload["results"])
+    assert payload["board"] == {"cards": 30, "connections": 30, "frames": 3, "attachments": 4}
+    assert payload["spec"]["cards"] == 30
+    assert set(payload["memory"]) == {"card", "connection", "frame"}
+    assert all(size > 0 for size in payload["memory"].values())
+
+    rows = compare_results(payload, payload)
+    assert [row["ratio"] for row in rows] == [1.0] * len(names)
+
+
+def test_cli_writes_json_results(tmp_path):
+    output = tmp_path / "results.json"
+
+    code = main(
+        ["--size", "small", "--cards", "20", "--connections", "5", "--attachments", "0",
+         "--repeat", "1", "--only", "history.", "-o", str(output), "-q"]
+    )
+
+    assert code == 0
+    payload = json.loads(output.read_text(encoding="utf-8"))
+    assert [result["name"] for result in payload["results"]] == ["history.push", "history.push_undo"]
+    assert payload["seed"] == 0 and payload["board"]["cards"] == 20
+
+
+def test_headless_app_drags_and_zooms_through_app_handlers():
+    app = HeadlessApp(generate_board(TINY, seed=3))
+    conn = next(conn for conn in app.connections if conn.style == "straight")
+    card = app.cards[conn.from_id]
+    start = (card.x, card.y)
+    line_id = app.items.connection(conn).line_id
+    line_before = app.canvas.coords(line_id)
+
+    app.drag_cards([card.id], [(10.0, 0.0), (10.0, 20.0)])
+
+    assert (card.x, card.y) == (start[0] + 10, start[1] + 20)
+    assert app.canvas.coords(app.items.card(card.id).rect_id)[:2] == (
+        card.x - card.width / 2,
+        card.y - card.height / 2,
+    )
+    assert app.canvas.coords(line_id) != line_before
+    assert app.elbow_router.suspended is False
+    assert card.id in app.card_index.ids_at(card.x, card.y)
+
+    app.zoom(2.0, 0, 0)
+    assert app.zoom_factor == 2.0
+    assert (card.x, card.y) == ((start[0] + 10) * 2, (start[1] + 20) * 2)
+    assert app.canvas.coords(app.items.card(card.id).rect_id)[0] == card.x - card.width / 2
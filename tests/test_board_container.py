@@ -0,0 +1,101 @@
+import base64
+import json
+import zipfile
+
+import pytest
+
+from src.board_model import Attachment, BoardData, Card
+from src.board_io import (
+    BoardContainer,
+    BoardFileError,
+    _validate_board_data,
+    is_board_container,
+    read_board_file,
+    write_board_file,
+)
+
+PNG_BYTES = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 8
+
+
+def _board_with_attachment() -> dict:
+    attachment = Attachment(
+        id=1,
+        name="image.png",
+        source_type="file",
+        mime_type="image/png",
+        width=32,
+        height=32,
+        offset_x=0,
+        offset_y=0,
+        data_base64=base64.b64encode(PNG_BYTES).decode("ascii"),
+    )
+    cards = {
+        1: Card(id=1, x=0, y=0, width=180, height=100, text="С картинкой", attachments=[attachment]),
+        2: Card(id=2, x=300, y=0, width=180, height=100, text="Без картинки"),
+    }
+    return BoardData(cards=cards, connections=[], frames={}).to_primitive()
+
+
+def test_container_stores_attachments_out_of_line(tmp_path):
+    path = tmp_path / "board.mboard"
+    write_board_file(path, _board_with_attachment())
+
+    assert is_board_container(path)
+    with zipfile.ZipFile(path) as archive:
+        info = archive.getinfo("attachments/1-1.png")
+        assert info.compress_type == zipfile.ZIP_STORED
+        assert archive.read(info) == PNG_BYTES
+        board_json = json.loads(archive.read("board.json"))
+
+    attachment = board_json["cards"][0]["attachments"][0]
+    assert attachment["archive_member"] == "attachments/1-1.png"
+    assert attachment["data_base64"] is None
+
+
+def test_container_roundtrip_and_random_access(tmp_path):
+    path = tmp_path / "board.mboard"
+    source = _board_with_attachment()
+    write_board_file(path, source)
+
+    with BoardContainer(path) as container:
+        data = container.board_data()
+        assert container.read_attachment("attachments/1-1.png") == PNG_BYTES
+        with pytest.raises(BoardFileError):
+            container.read_attachment("attachments/404.png")
+
+    board = BoardData.from_primitive(data)
+    assert board.cards[1].attachments[0].archive_member == "attachments/1-1.png"
+    assert board.cards[2].text == "Без картинки"
+    assert read_board_file(path)["cards"] == data["cards"]
+
+
+def test_json_boards_still_supported(tmp_path):
+    path = tmp_path / "board.json"
+    source = _board_with_attachment()
+    write_board_file(path, source)
+
+    assert not is_board_container(path)
+    assert read_board_file(path) == source
+
+
+def test_validation_rejects_missing_members_and_unknown_version(tmp_path):
+    path = tmp_path / "board.mboard"
+    write_board_file(path, _board_with_attachment())
+    with BoardContainer(path) as container:
+        data = container.board_data()
+
+    with pytest.raises(BoardFileError):
+        _validate_board_data(data, members={"board.json"})
+
+    data["container_version"] = 99
+    with pytest.raises(BoardFileError):
+        _validate_board_data(data)
+
+
+def test_non_container_file_is_reported(tmp_path):
+    path = tmp_path / "broken.mboard"
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("readme.txt", "nothing here")
+
+    with pytest.raises(BoardFileError):
+        BoardContainer(path)
@@ -0,0 +1,129 @@
+import random
+
+from src.board_index import ConnectionIndex, FrameIndex
+from src.board_model import (
+    BOARD_REPLACED,
+    CONNECTION_ADDED,
+    CONNECTION_REMOVED,
+    CONNECTION_RETARGETED,
+    FRAME_ADDED,
+    FRAME_MOVED,
+    FRAME_REMOVED,
+    BoardEvents,
+    Card,
+    Connection,
+    Frame,
+)
+from src.card_store import CardStore
+from src.spatial_index import CardIndex
+
+
+def make_board(events, count=200, seed=1):
+    rng = random.Random(seed)
+    cards = CardStore(
+        {
+            i: Card(id=i, x=rng.uniform(0, 2000), y=rng.uniform(0, 2000), width=80, height=60)
+            for i in range(1, count + 1)
+        },
+        events=events,
+    )
+    return {"cards": cards, "frames": {}}
+
+
+def brute_members(cards, frame):
+    return {
+        cid
+        for cid, card in cards.items()
+        if frame.x1 <= card.x <= frame.x2 and frame.y1 <= card.y <= frame.y2
+    }
+
+
+def test_frame_index_tracks_cards_and_nested_frames():
+    events = BoardEvents()
+    board = make_board(events)
+    card_index = CardIndex(lambda: board["cards"], events, cell_size=128)
+    index = FrameIndex(lambda: board["cards"], lambda: board["frames"], card_index, events, cell_size=300)
+    frames = board["frames"]
+
+    frames[1] = Frame(id=1, x1=100, y1=100, x2=1200, y2=1200)
+    frames[2] = Frame(id=2, x1=300, y1=300, x2=700, y2=700)
+    frames[3] = Frame(id=3, x1=1500, y1=0, x2=1900, y2=400)
+    events.emit(FRAME_ADDED, frames)
+    cards = board["cards"]
+    for frame in frames.values():
+        assert index.cards_in(frame.id) == brute_members(cards, frame)
+    assert index.nested_in(1) == [2] and index.enclosing(2) == [1]
+    assert index.nested_in(3) == [] and index.enclosing(1) == []
+
+    # Карточки уходят из рамок и приходят в них, рамки двигаются
+    some = list(cards)[:40]
+    cards.translate(some, 650, -320)
+    cards[500] = Card(id=500, x=500, y=500, width=10, height=10)
+    del cards[some[-1]]
+    frames[2].x1 += 900
+    frames[2].x2 += 900
+    events.emit(FRAME_MOVED, (2,))
+    del frames[3]
+    events.emit(FRAME_REMOVED, (3,))
+
+    for frame in frames.values():
+        assert index.cards_in(frame.id) == brute_members(cards, frame)
+    assert index.cards_in(3) == set()
+    assert index.nested_in(1) == []
+    assert 1 in index.frames_of(500) and 2 not in index.frames_of(500)
+
+    board["cards"] = CardStore({9: Card(id=9, x=400, y=400, width=10, height=10)}, events=events)
+    board["frames"] = {5: Frame(id=5, x1=0, y1=0, x2=1000, y2=1000)}
+    events.emit(BOARD_REPLACED)
+    assert index.cards_in(5) == {9} and index.frames_of(9) == {5}
+
+
+def test_connection_index_follows_connection_events():
+    events = BoardEvents()
+    board = {"connections": [Connection(from_id=1, to_id=2), Connection(from_id=2, to_id=3)]}
+    index = ConnectionIndex(lambda: board["connections"], events)
+    first, second = board["connections"]
+
+    assert index.of_cards([2]) == [first, second]
+    third = Connection(from_id=3, to_id=4)
+    board["connections"].append(third)
+    events.emit_connections(CONNECTION_ADDED, (third,))
+    first.to_id = 4
+    events.emit_connections(CONNECTION_RETARGETED, (first,))
+    board["connections"].remove(second)
+    events.emit_connections(CONNECTION_REMOVED, (second,))
+
+    assert index.of_cards([2]) == []
+    assert sorted(map(id, index.of_cards([4]))) == sorted(map(id, [first, third]))
+    assert len(index.of_cards([1, 3, 4])) == 2
+
+    board["connections"] = [Connection(from_id=7, to_id=8)]
+    events.emit(BOARD_REPLACED)
+    assert index.of_cards([1, 2, 3, 4]) == [] and len(index.of_cards([8])) == 1
+
+
+def test_frame_revision_changes_with_frame_contents():
+    events = BoardEvents()
+    # Сдвиг большей части доски перестраивает индекс целиком: карточек с запасом
+    cards = CardStore(
+        {i: Card(id=i, x=900 + 100 * i, y=900, width=80, height=60) for i in range(2, 12)},
+        events=events,
+    )
+    cards[1] = Card(id=1, x=100, y=100, width=80, height=60)
+    frames = {1: Frame(id=1, x1=0, y1=0, x2=400, y2=400)}
+    card_index = CardIndex(lambda: cards, events)
+    index = FrameIndex(lambda: cards, lambda: frames, card_index, events)
+
+    before = index.revision(1)
+    # Карточка сдвинута, но из рамки не вышла; чужая карточка — вне рамок
+    cards.translate([1, 2], 20, 20)
+    assert index.revision(1) == before
+
+    cards.translate([2], -800, -800)
+    assert index.revision(1) != before and index.cards_in(1) == {1, 2}
+
+    before = index.revision(1)
+    frames[2] = Frame(id=2, x1=2000, y1=2000, x2=2100, y2=2100)
+    events.emit(FRAME_ADDED, (2,))
+    # Новая рамка может оказаться вложенной: версии всех рамок меняются
+    assert index.revision(1) != before
@@ -1,8 +1,14 @@
 import copy
 
 from src.board_model import (
+    CARD_MOVED,
+    CONNECTION_ADDED,
+    FRAME_MOVED,
+    FRAME_RENAMED,
+    GEOMETRY_EVENTS,
     Attachment,
     BoardData,
+    BoardEvents,
     Card,
     Connection,
     Frame,
@@ -319,3 +325,33 @@ def test_bulk_color_update_preserves_theme_defaults():
 
     assert restored.cards[1].color == "#101010"
     assert THEMES["light"]["card_default"] == default_light
+
+
+def test_board_events_coalesce_batches_and_filter_kinds():
+    events = BoardEvents()
+    received = []
+    geometry = []
+    events.subscribe(received.append)
+    unsubscribe = events.subscribe(geometry.append, GEOMETRY_EVENTS)
+    conn = Connection(from_id=1, to_id=2)
+
+    with events.batch():
+        events.emit(CARD_MOVED, [1, 2])
+        with events.batch():
+            events.emit(CARD_MOVED, [2, 3])
+            events.emit_connections(CONNECTION_ADDED, [conn, conn])
+        assert received == []
+    assert len(received) == 1
+    change = received[0]
+    assert change.kinds == {CARD_MOVED, CONNECTION_ADDED}
+    assert change.ids(CARD_MOVED) == {1, 2, 3} and change.card_ids() == {1, 2, 3}
+    assert change.connections(CONNECTION_ADDED) == [conn]
+    assert geometry == [change]
+
+    # Переименование рамки не меняет геометрию
+    events.emit(FRAME_RENAMED, [7])
+    assert len(received) == 2 and len(geometry) == 1
+    unsubscribe()
+    events.emit(FRAME_MOVED, [7])
+    assert len(received) == 3 and len(geometry) == 1
+    assert FRAME_MOVED not in received[1] and received[2].ids(FRAME_MOVED) == {7}
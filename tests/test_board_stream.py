@@ -0,0 +1,225 @@
+import json
+from json import JSONDecodeError
+from unittest import mock
+
+import pytest
+
+from src.board_model import CARD_ADDED, BoardData, BoardEvents, Card, Connection, Frame
+from src.board_stream import StreamingBoardReader
+from src.board_io import BoardFileError, _validate_board_data, write_board_file
+from src.card_store import CardStore
+from src.load_controller import LoadController
+
+
+def _write_board(path, board: BoardData, **extra):
+    data = board.to_primitive()
+    data = {"schema_version": data["schema_version"], **extra, **data}
+    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    return data
+
+
+def _sample_board(count: int = 30) -> BoardData:
+    cards = {
+        i: Card(id=i, x=i * 250.0, y=100.0, width=180, height=100, text=f"Карточка {i} " * 3)
+        for i in range(1, count + 1)
+    }
+    connections = [Connection(from_id=i, to_id=i + 1, label="→") for i in range(1, count)]
+    frames = {1: Frame(id=1, x1=0, y1=0, x2=600, y2=300, title="Группа")}
+    return BoardData(cards=cards, connections=connections, frames=frames)
+
+
+def test_reader_streams_records_in_small_chunks(tmp_path):
+    path = tmp_path / "board.json"
+    data = _write_board(path, _sample_board(), viewport={"x1": 0, "y1": 0, "x2": 800, "y2": 600})
+
+    with StreamingBoardReader(path, chunk_size=16) as reader:
+        records = list(reader.records())
+        assert reader.progress == 1.0
+        skeleton = reader.skeleton()
+
+    assert records[0] == ("schema_version", data["schema_version"])
+    assert records[1] == ("viewport", data["viewport"])
+    assert [payload for kind, payload in records if kind == "card"] == data["cards"]
+    assert [payload for kind, payload in records if kind == "connection"] == data["connections"]
+    assert [payload for kind, payload in records if kind == "frame"] == data["frames"]
+    assert skeleton["cards"] == []
+    _validate_board_data(skeleton)
+
+
+def test_reader_handles_numbers_split_across_chunks(tmp_path):
+    path = tmp_path / "board.json"
+    path.write_text(
+        '{"schema_version":5,"cards":[{"id":1,"x":123456.789,"y":2,"width":3,"height":4}],'
+        '"connections":[],"frames":[]}',
+        encoding="utf-8",
+    )
+
+    for chunk_size in range(16, 40):
+        with StreamingBoardReader(path, chunk_size=chunk_size) as reader:
+            cards = [payload for kind, payload in reader.records() if kind == "card"]
+        assert cards[0]["x"] == 123456.789
+
+
+def test_reader_reports_truncated_file(tmp_path):
+    path = tmp_path / "broken.json"
+    path.write_text('{"schema_version": 5, "cards": [{"id": 1, "x": ', encoding="utf-8")
+
+    with StreamingBoardReader(path, chunk_size=16) as reader:
+        with pytest.raises(JSONDecodeError):
+            list(reader.records())
+
+
+def test_reader_skeleton_detects_bad_sections(tmp_path):
+    path = tmp_path / "bad.json"
+    path.write_text('{"schema_version": 5, "cards": {}, "connections": [], "frames": []}', encoding="utf-8")
+
+    with StreamingBoardReader(path) as reader:
+        list(reader.records())
+        with pytest.raises(BoardFileError):
+            _validate_board_data(reader.skeleton())
+
+
+def _make_loader_app():
+    app = mock.Mock()
+    app.board_events = BoardEvents()
+    app.cards = CardStore(events=app.board_events)
+    app.frames = {}
+    app.connections = []
+    app.pending_attachment_restore = set()
+    app.theme = {"text": "#000000"}
+    app.visible_canvas_rect.return_value = (0, 0, 800, 600)
+    app.canvas.canvasx.side_effect = lambda v: v
+    app.canvas.canvasy.side_effect = lambda v: v
+    app.canvas.bbox.return_value = None
+    scheduled = []
+    app.root.after.side_effect = lambda _ms, callback: scheduled.append(callback) or "after#1"
+    return app, scheduled
+
+
+def test_load_controller_draws_viewport_cards_first(tmp_path):
+    path = tmp_path / "board.json"
+    _write_board(path, _sample_board(), viewport={"x1": 4000, "y1": 0, "x2": 4800, "y2": 600})
+    app, scheduled = _make_loader_app()
+    drawn: list[int] = []
+    app.canvas_view.draw_card.side_effect = lambda card: drawn.append(card.id)
+    finished = mock.Mock()
+
+    loader = LoadController(app, chunk_size=5)
+    loader.start(StreamingBoardReader(path, chunk_size=64), on_finished=finished)
+    while scheduled:
+        scheduled.pop(0)()
+
+    finished.assert_called_once()
+    assert sorted(drawn) == list(range(1, 31))
+    # Область просмотра с запасом в половину экрана: x от 3600 до 5200
+    assert drawn[:7] == list(range(15, 22))
+    assert len(app.connections) == 29
+    assert app.canvas_view.draw_connection.call_count == 29
+    assert not loader.is_loading
+
+
+def test_load_controller_emits_one_change_per_chunk(tmp_path):
+    path = tmp_path / "board.json"
+    _write_board(path, _sample_board())
+    app, scheduled = _make_loader_app()
+    changes = []
+    app.board_events.subscribe(lambda change: changes.append(change.ids(CARD_ADDED)), kinds=(CARD_ADDED,))
+
+    loader = LoadController(app, chunk_size=10)
+    loader.start(StreamingBoardReader(path, chunk_size=64), on_finished=mock.Mock())
+    while scheduled:
+        scheduled.pop(0)()
+
+    assert set().union(*changes) == set(range(1, 31))
+    assert len(changes) <= 4
+    assert all(len(ids) > 1 for ids in changes[:-1])
+
+
+def test_load_controller_reports_unsupported_schema(tmp_path):
+    path = tmp_path / "board.json"
+    path.write_text('{"schema_version": 99, "cards": [], "connections": [], "frames": []}', encoding="utf-8")
+    app, scheduled = _make_loader_app()
+    failed = mock.Mock()
+
+    loader = LoadController(app)
+    loader.start(StreamingBoardReader(path), on_failed=failed)
+    while scheduled:
+        scheduled.pop(0)()
+
+    failed.assert_called_once()
+    assert isinstance(failed.call_args[0][0], BoardFileError)
+    assert not loader.is_loading
+
+
+def test_load_controller_reopens_autosave_attachments_container(tmp_path):
+    container_path = tmp_path / "board.mboard"
+    write_board_file(container_path, _sample_board(2).to_primitive())
+    path = tmp_path / "autosave.json"
+    _write_board(path, _sample_board(2), attachments_container=str(container_path))
+    app, scheduled = _make_loader_app()
+    previous = mock.Mock()
+    app.attachment_store.set_container.return_value = previous
+
+    loader = LoadController(app)
+    loader.start(StreamingBoardReader(path), on_finished=mock.Mock())
+    while scheduled:
+        scheduled.pop(0)()
+
+    container = app.attachment_store.set_container.call_args[0][0]
+    assert container.path == container_path
+    previous.close.assert_called_once()
+    container.close()
+
+
+def test_user_actions_are_ignored_while_a_board_loads(tmp_path, monkeypatch):
+    import src.files as file_io
+    from src.events import EventBinder
+    from src.history import History
+    from src.main import BoardApp
+
+    path = tmp_path / "board.json"
+    _write_board(path, _sample_board())
+    loader_app, scheduled = _make_loader_app()
+    app = BoardApp.__new__(BoardApp)
+    for name in ("board_events", "cards", "frames", "connections", "pending_attachment_restore",
+                 "theme", "canvas", "canvas_view", "root", "visible_canvas_rect",
+                 "reset_board_canvas", "render_board", "update_controls_state", "collapse_controller",
+                 "report_attachment_restore_failures", "attachment_store"):
+        setattr(app, name, getattr(loader_app, name))
+    app.next_card_id, app.next_frame_id = 100, 100
+    app.history = History()
+    app.history.clear_and_init({"cards": [], "connections": [], "frames": []})
+    app.history.push({"cards": [{"id": 99}], "connections": [], "frames": []})
+    app.set_board_from_data = mock.Mock()
+    app._schedule_autosave = mock.Mock()
+    app.on_canvas_click = mock.Mock()
+    app.start_pan = mock.Mock()
+    save = mock.Mock(return_value=True)
+    monkeypatch.setattr(file_io, "save_board", save)
+    app.load_controller = LoadController(app, chunk_size=5)
+    app.load_controller.start(StreamingBoardReader(path, chunk_size=64), on_finished=mock.Mock())
+    scheduled.pop(0)()
+    assert app.load_controller.is_loading
+    assert app.next_card_id == max(app.cards) + 1
+
+    binder = EventBinder(busy=lambda: app.load_controller.is_loading)
+    binder.handler_for(app, "on_canvas_click")(mock.Mock())
+    binder.handler_for(app, "start_pan")(mock.Mock())
+    app.save_board()
+    app.push_history()
+    app.on_undo()
+
+    app.on_canvas_click.assert_not_called()
+    app.start_pan.assert_called_once()
+    save.assert_not_called()
+    app._schedule_autosave.assert_not_called()
+    app.set_board_from_data.assert_not_called()
+    assert app.history.index == 0 and len(app.history.commands) == 1
+    assert app.load_controller.is_loading
+
+    while scheduled:
+        scheduled.pop(0)()
+    assert not app.load_controller.is_loading
+    assert (app.next_card_id, app.next_frame_id) == (31, 2)
+    binder.handler_for(app, "on_canvas_click")(mock.Mock())
+    app.on_canvas_click.assert_called_once()
@@ -0,0 +1,82 @@
+import pytest
+
+from src import bulk_ops, card_store
+from src.board_model import CONNECTION_REMOVED, BoardEvents, Card, Connection
+from src.card_store import CardStore
+
+
+@pytest.fixture(params=["array", "numpy"])
+def use_numpy(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+        monkeypatch.setattr(card_store, "VECTOR_MIN_ROWS", 1)
+        return True
+    return False
+
+
+def make_store(use_numpy=True, events=None):
+    cards = {
+        1: Card(id=1, x=100, y=50, width=100, height=40),
+        2: Card(id=2, x=30, y=300, width=60, height=80),
+        3: Card(id=3, x=400, y=120, width=200, height=60),
+        4: Card(id=4, x=250, y=10, width=50, height=50),
+    }
+    return CardStore(cards, use_numpy=use_numpy, events=events)
+
+
+def test_align_and_distribute_return_changed_ids_and_patch(use_numpy):
+    store = make_store(use_numpy)
+
+    edit = bulk_ops.align(store, [1, 2, 3], "left")
+    assert sorted(edit.changed) == [1, 3]
+    assert edit.patch == {1: {"x": 50.0}, 3: {"x": 100.0}}
+    assert store[2].x == 30
+
+    edit = bulk_ops.align(store, [1, 2, 3], "bottom")
+    assert {cid: store[cid].y + store[cid].height / 2 for cid in (1, 2, 3)} == {1: 340, 2: 340, 3: 340}
+    assert bulk_ops.align(store, [1, 2, 3], "bottom").changed == []
+
+    edit = bulk_ops.distribute(store, [1, 3, 4, 2], "x")
+    assert not {2, 4} & set(edit.changed) and set(edit.patch) == set(edit.changed)
+    ordered = sorted(store.values(), key=lambda card: card.x)
+    gaps = [
+        (b.x - b.width / 2) - (a.x + a.width / 2) for a, b in zip(ordered, ordered[1:])
+    ]
+    assert gaps == pytest.approx([gaps[0]] * 3)
+    assert [card.id for card in ordered] == [2, 1, 3, 4] and (ordered[0].x, ordered[-1].x) == (30, 250)
+
+
+def test_set_size_respects_minimums_and_keeps_centers(use_numpy):
+    store = make_store(use_numpy)
+
+    edit = bulk_ops.set_size(store, [1, 2, 3], 50, 30, min_width=60, min_height=40, minimums={3: (150, 10)})
+    assert sorted(edit.changed) == [1, 2, 3]
+    assert {cid: (store[cid].width, store[cid].height) for cid in (1, 2, 3)} == {
+        1: (60, 40),
+        2: (60, 40),
+        3: (150, 40),
+    }
+    assert (store[3].x, store[3].y) == (400, 120)
+    assert edit.patch[2] == {"width": 60.0, "height": 40.0}
+    assert bulk_ops.set_size(store, [1, 2], width=60).changed == []
+
+
+def test_recolor_and_delete_report_one_change():
+    events = BoardEvents()
+    changes = []
+    events.subscribe(changes.append)
+    store = make_store(events=events)
+    connections = [Connection(from_id=1, to_id=2), Connection(from_id=3, to_id=4), Connection(from_id=4, to_id=1)]
+
+    edit = bulk_ops.recolor(store, [1, 2, 99], "#ff0000")
+    assert edit.patch == {1: {"color": "#ff0000"}, 2: {"color": "#ff0000"}}
+    assert not bulk_ops.recolor(store, [1], "#ff0000")
+
+    changes.clear()
+    kept = connections[1]
+    edit = bulk_ops.delete(store, connections, [1, 99])
+    assert edit.changed == [1] and edit.patch == {1: None}
+    assert [card.id for card in edit.removed_cards] == [1] and type(edit.removed_cards[0]) is Card
+    assert len(edit.removed_connections) == 2 and connections == [kept]
+    assert sorted(store) == [2, 3, 4]
+    assert len(changes) == 1 and len(changes[0].connections(CONNECTION_REMOVED)) == 2
@@ -0,0 +1,120 @@
+import copy
+import random
+
+import pytest
+
+from src import card_store
+from src.board_model import (
+    CARD_ADDED,
+    CARD_COLOR_CHANGED,
+    CARD_MOVED,
+    CARD_REMOVED,
+    CARD_RESIZED,
+    BoardEvents,
+    Card,
+)
+from src.card_store import CardStore, card_ids_with_center_in, cards_bounds
+
+
+def make_cards(count, seed=0):
+    rng = random.Random(seed)
+    return {
+        i: Card(id=i, x=rng.uniform(-500, 500), y=rng.uniform(-500, 500), width=rng.choice([80, 120]), height=60)
+        for i in range(1, count + 1)
+    }
+
+
+@pytest.fixture(params=["array", "numpy"])
+def use_numpy(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+        monkeypatch.setattr(card_store, "VECTOR_MIN_ROWS", 1)
+        return True
+    return False
+
+
+def test_card_writes_reach_columns_and_removal_detaches_card():
+    store = CardStore({1: Card(id=1, x=10, y=20, width=100, height=50)})
+    card = store[1]
+
+    card.x += 5
+    assert store.xs[card._row] == 15
+    store.translate([1], 1, -1)
+    assert (card.x, card.y) == (16, 19)
+
+    store[2] = Card(id=2, x=0, y=0, width=10, height=10)
+    removed = store.pop(1)
+    assert removed is card and type(card) is Card
+    assert (card.x, card.y, card.width, card.height) == (16, 19, 100, 50)
+    assert store[2]._row == 0 and list(store.xs) == [0.0]
+    # Копия и история работают с отвязанными карточками
+    assert type(copy.deepcopy(store[2])) is Card
+    assert copy.deepcopy(store) == store and store[2] == Card(id=2, x=0, y=0, width=10, height=10)
+
+    store.clear()
+    assert not store and not store.xs and store.get(2) is None
+
+
+def test_bulk_operations_match_per_card_arithmetic(use_numpy):
+    cards = make_cards(200)
+    expected = {cid: (c.x, c.y, c.width, c.height) for cid, c in cards.items()}
+    store = CardStore(cards, use_numpy=use_numpy)
+    for cid in (5, 17, 120):
+        del store[cid]
+        expected.pop(cid)
+
+    moved = store.translate([1, 2, 2, 999], 3.5, -2)
+    assert sorted(moved) == [1, 2]
+    for cid in (1, 2):
+        x, y, w, h = expected[cid]
+        expected[cid] = (x + 3.5, y - 2, w, h)
+
+    store.scale(1.1, 40, -30)
+    expected = {
+        cid: (40 + (x - 40) * 1.1, -30 + (y + 30) * 1.1, w * 1.1, h * 1.1)
+        for cid, (x, y, w, h) in expected.items()
+    }
+    assert {cid: (c.x, c.y, c.width, c.height) for cid, c in store.items()} == expected
+
+    everything = sorted(store, reverse=True)
+    assert sorted(store.translate(everything, 1, 0)) == sorted(everything)
+    store.translate(everything, -1, 0)
+    assert {cid: (c.x, c.y) for cid, c in store.items()} == {cid: v[:2] for cid, v in expected.items()}
+
+    snapped = store.snap(list(store), 50)
+    assert set(snapped) == {cid for cid, (x, y, _w, _h) in expected.items() if x % 50 or y % 50}
+    assert all(card.x % 50 == 0 and card.y % 50 == 0 for card in store.values())
+
+    plain = {cid: Card(id=cid, x=c.x, y=c.y, width=c.width, height=c.height) for cid, c in store.items()}
+    assert cards_bounds(store) == cards_bounds(plain)
+    assert sorted(card_ids_with_center_in(store, -100, -100, 200, 150)) == sorted(
+        card_ids_with_center_in(plain, -100, -100, 200, 150)
+    )
+    assert cards_bounds(CardStore()) is None
+
+
+def test_store_reports_card_changes(use_numpy):
+    events = BoardEvents()
+    changes = []
+    events.subscribe(changes.append)
+    store = CardStore(make_cards(100), use_numpy=use_numpy, events=events)
+    assert changes == []
+
+    store[1].x += 1
+    store[2].color = "#ff0000"
+    store[101] = Card(id=101, x=0, y=0, width=10, height=10)
+    del store[3]
+    assert [change.kinds for change in changes] == [
+        {CARD_MOVED},
+        {CARD_COLOR_CHANGED},
+        {CARD_ADDED},
+        {CARD_REMOVED},
+    ]
+    assert [change.card_ids() for change in changes] == [{1}, {2}, {101}, {3}]
+
+    changes.clear()
+    store.translate(list(store), 5, 5)
+    store.scale(2, 0, 0)
+    assert len(changes) == 2
+    assert changes[0].kinds == {CARD_MOVED} and changes[0].ids(CARD_MOVED) == set(store)
+    assert changes[1].kinds == {CARD_MOVED, CARD_RESIZED}
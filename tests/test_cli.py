@@ -0,0 +1,121 @@
+import json
+
+import pytest
+
+from src import cli
+from src.board_model import BoardData, Card, Connection, Frame
+
+
+def _write_board(path, count: int = 4):
+    cards = {
+        i: Card(id=i, x=i * 200.0, y=100.0, width=160, height=80, text=f"Карточка {i}")
+        for i in range(1, count + 1)
+    }
+    connections = [Connection(from_id=i, to_id=i + 1, label="далее") for i in range(1, count)]
+    frames = {1: Frame(id=1, x1=0, y1=0, x2=500, y2=300, title="Группа")}
+    data = BoardData(cards=cards, connections=connections, frames=frames).to_primitive()
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    return data
+
+
+def test_validate_reports_bad_files_with_exit_code(tmp_path, capsys):
+    good = tmp_path / "good.json"
+    bad = tmp_path / "bad.json"
+    _write_board(good)
+    bad.write_text('{"cards": []}', encoding="utf-8")
+
+    assert cli.main(["-j", "1", "validate", str(good)]) == cli.EXIT_OK
+    assert cli.main(["-j", "2", "validate", str(good), str(bad)]) == cli.EXIT_FAILED
+    err = capsys.readouterr().err
+    assert "[2/2]" in err
+    assert "ОШИБКА" in err and str(bad) in err
+
+
+def test_convert_roundtrip_through_container(tmp_path):
+    source = tmp_path / "board.json"
+    data = _write_board(source)
+    out = tmp_path / "out"
+    back = tmp_path / "back"
+
+    assert cli.main(["-q", "convert", "--to", "mboard", "-o", str(out), str(source)]) == 0
+    assert (out / "board.mboard").exists()
+    assert cli.main(["-q", "convert", "--to", "json", "-o", str(back), str(out / "board.mboard")]) == 0
+    assert json.loads((back / "board.json").read_text(encoding="utf-8")) == data
+
+
+def test_stats_json_output(tmp_path, capsys):
+    source = tmp_path / "board.json"
+    _write_board(source, count=5)
+
+    assert cli.main(["-q", "stats", "--json", str(source)]) == 0
+    stats = json.loads(capsys.readouterr().out)[0]
+    assert stats["cards"] == 5
+    assert stats["connections"] == 4
+    assert stats["frames"] == 1
+    assert stats["format"] == "json"
+
+
+def test_export_svg_and_png(tmp_path):
+    source = tmp_path / "board.json"
+    _write_board(source)
+    out = tmp_path / "exported"
+
+    assert cli.main(["-q", "export", "--format", "svg", "-o", str(out), str(source)]) == 0
+    svg = (out / "board.svg").read_text(encoding="utf-8")
+    assert svg.count("<rect") == 1 + 1 + 4  # фон, рамка, карточки
+    assert "Карточка 3" in svg
+
+    pytest.importorskip("PIL")
+    assert cli.main(["-q", "export", "--format", "png", "-o", str(out), str(source)]) == 0
+    assert (out / "board.png").read_bytes().startswith(b"\x89PNG")
+
+
+def test_conflicting_outputs_are_rejected(tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    first = tmp_path / "a" / "board.json"
+    second = tmp_path / "b" / "board.json"
+    _write_board(first)
+    _write_board(second)
+
+    with pytest.raises(SystemExit) as exc:
+        cli.main(["export", "--format", "svg", "-o", str(tmp_path), str(first), str(second)])
+    assert exc.value.code == cli.EXIT_USAGE
+
+
+def test_export_png_region_and_tiles(tmp_path):
+    pytest.importorskip("PIL")
+    source = tmp_path / "board.json"
+    _write_board(source)
+    out = tmp_path / "exported"
+
+    args = ["-q", "export", "--format", "png", "-o", str(out), str(source)]
+    assert cli.main(args[:-1] + ["--region", "0,0,200,100", "--dpi", "192", str(source)]) == 0
+    from PIL import Image
+
+    with Image.open(out / "board.png") as img:
+        assert img.size == (400, 200)
+
+    assert cli.main(args[:-1] + ["--tiles", "--tile-size", "128", str(source)]) == 0
+    manifest = json.loads((out / "board_tiles" / "manifest.json").read_text())
+    assert manifest["tile_size"] == 128
+
+
+@pytest.mark.parametrize("value", ["0", "-64", "abc"])
+def test_tile_size_must_be_positive(tmp_path, value):
+    path = tmp_path / "board.json"
+    _write_board(path)
+
+    with pytest.raises(SystemExit) as exc:
+        cli.main(["export", "--tile-size", value, str(path)])
+    assert exc.value.code == cli.EXIT_USAGE
+
+
+@pytest.mark.parametrize("value", ["0", "-1.5", "nan", "inf", "abc"])
+def test_scale_must_be_positive(tmp_path, value):
+    path = tmp_path / "board.json"
+    _write_board(path)
+
+    with pytest.raises(SystemExit) as exc:
+        cli.main(["export", "--format", "png", "--scale", value, str(path)])
+    assert exc.value.code == cli.EXIT_USAGE
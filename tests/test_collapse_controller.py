@@ -0,0 +1,174 @@
+from unittest import mock
+
+from src.board_index import ConnectionIndex, FrameIndex
+from src.board_model import BoardEvents, Card, Connection, Frame
+from src.canvas_view import CanvasView
+from src.card_store import CardStore
+from src.collapse_controller import CollapseController, cards_count_label
+from src.config import THEMES
+from src.handle_pool import POOLED_TAG, HandlePool
+from src.main import BoardApp
+from src.render_backend import RecordingBackend
+from src.spatial_index import CardIndex
+
+
+class FakeApp:
+    """Ровно то, что контроллеру нужно от BoardApp, поверх записывающего бэкенда."""
+
+    def __init__(self):
+        self.board_events = BoardEvents()
+        self.cards = CardStore(
+            {
+                1: Card(id=1, x=200, y=200, width=80, height=60),
+                2: Card(id=2, x=300, y=300, width=80, height=60),
+                3: Card(id=3, x=700, y=700, width=80, height=60),
+                4: Card(id=4, x=1500, y=200, width=80, height=60),
+            },
+            events=self.board_events,
+        )
+        self.connections = [
+            Connection(from_id=1, to_id=2),
+            Connection(from_id=2, to_id=4),
+            Connection(from_id=3, to_id=4, label="связь"),
+        ]
+        self.frames = {
+            1: Frame(id=1, x1=0, y1=0, x2=1000, y2=1000, title="Внешняя"),
+            2: Frame(id=2, x1=100, y1=100, x2=400, y2=400, title="Вложенная"),
+        }
+        self.canvas = RecordingBackend()
+        self.canvas_view = CanvasView(self.canvas, None, THEMES["light"])
+        self.items = self.canvas_view.items
+        self.handle_pool = HandlePool(self.canvas)
+        self.card_index = CardIndex(lambda: self.cards, self.board_events)
+        self.connection_index = ConnectionIndex(lambda: self.connections, self.board_events)
+        self.frame_index = FrameIndex(lambda: self.cards, lambda: self.frames, self.card_index, self.board_events)
+        self.selected_cards = set()
+        self.selected_frame_id = None
+        self.selected_connection = self.context_connection = self.hover_connection = None
+        self.selection_controller = mock.Mock()
+        self.collapse_controller = CollapseController(self)
+
+    def _clear_attachment_previews_for_card(self, card_id):
+        pass
+
+    _delete_card_items = BoardApp._delete_card_items
+
+    def render_card_attachments(self, card_id):
+        pass
+
+    def hide_connection_handles(self, connection):
+        pass
+
+    _discard_connection_items = BoardApp._discard_connection_items
+
+    def drawn_cards(self):
+        return {cid for cid in self.cards if self.canvas.find_withtag(f"card_{cid}")}
+
+    def drawn_connections(self):
+        return {
+            (conn.from_id, conn.to_id)
+            for conn in self.connections
+            if self.items.connections.get(id(conn)) and self.items.connection(conn).line_id
+        }
+
+    def hit_connections(self):
+        """Связи, которые находит хит-тест (индекс отрезков ``CanvasView``)."""
+        return {
+            (conn.from_id, conn.to_id)
+            for conn in self.connections
+            if id(conn) in self.canvas_view.connection_hits
+        }
+
+    def set_collapsed(self, frame_id, collapsed):
+        self.frames[frame_id].collapsed = collapsed
+        self.collapse_controller.refresh()
+
+
+def test_collapsed_frames_release_and_restore_their_items():
+    app = FakeApp()
+    app.canvas_view.render_board(app.cards, app.frames, app.connections, grid_size=100, show_grid=False)
+    app.collapse_controller.reset()
+    app.collapse_controller.refresh()
+    full = len(app.canvas.items)
+    assert app.canvas_view.connection_at(250, 250) is app.connections[0]
+    app.selected_connection = app.hover_connection = app.connections[0]
+
+    app.set_collapsed(2, True)
+    assert app.drawn_cards() == {3, 4}
+    assert app.drawn_connections() == {(3, 4)}
+    # Связи внутри свёрнутой рамки не находятся хит-тестом и не остаются выделенными
+    assert app.hit_connections() == {(3, 4)}
+    assert app.canvas_view.connection_at(250, 250) is None
+    assert app.selected_connection is None and app.hover_connection is None
+    summary = app.items.frame(2).summary_ids
+    assert app.canvas.itemcget(summary[0], "text") == "2 карточки"
+    # Подпись, рамка миниатюры и по прямоугольнику на карточку
+    assert len(summary) == 4 and len(app.canvas.items) == full - 6 - 2 + 4
+
+    app.set_collapsed(1, True)
+    assert app.drawn_cards() == {4}
+    assert app.canvas.itemcget(app.items.frame(2).rect_id, "state") == "hidden"
+    assert all(app.canvas.itemcget(i, "state") == "hidden" for i in app.items.frame(2).summary_ids)
+
+    # Развёрнутая внешняя рамка не раскрывает свёрнутую вложенную
+    app.set_collapsed(1, False)
+    assert app.drawn_cards() == {3, 4}
+    assert app.drawn_connections() == {(3, 4)}
+    assert app.canvas.itemcget(app.items.frame(2).rect_id, "state") == "normal"
+
+    app.set_collapsed(2, False)
+    assert app.drawn_cards() == {1, 2, 3, 4}
+    assert app.drawn_connections() == {(1, 2), (2, 4), (3, 4)}
+    assert app.hit_connections() == {(1, 2), (2, 4), (3, 4)}
+    assert app.items.frame(2).summary_ids == [] and len(app.canvas.items) == full
+
+
+def test_collapsed_cards_return_their_handles_to_the_pool():
+    app = FakeApp()
+    app.canvas_view.render_board(app.cards, app.frames, app.connections, grid_size=100, show_grid=False)
+    app.collapse_controller.reset()
+    pool = app.handle_pool
+    items = app.items.card(1)
+    resize = pool.acquire("resize", app.canvas.create_rectangle, (0, 0, 10, 10), tags=("card_1",))
+    connect = pool.acquire("connect", app.canvas.create_rectangle, (0, 0, 5, 5), tags=("card_1",))
+    items.resize_handle_id = resize
+    items.connect_handles["n"] = connect
+
+    app.set_collapsed(2, True)
+
+    # Хэндлы остались на холсте спрятанными и снова выдаются пулом
+    assert set(app.canvas.find_withtag(POOLED_TAG)) == {resize, connect}
+    assert pool.size() == (2, 2)
+    assert pool.acquire("connect", app.canvas.create_rectangle, (0, 0, 5, 5)) == connect
+
+
+def test_cards_count_label_agrees_with_number():
+    assert [cards_count_label(n) for n in (1, 2, 5, 11, 21, 104, 112)] == [
+        "1 карточка",
+        "2 карточки",
+        "5 карточек",
+        "11 карточек",
+        "21 карточка",
+        "104 карточки",
+        "112 карточек",
+    ]
+
+
+def test_refresh_reuses_collapsed_members_until_they_change():
+    app = FakeApp()
+    app.canvas_view.render_board(app.cards, app.frames, app.connections, grid_size=100, show_grid=False)
+    app.collapse_controller.reset()
+    app.set_collapsed(2, True)
+
+    with mock.patch.object(app.frame_index, "cards_in", wraps=app.frame_index.cards_in) as cards_in:
+        app.collapse_controller.refresh()
+        app.cards.translate([4], 10, 0)
+        app.collapse_controller.refresh()
+        assert cards_in.call_count == 0
+
+        # Карточка, въехавшая в свёрнутую рамку, убирается с холста
+        app.cards.translate([3], -450, -450)
+        app.collapse_controller.refresh()
+        assert cards_in.call_count == 1
+    assert app.drawn_cards() == {4}
+    assert app.canvas.itemcget(app.items.frame(2).summary_ids[0], "text") == "3 карточки"
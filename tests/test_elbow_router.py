@@ -0,0 +1,164 @@
+import random
+from unittest import mock
+
+from src.board_model import (
+    CONNECTION_CHANGED,
+    FRAME_ADDED,
+    BoardEvents,
+    Card,
+    Connection,
+    Frame,
+)
+from src.card_store import CardStore
+from src.elbow_router import ElbowRouter, route_orthogonal
+from src.geometry import connection_geometry
+from src.main import BoardApp
+from src.spatial_index import CardIndex, card_box
+
+
+def segments(coords):
+    points = list(zip(coords[0::2], coords[1::2]))
+    return list(zip(points, points[1:]))
+
+
+def crosses_card(coords, cards, skip=()):
+    """Заходит ли ломаная внутрь какой-нибудь карточки (проверка по точкам отрезков)."""
+
+    for (ax, ay), (bx, by) in segments(coords):
+        for step in range(1, 50):
+            x = ax + (bx - ax) * step / 50
+            y = ay + (by - ay) * step / 50
+            for card in cards.values():
+                x1, y1, x2, y2 = card_box(card)
+                if card.id not in skip and x1 < x < x2 and y1 < y < y2:
+                    return True
+    return False
+
+
+def make_router(cards, frames=None, events=None):
+    frames = {} if frames is None else frames
+    return ElbowRouter(lambda: cards, lambda: frames, CardIndex(lambda: cards, events), events)
+
+
+def test_route_goes_around_cards_between_ends():
+    cards = {
+        1: Card(id=1, x=0, y=0, width=100, height=60),
+        2: Card(id=2, x=600, y=0, width=100, height=60),
+        3: Card(id=3, x=300, y=0, width=120, height=200),
+    }
+    conn = Connection(from_id=1, to_id=2, style="elbow")
+    plain, _info = connection_geometry(conn, cards[1], cards[2])
+    assert crosses_card(plain, cards)
+
+    waypoints = make_router(cards).route(conn, cards[1], cards[2])
+    coords, info = connection_geometry(conn, cards[1], cards[2], waypoints)
+    assert not crosses_card(coords, cards)
+    assert all(ax == bx or ay == by for (ax, ay), (bx, by) in segments(coords))
+    assert (coords[0], coords[1], coords[-2], coords[-1]) == (50, 0, 550, 0)
+    # Обход сверху или снизу — два поворота туда и два обратно
+    assert len(coords) // 2 == 6
+    assert info["start_dir"] == (1.0, 0.0)
+
+
+def test_routes_on_random_board_avoid_cards():
+    rng = random.Random(5)
+    cards = {}
+    for i in range(1, 40):
+        cards[i] = Card(id=i, x=(i % 8) * 220 + rng.uniform(-30, 30), y=(i // 8) * 180, width=120, height=70)
+    router = make_router(cards)
+    routed = 0
+    for _ in range(60):
+        a, b = rng.sample(sorted(cards), 2)
+        conn = Connection(from_id=a, to_id=b, style="elbow")
+        waypoints = router.route(conn, cards[a], cards[b])
+        if waypoints is None:
+            continue
+        routed += 1
+        coords, _info = connection_geometry(conn, cards[a], cards[b], waypoints)
+        assert all(ax == bx or ay == by for (ax, ay), (bx, by) in segments(coords))
+        assert not crosses_card(coords, cards)
+    assert routed > 50
+
+
+def test_frame_borders_are_crossed_only_when_needed():
+    obstacles = [(-50, -30, 50, 30), (350, 270, 450, 330)]
+    # Рамка у выхода из первой карточки: путь сворачивает раньше, чем войти в неё
+    frame = (100.0, -60.0, 180.0, 60.0)
+    around = route_orthogonal((50, 0), "e", (350, 300), "w", obstacles, [frame])
+    assert around == (66.0, 0.0, 66.0, 300.0)
+    assert route_orthogonal((50, 0), "e", (350, 300), "w", obstacles) is not None
+
+
+def test_router_reroutes_only_connections_near_changes():
+    events = BoardEvents()
+    cards = CardStore(
+        {
+            1: Card(id=1, x=0, y=0, width=100, height=60),
+            2: Card(id=2, x=600, y=0, width=100, height=60),
+            3: Card(id=3, x=0, y=2000, width=100, height=60),
+            4: Card(id=4, x=600, y=2000, width=100, height=60),
+            5: Card(id=5, x=300, y=1000, width=100, height=60),
+        },
+        events=events,
+    )
+    frames = {}
+    router = make_router(cards, frames, events)
+    top = Connection(from_id=1, to_id=2, style="elbow")
+    bottom = Connection(from_id=3, to_id=4, style="elbow")
+    straight = Connection(from_id=1, to_id=4)
+    first = router.route(top, cards[1], cards[2])
+    router.route(bottom, cards[3], cards[4])
+    assert first == ()  # карточки на одной прямой: обход не нужен
+    assert router.route(straight, cards[1], cards[4]) is None
+
+    # Карточка встаёт поперёк верхней связи: пересчитывается только она
+    cards.translate([5], 0, -1000)
+    assert router.take_rerouted() == [top]
+    assert router.cache_stats() == (0, 2)
+    detour = router.route(top, cards[1], cards[2])
+    router.route(bottom, cards[3], cards[4])
+    assert router.cache_stats() == (1, 3)
+    assert len(detour) > 2
+
+    # Карточка уходит — маршрут снова прямой
+    cards.translate([5], 0, 1000)
+    assert router.take_rerouted() == [top]
+    assert router.route(top, cards[1], cards[2]) == first
+
+    frames[1] = Frame(id=1, x1=-100, y1=1900, x2=800, y2=2100)
+    events.emit(FRAME_ADDED, (1,))
+    assert router.take_rerouted() == [bottom]
+
+
+def test_suspended_router_defers_routes_until_drag_ends():
+    cards = {
+        1: Card(id=1, x=0, y=0, width=100, height=60),
+        2: Card(id=2, x=600, y=0, width=100, height=60),
+        3: Card(id=3, x=300, y=0, width=120, height=200),
+    }
+    router = make_router(cards)
+    conn = Connection(from_id=1, to_id=2, style="elbow")
+    router.suspended = True
+    assert router.route(conn, cards[1], cards[2]) is None
+    router.suspended = False
+    assert router.take_rerouted() == [conn]
+    assert router.route(conn, cards[1], cards[2]) is not None
+
+
+def test_panel_style_and_radius_changes_reach_subscribers():
+    app = BoardApp.__new__(BoardApp)
+    app.board_events = BoardEvents()
+    app.cards = {}
+    app.canvas_view = mock.Mock()
+    app.show_connection_handles = mock.Mock()
+    app.push_history = mock.Mock()
+    app.var_connection_style = mock.Mock(get=lambda: "elbow")
+    app.selected_connection = conn = Connection(from_id=1, to_id=2)
+    changed = []
+    app.board_events.subscribe(lambda change: changed.append(change.connections(CONNECTION_CHANGED)), (CONNECTION_CHANGED,))
+
+    app.on_connection_style_change()
+    app.on_connection_radius_change("12")
+
+    assert (conn.style, conn.radius) == ("elbow", 12.0)
+    assert changed == [[conn], [conn]]
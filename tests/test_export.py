@@ -0,0 +1,153 @@
+import json
+
+import pytest
+
+from src.board_model import BoardData, Card, Connection, Frame
+from src.config import THEMES
+from src import export
+from src.export import write_png, write_png_tiles
+
+Image = pytest.importorskip("PIL.Image")
+ImageChops = pytest.importorskip("PIL.ImageChops")
+
+THEME = THEMES["light"]
+
+
+def _board(count: int = 12) -> BoardData:
+    cards = {
+        i: Card(id=i, x=(i % 4) * 220.0, y=(i // 4) * 160.0, width=160, height=90, text=f"Карточка {i}\nвторая строка")
+        for i in range(1, count + 1)
+    }
+    connections = [Connection(from_id=i, to_id=i + 1, label="дальше") for i in range(1, count)]
+    frames = {1: Frame(id=1, x1=-40, y1=-40, x2=500, y2=260, title="Группа")}
+    return BoardData(cards=cards, connections=connections, frames=frames)
+
+
+def _same_pixels(first, second) -> bool:
+    with Image.open(first) as a, Image.open(second) as b:
+        return a.size == b.size and ImageChops.difference(a.convert("RGB"), b.convert("RGB")).getbbox() is None
+
+
+def test_tiled_export_matches_single_pass(tmp_path):
+    board = _board()
+    write_png(board, tmp_path / "single.png", theme=THEME, tile_size=10_000)
+    write_png(board, tmp_path / "tiled.png", theme=THEME, tile_size=97)
+
+    assert _same_pixels(tmp_path / "single.png", tmp_path / "tiled.png")
+
+
+def _scattered_board(count: int = 24) -> BoardData:
+    """Дробные координаты и диагональные, скруглённые и угловые связи."""
+
+    cards = {
+        i: Card(id=i, x=i * 173.37 + (i % 3) * 41.9, y=(i % 5) * 131.61 + i * 7.3, width=150.5, height=87.25, text=f"Карточка {i}")
+        for i in range(1, count + 1)
+    }
+    styles = ("straight", "rounded", "elbow")
+    connections = [
+        Connection(from_id=i, to_id=(i * 7) % count + 1, style=styles[i % 3], label="связь" if i % 4 == 0 else "")
+        for i in range(1, count)
+    ]
+    frames = {1: Frame(id=1, x1=-30.3, y1=-20.7, x2=900.45, y2=420.15, title="Группа")}
+    return BoardData(cards=cards, connections=connections, frames=frames)
+
+
+@pytest.mark.parametrize("scale", [1.0, 1.37, 2.0])
+def test_tiled_export_matches_single_pass_at_fractional_positions(tmp_path, scale):
+    board = _scattered_board()
+    write_png(board, tmp_path / "single.png", theme=THEME, scale=scale, tile_size=100_000)
+    write_png(board, tmp_path / "tiled.png", theme=THEME, scale=scale, tile_size=97)
+
+    assert _same_pixels(tmp_path / "single.png", tmp_path / "tiled.png")
+
+
+@pytest.mark.parametrize("direction", ["end", "start"])
+def test_png_connections_have_arrowheads_like_the_canvas(tmp_path, direction):
+    board = BoardData(
+        cards={
+            1: Card(id=1, x=0, y=0, width=100, height=60),
+            2: Card(id=2, x=300, y=0, width=100, height=60),
+        },
+        connections=[Connection(from_id=1, to_id=2, direction=direction)],
+        frames={},
+    )
+    write_png(board, tmp_path / "arrow.png", theme=THEME, padding=0)
+
+    def column_height(x):
+        color = Image.new("RGB", (1, 1), THEME["connection"]).getpixel((0, 0))
+        return sum(1 for y in range(img.height) if img.getpixel((x, y)) == color)
+
+    with Image.open(tmp_path / "arrow.png") as img:
+        img = img.convert("RGB")
+        # Линия идёт между краями карточек: x от 100 до 300 в пикселях изображения
+        near_from, middle, near_to = column_height(105), column_height(200), column_height(295)
+    assert middle == 2
+    if direction == "end":
+        assert near_to > middle and near_from == middle
+    else:
+        assert near_from > middle and near_to == middle
+
+
+def test_parallel_export_matches_serial(tmp_path):
+    board = _board()
+    write_png(board, tmp_path / "serial.png", theme=THEME, tile_size=256)
+    write_png(board, tmp_path / "parallel.png", theme=THEME, tile_size=256, jobs=2)
+
+    assert _same_pixels(tmp_path / "serial.png", tmp_path / "parallel.png")
+
+
+def test_region_selection_and_dpi(tmp_path):
+    board = _board()
+
+    size = write_png(board, tmp_path / "region.png", theme=THEME, region=(0, 0, 300, 200))
+    assert size == (300, 200)
+
+    full = write_png(board, tmp_path / "full.png", theme=THEME)
+    selected = write_png(board, tmp_path / "selected.png", theme=THEME, card_ids=[1, 2])
+    assert selected[0] < full[0] and selected[1] < full[1]
+
+    doubled = write_png(board, tmp_path / "dpi.png", theme=THEME, region=(0, 0, 300, 200), dpi=192)
+    assert doubled == (600, 400)
+    with Image.open(tmp_path / "dpi.png") as img:
+        assert round(img.info["dpi"][0]) == 192
+
+    with pytest.raises(ValueError):
+        write_png(BoardData(cards={}, connections=[], frames={}), tmp_path / "empty.png", theme=THEME)
+
+
+def test_tiles_with_pyramid_levels(tmp_path, monkeypatch):
+    routers = []
+    board_router = export.board_router
+    monkeypatch.setattr(export, "board_router", lambda board: routers.append(board) or board_router(board))
+    manifest = write_png_tiles(_board(), tmp_path / "tiles", theme=THEME, tile_size=128)
+
+    levels = manifest["levels"]
+    # Маршруты связей строятся один раз на весь экспорт, а не на каждый уровень
+    assert len(levels) > 1 and len(routers) == 1
+    assert levels[0]["scale"] == 1.0
+    assert levels[-1]["width"] <= 128 and levels[-1]["height"] <= 128
+    assert [level["scale"] for level in levels[1:]] == [levels[0]["scale"] / 2 ** n for n in range(1, len(levels))]
+    for index, level in enumerate(levels):
+        files = list((tmp_path / "tiles" / str(index)).glob("*.png"))
+        assert len(files) == level["columns"] * level["rows"]
+    assert json.loads((tmp_path / "tiles" / "manifest.json").read_text()) == manifest
+
+
+def test_app_export_offers_tiles_above_the_pixel_budget(tmp_path, monkeypatch):
+    from src import files
+
+    board = _board()
+    width, height = export.png_size(board, dpi=192)
+    assert (width, height) == write_png(board, tmp_path / "full.png", theme=THEME, dpi=192)
+
+    monkeypatch.setattr(files, "PNG_PIXEL_BUDGET", width * height - 1)
+    monkeypatch.setattr(files.simpledialog, "askinteger", lambda *a, **k: 192)
+    monkeypatch.setattr(files.messagebox, "askyesnocancel", lambda *a, **k: True)
+    monkeypatch.setattr(files.messagebox, "showinfo", lambda *a, **k: None)
+    monkeypatch.setattr(files.filedialog, "askdirectory", lambda **k: str(tmp_path / "tiles"))
+    monkeypatch.setattr(files.filedialog, "asksaveasfilename", lambda **k: pytest.fail("asked for a single file"))
+    monkeypatch.setattr(files, "write_png", lambda *a, **k: pytest.fail("rendered a full-size image"))
+
+    assert files.export_png(board=board, theme=THEME)
+    manifest = json.loads((tmp_path / "tiles" / "manifest.json").read_text(encoding="utf-8"))
+    assert (manifest["levels"][0]["width"], manifest["levels"][0]["height"]) == (width, height)
@@ -0,0 +1,83 @@
+import copy
+import random
+
+import pytest
+
+from src import geometry_batch
+from src.board_model import Card, Connection
+from src.canvas_view import CanvasView
+from src.config import THEMES
+from src.geometry import connection_geometry
+from src.render_backend import RecordingBackend
+
+
+def make_jobs(count=400, seed=3):
+    rng = random.Random(seed)
+    cards = {
+        i: Card(id=i, x=rng.uniform(-800, 800), y=rng.uniform(-800, 800), width=rng.choice([80, 120, 200]), height=60)
+        for i in range(1, 60)
+    }
+    # Совпадающие центры и вертикальные/горизонтальные пары — краевые случаи
+    cards[60] = Card(id=60, x=cards[1].x, y=cards[1].y, width=80, height=60)
+    cards[61] = Card(id=61, x=cards[2].x, y=cards[2].y + 300, width=80, height=60)
+    anchors = [None, "n", "e", "s", "w"]
+    jobs = []
+    for _ in range(count):
+        from_id, to_id = rng.sample(sorted(cards), 2)
+        conn = Connection(
+            from_id=from_id,
+            to_id=to_id,
+            style=rng.choice(["straight", "elbow", "rounded"]),
+            radius=rng.choice([0.0, 10.0, 40.0, 400.0]),
+            curvature=rng.choice([0.0, -60.0, 25.0, 900.0]),
+            from_anchor=rng.choice(anchors),
+            to_anchor=rng.choice(anchors),
+        )
+        jobs.append((conn, cards[from_id], cards[to_id]))
+    jobs.append((Connection(from_id=1, to_id=60, style="rounded"), cards[1], cards[60]))
+    jobs.append((Connection(from_id=2, to_id=61, style="elbow"), cards[2], cards[61]))
+    return jobs
+
+
+@pytest.fixture(params=["scalar", "numpy"])
+def min_connections(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+        monkeypatch.setattr(geometry_batch, "VECTOR_MIN_CONNECTIONS", 1)
+    else:
+        monkeypatch.setattr(geometry_batch, "_numpy", lambda: None)
+
+
+def test_batch_matches_scalar_geometry_exactly(min_connections):
+    jobs = make_jobs()
+    expected = []
+    for conn, from_card, to_card in copy.deepcopy(jobs):
+        coords, render_info = connection_geometry(conn, from_card, to_card)
+        expected.append((tuple(coords), render_info, conn.from_anchor, conn.to_anchor))
+
+    routes = geometry_batch.connection_geometries(jobs)
+
+    assert len(routes) == len(expected)
+    for (conn, _f, _t), (coords, render_info), want in zip(jobs, routes, expected):
+        assert (coords, render_info, conn.from_anchor, conn.to_anchor) == want
+
+
+def test_canvas_view_batches_only_cache_misses(min_connections):
+    jobs = make_jobs(count=80)
+    cards = {card.id: card for _conn, from_card, to_card in jobs for card in (from_card, to_card)}
+    connections = [conn for conn, _f, _t in jobs]
+    view = CanvasView(RecordingBackend(), None, THEMES["light"])
+
+    first = view.connection_geometries(connections, cards)
+    assert view.geometry_cache.cache_stats() == (0, len(connections))
+    cards[1].x += 15
+    moved = sum(1 in (conn.from_id, conn.to_id) for conn in connections)
+    second = view.connection_geometries(connections, cards)
+
+    assert view.geometry_cache.cache_stats() == (len(connections) - moved, len(connections) + moved)
+    assert [item[0] for item in second] == connections
+    for (conn, coords, render_info), (_c, old_coords, _i) in zip(second, first):
+        want_coords, want_info = connection_geometry(copy.deepcopy(conn), cards[conn.from_id], cards[conn.to_id])
+        assert (coords, render_info) == (tuple(want_coords), want_info)
+        if 1 not in (conn.from_id, conn.to_id):
+            assert coords is old_coords
@@ -0,0 +1,158 @@
+from unittest import mock
+
+from src.board_model import Card, Connection, Frame
+from src.canvas_view import CanvasView
+from src.card_store import CardStore
+from src.config import THEMES
+from src.handle_pool import POOLED_TAG, HandlePool
+from src.main import BoardApp
+from src.render_backend import RecordingBackend
+
+
+class OvalBackend(RecordingBackend):
+    """Записывающий бэкенд с овалами и привязками, как у ``tk.Canvas``."""
+
+    def create_oval(self, x1, y1, x2, y2, **options):
+        self.calls["create_oval"] += 1
+        return self._add("oval", (x1, y1, x2, y2), options)
+
+    def tag_bind(self, item, sequence, callback):
+        self.calls["tag_bind"] += 1
+
+    def config(self, **options):
+        self.configure(**options)
+
+
+def _make_app():
+    app = BoardApp.__new__(BoardApp)
+    app.canvas = OvalBackend()
+    app.theme = THEMES["light"]
+    app.canvas_view = CanvasView(app.canvas, None, app.theme)
+    app.cards = {
+        1: Card(id=1, x=100, y=100, width=80, height=60),
+        2: Card(id=2, x=400, y=200, width=80, height=60),
+        3: Card(id=3, x=200, y=500, width=80, height=60),
+    }
+    app.connections = [Connection(from_id=1, to_id=2), Connection(from_id=2, to_id=3)]
+    app.frames = {1: Frame(id=1, x1=0, y1=0, x2=600, y2=600, title="Рамка")}
+    app.connection_handle_map = {}
+    app.handle_pool = HandlePool(app.canvas)
+    app.collapse_controller = mock.Mock()
+    app.collapse_controller.is_hidden.return_value = False
+    for card in app.cards.values():
+        app.canvas_view.draw_card(card)
+    app.canvas_view.draw_frame(app.frames[1])
+    for conn in app.connections:
+        app.canvas_view.draw_connection(conn, app.cards[conn.from_id], app.cards[conn.to_id])
+    return app
+
+
+def _created(backend):
+    return backend.calls["create_oval"] + backend.calls["create_rectangle"]
+
+
+def test_pool_reuses_released_items_and_strips_tags():
+    backend = OvalBackend()
+    pool = HandlePool(backend)
+    first = pool.acquire("connect", backend.create_oval, (0, 0, 10, 10), fill="red", tags=("connect_handle", "card_1"))
+    pool.release(first)
+    assert backend.items[first].options["state"] == "hidden"
+    assert backend.find_withtag("card_1") == ()
+    assert backend.find_withtag(POOLED_TAG) == (first,)
+
+    second = pool.acquire("connect", backend.create_oval, (5, 5, 15, 15), fill="blue", tags=("connect_handle", "card_2"))
+    assert second == first
+    assert backend.items[second].options["state"] == "normal"
+    assert backend.items[second].options["fill"] == "blue"
+    assert backend.coords(second) == (5.0, 5.0, 15.0, 15.0)
+    assert backend.find_withtag("card_2") == (second,)
+    # Другой вид — другой элемент
+    assert pool.acquire("resize", backend.create_rectangle, (0, 0, 1, 1)) != first
+    assert pool.cache_stats() == (1, 2)
+    assert pool.size() == (2, 0)
+
+    pool.release(second)
+    pool.release(second)
+    assert pool.size() == (2, 1)
+    pool.clear()
+    assert pool.size() == (0, 0)
+
+
+def test_connection_handle_drag_moves_items_without_creating():
+    app = _make_app()
+    conn = app.connections[0]
+    app.show_connection_handles(conn)
+    created = _created(app.canvas)
+    handle_ids = set(app.connection_handle_map)
+    assert len(handle_ids) == 4
+
+    for step in range(20):
+        conn.curvature = float(step)
+        app.show_connection_handles(conn)
+    assert _created(app.canvas) == created
+    assert app.canvas.calls["delete"] == 0
+    assert set(app.connection_handle_map) == handle_ids
+
+    # Выбор другой связи переиспользует те же элементы
+    other = app.connections[1]
+    app.show_connection_handles(other)
+    assert _created(app.canvas) == created
+    assert set(app.connection_handle_map) == handle_ids
+    assert all(owner is other for owner in app.connection_handle_map.values())
+    assert app.items.connection(conn).start_handle_id is None
+
+    app.hide_connection_handles()
+    assert app.connection_handle_map == {}
+    assert all(app.canvas.items[hid].options["state"] == "hidden" for hid in handle_ids)
+    assert app.canvas.find_withtag("connection_handle") == ()
+
+
+def test_card_and_frame_handles_cycle_through_fixed_items():
+    app = _make_app()
+    app.show_card_handles(1)
+    app.show_frame_handles(1)
+    created = _created(app.canvas)
+    binds = app.canvas.calls["tag_bind"]
+
+    for _ in range(10):
+        app.hide_card_handles(1)
+        app.show_card_handles(2, include_resize=False)
+        app.hide_card_handles(2, include_resize=False)
+        app.show_card_handles(3)
+        app.hide_card_handles(3)
+        app.show_card_handles(1)
+        app.hide_frame_handles(1)
+        app.show_frame_handles(1)
+    assert _created(app.canvas) == created
+    assert app.canvas.calls["tag_bind"] == binds
+    assert app.canvas.calls["delete"] == 0
+
+    # Теги указывают на текущую карточку: по ним ищет перетаскивание
+    items = app.items.card(1)
+    assert set(app.canvas.find_withtag("connect_handle")) == set(items.connect_handles.values())
+    assert "card_1" in app.canvas.items[items.resize_handle_id].tags
+    assert app.canvas.find_withtag("frame_handle_1") == tuple(
+        hid for hid in app.canvas.order if hid in app.items.frame(1).resize_handles.values()
+    )
+
+def test_deleted_cards_return_their_handles_to_the_pool():
+    app = _make_app()
+    app.cards = CardStore(app.cards)
+    app.show_card_handles(1)
+    handles = {app.items.card(1).resize_handle_id, *app.items.card(1).connect_handles.values()}
+    app.selected_connection = app.context_connection = app.hover_connection = None
+    app.selected_cards = {1}
+    app.attachment_items = {}
+    app.attachment_tk_images = {}
+    app.selected_attachment = None
+    app.push_history = mock.Mock()
+
+    app.delete_selected_cards()
+
+    assert 1 not in app.cards
+    assert app.handle_pool.size() == (len(handles), len(handles))
+    assert set(app.canvas.find_withtag(POOLED_TAG)) == handles
+    # Следующий показ хэндлов не создаёт элементов
+    created = _created(app.canvas)
+    app.show_card_handles(2)
+    assert _created(app.canvas) == created
@@ -0,0 +1,146 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from benchmarks.replay import results_payload
+from src.events import EventBinder, Hotkey, MouseBinding
+from src.input_recorder import InputRecorder, InputReplayer, load_recording
+
+
+class ScrolledCanvas:
+    def __init__(self, dx=0, dy=0):
+        self.dx = dx
+        self.dy = dy
+        self.bindings = {}
+
+    def canvasx(self, x):
+        return x + self.dx
+
+    def canvasy(self, y):
+        return y + self.dy
+
+    def bind(self, sequence, handler):
+        self.bindings[sequence] = handler
+
+
+class StubApp:
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.zoom_factor = 1.0
+        self.board = {"cards": [{"id": 1}], "connections": [], "frames": []}
+        self.calls = []
+        self.hotkeys = {}
+        self.history = SimpleNamespace(clear_and_init=lambda state: self.calls.append(("history", state)))
+        self.root = SimpleNamespace(
+            bind_all=self.hotkeys.__setitem__,
+            update_idletasks=lambda: None,
+            update=lambda: None,
+        )
+
+    def get_board_data(self):
+        return self.board
+
+    def set_board_from_data(self, data):
+        self.board = data
+
+    def current_viewport(self):
+        return {"x": 0.0, "y": 0.0}
+
+    def scroll_to_viewport(self, viewport):
+        self.calls.append(("viewport", viewport))
+
+    def on_canvas_click(self, event):
+        self.calls.append(("click", event.x, event.y))
+
+    def on_mouse_drag(self, event):
+        self.calls.append(("drag", event.x, event.y))
+
+    def start_pan(self, event):
+        self.calls.append(("pan", event.x, event.y))
+
+    def on_undo(self, event=None):
+        self.calls.append(("undo", event.keysym))
+
+    def toggle_input_recording(self, event=None):
+        self.calls.append(("toggle",))
+
+
+BINDINGS = [
+    MouseBinding("<Button-1>", "on_canvas_click"),
+    MouseBinding("<B1-Motion>", "on_mouse_drag"),
+    MouseBinding("<ButtonPress-2>", "start_pan"),
+]
+HOTKEYS = [
+    Hotkey("undo", ("<Control-z>",), "on_undo"),
+    Hotkey("toggle_input_recording", ("<Control-Shift-R>",), "toggle_input_recording"),
+]
+
+
+def record_session(tmp_path):
+    app = StubApp(ScrolledCanvas(dx=100, dy=50))
+    recorder = InputRecorder()
+    EventBinder(BINDINGS, HOTKEYS, recorder=recorder).bind(app)
+    app.canvas.bindings["<Button-1>"](SimpleNamespace(x=5, y=6))
+    recorder.start(app)
+    app.canvas.bindings["<Button-1>"](SimpleNamespace(x=10, y=20, state=4, delta="??"))
+    app.canvas.bindings["<B1-Motion>"](SimpleNamespace(x=15, y=25))
+    app.canvas.bindings["<ButtonPress-2>"](SimpleNamespace(x=1, y=2))
+    app.hotkeys["<Control-z>"](SimpleNamespace(keysym="z", x=0, y=0))
+    app.hotkeys["<Control-Shift-R>"](SimpleNamespace(keysym="R"))
+    recorder.stop()
+    path = tmp_path / "session.json"
+    recorder.save(path)
+    return app, path
+
+
+def test_recorder_captures_dispatched_events_with_canvas_coordinates(tmp_path):
+    app, path = record_session(tmp_path)
+
+    session = load_recording(path)
+    events = session["events"]
+    assert [event["handler"] for event in events] == ["on_canvas_click", "on_mouse_drag", "start_pan", "on_undo"]
+    assert events[0]["sequence"] == "<Button-1>" and events[0]["kind"] == "mouse"
+    assert (events[0]["cx"], events[0]["cy"], events[0]["state"]) == (110, 70, 4)
+    assert "delta" not in events[0]
+    assert events[3]["kind"] == "hotkey" and events[3]["keysym"] == "z" and "cx" not in events[3]
+    assert all(a["t"] <= b["t"] for a, b in zip(events, events[1:]))
+    assert session["board"] == app.board and session["zoom"] == 1.0
+    # Обработчики вызываются и без записи, служебная клавиша в запись не попадает
+    assert app.calls[0] == ("click", 5, 6) and app.calls[-1] == ("toggle",)
+
+
+def test_replayer_restores_board_and_maps_canvas_coordinates(tmp_path):
+    _, path = record_session(tmp_path)
+    session = load_recording(path)
+    app = StubApp(ScrolledCanvas(dx=40, dy=0))
+    app.board = {"cards": [], "connections": [], "frames": []}
+
+    report = InputReplayer(app).replay(session)
+
+    assert app.board == session["board"]
+    assert ("viewport", {"x": 0.0, "y": 0.0}) in app.calls
+    # Точка доски та же, что при записи; панорамирование — в координатах окна
+    assert [call for call in app.calls if call[0] in {"click", "drag", "pan", "undo"}] == [
+        ("click", 70, 70),
+        ("drag", 75, 75),
+        ("pan", 1, 2),
+        ("undo", "z"),
+    ]
+    assert [timing.handler for timing in report.timings] == [event["handler"] for event in session["events"]]
+    summary = report.by_handler()
+    assert summary["on_undo"]["events"] == 1
+    assert "on_canvas_click" in report.format()
+
+    payload = results_payload(session, [report, report], str(path))
+    names = {result["name"] for result in payload["results"]}
+    assert {"replay.on_canvas_click", "replay.on_undo", "replay.wall"} <= names
+    assert all(len(result["times"]) == 2 for result in payload["results"])
+
+
+def test_load_recording_rejects_foreign_files(tmp_path):
+    path = tmp_path / "board.json"
+    path.write_text(json.dumps({"cards": []}), encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        load_recording(path)
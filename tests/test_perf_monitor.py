@@ -0,0 +1,121 @@
+import logging
+import time
+from types import SimpleNamespace
+
+from src.autosave import AutoSaveService
+from src.events import EventBinder, Hotkey, MouseBinding
+from src.history import History
+from src.perf_hud import PerfHud
+from src.perf_monitor import PerfMonitor, budget_from_env, deep_sizeof, percentile
+from src.text_layout import TextLayoutEngine, estimated_metrics
+
+
+def test_percentiles_and_budget_from_env():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.95) == 95
+    assert percentile(values, 0.99) == 99
+    assert percentile([], 0.5) == 0.0
+
+    assert budget_from_env({}) == 16.0
+    assert budget_from_env({"MINI_MIRO_SLOW_MS": "33"}) == 33.0
+    assert budget_from_env({"MINI_MIRO_SLOW_MS": "abc"}) == 16.0
+
+
+def test_slow_handler_is_logged_with_stack_sample(caplog):
+    monitor = PerfMonitor(budget_ms=5)
+
+    def sluggish_handler(event=None):
+        time.sleep(0.05)
+        return "done"
+
+    wrapped = monitor.wrap("on_mouse_drag", sluggish_handler)
+    with caplog.at_level(logging.WARNING, logger="src.perf_monitor"):
+        assert wrapped() == "done"
+        monitor.wrap("on_mouse_move", lambda event=None: None)()
+    monitor.shutdown()
+
+    assert [call.handler for call in monitor.slow_calls] == ["on_mouse_drag"]
+    assert "sluggish_handler" in monitor.slow_calls[0].stack
+    assert "on_mouse_drag" in caplog.text
+    assert set(monitor.handler_latencies) == {"on_mouse_drag", "on_mouse_move"}
+    stats = monitor.snapshot()
+    assert stats["slow_calls"] == 1 and stats["handler_p99_ms"] >= 50
+
+
+def test_event_binder_wraps_handlers_by_name():
+    bound = {}
+
+    class Widget:
+        def bind(self, sequence, handler):
+            bound[sequence] = handler
+
+        bind_all = bind
+
+    calls = []
+    app = SimpleNamespace(canvas=Widget(), root=Widget(), on_drag=lambda e: calls.append(e), on_undo=lambda e: "undo")
+    monitor = PerfMonitor(sample_stacks=False)
+    EventBinder([MouseBinding("<B1-Motion>", "on_drag")], [Hotkey("undo", ("<Control-z>",), "on_undo")], monitor).bind(app)
+
+    bound["<B1-Motion>"]("event")
+    assert bound["<Control-z>"]("key") == "undo"
+    assert calls == ["event"]
+    assert {name: len(values) for name, values in monitor.handler_latencies.items()} == {"on_drag": 1, "on_undo": 1}
+
+
+def test_hud_lines_report_items_history_caches_and_autosave(tmp_path):
+    engine = TextLayoutEngine(estimated_metrics)
+    engine.layout("abc")
+    engine.layout("abc")
+    monitor = PerfMonitor(sample_stacks=False)
+    monitor.register_cache("раскладок текста", engine.cache_stats)
+    monitor.record_frame(4.0, 2.0)
+    history = History()
+    history.clear_and_init({"cards": [{"id": 1, "text": "x" * 1000}]})
+    history.push({"cards": []})
+    autosave = AutoSaveService(filename=tmp_path / "autosave.json")
+    autosave.save({"cards": []})
+    app = SimpleNamespace(
+        perf_monitor=monitor,
+        canvas=SimpleNamespace(find_all=lambda: (1, 2, 3)),
+        history=history,
+        autosave_service=autosave,
+    )
+
+    lines = PerfHud(app).lines()
+
+    assert lines[0].startswith("кадр 4.0 мс")
+    assert "элементов холста: 3" in lines
+    assert lines[3].startswith("история: 1 шагов")
+    assert "кэш раскладок текста: 50%" in lines
+    assert lines[-1].startswith("автосохранение:") and "назад" in lines[-1]
+    assert deep_sizeof(history.initial_state) > 1000
+
+
+def test_hud_samples_history_memory_only_when_history_changes(monkeypatch):
+    sized = []
+    monkeypatch.setattr("src.perf_hud.deep_sizeof", lambda obj: sized.append(obj) or 100)
+    clock = [1000.0]
+    monkeypatch.setattr("src.perf_hud.time.monotonic", lambda: clock[0])
+    history = History()
+    history.clear_and_init({"cards": []})
+    hud = PerfHud(SimpleNamespace(history=history), history_interval_s=2.0)
+
+    assert hud._history_bytes() == 100
+    for _ in range(20):
+        clock[0] += 0.25
+        assert hud._history_bytes() == 100
+    assert len(sized) == 1
+
+    # Старые снимки не пересчитываются
+    history.push({"cards": [{"id": 1}]})
+    assert hud._history_bytes() == 300
+    assert len(sized) == 3
+
+    # Шаг сразу после замера виден только на следующем
+    history.push({"cards": [{"id": 2}]})
+    clock[0] += 0.5
+    assert hud._history_bytes() == 300
+    clock[0] += 2.0
+    assert hud._history_bytes() == 500
+    assert len(sized) == 5
@@ -0,0 +1,101 @@
+import pytest
+
+from src.board_model import BoardData, Card, Connection, Frame
+from src.canvas_view import CanvasView
+from src.config import THEMES
+from src.export import write_canvas_png
+from src.render_backend import NullBackend, RecordingBackend, TkBackend, as_backend
+
+THEME = THEMES["light"]
+
+
+def _board() -> BoardData:
+    cards = {
+        1: Card(id=1, x=100, y=100, width=160, height=100, text="Первая карточка с длинным текстом"),
+        2: Card(id=2, x=400, y=260, width=160, height=100, text="Вторая"),
+    }
+    connections = [Connection(from_id=1, to_id=2, label="связь", style="elbow")]
+    frames = {1: Frame(id=1, x1=0, y1=0, x2=520, y2=360, title="Рамка")}
+    return BoardData(cards=cards, connections=connections, frames=frames)
+
+
+def _render(backend, minimap=None) -> tuple[BoardData, CanvasView]:
+    board = _board()
+    view = CanvasView(backend, minimap, THEME)
+    view.render_board(board.cards, board.frames, board.connections, grid_size=100, show_grid=False)
+    return board, view
+
+
+def test_canvas_objects_are_wrapped_and_backends_pass_through():
+    class FakeCanvas:
+        def create_line(self, *coords, **options):
+            return 1
+
+    backend = RecordingBackend()
+    assert as_backend(backend) is backend
+    assert isinstance(as_backend(FakeCanvas()), TkBackend)
+
+
+def test_render_board_records_items_in_canvas_order():
+    backend = RecordingBackend()
+    board, view = _render(backend)
+    card = board.cards[1]
+    card_items = view.items.card(1)
+    line_id = view.items.connection(board.connections[0]).line_id
+
+    assert backend.find_withtag("card") == tuple(view.items.card(cid).rect_id for cid in board.cards)
+    assert backend.itemcget(line_id, "arrow") == "last"
+    assert backend.coords(line_id) == (180.0, 100.0, 180.0, 260.0, 320.0, 260.0)
+    # Рамка под карточками, скрытая сетка — под всем и не входит в габариты
+    assert backend.order.index(view.items.frame(1).rect_id) < backend.order.index(card_items.rect_id)
+    assert all(backend.itemcget(i, "state") == "hidden" for i in backend.order[: len(backend.find_withtag("grid"))])
+    assert backend.surface["scrollregion"] == backend.bbox("all")
+
+    # Длинный текст переносится по ширине карточки и остаётся внутри неё
+    x1, y1, x2, y2 = backend.bbox(card_items.text_id)
+    assert card.x - card.width / 2 <= x1 and x2 <= card.x + card.width / 2
+    assert y2 - y1 > backend.measure_text("Вторая", font=backend.itemcget(card_items.text_id, "font"))[1]
+
+
+def test_minimap_and_null_backend():
+    minimap = RecordingBackend(width=200, height=150)
+    _render(RecordingBackend(), minimap)
+    assert len(minimap.find_withtag("minimap_card")) == 2
+    assert len(minimap.find_withtag("minimap_frame")) == 1
+    assert minimap.find_withtag("minimap_viewport")
+
+    null = NullBackend()
+    board, view = _render(null)
+    assert null.calls["create_rectangle"] == 2 * len(board.cards) + len(board.frames)
+    assert all(view.items.card(cid).rect_id for cid in board.cards)
+
+
+def test_canvas_png_export_uses_pillow_backend(tmp_path):
+    Image = pytest.importorskip("PIL.Image")
+    board = _board()
+    size = write_canvas_png(board, tmp_path / "board.png", theme=THEME, region=(0, 0, 520, 360))
+
+    assert size == (520, 360)
+    assert not hasattr(board.cards[1], "rect_id")  # id элементов в модели не хранятся
+    with Image.open(tmp_path / "board.png") as img:
+        # Фон рамки вне карточек и цвет карточки под её текстом
+        assert img.getpixel((10, 300)) == Image.new("RGB", (1, 1), THEME["frame_bg"]).getpixel((0, 0))
+        assert img.getpixel((100, 140)) == Image.new("RGB", (1, 1), board.cards[1].color).getpixel((0, 0))
+
+
+def test_canvas_png_export_routes_elbows_around_cards(tmp_path):
+    Image = pytest.importorskip("PIL.Image")
+    board = BoardData(
+        cards={
+            1: Card(id=1, x=0, y=0, width=160, height=90),
+            2: Card(id=2, x=600, y=0, width=160, height=90),
+            3: Card(id=3, x=300, y=0, width=80, height=90),
+        },
+        connections=[Connection(from_id=1, to_id=2, style="elbow")],
+        frames={},
+    )
+    write_canvas_png(board, tmp_path / "board.png", theme=THEME, region=(-100, -100, 700, 100))
+
+    with Image.open(tmp_path / "board.png") as img:
+        # Обход под карточкой 3: горизонтальный отрезок на y=61, как в SVG
+        assert img.getpixel((520, 161)) == Image.new("RGB", (1, 1), THEME["connection"]).getpixel((0, 0))
@@ -11,6 +11,7 @@ from src.board_model import (
 )
 from src.canvas_view import CanvasView
 from src.config import THEMES
+from src.geometry import connection_geometry
 from src.history import History
 
 
@@ -174,13 +175,14 @@ def test_connection_geometry_snapshot_for_curved_path(canvas_view, recording_can
         170.0,
     ]
 
-    line = recording_canvas.items[connection.line_id]
+    items = canvas_view.items.connection(connection)
+    line = recording_canvas.items[items.line_id]
     assert line["kwargs"].get("arrow") == "first"
     assert line["coords"] == pytest.approx(expected_coords)
     assert render_info["midpoint_y"] != render_info["baseline_mid_y"]
 
-    assert connection.label_id is not None
-    label = recording_canvas.items[connection.label_id]
+    assert items.label_id is not None
+    label = recording_canvas.items[items.label_id]
     assert label["coords"][0] == pytest.approx(render_info["midpoint_x"])
     assert label["coords"][1] == pytest.approx(render_info["midpoint_y"])
 
@@ -191,7 +193,7 @@ def test_apply_connection_direction_updates_arrow(recording_canvas, canvas_view)
     connection = Connection(from_id=1, to_id=2)
 
     canvas_view.draw_connection(connection, from_card, to_card)
-    line = recording_canvas.items[connection.line_id]
+    line = recording_canvas.items[canvas_view.items.connection(connection).line_id]
     assert line["kwargs"].get("arrow") == "last"
 
     connection.direction = "start"
@@ -253,3 +255,27 @@ def test_rounded_connection_end_to_end_flow(recording_canvas, canvas_view):
     undo_state = history.undo(DummyApp())
     assert undo_state["connections"][0]["style"] == "rounded"
     assert undo_state["connections"][0]["radius"] == 30
+
+
+def test_connection_geometry_is_cached_until_endpoints_or_style_change(canvas_view):
+    cards = {
+        1: Card(id=1, x=80, y=150, width=120, height=80),
+        2: Card(id=2, x=320, y=170, width=120, height=80),
+    }
+    connection = Connection(from_id=1, to_id=2, style="rounded", radius=40, curvature=30)
+    cache = canvas_view.geometry_cache
+
+    canvas_view.draw_connection(connection, cards[1], cards[2])
+    canvas_view.connection_handle_positions(connection, cards[1], cards[2])
+    canvas_view.update_connection_positions([connection], cards)
+    assert cache.cache_stats() == (2, 1)
+
+    for change in (lambda: setattr(cards[2], "y", 260), lambda: setattr(connection, "radius", 10)):
+        change()
+        coords, info = canvas_view.connection_geometry(connection, cards[1], cards[2])
+        expected_coords, expected_info = connection_geometry(connection, cards[1], cards[2])
+        assert list(coords) == list(expected_coords) and info == expected_info
+    assert cache.cache_stats() == (2, 3)
+
+    cache.discard(connection)
+    assert len(cache) == 0
@@ -27,6 +27,7 @@ class DummyApp:
         self.save_board = _noop
         self.load_board = _noop
         self.export_png = _noop
+        self.export_svg = _noop
         self.attach_image_from_file = _noop
         self.toggle_theme = _noop
         self.on_toggle_show_grid = _noop
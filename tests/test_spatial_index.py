@@ -0,0 +1,206 @@
+import random
+from types import SimpleNamespace
+from unittest import mock
+
+from src.board_model import BOARD_REPLACED, BoardEvents, Card, Connection
+from src.canvas_view import CanvasView
+from src.card_store import CardStore, card_ids_with_center_in
+from src.config import THEMES
+from src.main import BoardApp
+from src.render_backend import RecordingBackend
+from src.selection_controller import SelectionController
+from src.spatial_index import CardIndex, GridIndex, SegmentIndex, point_segment_distance
+
+
+def test_grid_query_matches_brute_force():
+    rng = random.Random(3)
+    grid = GridIndex(cell_size=100)
+    boxes = {}
+    for key in range(300):
+        x, y = rng.uniform(-1000, 1000), rng.uniform(-1000, 1000)
+        boxes[key] = (x, y, x + rng.uniform(0, 400), y + rng.uniform(0, 60))
+        grid.insert(key, boxes[key])
+    for key in range(0, 300, 3):
+        x, y = rng.uniform(-1000, 1000), rng.uniform(-1000, 1000)
+        boxes[key] = (x, y, x + 50, y + 50)
+        grid.insert(key, boxes[key])
+    for key in range(1, 300, 7):
+        grid.remove(key)
+        del boxes[key]
+
+    for area in [(-200, -200, 200, 200), (0, 0, 0, 0), (-5000, -5000, 5000, 5000), (900, -50, 1400, 10)]:
+        x1, y1, x2, y2 = area
+        expected = {k for k, (a, b, c, d) in boxes.items() if a <= x2 and c >= x1 and b <= y2 and d >= y1}
+        assert set(grid.query(*area)) == expected
+    assert len(grid) == len(boxes)
+
+
+def brute_nearest(polylines, x, y, tolerance):
+    best = None
+    for key, coords in polylines.items():
+        for n in range(len(coords) // 2 - 1):
+            distance = point_segment_distance(x, y, *coords[2 * n:2 * n + 4])
+            if distance <= tolerance and (best is None or distance < best[1]):
+                best = (key, distance)
+    return best
+
+
+def test_segment_index_nearest_matches_brute_force():
+    rng = random.Random(11)
+    index = SegmentIndex(cell_size=50)
+    polylines = {}
+    for key in range(200):
+        points = [rng.uniform(-1000, 1000) for _ in range(2)]
+        for _ in range(rng.randint(1, 12)):
+            points += [points[-2] + rng.uniform(-300, 300), points[-1] + rng.choice([0, rng.uniform(-300, 300)])]
+        polylines[key] = tuple(points)
+        index.insert(key, polylines[key])
+    for key in range(0, 200, 4):
+        polylines[key] = tuple(v + 7 for v in polylines[key])
+        index.insert(key, polylines[key])
+    for key in range(1, 200, 9):
+        index.remove(key)
+        del polylines[key]
+
+    assert len(index) == len(polylines)
+    for _ in range(500):
+        x, y = rng.uniform(-1200, 1200), rng.uniform(-1200, 1200)
+        hit = index.nearest(x, y, 25)
+        expected = brute_nearest(polylines, x, y, 25)
+        if expected is None:
+            assert hit is None
+        else:
+            assert hit is not None and abs(hit[1] - expected[1]) < 1e-9
+
+
+def test_canvas_view_hit_tests_connection_lines_with_tolerance():
+    cards = {
+        1: Card(id=1, x=0, y=0, width=100, height=60),
+        2: Card(id=2, x=400, y=0, width=100, height=60),
+        3: Card(id=3, x=0, y=300, width=100, height=60),
+    }
+    connections = [Connection(from_id=1, to_id=2), Connection(from_id=1, to_id=3, style="rounded", radius=40)]
+    view = CanvasView(RecordingBackend(), None, THEMES["light"])
+    view.render_board(cards, {}, connections, grid_size=50, show_grid=False)
+    top, curve = connections
+
+    assert view.connection_at(200, 3) is top
+    assert view.connection_at(200, 30) is None
+    assert view.connection_at(0, 150) is curve
+
+    # Сдвиг карточки переиндексирует только её связь
+    polyline = view.connection_hits.polyline(id(curve))
+    cards[2].y = 200
+    view.update_connection_positions(connections, cards)
+    assert view.connection_hits.polyline(id(curve)) is polyline
+    assert view.connection_at(200, 3) is None and view.connection_at(200, 100) is top
+
+    view.forget_connection(top)
+    assert view.connection_at(200, 100) is None and len(view.connection_hits) == 1
+
+
+class ScalingBackend(RecordingBackend):
+    """Записывающий бэкенд с ``scale`` и координатами окна, как у ``tk.Canvas``."""
+
+    def canvasx(self, x):
+        return x
+
+    canvasy = canvasx
+
+    def scale(self, item, cx, cy, sx, sy):
+        for item_id in self.find_withtag(item):
+            record = self.items[item_id]
+            record.coords = [
+                cx + (v - cx) * sx if n % 2 == 0 else cy + (v - cy) * sy for n, v in enumerate(record.coords)
+            ]
+
+    def config(self, **options):
+        self.configure(**options)
+
+
+def test_zoom_moves_connection_hit_segments_with_lines():
+    app = BoardApp.__new__(BoardApp)
+    app.canvas = ScalingBackend()
+    app.canvas_view = CanvasView(app.canvas, None, THEMES["light"])
+    app.board_events = BoardEvents()
+    app.cards = CardStore(
+        {1: Card(id=1, x=0, y=0, width=100, height=60), 2: Card(id=2, x=400, y=0, width=100, height=60)},
+        events=app.board_events,
+    )
+    app.frames = {}
+    app.connections = [Connection(from_id=1, to_id=2)]
+    app.collapse_controller = mock.Mock(hidden_cards=frozenset())
+    app.collapse_controller.is_hidden.return_value = False
+    app.zoom_factor, app.min_zoom, app.max_zoom = 1.0, 0.3, 2.5
+    app.canvas_view.render_board(app.cards, app.frames, app.connections, grid_size=50, show_grid=False)
+    (conn,) = app.connections
+    assert app.canvas_view.connection_at(600, 0) is None
+
+    app.apply_zoom(2.0, SimpleNamespace(x=0, y=0))
+
+    line_id = app.items.connection(conn).line_id
+    assert app.canvas_view.connection_hits.polyline(id(conn)) == tuple(app.canvas.coords(line_id))
+    assert app.canvas_view.connection_at(600, 3) is conn
+    assert app.canvas_view.connection_at(200, 3) is conn
+
+    app.apply_zoom(0.5, SimpleNamespace(x=0, y=0))
+    assert app.canvas_view.connection_at(600, 3) is None
+
+
+def test_card_index_follows_board_events():
+    events = BoardEvents()
+    board = {"cards": CardStore({i: Card(id=i, x=i * 100, y=0, width=80, height=60) for i in range(1, 21)}, events=events)}
+    index = CardIndex(lambda: board["cards"], events, cell_size=128)
+
+    assert sorted(index.ids_with_center_in(150, -10, 450, 10)) == [2, 3, 4]
+    cards = board["cards"]
+    cards.translate([3], 0, 500)
+    cards[3].width = 1000
+    del cards[4]
+    cards[21] = Card(id=21, x=300, y=0, width=10, height=10)
+    assert sorted(index.ids_with_center_in(150, -10, 450, 10)) == [2, 21]
+    assert sorted(index.ids_at(300, 500)) == [3]
+
+    board["cards"] = CardStore({7: Card(id=7, x=0, y=0, width=10, height=10)}, events=events)
+    events.emit(BOARD_REPLACED)
+    assert index.ids_with_center_in(-1, -1, 1, 1) == [7]
+    assert sorted(index.ids_with_center_in(-5000, -5000, 5000, 5000)) == sorted(
+        card_ids_with_center_in(board["cards"], -5000, -5000, 5000, 5000)
+    )
+
+
+def test_selection_redraws_only_the_difference():
+    app = mock.Mock()
+    app.cards = CardStore({i: Card(id=i, x=i * 10, y=0, width=8, height=8) for i in range(1, 101)})
+    app.card_index = CardIndex(lambda: app.cards)
+    app.collapse_controller.hidden_cards = set()
+    app.selected_cards = set()
+    app.selected_card_id = None
+    app.selected_frame_id = None
+    app.selected_attachment = None
+    controller = SelectionController(app)
+
+    controller.finish_lasso(0, -5, 305, 5)
+    assert app.selected_cards == set(range(1, 31))
+    assert app.canvas_view.set_card_selected.call_count == 30
+
+    app.canvas_view.reset_mock()
+    controller.set_card_selection(range(20, 41), primary=40)
+    calls = app.canvas_view.set_card_selected.call_args_list
+    assert sorted(c.args for c in calls) == sorted(
+        [(cid, False) for cid in range(1, 20)] + [(cid, True) for cid in range(31, 41)]
+    )
+    assert app.selected_card_id == 40
+
+    app.canvas_view.reset_mock()
+    controller.preview_lasso(0, -5, 55, 5)
+    controller.preview_lasso(0, -5, 75, 5)
+    previewed = [c.args for c in app.canvas_view.set_cards_previewed.call_args_list]
+    assert [(set(ids), on) for ids, on in previewed] == [
+        (set(), False),
+        (set(range(1, 6)), True),
+        (set(), False),
+        ({6, 7}, True),
+    ]
+    controller.clear_lasso_preview()
+    assert set(app.canvas_view.set_cards_previewed.call_args.args[0]) == set(range(1, 8))
@@ -0,0 +1,53 @@
+import io
+
+import pytest
+from _tkinter import TclError
+
+from src.startup import StartupProfiler, build_parser
+
+
+def test_profiler_reports_phases_only_when_enabled():
+    profiler = StartupProfiler(enabled=True)
+    with profiler.phase("окно Tk"):
+        pass
+    profiler.mark("первая отрисовка")
+
+    names = [name for name, _, _ in profiler.phases]
+    assert names == ["окно Tk", "первая отрисовка"]
+    assert profiler.phases[0][2] <= profiler.phases[1][2]
+    stream = io.StringIO()
+    profiler.report(stream)
+    assert "первая отрисовка" in stream.getvalue()
+
+    silent = io.StringIO()
+    StartupProfiler().report(silent)
+    assert silent.getvalue() == ""
+
+
+def test_parser_accepts_profile_flag():
+    assert build_parser().parse_args(["--profile-startup"]).profile_startup
+    assert not build_parser().parse_args([]).profile_startup
+
+
+def test_deferred_startup_draws_grid_after_first_paint(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    from src.main import BoardApp
+
+    try:
+        app = BoardApp(deferred_startup=True)
+    except TclError as exc:  # pragma: no cover - environment dependent
+        pytest.skip(f"Tk is not available: {exc}")
+    try:
+        app.root.withdraw()
+        assert app.canvas.find_withtag("grid") == ()
+        assert not app._context_menus_built and app.perf_hud is None
+
+        app._on_first_paint()
+        app._finish_deferred_startup()
+
+        assert app.canvas.find_withtag("grid")
+        assert [name for name, _, _ in app.startup_profiler.phases][-1] == "готово"
+    finally:
+        app.perf_monitor.shutdown()
+        app.attachment_store.shutdown()
+        app.root.destroy()
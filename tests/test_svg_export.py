@@ -0,0 +1,146 @@
+import base64
+from dataclasses import replace
+import xml.etree.ElementTree as ET
+
+from src.board_model import Attachment, BoardData, Card, Connection
+from src.canvas_view import CanvasView
+from src.config import THEMES
+from src.elbow_router import ElbowRouter
+from src.export import write_svg
+from src.render_backend import RecordingBackend
+from src.spatial_index import CardIndex
+from src.text_layout import TextLayoutEngine, estimated_metrics
+
+THEME = THEMES["light"]
+SVG = "{http://www.w3.org/2000/svg}"
+XLINK_HREF = "{http://www.w3.org/1999/xlink}href"
+
+
+def _grid_board(count: int) -> BoardData:
+    cards = {
+        i: Card(id=i, x=(i % 20) * 200.0, y=(i // 20) * 150.0, width=160, height=90, text=f"Карточка {i}")
+        for i in range(1, count + 1)
+    }
+    connections = [Connection(from_id=i, to_id=i + 1, label="дальше") for i in range(1, count)]
+    return BoardData(cards=cards, connections=connections, frames={})
+
+
+def _points(polyline) -> list[float]:
+    return [float(v) for pair in polyline.get("points").split() for v in pair.split(",")]
+
+
+def test_connections_follow_canvas_geometry(tmp_path):
+    cards = {
+        1: Card(id=1, x=0, y=0, width=120, height=80),
+        2: Card(id=2, x=400, y=180, width=120, height=80),
+        3: Card(id=3, x=0, y=420, width=120, height=80),
+    }
+    connections = [
+        Connection(from_id=1, to_id=2, style="rounded", radius=40, curvature=30),
+        Connection(from_id=2, to_id=3, style="elbow", direction="start"),
+        Connection(from_id=3, to_id=1),
+    ]
+    board = BoardData(cards=cards, connections=connections, frames={})
+    path = tmp_path / "board.svg"
+    write_svg(board, path, theme=THEME)
+
+    view = CanvasView(RecordingBackend(), None, THEME)
+    view.elbow_router = ElbowRouter(lambda: cards, lambda: {}, CardIndex(lambda: cards))
+    polylines = ET.parse(path).getroot().findall(f"{SVG}polyline")
+    assert len(polylines) == 3
+    for polyline, conn in zip(polylines, connections):
+        expected, _info = view.connection_geometry(conn, cards[conn.from_id], cards[conn.to_id])
+        actual = _points(polyline)
+        assert len(actual) == len(expected)
+        assert all(abs(a - e) < 0.01 for a, e in zip(actual, expected))
+    assert len(_points(polylines[0])) > 6  # скругление — ломаная из многих точек
+    assert polylines[1].get("marker-start") == "url(#arrow)"
+    assert polylines[2].get("marker-end") == "url(#arrow)"
+
+
+def test_attachments_are_embedded_linked_or_skipped(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    payload = b"\x89PNG fake image bytes"
+    stored = tmp_path / "attachments" / "1-1.png"
+    stored.parent.mkdir()
+    stored.write_bytes(payload)
+    attachment = Attachment(
+        id=1, name="pic.png", source_type="file", mime_type="image/png",
+        width=64, height=32, storage_path="attachments/1-1.png",
+    )
+    card = Card(id=1, x=0, y=0, width=200, height=160, text="Фото", attachments=[attachment])
+    board = BoardData(cards={1: card}, connections=[], frames={})
+    reads = []
+
+    def reader(a):
+        reads.append(a.id)
+        return payload
+
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    write_svg(board, out_dir / "embed.svg", theme=THEME, attachment_reader=reader)
+    image = ET.parse(out_dir / "embed.svg").getroot().find(f"{SVG}image")
+    assert image.get(XLINK_HREF) == "data:image/png;base64," + base64.b64encode(payload).decode()
+    assert float(image.get("width")) == 64 and float(image.get("height")) == 32
+
+    write_svg(board, out_dir / "link.svg", theme=THEME, attachments="link", attachment_reader=reader)
+    image = ET.parse(out_dir / "link.svg").getroot().find(f"{SVG}image")
+    assert image.get(XLINK_HREF) == "../attachments/1-1.png"
+    assert reads == [1]
+
+    write_svg(board, out_dir / "none.svg", theme=THEME, attachments="none", attachment_reader=reader)
+    assert ET.parse(out_dir / "none.svg").getroot().find(f"{SVG}image") is None
+
+
+def test_output_size_grows_linearly(tmp_path):
+    small = tmp_path / "small.svg"
+    large = tmp_path / "large.svg"
+    write_svg(_grid_board(200), small, theme=THEME)
+    write_svg(_grid_board(800), large, theme=THEME)
+
+    ratio = large.stat().st_size / small.stat().st_size
+    assert 3.5 < ratio < 4.5
+
+
+def test_untrusted_colors_and_mime_types_stay_inside_attributes(tmp_path):
+    attachment = Attachment(
+        id=1, name="pic.png", source_type="file", mime_type='image/png" onload="alert(1)',
+        width=64, height=32,
+    )
+    cards = {
+        1: Card(id=1, x=0, y=0, width=200, height=160, color='red" onload="alert(1)', attachments=[attachment]),
+        2: Card(id=2, x=300, y=0, width=160, height=90, color="#a0b1c2"),
+    }
+    theme = dict(THEME, bg="#fff}</style><script>alert(1)</script>")
+    path = tmp_path / "board.svg"
+    write_svg(
+        BoardData(cards=cards, connections=[], frames={}),
+        path,
+        theme=theme,
+        attachment_reader=lambda _a: b"data",
+    )
+
+    text = path.read_text(encoding="utf-8")
+    assert "onload" not in text and "<script" not in text
+    root = ET.parse(path).getroot()
+    fills = [rect.get("fill") for rect in root.iter(f"{SVG}rect") if rect.get("class") == "cd"]
+    assert fills == [THEME["card_default"], "#a0b1c2"]
+    assert root.find(f"{SVG}image").get(XLINK_HREF).startswith("data:application/octet-stream;base64,")
+
+
+def test_text_wraps_with_the_given_engine(tmp_path):
+    card = Card(id=1, x=0, y=0, width=200, height=120, text="одна две три четыре пять шесть")
+    board = BoardData(cards={1: card}, connections=[], frames={})
+    # Широкий шрифт холста переносит строку там, где движок без Tk её не рвёт
+    engine = TextLayoutEngine(lambda key: estimated_metrics(replace(key, size=key.size * 2)))
+
+    def lines(**kwargs):
+        path = tmp_path / "board.svg"
+        write_svg(board, path, theme=THEME, **kwargs)
+        text = ET.parse(path).getroot().find(f"{SVG}text")
+        return [tspan.text for tspan in text.iter(f"{SVG}tspan")]
+
+    wide = lines(text_engine=engine)
+    assert len(wide) > len(lines())
+    assert " ".join(wide) == card.text
+    assert engine.misses > 0
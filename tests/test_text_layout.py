@@ -0,0 +1,88 @@
+import re
+import time
+
+import pytest
+
+from src.board_model import BoardData, Card
+from src.canvas_view import CanvasView
+from src.config import THEMES
+from src.export import write_svg
+from src.render_backend import PillowBackend, RecordingBackend
+from src.text_layout import (
+    TextLayoutEngine,
+    card_layout,
+    estimated_metrics,
+    font_key,
+    headless_engine,
+    responsive_scale,
+)
+
+THEME = THEMES["light"]
+
+
+def _engine() -> TextLayoutEngine:
+    # Оценочные метрики: ширина любого символа одинакова, переносы предсказуемы
+    return TextLayoutEngine(estimated_metrics)
+
+
+def test_font_key_normalizes_tk_font_descriptions():
+    assert font_key(("Arial", 10, "bold")) == font_key("Arial 10 bold")
+    assert font_key(("Arial", -12)).pixel_size == 12
+    assert font_key(("Arial", 9, "italic")).italic
+
+
+def test_wraps_on_spaces_and_keeps_paragraphs():
+    engine = _engine()
+    char = engine.metrics(("Arial", 10)).char_width("a")
+
+    block = engine.layout("aaa bbb ccc\ndd", font=("Arial", 10), width=char * 7.5)
+
+    assert block.lines == ("aaa bbb", "ccc", "dd")
+    assert block.width == pytest.approx(char * 7)
+    assert block.height == 3 * block.line_height
+    assert engine.layout("aaa bbb ccc\ndd", font=("Arial", 10), width=char * 7.5) is block
+
+
+def test_long_word_is_broken_by_characters():
+    engine = _engine()
+    char = engine.metrics(("Arial", 10)).char_width("a")
+
+    block = engine.layout("x " + "a" * 10, font=("Arial", 10), width=char * 4)
+
+    assert block.lines == ("x", "aaaa", "aaaa", "aa")
+    assert all(engine.metrics(("Arial", 10)).width(line) <= char * 4 for line in block.lines)
+
+
+def _card() -> Card:
+    return Card(id=1, x=200, y=150, width=180, height=120, text="Очень длинный текст карточки, который переносится")
+
+
+def test_canvas_pillow_and_export_break_lines_identically(tmp_path):
+    card = _card()
+    expected = card_layout(card, headless_engine().layout, scale=responsive_scale(card.width))["block"].lines
+    assert len(expected) > 1
+
+    for backend in (RecordingBackend(), PillowBackend()):
+        card = _card()
+        view = CanvasView(backend, None, THEME)
+        view.draw_card(card)
+        assert backend.itemcget(view.items.card(card.id).text_id, "text") == "\n".join(expected)
+
+    write_svg(BoardData(cards={1: _card()}, connections=[], frames={}), tmp_path / "card.svg", theme=THEME)
+    svg = (tmp_path / "card.svg").read_text(encoding="utf-8")
+    assert tuple(re.findall(r"<tspan[^>]*>([^<]*)</tspan>", svg)) == expected
+
+
+def test_ten_thousand_cards_lay_out_under_a_second():
+    engine = headless_engine()
+    cards = [
+        Card(id=i, x=0, y=0, width=120 + i % 200, height=100, text=f"Карточка {i}: задача номер {i * 7} из плана")
+        for i in range(10_000)
+    ]
+
+    started = time.perf_counter()
+    for card in cards:
+        card_layout(card, engine.layout)
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 1.0
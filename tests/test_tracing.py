@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+from src import tracing
+from src.board_model import Card, Connection
+from src.autosave import AutoSaveService
+from src.canvas_view import CanvasView
+from src.config import THEMES
+from src.render_backend import RecordingBackend
+from src.tracing import Tracer, trace_path_from_env, traced
+
+
+@pytest.fixture
+def tracer():
+    tracing.tracer.clear()
+    tracing.tracer.enable()
+    yield tracing.tracer
+    tracing.tracer.disable()
+    tracing.tracer.clear()
+
+
+def test_disabled_tracer_records_nothing():
+    local = Tracer()
+
+    with local.span("idle", size=1) as span:
+        local.count("hits")
+
+    assert span is tracing._NULL_SPAN
+    assert local.trace_events() == [] and local.summary() == [] and local.counters == {}
+
+
+def test_spans_counters_and_chrome_trace(tracer, tmp_path):
+    @traced("work.step")
+    def step(value):
+        return value * 2
+
+    with tracing.span("work.batch", items=3):
+        results = [step(i) for i in range(3)]
+        tracing.count("work.items", 3)
+
+    assert results == [0, 2, 4]
+    summary = {row.name: row for row in tracer.summary()}
+    assert summary["work.step"].calls == 3
+    assert summary["work.batch"].total_ns >= summary["work.step"].total_ns
+    assert tracer.counters == {"work.items": 3}
+
+    tracer.write_trace(tmp_path / "trace.json")
+    events = json.loads((tmp_path / "trace.json").read_text(encoding="utf-8"))["traceEvents"]
+    batch = next(e for e in events if e["name"] == "work.batch")
+    assert batch["ph"] == "X" and batch["cat"] == "work" and batch["args"] == {"items": 3}
+    assert all(batch["ts"] <= e["ts"] for e in events if e["name"] == "work.step")
+    assert [e["args"]["value"] for e in events if e["ph"] == "C"] == [3]
+    assert "work.step" in tracer.format_summary()
+
+
+def test_event_limit_keeps_summary():
+    local = Tracer(max_events=2)
+    local.enable()
+    for _ in range(5):
+        with local.span("tick"):
+            pass
+
+    assert len(local.trace_events()) == 2
+    assert local.dropped == 3
+    assert local.summary()[0].calls == 5
+
+
+def test_hot_paths_are_instrumented(tracer, tmp_path):
+    cards = {1: Card(id=1, x=0, y=0, width=120, height=80, text="a"), 2: Card(id=2, x=300, y=0, width=120, height=80)}
+    view = CanvasView(RecordingBackend(), RecordingBackend(200, 150), THEMES["light"])
+    view.render_board(cards, {}, [Connection(from_id=1, to_id=2)], 50, True)
+    AutoSaveService(filename=tmp_path / "autosave.json").save({"cards": []})
+
+    calls = {row.name: row.calls for row in tracer.summary()}
+    assert calls["canvas.render_board"] == 1
+    assert calls["canvas.compute_card_layout"] == 2
+    assert calls["canvas.render_minimap"] == 1
+    assert calls["autosave.save"] == 1
+    assert tracer.counters["canvas.cards_drawn"] == 2
+    assert tracer.counters["autosave.bytes"] > 0
+
+
+def test_trace_path_from_env():
+    assert trace_path_from_env({}) is None
+    assert trace_path_from_env({"MINI_MIRO_TRACE": "0"}) is None
+    assert trace_path_from_env({"MINI_MIRO_TRACE": "1"}) == "trace.json"
+    assert trace_path_from_env({"MINI_MIRO_TRACE": "/tmp/board.trace.json"}) == "/tmp/board.trace.json"